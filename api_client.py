@@ -0,0 +1,328 @@
+"""
+HTTP/JSON API Client Transport
+==============================
+
+Transport του desktop client προς το api_server, με τα ΙΔΙΑ ονόματα και
+ορίσματα συναρτήσεων με το database_refactored - ο κώδικας που το
+χρησιμοποιεί δεν χρειάζεται να ξέρει αν μιλάει με sqlite3 ή με server.
+
+Features:
+---------
+- Keep-alive σύνδεση (http.client) ανά thread
+- ETag cache: κάθε GET στέλνει If-None-Match, στο 304 επιστρέφεται το
+  αποθηκευμένο αποτέλεσμα χωρίς μεταφορά/αποκωδικοποίηση σώματος
+- iter_tasks(): keyset pagination με generator (σταθερή μνήμη)
+- Οι υπόλοιπες συναρτήσεις των οθονών (api_server.REMOTE_READS /
+  REMOTE_WRITES) μέσω /api/call/<όνομα>, με τα ίδια ορίσματα
+- Σφάλματα του server → ίδιες εξαιρέσεις με το database_refactored
+  (400 → ValidationError, 409 → ConflictError, άλλα → DatabaseError),
+  διαθέσιμες και ως db.ValidationError / db.ConflictError
+- `db`: το transport της εφαρμογής, επιλεγμένο ΜΙΑ φορά στην εκκίνηση
+  (init_transport) - χωρίς init_transport, απευθείας sqlite3
+
+Usage:
+------
+    import api_client
+
+    api_client.init_transport()              # main.py: server_url/api_token από settings.json
+    from api_client import db                # οθόνες
+    units = db.get_all_units()
+
+    remote = api_client.RemoteDatabase("http://10.0.0.5:8765", token="...")
+    for task in remote.iter_tasks(status="pending"):
+        ...
+"""
+
+import functools
+import http.client
+import json
+import os
+import threading
+from urllib.parse import urlsplit, urlencode
+
+import api_server
+import database_refactored as database
+import logger_config
+from config import AppConfig
+
+logger = logger_config.get_logger(__name__)
+
+DEFAULT_TIMEOUT = 10.0
+DEFAULT_PAGE_SIZE = 200
+
+
+class RemoteDatabase:
+    """Υποσύνολο του API του database_refactored πάνω από HTTP"""
+
+    ValidationError = database.ValidationError
+    ConflictError = database.ConflictError
+    DatabaseError = database.DatabaseError
+
+    def __init__(self, base_url, timeout=DEFAULT_TIMEOUT, token=None):
+        url = urlsplit(base_url)
+        if url.scheme != "http" or not url.hostname:
+            raise database.ValidationError(f"Μη έγκυρο URL server: {base_url}")
+        self.base_url = base_url
+        self.host = url.hostname
+        self.port = url.port or 80
+        self.timeout = timeout
+        self.token = token
+
+        self._local = threading.local()
+        self._etag_cache = {}            # path → (etag, payload)
+        self._cache_lock = threading.Lock()
+        self.stats = {'requests': 0, 'not_modified': 0}
+
+    # ─────────────────────────────────────────────────────────────────────
+    # HTTP
+    # ─────────────────────────────────────────────────────────────────────
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            self._local.conn = conn
+        return conn
+
+    def _request(self, method, path, params=None, body=None):
+        if params:
+            query = urlencode({k: v for k, v in params.items() if v not in (None, "")})
+            if query:
+                path = f"{path}?{query}"
+
+        headers = {"Accept": "application/json"}
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        payload = None
+        if body is not None:
+            payload = json.dumps(body, ensure_ascii=False, default=str).encode("utf-8")
+            headers["Content-Type"] = "application/json; charset=utf-8"
+
+        cached = None
+        if method == "GET":
+            with self._cache_lock:
+                cached = self._etag_cache.get(path)
+            if cached:
+                headers["If-None-Match"] = cached[0]
+
+        # Μία επανάληψη αν ο server έκλεισε την keep-alive σύνδεση
+        for attempt in (1, 2):
+            conn = self._connection()
+            try:
+                conn.request(method, path, body=payload, headers=headers)
+                response = conn.getresponse()
+                data = response.read()
+                break
+            except (http.client.HTTPException, ConnectionError, OSError):
+                conn.close()
+                self._local.conn = None
+                if attempt == 2:
+                    raise
+
+        self.stats['requests'] += 1
+        if response.status == 304 and cached:
+            self.stats['not_modified'] += 1
+            return cached[1]
+
+        result = json.loads(data.decode("utf-8")) if data else None
+        if response.status >= 400:
+            self._raise(response.status, result or {})
+
+        etag = response.getheader("ETag")
+        if method == "GET" and etag:
+            with self._cache_lock:
+                self._etag_cache[path] = (etag, result)
+        return result
+
+    @staticmethod
+    def _raise(status, error):
+        message = error.get('error', f"HTTP {status}")
+        if status == 409:
+            raise database.ConflictError(error.get('table'), error.get('record_id'),
+                                         error.get('conflicts', {}), error.get('current', {}))
+        if status in (400, 401, 404):
+            raise database.ValidationError(message)
+        raise database.DatabaseError(message)
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def _call(self, method, name, *args, **kwargs):
+        """Συνάρτηση του database_refactored στον server (/api/call/<όνομα>)"""
+        if method == "GET":
+            result = self._request("GET", f"/api/call/{name}", params={
+                'args': json.dumps(args, ensure_ascii=False) if args else None,
+                'kwargs': json.dumps(kwargs, ensure_ascii=False) if kwargs else None,
+            })
+        else:
+            result = self._request("POST", f"/api/call/{name}", body={'args': list(args), 'kwargs': kwargs})
+        return result['result']
+
+    def __getattr__(self, name):
+        # Ό,τι δεν έχει δικό του endpoint: μόνο οι συναρτήσεις της λίστας του server
+        if name in api_server.REMOTE_READS:
+            return functools.partial(self._call, "GET", name)
+        if name in api_server.REMOTE_WRITES:
+            return functools.partial(self._call, "POST", name)
+        raise AttributeError(f"Το {name} δεν είναι διαθέσιμο μέσω του API server")
+
+    def data_version(self):
+        """Έκδοση δεδομένων του server (ίδια τιμή = καμία αλλαγή από τότε)"""
+        return self._request("GET", "/api/version")['version']
+
+    # ─────────────────────────────────────────────────────────────────────
+    # Reads
+    # ─────────────────────────────────────────────────────────────────────
+
+    def get_all_groups(self):
+        return self._request("GET", "/api/groups")
+
+    def get_all_units(self):
+        return self._request("GET", "/api/units")
+
+    def get_all_task_types(self):
+        return self._request("GET", "/api/task_types")
+
+    def get_dashboard_stats(self):
+        return self._request("GET", "/api/dashboard")
+
+    def get_deleted_tasks(self):
+        return self._request("GET", "/api/deleted_tasks")
+
+    def get_location_subtree_ids(self, location_ids):
+        return set(self._call("GET", "get_location_subtree_ids", sorted(location_ids)))
+
+    def get_dashboard_counters(self):
+        counters = self._call("GET", "get_dashboard_counters")
+        # Κλειδιά JSON = strings - τα group_id ξανά int
+        counters['pending_by_group'] = {int(k): v for k, v in counters['pending_by_group'].items()}
+        return counters
+
+    def get_task_by_id(self, task_id):
+        try:
+            return self._request("GET", f"/api/tasks/{int(task_id)}")
+        except database.ValidationError:
+            return None
+
+    def filter_tasks_page(self, status=None, unit_id=None, task_type_id=None, date_from=None,
+                          date_to=None, search_text=None, cursor=None, limit=DEFAULT_PAGE_SIZE,
+                          location_ids=None):
+        """Μία σελίδα → (tasks, next_cursor)"""
+        page = self._request("GET", "/api/tasks", params={
+            'status': status, 'unit_id': unit_id, 'task_type_id': task_type_id,
+            'date_from': date_from, 'date_to': date_to, 'search': search_text,
+            'location_ids': ",".join(str(i) for i in sorted(location_ids)) if location_ids else None,
+            'cursor': cursor, 'limit': limit,
+        })
+        return page['items'], page['next_cursor']
+
+    def iter_tasks(self, page_size=DEFAULT_PAGE_SIZE, **filters):
+        """Όλες οι εργασίες του φίλτρου, σελίδα-σελίδα"""
+        cursor = None
+        while True:
+            tasks, cursor = self.filter_tasks_page(cursor=cursor, limit=page_size, **filters)
+            yield from tasks
+            if cursor is None:
+                return
+
+    def filter_tasks(self, status=None, unit_id=None, task_type_id=None, date_from=None, date_to=None,
+                     search_text=None, location_ids=None):
+        return list(self.iter_tasks(status=status, unit_id=unit_id, task_type_id=task_type_id,
+                                    date_from=date_from, date_to=date_to, search_text=search_text,
+                                    location_ids=location_ids))
+
+    # ─────────────────────────────────────────────────────────────────────
+    # Writes
+    # ─────────────────────────────────────────────────────────────────────
+
+    def add_task(self, unit_id, task_type_id, description, status, priority, created_date,
+                 completed_date=None, technician_name=None, notes=None, task_item_id=None, location=None):
+        result = self._request("POST", "/api/tasks", body={
+            'unit_id': unit_id, 'task_type_id': task_type_id, 'description': description,
+            'status': status, 'priority': priority, 'created_date': created_date,
+            'completed_date': completed_date, 'technician_name': technician_name, 'notes': notes,
+            'task_item_id': task_item_id, 'location': location,
+        })
+        return result['id']
+
+    def update_task(self, task_id, unit_id, task_type_id, description, status, priority,
+                    created_date, completed_date, technician_name, notes, task_item_id=None, location=None,
+                    base=None):
+        result = self._request("PUT", f"/api/tasks/{int(task_id)}", body={
+            'unit_id': unit_id, 'task_type_id': task_type_id, 'description': description,
+            'status': status, 'priority': priority, 'created_date': created_date,
+            'completed_date': completed_date, 'technician_name': technician_name, 'notes': notes,
+            'task_item_id': task_item_id, 'location': location, 'base': base,
+        })
+        return result['row_version']
+
+    def delete_task(self, task_id):
+        self._request("DELETE", f"/api/tasks/{int(task_id)}")
+        return True
+
+    def restore_task(self, task_id):
+        self._request("POST", f"/api/tasks/{int(task_id)}/restore")
+        return True
+
+    def update_unit(self, unit_id, name, group_id, location, model, notes, installation_date, base=None):
+        result = self._request("PUT", f"/api/units/{int(unit_id)}", body={
+            'name': name, 'group_id': group_id, 'location': location, 'model': model,
+            'notes': notes, 'installation_date': installation_date, 'base': base,
+        })
+        return result['row_version']
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# TRANSPORT SELECTION
+# ═══════════════════════════════════════════════════════════════════════════
+
+def get_transport(settings_file=AppConfig.SETTINGS_FILE):
+    """
+    "server_url" (και "api_token") στο settings.json → RemoteDatabase,
+    αλλιώς το ίδιο το database_refactored (απευθείας sqlite3).
+    """
+    settings = {}
+    if os.path.exists(settings_file):
+        try:
+            with open(settings_file, "r", encoding="utf-8") as f:
+                settings = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"⚠️  Could not read {settings_file}: {e}")
+
+    server_url = settings.get("server_url")
+    if server_url:
+        logger.info(f"Using API server at {server_url}")
+        return RemoteDatabase(server_url, token=settings.get("api_token"))
+    return database
+
+
+_transport = None
+
+
+def init_transport(settings_file=AppConfig.SETTINGS_FILE):
+    """Επιλογή transport της εφαρμογής (μία φορά, στην εκκίνηση)"""
+    global _transport
+    _transport = get_transport(settings_file)
+    return _transport
+
+
+def current_transport():
+    """Το transport του init_transport - χωρίς αυτό, το database_refactored"""
+    return database if _transport is None else _transport
+
+
+def is_remote() -> bool:
+    return isinstance(current_transport(), RemoteDatabase)
+
+
+class _Transport:
+    """Πρόσβαση στο τρέχον transport (db.get_all_units(), db.ConflictError, ...)"""
+
+    def __getattr__(self, name):
+        return getattr(current_transport(), name)
+
+
+db = _Transport()
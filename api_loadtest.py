@@ -0,0 +1,145 @@
+"""
+API Load Test
+=============
+
+Ταυτόχρονοι clients προς το api_server στο localhost.
+
+Features:
+---------
+- Ξεκινά δικό του server σε ελεύθερη θύρα (ή χρησιμοποιεί --url)
+- N client threads, το καθένα με δικό του RemoteDatabase (keep-alive)
+- Μίγμα αιτημάτων: σελίδες εργασιών (keyset), λεπτομέρειες εργασίας,
+  dashboard, λίστα μονάδων - προαιρετικά και ενημερώσεις (--write-ratio)
+- Αναφορά: requests/s, latency p50/p95/p99, ποσοστό 304 (ETag hits)
+
+Usage:
+------
+    python api_loadtest.py --clients 16 --seconds 10
+    python api_loadtest.py --url http://10.0.0.5:8765 --token ... --write-ratio 0.05
+"""
+
+import argparse
+import random
+import threading
+import time
+
+import api_client
+import api_server
+import database_refactored as database
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def _client_loop(url, deadline, write_ratio, seed, results, token=None):
+    rng = random.Random(seed)
+    client = api_client.RemoteDatabase(url, token=token)
+    latencies, errors = [], 0
+
+    # Λίγα IDs για τις λεπτομέρειες / ενημερώσεις
+    tasks, _ = client.filter_tasks_page(limit=50)
+    task_ids = [t['id'] for t in tasks]
+
+    while time.perf_counter() < deadline:
+        op = rng.random()
+        started = time.perf_counter()
+        try:
+            if op < write_ratio and task_ids:
+                task = client.get_task_by_id(rng.choice(task_ids))
+                if task:
+                    client.update_task(
+                        task['id'], task['unit_id'], task['task_type_id'], task['description'],
+                        task['status'], task['priority'], task['created_date'], task['completed_date'],
+                        task['technician_name'], task['notes'], task['task_item_id'], task['location'],
+                        base=task)
+            elif op < 0.5:
+                cursor = None
+                for _ in range(rng.randint(1, 3)):
+                    _, cursor = client.filter_tasks_page(cursor=cursor, limit=100)
+                    if cursor is None:
+                        break
+            elif op < 0.75 and task_ids:
+                client.get_task_by_id(rng.choice(task_ids))
+            elif op < 0.9:
+                client.get_dashboard_stats()
+            else:
+                client.get_all_units()
+        except database.ConflictError:
+            pass
+        except Exception:
+            errors += 1
+        latencies.append(time.perf_counter() - started)
+
+    client.close()
+    results.append((latencies, errors, client.stats['requests'], client.stats['not_modified']))
+
+
+def run_load_test(url=None, clients=8, seconds=5.0, write_ratio=0.0, pool_size=api_server.DEFAULT_POOL_SIZE,
+                  token=None):
+    """
+    Returns:
+        dict: operations, requests, req_per_sec, p50_ms, p95_ms, p99_ms, errors, etag_hit_pct
+    """
+    server = None
+    if url is None:
+        server = api_server.start_in_thread(port=0, pool_size=pool_size)
+        url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    try:
+        results = []
+        deadline = time.perf_counter() + seconds
+        threads = [
+            threading.Thread(target=_client_loop, args=(url, deadline, write_ratio, seed, results, token))
+            for seed in range(clients)
+        ]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+    finally:
+        if server is not None:
+            api_server.stop_server(server)
+
+    latencies = sorted(l for result in results for l in result[0])
+    requests = sum(result[2] for result in results)
+    not_modified = sum(result[3] for result in results)
+    return {
+        'clients': clients,
+        'operations': len(latencies),
+        'requests': requests,
+        'req_per_sec': round(requests / elapsed),
+        'p50_ms': round(_percentile(latencies, 50) * 1000, 2),
+        'p95_ms': round(_percentile(latencies, 95) * 1000, 2),
+        'p99_ms': round(_percentile(latencies, 99) * 1000, 2),
+        'errors': sum(result[1] for result in results),
+        'etag_hit_pct': round(100 * not_modified / requests, 1) if requests else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test για το HVACR API server")
+    parser.add_argument("--url", default=None, help="Υπάρχων server (προεπιλογή: τοπικός σε ελεύθερη θύρα)")
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--write-ratio", type=float, default=0.0,
+                        help="Ποσοστό ενημερώσεων (0-1) - ΓΡΑΦΕΙ στη database")
+    parser.add_argument("--pool-size", type=int, default=api_server.DEFAULT_POOL_SIZE)
+    parser.add_argument("--token", default=None, help="Token του server (με --url)")
+    args = parser.parse_args()
+
+    if args.url is None:
+        database.init_database()
+
+    report = run_load_test(args.url, args.clients, args.seconds, args.write_ratio, args.pool_size, args.token)
+    for key, value in report.items():
+        print(f"{key:>14}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,539 @@
+"""
+HTTP/JSON API Server
+====================
+
+Προαιρετικό server mode: ΜΙΑ διεργασία ανοίγει το SQLite αρχείο και οι
+υπόλοιποι σταθμοί (γραφείο, συνεργείο, tablet) μιλούν μαζί της μέσω HTTP -
+χωρίς αντιγραφές του αρχείου και χωρίς κοινόχρηστο δίσκο.
+
+Features:
+---------
+- Μόνο stdlib (http.server.ThreadingHTTPServer, HTTP/1.1 keep-alive)
+- Connection pool για ΟΛΕΣ τις αναγνώσεις (read-only συνδέσεις, query_only)
+- Κοινό token (Authorization: Bearer ...) σε κάθε endpoint εκτός από το
+  /api/health - υποχρεωτικό όταν ο server ακούει εκτός loopback
+- Keyset pagination στη λίστα εργασιών (opaque cursor, χωρίς OFFSET)
+- ETag / If-None-Match σε κάθε GET → 304 χωρίς σώμα αν δεν άλλαξε κάτι
+- Εγγραφές μέσω των συναρτήσεων του database_refactored (ίδιοι κανόνες,
+  ίδια triggers), με ConflictError → 409 και field-level diff
+- Οι εγγραφές όλων των threads περνούν από ΕΝΑΝ writer (write_service):
+  ταυτόχρονα αιτήματα γίνονται commit μαζί (group commit), το καθένα
+  σε δικό του SAVEPOINT
+- /api/call/<όνομα>: οι υπόλοιπες συναρτήσεις που καλούν οι οθόνες του
+  desktop (REMOTE_READS / REMOTE_WRITES - μόνο αυτές), με τα ίδια ορίσματα
+- /api/version: αλλάζει σε κάθε commit (PRAGMA data_version) - τα caches
+  των clients (query_cache) ξέρουν πότε να αδειάσουν
+
+Endpoints:
+----------
+    GET    /api/health
+    GET    /api/version
+    GET    /api/groups | /api/units | /api/task_types | /api/dashboard
+    GET    /api/tasks?status=&unit_id=&task_type_id=&date_from=&date_to=&search=&location_ids=1,2&limit=&cursor=
+    GET    /api/tasks/<id>
+    GET    /api/deleted_tasks
+    POST   /api/tasks                  (σώμα: πεδία του add_task)
+    PUT    /api/tasks/<id>             (σώμα: πεδία του update_task + "base")
+    DELETE /api/tasks/<id>
+    POST   /api/tasks/<id>/restore
+    PUT    /api/units/<id>             (σώμα: πεδία του update_unit + "base")
+    GET    /api/call/<όνομα>?args=[...]&kwargs={...}   (REMOTE_READS, JSON ορίσματα)
+    POST   /api/call/<όνομα>           (REMOTE_WRITES, σώμα: {"args": [...], "kwargs": {...}})
+
+    Στα PUT τα πεδία που λείπουν από το σώμα κρατούν την τρέχουσα τιμή τους.
+
+Usage:
+------
+    python api_server.py --host 0.0.0.0 --port 8765 --token-file api_token.txt
+
+    import api_server
+    server = api_server.start_in_thread(port=0)   # tests / load test
+"""
+
+import argparse
+import base64
+import hashlib
+import hmac
+import json
+import queue
+import re
+import secrets
+import sqlite3
+import threading
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+import dashboard_service
+import database_refactored as database
+import logger_config
+import write_service
+
+logger = logger_config.get_logger(__name__)
+
+DEFAULT_HOST = "127.0.0.1"
+LOOPBACK_HOSTS = ("127.0.0.1", "localhost", "::1")
+DEFAULT_PORT = 8765
+DEFAULT_POOL_SIZE = 4
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# CONNECTION POOL
+# ═══════════════════════════════════════════════════════════════════════════
+
+class ConnectionPool:
+    """
+    Σταθερός αριθμός read-only συνδέσεων, μοιρασμένων ανάμεσα στα threads
+    του server. Ο αριθμός τους είναι και το όριο ταυτόχρονων αναγνώσεων.
+    """
+
+    def __init__(self, db_path=None, size=DEFAULT_POOL_SIZE):
+        self.db_path = db_path or database.DB_NAME
+        self._idle = queue.Queue()
+        for _ in range(size):
+            self._idle.put(self._connect())
+        # Μόνιμη σύνδεση για το data_version (η τιμή συγκρίνεται μόνο
+        # μέσα στην ίδια σύνδεση)
+        self._watch = self._connect()
+        self._watch_lock = threading.Lock()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=database.BUSY_TIMEOUT_MS / 1000,
+                               check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute(f"PRAGMA busy_timeout = {database.BUSY_TIMEOUT_MS}")
+        conn.execute("PRAGMA query_only = ON")
+        return conn
+
+    @contextmanager
+    def connection(self):
+        conn = self._idle.get()
+        try:
+            yield conn
+        finally:
+            # Καμία ανοιχτή read transaction δεν μένει πίσω στο pool
+            if conn.in_transaction:
+                conn.rollback()
+            self._idle.put(conn)
+
+    def data_version(self):
+        """PRAGMA data_version - αλλάζει σε κάθε commit άλλης σύνδεσης (writer κ.λπ.)"""
+        with self._watch_lock:
+            return self._watch.execute("PRAGMA data_version").fetchone()[0]
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+        self._watch.close()
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# CURSORS / ETAGS
+# ═══════════════════════════════════════════════════════════════════════════
+
+def encode_cursor(after):
+    """Κλειδί keyset → opaque string για το URL"""
+    if after is None:
+        return None
+    raw = json.dumps(list(after), ensure_ascii=False).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_cursor(token):
+    if not token:
+        return None
+    try:
+        created_date, created_at, task_id = json.loads(base64.urlsafe_b64decode(token.encode("ascii")))
+        return created_date, created_at, int(task_id)
+    except (ValueError, TypeError):
+        raise database.ValidationError("Μη έγκυρο cursor σελιδοποίησης")
+
+
+def compute_etag(body: bytes) -> str:
+    return '"' + hashlib.sha1(body).hexdigest() + '"'
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# REQUEST HANDLER
+# ═══════════════════════════════════════════════════════════════════════════
+
+class _NotFound(Exception):
+    pass
+
+
+class _Unauthorized(Exception):
+    pass
+
+
+_TASK_FIELDS = ('unit_id', 'task_type_id', 'description', 'status', 'priority', 'created_date',
+                'completed_date', 'technician_name', 'notes', 'task_item_id', 'location')
+_UNIT_FIELDS = ('name', 'group_id', 'location', 'model', 'notes', 'installation_date')
+
+# /api/call/<όνομα>: ό,τι άλλο χρειάζονται οι οθόνες εργασιών/μονάδων.
+# Όλες δέχονται conn - οι αναγνώσεις τρέχουν στο pool, οι εγγραφές στον writer.
+REMOTE_READS = {fn.__name__: fn for fn in (
+    database.get_recent_tasks,
+    database.get_all_tasks,
+    database.get_related_tasks,
+    database.get_units_by_group,
+    database.get_unit_by_id,
+    database.get_deleted_units,
+    database.get_deleted_groups,
+    database.get_task_items_by_type,
+    database.get_all_locations,
+    database.get_location_subtree_ids,
+    dashboard_service.get_dashboard_counters,
+    dashboard_service.get_pending_tasks,
+)}
+REMOTE_WRITES = {fn.__name__: fn for fn in (
+    database.sync_chain_status,
+    database.add_unit,
+    database.soft_delete_unit,
+    database.restore_unit,
+    database.permanent_delete_unit,
+    database.add_group,
+    database.update_group,
+    database.soft_delete_group,
+    database.permanent_delete_group,
+)}
+
+
+def _fields(body, names, required=()):
+    missing = [name for name in required if name not in body]
+    if missing:
+        raise database.ValidationError(f"Λείπουν πεδία: {', '.join(missing)}")
+    return [body.get(name) for name in names]
+
+
+def _call_arguments(args, kwargs):
+    if not isinstance(args, list) or not isinstance(kwargs, dict) or 'conn' in kwargs:
+        raise database.ValidationError("Μη έγκυρα ορίσματα κλήσης")
+    return args, kwargs
+
+
+def _jsonable(result):
+    # Τα set (π.χ. get_location_subtree_ids) → ταξινομημένη λίστα
+    return sorted(result) if isinstance(result, (set, frozenset)) else result
+
+
+def _update_merged(table, names, update, record_id, body, conn):
+    """
+    PUT με μέρος των πεδίων: όσα λείπουν από το σώμα παίρνουν την τρέχουσα
+    τιμή της εγγραφής (διαβασμένη στο ίδιο transaction με την ενημέρωση)
+    """
+    current = conn.execute(f"SELECT * FROM {table} WHERE id = ?", (record_id,)).fetchone()
+    if current is None:
+        raise _NotFound(f"{table} {record_id}")
+    values = [body[name] if name in body else current[name] for name in names]
+    return update(record_id, *values, base=body.get('base'), conn=conn)
+
+
+class ApiRequestHandler(BaseHTTPRequestHandler):
+    """Δρομολόγηση /api/... → database_refactored"""
+
+    protocol_version = "HTTP/1.1"
+    server_version = "HVACR-API/1.0"
+    # Headers και σώμα γράφονται χωριστά - χωρίς TCP_NODELAY ο Nagle
+    # συνδυάζεται με το delayed ACK του client (~40ms ανά απάντηση)
+    disable_nagle_algorithm = True
+
+    # Ορίζονται από το make_server
+    pool: ConnectionPool = None
+    writer: write_service.WriteService = None
+    token: str = None
+    instance: str = None
+
+    ROUTES = [
+        ("GET", re.compile(r"^/api/health$"), "_get_health"),
+        ("GET", re.compile(r"^/api/version$"), "_get_version"),
+        ("GET", re.compile(r"^/api/groups$"), "_get_groups"),
+        ("GET", re.compile(r"^/api/units$"), "_get_units"),
+        ("GET", re.compile(r"^/api/task_types$"), "_get_task_types"),
+        ("GET", re.compile(r"^/api/dashboard$"), "_get_dashboard"),
+        ("GET", re.compile(r"^/api/tasks$"), "_get_tasks"),
+        ("GET", re.compile(r"^/api/tasks/(\d+)$"), "_get_task"),
+        ("GET", re.compile(r"^/api/deleted_tasks$"), "_get_deleted_tasks"),
+        ("POST", re.compile(r"^/api/tasks$"), "_post_task"),
+        ("PUT", re.compile(r"^/api/tasks/(\d+)$"), "_put_task"),
+        ("DELETE", re.compile(r"^/api/tasks/(\d+)$"), "_delete_task"),
+        ("POST", re.compile(r"^/api/tasks/(\d+)/restore$"), "_restore_task"),
+        ("PUT", re.compile(r"^/api/units/(\d+)$"), "_put_unit"),
+        ("GET", re.compile(r"^/api/call/(\w+)$"), "_get_call"),
+        ("POST", re.compile(r"^/api/call/(\w+)$"), "_post_call"),
+    ]
+
+    # ─────────────────────────────────────────────────────────────────────
+    # Dispatch
+    # ─────────────────────────────────────────────────────────────────────
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def do_PUT(self):
+        self._dispatch("PUT")
+
+    def do_DELETE(self):
+        self._dispatch("DELETE")
+
+    def _dispatch(self, method):
+        url = urlsplit(self.path)
+        self.query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        try:
+            if url.path != "/api/health":
+                self._check_token()
+            for route_method, pattern, handler_name in self.ROUTES:
+                match = pattern.match(url.path)
+                if match and route_method == method:
+                    args = [int(group) if group.isdigit() else group for group in match.groups()]
+                    status, payload = getattr(self, handler_name)(*args)
+                    self._send_json(status, payload, cacheable=(method == "GET"))
+                    return
+            raise _NotFound(url.path)
+
+        except _Unauthorized:
+            # Το σώμα του αιτήματος δεν διαβάστηκε - η keep-alive σύνδεση κλείνει
+            self.close_connection = True
+            self._send_json(401, {'error': "Απαιτείται έγκυρο token"})
+        except _NotFound as e:
+            self._send_json(404, {'error': f"Δεν βρέθηκε: {e}"})
+        except database.ConflictError as e:
+            self._send_json(409, {'error': str(e), 'table': e.table, 'record_id': e.record_id,
+                                  'conflicts': e.conflicts, 'current': e.current})
+        except (database.ValidationError, ValueError, sqlite3.IntegrityError) as e:
+            # IntegrityError: π.χ. PUT με "unit_id": null (NOT NULL / FOREIGN KEY)
+            self._send_json(400, {'error': str(e)})
+        except Exception as e:
+            logger.error(f"❌ API {method} {self.path} failed: {e}", exc_info=True)
+            self._send_json(500, {'error': str(e)})
+
+    def _check_token(self):
+        if self.token is None:
+            return
+        scheme, _, supplied = (self.headers.get("Authorization") or "").partition(" ")
+        if scheme.lower() != "bearer" or not hmac.compare_digest(supplied.strip().encode("utf-8"),
+                                                                 self.token.encode("utf-8")):
+            raise _Unauthorized()
+
+    def _read_body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if not length:
+            return {}
+        body = json.loads(self.rfile.read(length).decode("utf-8"))
+        if not isinstance(body, dict):
+            raise database.ValidationError("Το σώμα πρέπει να είναι JSON object")
+        return body
+
+    def _send_json(self, status, payload, cacheable=False):
+        body = json.dumps(payload, ensure_ascii=False, default=str).encode("utf-8")
+        etag = compute_etag(body) if cacheable and status == 200 else None
+
+        if etag and etag in (self.headers.get("If-None-Match") or ""):
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        if self.close_connection:
+            self.send_header("Connection", "close")
+        if etag:
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug(f"API {self.address_string()} - {format % args}")
+
+    # ─────────────────────────────────────────────────────────────────────
+    # Reads
+    # ─────────────────────────────────────────────────────────────────────
+
+    def _get_health(self):
+        return 200, {'status': 'ok'}
+
+    def _get_version(self):
+        # instance: νέα τιμή σε κάθε εκκίνηση (το data_version ξεκινά πάλι)
+        return 200, {'version': f"{self.instance}:{self.pool.data_version()}"}
+
+    def _get_groups(self):
+        with self.pool.connection() as conn:
+            return 200, database.get_all_groups(conn=conn)
+
+    def _get_units(self):
+        with self.pool.connection() as conn:
+            return 200, database.get_all_units(conn=conn)
+
+    def _get_task_types(self):
+        with self.pool.connection() as conn:
+            return 200, database.get_all_task_types(conn=conn)
+
+    def _get_dashboard(self):
+        with self.pool.connection() as conn:
+            return 200, database.get_dashboard_stats(conn=conn)
+
+    def _get_tasks(self):
+        q = self.query
+        limit = min(int(q.get('limit') or DEFAULT_PAGE_SIZE), MAX_PAGE_SIZE)
+        with self.pool.connection() as conn:
+            tasks, next_after = database.filter_tasks_page(
+                status=q.get('status'),
+                unit_id=int(q['unit_id']) if q.get('unit_id') else None,
+                task_type_id=int(q['task_type_id']) if q.get('task_type_id') else None,
+                date_from=q.get('date_from'),
+                date_to=q.get('date_to'),
+                search_text=q.get('search'),
+                after=decode_cursor(q.get('cursor')),
+                limit=limit,
+                conn=conn,
+                location_ids=[int(i) for i in q['location_ids'].split(',')] if q.get('location_ids') else None,
+            )
+        return 200, {'items': tasks, 'next_cursor': encode_cursor(next_after)}
+
+    def _get_task(self, task_id):
+        with self.pool.connection() as conn:
+            task = database.get_task_by_id(task_id, conn=conn)
+        if task is None:
+            raise _NotFound(f"εργασία {task_id}")
+        return 200, task
+
+    def _get_deleted_tasks(self):
+        with self.pool.connection() as conn:
+            return 200, database.get_deleted_tasks(conn=conn)
+
+    def _get_call(self, name):
+        if name not in REMOTE_READS:
+            raise _NotFound(f"συνάρτηση {name}")
+        args, kwargs = _call_arguments(json.loads(self.query.get('args') or "[]"),
+                                       json.loads(self.query.get('kwargs') or "{}"))
+        with self.pool.connection() as conn:
+            return 200, {'result': _jsonable(REMOTE_READS[name](*args, conn=conn, **kwargs))}
+
+    # ─────────────────────────────────────────────────────────────────────
+    # Writes
+    # ─────────────────────────────────────────────────────────────────────
+
+    def _write(self, fn, *args, **kwargs):
+        """fn(*args, conn=..., **kwargs) στον writer - επιστρέφει μετά το COMMIT"""
+        return self.writer.submit(lambda conn: fn(*args, conn=conn, **kwargs)).result()
+
+    def _post_task(self):
+        body = self._read_body()
+        task_id = self._write(database.add_task, *_fields(body, _TASK_FIELDS,
+                                                          required=('unit_id', 'task_type_id', 'description')))
+        return 201, {'id': task_id}
+
+    def _put_task(self, task_id):
+        body = self._read_body()
+        version = self._write(_update_merged, 'tasks', _TASK_FIELDS, database.update_task, task_id, body)
+        return 200, {'id': task_id, 'row_version': version}
+
+    def _delete_task(self, task_id):
+        self._write(database.delete_task, task_id)
+        return 200, {'id': task_id, 'deleted': True}
+
+    def _restore_task(self, task_id):
+        self._write(database.restore_task, task_id)
+        return 200, {'id': task_id, 'restored': True}
+
+    def _put_unit(self, unit_id):
+        body = self._read_body()
+        version = self._write(_update_merged, 'units', _UNIT_FIELDS, database.update_unit, unit_id, body)
+        return 200, {'id': unit_id, 'row_version': version}
+
+    def _post_call(self, name):
+        if name not in REMOTE_WRITES:
+            raise _NotFound(f"συνάρτηση {name}")
+        body = self._read_body()
+        args, kwargs = _call_arguments(body.get('args', []), body.get('kwargs', {}))
+        return 200, {'result': _jsonable(self._write(REMOTE_WRITES[name], *args, **kwargs))}
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# SERVER
+# ═══════════════════════════════════════════════════════════════════════════
+
+def make_server(host=DEFAULT_HOST, port=DEFAULT_PORT, pool_size=DEFAULT_POOL_SIZE, db_path=None, token=None):
+    """
+    ThreadingHTTPServer με δικό του pool και writer (το handler class
+    είναι ανά server). Εκτός loopback χρειάζεται token.
+    """
+    if not token and host not in LOOPBACK_HOSTS:
+        raise database.ValidationError(f"Ο server στο {host} χρειάζεται token (--token / --token-file)")
+    pool = ConnectionPool(db_path, pool_size)
+    writer = write_service.WriteService(db_path=db_path).start()
+    handler = type("BoundApiRequestHandler", (ApiRequestHandler,),
+                   {'pool': pool, 'writer': writer, 'token': token or None,
+                    'instance': secrets.token_hex(4)})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    server.pool = pool
+    server.writer = writer
+    return server
+
+
+def start_in_thread(host=DEFAULT_HOST, port=0, pool_size=DEFAULT_POOL_SIZE, db_path=None, token=None):
+    """
+    Εκκίνηση σε background thread. port=0 → ελεύθερη θύρα
+    (server.server_address[1]). Τερματισμός: stop_server(server).
+    """
+    server = make_server(host, port, pool_size, db_path, token)
+    thread = threading.Thread(target=server.serve_forever, name="api-server", daemon=True)
+    thread.start()
+    logger.info(f"API server listening on http://{host}:{server.server_address[1]}")
+    return server
+
+
+def stop_server(server):
+    server.shutdown()
+    server.server_close()
+    server.writer.stop()
+    server.pool.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HVACR HTTP/JSON API server")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--pool-size", type=int, default=DEFAULT_POOL_SIZE)
+    parser.add_argument("--db", default=None, help="Αρχείο database (προεπιλογή: DB_NAME)")
+    parser.add_argument("--token", default=None, help="Κοινό token των clients")
+    parser.add_argument("--token-file", default=None, help="Αρχείο με το token (όχι στη γραμμή εντολών)")
+    args = parser.parse_args()
+
+    token = args.token
+    if args.token_file:
+        with open(args.token_file, "r", encoding="utf-8") as f:
+            token = f.read().strip()
+
+    if args.db:
+        database.DB_NAME = args.db
+    database.init_database()
+    # Οι αναγνώσεις του pool είναι query_only - οι μετρητές φτιάχνονται εδώ
+    dashboard_service.init_dashboard_counters()
+
+    server = make_server(args.host, args.port, args.pool_size, token=token)
+    logger.info(f"API server listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.writer.stop()
+        server.pool.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,353 @@
+"""
+Task Archive
+============
+
+Μεταφορά του παλιού, κλειστού ιστορικού σε ξεχωριστό αρχείο SQLite.
+
+Features:
+---------
+- Αρχειοθετούνται ολοκληρωμένες εργασίες παλαιότερες από
+  DatabaseConfig.ARCHIVE_AFTER_DAYS, μαζί με ΟΛΗ την αλυσίδα τους: μια
+  αλυσίδα μεταφέρεται μόνο όταν κάθε εργασία της είναι ολοκληρωμένη,
+  εκτός κάδου και παλιά - οι ζωντανές αλυσίδες μένουν ακέραιες στη main
+- Οι πίνακες tasks / task_relationships της main μένουν μικροί: indexes,
+  triggers και πλήρεις σαρώσεις αφορούν μόνο το "ζεστό" κομμάτι
+- Το archive (hvacr_maintenance_archive.db) έχει τις ίδιες στήλες. Τα
+  filter_tasks / filter_tasks_page κάνουν ATTACH + UNION ALL μόνο όταν το
+  εύρος ημερομηνιών φτάνει στο archive (βλ. database.attach_archive)
+- Μικρά batches, ΕΝΑ σύντομο transaction το καθένα (αντιγραφή στο archive
+  και διαγραφή από τη main μαζί) - background thread με δική του σύνδεση
+- Οι διαγραφές ΔΕΝ στέλνονται στα replicas (κάθε αντίγραφο αρχειοθετεί
+  μόνο του)
+
+Usage:
+------
+    import archive_service
+
+    report = archive_service.archive_tasks(older_than_days=365)
+    print(report.format())
+
+    archive_service.start_background_archiving()
+"""
+
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Optional
+
+import database_refactored as database
+import logger_config
+from config import DatabaseConfig
+
+logger = logger_config.get_logger(__name__)
+
+DEFAULT_PAUSE = 0.1           # δευτερόλεπτα ανάμεσα στα batches
+
+
+@dataclass
+class ArchiveReport:
+    """Αποτέλεσμα archive_tasks"""
+    cutoff: str = ""
+    tasks: int = 0
+    relationships: int = 0
+    skipped: int = 0
+    batches: int = 0
+    elapsed: float = 0.0
+
+    def format(self) -> str:
+        return "\n".join([
+            f"Αρχειοθέτηση εργασιών πριν από {self.cutoff}",
+            f"  Εργασίες: {self.tasks}, σχέσεις: {self.relationships}",
+            f"  Παραλείφθηκαν (ανοιχτή αλυσίδα): {self.skipped}",
+            f"  Batches: {self.batches}, χρόνος: {self.elapsed:.2f}s",
+        ])
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# SCHEMA
+# ═══════════════════════════════════════════════════════════════════════════
+
+def init_archive(conn=None):
+    """Πίνακας archive_state στη main (εύρος ημερομηνιών και μετρητές)"""
+    own_conn = conn is None
+    if own_conn:
+        conn = database.get_connection()
+
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS archive_state (
+            key TEXT PRIMARY KEY,
+            value
+        )
+    """)
+
+    if own_conn:
+        conn.commit()
+        conn.close()
+
+
+def _recover(cursor):
+    """
+    Συνέπεια μετά από διακοπή.
+
+    Σε WAL το commit δύο αρχείων δεν είναι ατομικό: αν το archive πρόλαβε να
+    γραφτεί αλλά η main όχι, οι γραμμές υπάρχουν και στα δύο. Η main
+    υπερισχύει - το αντίγραφο σβήνεται και η εργασία ξαναρχειοθετείται.
+    """
+    cursor.execute("DELETE FROM archive.tasks WHERE id IN (SELECT id FROM main.tasks)")
+    removed = cursor.rowcount
+    cursor.execute("""
+        DELETE FROM archive.task_relationships
+        WHERE id IN (SELECT id FROM main.task_relationships)
+    """)
+    removed += cursor.rowcount
+    if removed:
+        logger.warning(f"⚠️  Archive recovery: {removed} row(s) still present in main removed from archive")
+        cursor.execute("""
+            INSERT OR REPLACE INTO archive_state (key, value)
+            VALUES ('archived_tasks', (SELECT COUNT(*) FROM archive.tasks)),
+                   ('archived_relationships', (SELECT COUNT(*) FROM archive.task_relationships))
+        """)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# BATCH SELECTION
+# ═══════════════════════════════════════════════════════════════════════════
+
+# Οι αλυσίδες (συνεκτικές συνιστώσες, κάθε κατάσταση σχέσης) των υποψηφίων
+# του batch. Μια αλυσίδα κρατιέται ολόκληρη αν έστω μία εργασία της δεν
+# πληροί τα κριτήρια (εκκρεμής, στον κάδο ή πρόσφατη).
+_COMPONENTS = """
+    WITH RECURSIVE chain(root, id) AS (
+        SELECT id, id FROM temp.archive_seed
+        UNION
+        SELECT c.root, tr.child_task_id
+        FROM chain c JOIN main.task_relationships tr ON tr.parent_task_id = c.id
+        UNION
+        SELECT c.root, tr.parent_task_id
+        FROM chain c JOIN main.task_relationships tr ON tr.child_task_id = c.id
+    ),
+    blocked AS (
+        SELECT DISTINCT c.root
+        FROM chain c JOIN main.tasks t ON t.id = c.id
+        WHERE t.status != 'completed' OR t.is_deleted != 0 OR t.created_date >= ?
+    )
+    INSERT OR IGNORE INTO temp.archive_batch (id)
+    SELECT c.id
+    FROM chain c JOIN main.tasks t ON t.id = c.id
+    WHERE c.root NOT IN (SELECT root FROM blocked)
+"""
+
+
+def _select_batch(cursor, last_id, cutoff, batch_size):
+    """
+    Γεμίζει το temp.archive_batch με τις αλυσίδες των επόμενων υποψηφίων.
+
+    Returns:
+        tuple: (τελευταίο id υποψηφίου ή None στο τέλος, υποψήφιοι που μένουν)
+    """
+    cursor.execute("DELETE FROM temp.archive_seed")
+    cursor.execute("DELETE FROM temp.archive_batch")
+    cursor.execute("""
+        INSERT INTO temp.archive_seed (id)
+        SELECT id FROM main.tasks
+        WHERE id > ? AND status = 'completed' AND is_deleted = 0 AND created_date < ?
+        ORDER BY id
+        LIMIT ?
+    """, (last_id, cutoff, batch_size))
+    if cursor.rowcount == 0:
+        return None, 0
+
+    cursor.execute("SELECT MAX(id) FROM temp.archive_seed")
+    window_end = cursor.fetchone()[0]
+    cursor.execute(_COMPONENTS, (cutoff,))
+    cursor.execute("""
+        SELECT COUNT(*) FROM temp.archive_seed
+        WHERE id NOT IN (SELECT id FROM temp.archive_batch)
+    """)
+    return window_end, cursor.fetchone()[0]
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# MOVE
+# ═══════════════════════════════════════════════════════════════════════════
+
+def _columns(cursor, table):
+    cursor.execute(f"PRAGMA main.table_info({table})")
+    return ", ".join(row[1] for row in cursor.fetchall())
+
+
+def _move_batch(cursor):
+    """
+    Αντιγραφή στο archive και διαγραφή από τη main (μέσα στο transaction).
+    Tombstones/markers ανάμεσα σε αρχειοθετούμενες εργασίες απλώς σβήνονται.
+
+    Returns:
+        tuple: (εργασίες, σχέσεις)
+    """
+    task_columns = _columns(cursor, 'tasks')
+    rel_columns = _columns(cursor, 'task_relationships')
+    edges = """
+        (parent_task_id IN (SELECT id FROM temp.archive_batch)
+         OR child_task_id IN (SELECT id FROM temp.archive_batch))
+    """
+
+    cursor.execute(f"""
+        INSERT INTO archive.task_relationships ({rel_columns})
+        SELECT {rel_columns} FROM main.task_relationships
+        WHERE COALESCE(is_deleted, 0) = 0 AND {edges}
+    """)
+    relationships = cursor.rowcount
+    cursor.execute(f"""
+        INSERT INTO archive.tasks ({task_columns})
+        SELECT {task_columns} FROM main.tasks
+        WHERE id IN (SELECT id FROM temp.archive_batch)
+    """)
+    tasks = cursor.rowcount
+
+    cursor.execute(f"DELETE FROM main.task_relationships WHERE {edges}")
+    cursor.execute("DELETE FROM main.tasks WHERE id IN (SELECT id FROM temp.archive_batch)")
+    return tasks, relationships
+
+
+def _update_state(cursor, tasks, relationships):
+    """Μετρητές και εύρος ημερομηνιών στο archive_state"""
+    cursor.execute("""
+        SELECT MIN(created_date), MAX(created_date) FROM archive.tasks
+        WHERE created_date IS NOT NULL
+    """)
+    oldest, newest = cursor.fetchone()
+    state = database.get_archive_state(cursor.connection) or {}
+    cursor.executemany("INSERT OR REPLACE INTO archive_state (key, value) VALUES (?, ?)", [
+        ('oldest_date', oldest),
+        ('newest_date', newest),
+        ('archived_tasks', int(state.get('archived_tasks') or 0) + tasks),
+        ('archived_relationships', int(state.get('archived_relationships') or 0) + relationships),
+        ('last_run', datetime.now().strftime("%Y-%m-%d %H:%M:%S")),
+    ])
+
+
+def _set_replica_tracking(cursor, enabled):
+    """Οι διαγραφές της αρχειοθέτησης δεν καταγράφονται για τα replicas"""
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'replica_meta'")
+    if cursor.fetchone() is not None:
+        cursor.execute("UPDATE replica_meta SET value = ? WHERE key = 'applying'",
+                       (0 if enabled else 1,))
+
+
+def archive_tasks(older_than_days: int = DatabaseConfig.ARCHIVE_AFTER_DAYS,
+                  batch_size: int = DatabaseConfig.ARCHIVE_BATCH_SIZE, pause: float = 0.0,
+                  stop_event: Optional[threading.Event] = None) -> ArchiveReport:
+    """
+    Αρχειοθέτηση των κλειστών αλυσίδων που είναι παλαιότερες από older_than_days.
+
+    Args:
+        older_than_days: Ηλικία (με βάση το created_date) πέρα από την οποία
+                         μια ολοκληρωμένη εργασία αρχειοθετείται
+        batch_size: Υποψήφιες εργασίες ανά transaction (οι αλυσίδες τους
+                    μεταφέρονται ολόκληρες)
+        pause: Αναμονή ανάμεσα στα batches (για background εκτέλεση)
+        stop_event: Διακοπή μετά το τρέχον batch
+
+    Returns:
+        ArchiveReport
+    """
+    if older_than_days < 1:
+        raise database.ValidationError("Η ηλικία αρχειοθέτησης πρέπει να είναι τουλάχιστον 1 ημέρα")
+
+    started = time.perf_counter()
+    report = ArchiveReport(
+        cutoff=(datetime.now() - timedelta(days=older_than_days)).strftime("%Y-%m-%d")
+    )
+
+    conn = database.get_connection()
+    conn.isolation_level = None
+    cursor = conn.cursor()
+    try:
+        init_archive(conn)
+        database.attach_archive(conn, create=True)
+        cursor.execute("CREATE TEMP TABLE IF NOT EXISTS archive_seed (id INTEGER PRIMARY KEY)")
+        cursor.execute("CREATE TEMP TABLE IF NOT EXISTS archive_batch (id INTEGER PRIMARY KEY)")
+
+        cursor.execute("BEGIN IMMEDIATE")
+        _recover(cursor)
+        cursor.execute("COMMIT")
+
+        last_id = 0
+        while not (stop_event and stop_event.is_set()):
+            cursor.execute("BEGIN IMMEDIATE")
+            try:
+                last_id, skipped = _select_batch(cursor, last_id, report.cutoff, batch_size)
+                if last_id is None:
+                    cursor.execute("ROLLBACK")
+                    break
+
+                _set_replica_tracking(cursor, False)
+                tasks, relationships = _move_batch(cursor)
+                _set_replica_tracking(cursor, True)
+                if tasks:
+                    _update_state(cursor, tasks, relationships)
+                cursor.execute("COMMIT")
+            except Exception:
+                if conn.in_transaction:
+                    cursor.execute("ROLLBACK")
+                raise
+
+            report.batches += 1
+            report.tasks += tasks
+            report.relationships += relationships
+            report.skipped += skipped
+            if pause:
+                time.sleep(pause)
+
+    except sqlite3.Error as e:
+        logger.error(f"❌ Task archiving failed: {e}", exc_info=True)
+        raise RuntimeError(f"Σφάλμα αρχειοθέτησης: {str(e)}")
+    finally:
+        conn.close()
+
+    report.elapsed = time.perf_counter() - started
+    logger.info(
+        f"Task archiving: {report.tasks} task(s), {report.relationships} relationship(s) "
+        f"before {report.cutoff} in {report.elapsed:.2f}s ({report.skipped} skipped)"
+    )
+    return report
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# BACKGROUND
+# ═══════════════════════════════════════════════════════════════════════════
+
+_worker = None
+_stop_event = threading.Event()
+
+
+def start_background_archiving(older_than_days: int = DatabaseConfig.ARCHIVE_AFTER_DAYS,
+                               batch_size: int = DatabaseConfig.ARCHIVE_BATCH_SIZE,
+                               pause: float = DEFAULT_PAUSE) -> threading.Thread:
+    """
+    Εκκίνηση της αρχειοθέτησης σε daemon thread (μία φορά ανά εκτέλεση).
+    Σφάλματα καταγράφονται στο log - ποτέ δεν φτάνουν στο UI.
+    """
+    global _worker
+    if _worker is not None and _worker.is_alive():
+        return _worker
+
+    def run():
+        try:
+            archive_tasks(older_than_days, batch_size, pause, _stop_event)
+        except Exception as e:
+            logger.warning(f"⚠️  Background task archiving stopped: {e}")
+
+    _stop_event.clear()
+    _worker = threading.Thread(target=run, name="task-archiving", daemon=True)
+    _worker.start()
+    return _worker
+
+
+def stop_background_archiving(timeout: float = 2.0) -> None:
+    """Διακοπή μετά το τρέχον batch"""
+    _stop_event.set()
+    if _worker is not None:
+        _worker.join(timeout)
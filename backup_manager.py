@@ -30,6 +30,7 @@ import os
 import shutil
 from datetime import datetime
 from pathlib import Path
+import database_refactored as database
 import logger_config
 
 logger = logger_config.get_logger(__name__)
@@ -124,6 +125,8 @@ def restore_backup(backup_path):
         # Restore from backup
         logger.warning(f"⚠️  Restoring database from: {backup_path}")
         shutil.copy2(backup_path, DB_FILE)
+        # Το αρχείο αντικαταστάθηκε χωρίς commit - τα caches δεν ισχύουν πια
+        database.note_local_write()
         
         logger.info(f"✅ Database restored successfully from: {backup_path}")
         return True
@@ -0,0 +1,557 @@
+"""
+Bulk CSV Importer
+=================
+
+Μαζική εισαγωγή μονάδων και ιστορικού εργασιών από CSV (onboarding νέου
+νοσοκομείου) - αντί για add_unit / add_task ανά γραμμή.
+
+Features:
+---------
+- Streaming ανάγνωση σε chunks (σταθερή μνήμη για οποιοδήποτε μέγεθος)
+- Αντιστοίχιση ομάδων, μονάδων, τύπων, ειδών εργασιών και τοποθεσιών με
+  ΟΝΟΜΑ μέσω lookup πινάκων στη μνήμη (ένα query ανά πίνακα στην αρχή,
+  χωρίς διάκριση πεζών/κεφαλαίων και τόνων)
+- Έλεγχος με τους κανόνες του config.ValidationRules, ημερομηνίες
+  YYYY-MM-DD ή DD/MM/YYYY, κατάσταση/προτεραιότητα και στα ελληνικά
+- executemany σε ΕΝΑ transaction: είτε μπαίνουν όλες οι έγκυρες γραμμές
+  είτε καμία
+- Τα indexes του πίνακα αφαιρούνται και ξαναχτίζονται στο τέλος
+  (όταν η εισαγωγή είναι μεγάλη σε σχέση με τον πίνακα)
+- Τα triggers παράγωγων δεδομένων (dashboard, report cache, analytics,
+  replica) απενεργοποιούνται στη διάρκεια και τα δεδομένα τους
+  ενημερώνονται set-based στο τέλος - μέσα στο ίδιο transaction
+- Reject file: οι άκυρες γραμμές (αρχικές στήλες + γραμμή + αιτία)
+- Προαιρετικά δημιουργία ομάδων / τύπων / ειδών / τοποθεσιών που λείπουν
+
+Στήλες CSV:
+-----------
+    units: name, group, location, model, serial_number, installation_date, is_active
+    tasks: unit, group, task_type, task_item, description, status, priority,
+           created_date, completed_date, technician_name, notes, location
+
+Usage:
+------
+    import bulk_importer
+
+    report = bulk_importer.import_units("units.csv", create_missing=True)
+    report = bulk_importer.import_tasks("history.csv", reject_path="history_rejects.csv")
+    print(report.format())
+"""
+
+import csv
+import os
+import time
+import unicodedata
+from dataclasses import dataclass, field
+from datetime import date
+from os import urandom
+from typing import Dict, Optional
+
+import database_refactored as database
+import logger_config
+from config import ValidationRules, TaskStatus, TaskPriority
+
+logger = logger_config.get_logger(__name__)
+
+DEFAULT_CHUNK_SIZE = 10000
+
+# Triggers που κρατούν μόνο παράγωγα δεδομένα - ανενεργά κατά την εισαγωγή,
+# τα δεδομένα τους ενημερώνονται στο _refresh_derived()
+_DERIVED_TRIGGER_PREFIXES = ("trg_dashboard_", "trg_report_cache_", "trg_analytics_", "trg_replica_",
+                             "trg_location_")
+
+# Εκτιμώμενα bytes ανά γραμμή CSV (για την απόφαση αναβολής indexes)
+_EST_ROW_BYTES = 100
+
+
+class _RowError(Exception):
+    """Άκυρη γραμμή - καταγράφεται στο reject file"""
+
+
+@dataclass
+class ImportReport:
+    """Αποτέλεσμα μίας μαζικής εισαγωγής"""
+    table: str
+    path: str
+    read: int = 0
+    inserted: int = 0
+    rejected: int = 0
+    seconds: float = 0.0
+    reject_path: Optional[str] = None
+    deferred_indexes: int = 0
+    created: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def rows_per_sec(self) -> float:
+        return self.read / self.seconds if self.seconds else 0.0
+
+    def format(self) -> str:
+        lines = [
+            f"Εισαγωγή {self.table} από {self.path}",
+            f"  Γραμμές: {self.read}, εισήχθησαν: {self.inserted}, απορρίφθηκαν: {self.rejected}",
+            f"  Χρόνος: {self.seconds:.2f}s ({self.rows_per_sec:,.0f} γραμμές/s)",
+        ]
+        if self.created:
+            lines.append("  Δημιουργήθηκαν: " + ", ".join(f"{k}: {v}" for k, v in self.created.items()))
+        if self.reject_path:
+            lines.append(f"  Απορρίψεις: {self.reject_path}")
+        return "\n".join(lines)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# NORMALIZATION
+# ═══════════════════════════════════════════════════════════════════════════
+
+def fold_key(text) -> str:
+    """Κλειδί αναζήτησης: χωρίς τόνους, πεζά, ενιαία κενά ("ΒΛΆΒΗ " → "βλαβη")"""
+    decomposed = unicodedata.normalize("NFD", " ".join(str(text).split()))
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).casefold()
+
+
+class _Memo(dict):
+    """dict που υπολογίζει και κρατά το αποτέλεσμα κάθε νέας τιμής"""
+
+    def __init__(self, fn):
+        super().__init__()
+        self.fn = fn
+
+    def __missing__(self, value):
+        result = self[value] = self.fn(value)
+        return result
+
+
+def _parse_date(value):
+    """'YYYY-MM-DD' ή 'DD/MM/YYYY' → 'YYYY-MM-DD', αλλιώς None"""
+    text = value.strip()
+    try:
+        if len(text) == 10 and text[4] == "-":
+            return date.fromisoformat(text).isoformat()
+        day, month, year = text.replace(".", "/").split("/")
+        return date(int(year), int(month), int(day)).isoformat()
+    except ValueError:
+        return None
+
+
+def _choices(values, display_names):
+    """Αποδεκτές τιμές (κωδικός ή ελληνική ονομασία) → κωδικός"""
+    lookup = {fold_key(v): v for v in values}
+    lookup.update({fold_key(name): code for code, name in display_names.items()})
+    return lookup
+
+
+_STATUSES = _choices(TaskStatus.all(), TaskStatus.display_names())
+_PRIORITIES = _choices(TaskPriority.all(), TaskPriority.display_names())
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# LOOKUPS
+# ═══════════════════════════════════════════════════════════════════════════
+
+class _Lookups:
+    """Ονόματα → ids από τη database, με προαιρετική δημιουργία όσων λείπουν"""
+
+    def __init__(self, cursor, create_missing):
+        self.cursor = cursor
+        self.create_missing = create_missing
+        self.created = {}
+        self.key = _Memo(fold_key)
+
+        cursor.execute("SELECT id, name FROM groups")
+        self.groups = {fold_key(r[1]): r[0] for r in cursor.fetchall()}
+
+        cursor.execute("SELECT id, name FROM task_types")
+        self.types = {fold_key(r[1]): r[0] for r in cursor.fetchall()}
+
+        cursor.execute("SELECT id, task_type_id, name FROM task_items")
+        self.items = {(r[1], fold_key(r[2])): r[0] for r in cursor.fetchall()}
+
+        self.units = {}           # (όνομα, group_id) → id
+        self.units_by_name = {}   # όνομα → [ids]
+        cursor.execute("SELECT id, name, group_id FROM units")
+        for unit_id, name, group_id in cursor.fetchall():
+            self.add_unit(unit_id, name, group_id)
+
+        self.locations = None     # None: χωρίς πίνακα locations → ελεύθερο κείμενο
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'locations'")
+        if cursor.fetchone():
+            cursor.execute("SELECT name FROM locations WHERE is_deleted = 0")
+            self.locations = {fold_key(r[0]): r[0] for r in cursor.fetchall()}
+
+    def add_unit(self, unit_id, name, group_id):
+        key = fold_key(name)
+        self.units[(key, group_id)] = unit_id
+        self.units_by_name.setdefault(key, []).append(unit_id)
+
+    def _create(self, kind, sql, params):
+        if not self.create_missing:
+            raise _RowError(f"Δεν υπάρχει {kind}: {params[0]}")
+        self.cursor.execute(sql, params)
+        self.created[kind] = self.created.get(kind, 0) + 1
+        return self.cursor.lastrowid
+
+    def group(self, name):
+        key = self.key[name]
+        group_id = self.groups.get(key)
+        if group_id is None:
+            _check_length(name, ValidationRules.GROUP_NAME_MIN_LENGTH, ValidationRules.GROUP_NAME_MAX_LENGTH,
+                          "όνομα ομάδας")
+            group_id = self.groups[key] = self._create(
+                "ομάδα", "INSERT INTO groups (name, description) VALUES (?, '')", (name.strip(),))
+        return group_id
+
+    def task_type(self, name):
+        key = self.key[name]
+        type_id = self.types.get(key)
+        if type_id is None:
+            _check_length(name, ValidationRules.TASK_TYPE_NAME_MIN_LENGTH,
+                          ValidationRules.TASK_TYPE_NAME_MAX_LENGTH, "τύπος εργασίας")
+            type_id = self.types[key] = self._create(
+                "τύπος εργασίας", "INSERT INTO task_types (name, description) VALUES (?, '')", (name.strip(),))
+        return type_id
+
+    def task_item(self, type_id, name):
+        key = (type_id, self.key[name])
+        item_id = self.items.get(key)
+        if item_id is None:
+            item_id = self.items[key] = self._create(
+                "είδος εργασίας", "INSERT INTO task_items (name, task_type_id, description) VALUES (?, ?, '')",
+                (name.strip(), type_id))
+        return item_id
+
+    def unit(self, name, group_name):
+        key = self.key[name]
+        if group_name:
+            group_id = self.groups.get(self.key[group_name])
+            unit_id = self.units.get((key, group_id))
+            if unit_id is None:
+                raise _RowError(f"Άγνωστη μονάδα: {name} ({group_name})")
+            return unit_id
+        ids = self.units_by_name.get(key)
+        if not ids:
+            raise _RowError(f"Άγνωστη μονάδα: {name}")
+        if len(ids) > 1:
+            raise _RowError(f"Η μονάδα {name} υπάρχει σε πολλές ομάδες - συμπληρώστε τη στήλη group")
+        return ids[0]
+
+    def location(self, name):
+        if self.locations is None:
+            return name.strip()
+        key = self.key[name]
+        canonical = self.locations.get(key)
+        if canonical is None:
+            self._create("τοποθεσία", "INSERT INTO locations (name, description) VALUES (?, '')", (name.strip(),))
+            canonical = self.locations[key] = name.strip()
+        return canonical
+
+
+def _check_length(value, minimum, maximum, label):
+    length = len(value.strip())
+    if length < minimum or length > maximum:
+        raise _RowError(f"{label}: {minimum}-{maximum} χαρακτήρες (δόθηκαν {length})")
+
+
+def _check_max(value, maximum, label):
+    if value and len(value) > maximum:
+        raise _RowError(f"{label}: έως {maximum} χαρακτήρες (δόθηκαν {len(value)})")
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# ROW CONVERTERS
+# ═══════════════════════════════════════════════════════════════════════════
+
+_UNIT_COLUMNS = ("name", "group_id", "location", "model", "serial_number", "installation_date", "is_active")
+_TASK_COLUMNS = ("unit_id", "task_type_id", "task_item_id", "description", "status", "priority",
+                 "created_date", "completed_date", "technician_name", "notes", "location")
+
+
+def _unit_converter(lookups, header):
+    idx = {name: header.index(name) for name in
+           ("name", "group", "location", "model", "serial_number", "installation_date", "is_active")
+           if name in header}
+    for required in ("name", "group"):
+        if required not in idx:
+            raise database.ValidationError(f"Λείπει η στήλη '{required}' από το CSV")
+    dates = _Memo(_parse_date)
+
+    def get(row, name):
+        i = idx.get(name)
+        return row[i].strip() if i is not None and i < len(row) else ""
+
+    def convert(row):
+        name = get(row, "name")
+        _check_length(name, ValidationRules.UNIT_NAME_MIN_LENGTH, ValidationRules.UNIT_NAME_MAX_LENGTH,
+                      "όνομα μονάδας")
+        group_name = get(row, "group")
+        if not group_name:
+            raise _RowError("Λείπει η ομάδα")
+        group_id = lookups.group(group_name)
+        if (lookups.key[name], group_id) in lookups.units:
+            raise _RowError(f"Η μονάδα {name} υπάρχει ήδη στην ομάδα {group_name}")
+
+        serial = get(row, "serial_number") or None
+        _check_max(serial, ValidationRules.SERIAL_NUMBER_MAX_LENGTH, "σειριακός αριθμός")
+
+        installation = get(row, "installation_date")
+        if installation:
+            installation = dates[installation]
+            if installation is None:
+                raise _RowError(f"Μη έγκυρη ημερομηνία εγκατάστασης: {get(row, 'installation_date')}")
+
+        active = get(row, "is_active")
+        is_active = 0 if active and fold_key(active) in ("0", "no", "οχι", "false", "ανενεργη") else 1
+
+        location = get(row, "location")
+        location = lookups.location(location) if location else None
+        lookups.add_unit(None, name, group_id)
+        return (name, group_id, location, get(row, "model") or None, serial, installation or None, is_active)
+
+    return convert
+
+
+def _task_converter(lookups, header):
+    idx = {name: header.index(name) for name in
+           ("unit", "group", "task_type", "task_item", "description", "status", "priority", "created_date",
+            "completed_date", "technician_name", "notes", "location")
+           if name in header}
+    for required in ("unit", "task_type", "description", "created_date"):
+        if required not in idx:
+            raise database.ValidationError(f"Λείπει η στήλη '{required}' από το CSV")
+
+    dates = _Memo(_parse_date)
+    key = lookups.key
+    units = _Memo(lambda names: lookups.unit(*names))
+    types = _Memo(lookups.task_type)
+    items = _Memo(lambda pair: lookups.task_item(*pair))
+    locations = _Memo(lookups.location)
+    desc_min = ValidationRules.TASK_DESCRIPTION_MIN_LENGTH
+    desc_max = ValidationRules.TASK_DESCRIPTION_MAX_LENGTH
+    notes_max = ValidationRules.NOTES_MAX_LENGTH
+    tech_max = ValidationRules.TECHNICIAN_NAME_MAX_LENGTH
+
+    i_unit, i_type, i_desc, i_created = idx["unit"], idx["task_type"], idx["description"], idx["created_date"]
+    optional = [idx.get(name) for name in
+                ("group", "task_item", "status", "priority", "completed_date", "technician_name", "notes",
+                 "location")]
+    width = max(idx.values()) + 1
+
+    def convert(row):
+        if len(row) < width:
+            row = row + [""] * (width - len(row))
+        group, item, status, priority, completed, technician, notes, location = (
+            row[i] if i is not None else "" for i in optional)
+
+        # Πρώτα οι έλεγχοι πεδίων - μια άκυρη γραμμή δεν δημιουργεί τίποτα
+        description = row[i_desc].strip()
+        if not desc_min <= len(description) <= desc_max:
+            raise _RowError(f"Περιγραφή: {desc_min}-{desc_max} χαρακτήρες (δόθηκαν {len(description)})")
+
+        created = dates[row[i_created]]
+        if created is None:
+            raise _RowError(f"Μη έγκυρη ημερομηνία: {row[i_created]}")
+        if completed.strip():
+            completed_date = dates[completed]
+            if completed_date is None or completed_date < created:
+                raise _RowError(f"Μη έγκυρη ημερομηνία ολοκλήρωσης: {completed}")
+        else:
+            completed_date = None
+
+        status_code = _STATUSES.get(key[status]) if status.strip() else TaskStatus.PENDING
+        if status_code is None:
+            raise _RowError(f"Άγνωστη κατάσταση: {status}")
+        priority_code = _PRIORITIES.get(key[priority]) if priority.strip() else TaskPriority.MEDIUM
+        if priority_code is None:
+            raise _RowError(f"Άγνωστη προτεραιότητα: {priority}")
+
+        technician = technician.strip()
+        if len(technician) > tech_max:
+            raise _RowError(f"Τεχνικός: έως {tech_max} χαρακτήρες")
+        notes = notes.strip()
+        if len(notes) > notes_max:
+            raise _RowError(f"Σημειώσεις: έως {notes_max} χαρακτήρες")
+
+        unit_id = units[(row[i_unit], group)]
+        type_id = types[row[i_type]]
+        item_id = items[(type_id, item)] if item.strip() else None
+
+        return (unit_id, type_id, item_id, description, status_code, priority_code, created, completed_date,
+                technician or None, notes or None, locations[location] if location.strip() else None)
+
+    return convert
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# DEFERRED INDEXES & DERIVED DATA
+# ═══════════════════════════════════════════════════════════════════════════
+
+def _drop_indexes(cursor, table):
+    """Αφαίρεση των indexes του πίνακα - επιστρέφει το SQL για την επαναδημιουργία"""
+    cursor.execute("""
+        SELECT name, sql FROM sqlite_master
+        WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL
+    """, (table,))
+    indexes = cursor.fetchall()
+    for name, _ in indexes:
+        cursor.execute(f"DROP INDEX {name}")
+    return [sql for _, sql in indexes]
+
+
+def _suspend_derived_triggers(cursor, table):
+    """Αφαίρεση των triggers παράγωγων δεδομένων - επιστρέφει το SQL τους"""
+    cursor.execute("SELECT name, sql FROM sqlite_master WHERE type = 'trigger' AND tbl_name = ?", (table,))
+    triggers = [(name, sql) for name, sql in cursor.fetchall() if name.startswith(_DERIVED_TRIGGER_PREFIXES)]
+    for name, _ in triggers:
+        cursor.execute(f"DROP TRIGGER {name}")
+    return [sql for _, sql in triggers]
+
+
+def _table_exists(cursor, name):
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,))
+    return cursor.fetchone() is not None
+
+
+def _refresh_derived(cursor, table, after_id):
+    """Ό,τι θα έκαναν τα triggers για τις νέες γραμμές (id > after_id), set-based"""
+    cursor.execute(f"PRAGMA table_info({table})")
+    if 'location_id' in {row[1] for row in cursor.fetchall()}:
+        cursor.execute(f"""
+            UPDATE {table}
+            SET location_id = (SELECT id FROM locations WHERE name = TRIM({table}.location))
+            WHERE id > ? AND TRIM(COALESCE(location, '')) != ''
+        """, (after_id,))
+
+    import replica_sync
+    replica_sync.record_bulk_location_inserts(cursor)
+
+    if _table_exists(cursor, "dashboard_counters"):
+        import dashboard_service
+        dashboard_service.rebuild_counters(cursor.connection)
+
+    if table != "tasks":
+        return
+
+    if _table_exists(cursor, "report_unit_cache"):
+        cursor.execute("""
+            UPDATE report_unit_cache SET is_dirty = 1
+            WHERE unit_id IN (SELECT DISTINCT unit_id FROM tasks WHERE id > ?)
+        """, (after_id,))
+    if _table_exists(cursor, "analytics_data_version"):
+        cursor.execute("UPDATE analytics_data_version SET version = version + 1 WHERE id = 1")
+
+    replica_sync.record_bulk_task_inserts(cursor, after_id)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# IMPORT
+# ═══════════════════════════════════════════════════════════════════════════
+
+def _import(table, columns, make_converter, path, reject_path, create_missing, chunk_size, defer_indexes):
+    report = ImportReport(table=table, path=path)
+    started = time.perf_counter()
+
+    conn = database.get_connection()
+    conn.isolation_level = None
+    conn.execute("PRAGMA cache_size = -262144")
+    conn.execute("PRAGMA temp_store = MEMORY")
+    conn.execute("PRAGMA threads = 4")
+    cursor = conn.cursor()
+    rejects_file = rejects = None
+    sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+
+    try:
+        with open(path, "r", encoding="utf-8-sig", newline="") as f:
+            reader = csv.reader(f)
+            original_header = next(reader, None)
+            if original_header is None:
+                raise database.ValidationError("Κενό αρχείο CSV")
+            header = [fold_key(h).replace(" ", "_") for h in original_header]
+
+            cursor.execute("BEGIN IMMEDIATE")
+            lookups = _Lookups(cursor, create_missing)
+            convert = make_converter(lookups, header)
+
+            # Replica: το sync_uid δίνεται στο INSERT (όχι UPDATE όλων των γραμμών μετά)
+            cursor.execute(f"PRAGMA table_info({table})")
+            with_uid = "sync_uid" in [r[1] for r in cursor.fetchall()]
+            if with_uid:
+                sql = (f"INSERT INTO {table} ({', '.join(columns)}, sync_uid) "
+                       f"VALUES ({', '.join('?' * (len(columns) + 1))})")
+
+            cursor.execute(f"SELECT COALESCE(MAX(id), 0), COUNT(*) FROM {table}")
+            after_id, existing = cursor.fetchone()
+            if defer_indexes is None:
+                defer_indexes = os.path.getsize(path) / _EST_ROW_BYTES * 3 >= existing
+            index_sql = _drop_indexes(cursor, table) if defer_indexes else []
+            trigger_sql = _suspend_derived_triggers(cursor, table)
+            report.deferred_indexes = len(index_sql)
+
+            line = 1
+            batch = []
+            for row in reader:
+                line += 1
+                if not row:
+                    continue
+                report.read += 1
+                try:
+                    batch.append(convert(row) + (urandom(16).hex(),) if with_uid else convert(row))
+                except _RowError as e:
+                    if rejects is None:
+                        report.reject_path = reject_path or f"{os.path.splitext(path)[0]}_rejects.csv"
+                        rejects_file = open(report.reject_path, "w", encoding="utf-8-sig", newline="")
+                        rejects = csv.writer(rejects_file)
+                        rejects.writerow(original_header + ["line", "error"])
+                    rejects.writerow(row + [line, str(e)])
+                    report.rejected += 1
+                    continue
+                if len(batch) >= chunk_size:
+                    cursor.executemany(sql, batch)
+                    report.inserted += len(batch)
+                    batch = []
+            if batch:
+                cursor.executemany(sql, batch)
+                report.inserted += len(batch)
+
+            for statement in index_sql + trigger_sql:
+                cursor.execute(statement)
+            _refresh_derived(cursor, table, after_id)
+            cursor.execute("COMMIT")
+            report.created = lookups.created
+    except Exception:
+        if conn.in_transaction:
+            cursor.execute("ROLLBACK")
+        raise
+    finally:
+        if rejects_file is not None:
+            rejects_file.close()
+        conn.close()
+
+    report.seconds = time.perf_counter() - started
+    logger.info(f"Bulk import {table}: {report.inserted} inserted, {report.rejected} rejected "
+                f"in {report.seconds:.2f}s ({report.rows_per_sec:,.0f} rows/s)")
+    return report
+
+
+def import_units(path, reject_path=None, create_missing=False, chunk_size=DEFAULT_CHUNK_SIZE,
+                 defer_indexes=None) -> ImportReport:
+    """
+    Μαζική εισαγωγή μονάδων από CSV.
+
+    Args:
+        create_missing: Δημιουργία ομάδων/τοποθεσιών που δεν υπάρχουν
+        defer_indexes: None = αυτόματα (όταν η εισαγωγή είναι μεγάλη σε σχέση με τον πίνακα)
+    """
+    return _import("units", _UNIT_COLUMNS, _unit_converter, path, reject_path, create_missing,
+                   chunk_size, defer_indexes)
+
+
+def import_tasks(path, reject_path=None, create_missing=False, chunk_size=DEFAULT_CHUNK_SIZE,
+                 defer_indexes=None) -> ImportReport:
+    """
+    Μαζική εισαγωγή ιστορικού εργασιών από CSV. Οι μονάδες πρέπει να
+    υπάρχουν ήδη (π.χ. από import_units).
+
+    Args:
+        create_missing: Δημιουργία τύπων/ειδών εργασιών/τοποθεσιών που δεν υπάρχουν
+        defer_indexes: None = αυτόματα (όταν η εισαγωγή είναι μεγάλη σε σχέση με τον πίνακα)
+    """
+    return _import("tasks", _TASK_COLUMNS, _task_converter, path, reject_path, create_missing,
+                   chunk_size, defer_indexes)
@@ -0,0 +1,324 @@
+"""
+Chain Rebuild Tool
+==================
+
+Επαναϋπολογισμός των χρονολογικών αλυσίδων εργασιών ανά μονάδα και
+εγγραφή ΜΟΝΟ των διαφορών.
+
+Features:
+---------
+- ΔΥΟ queries: ενεργές εργασίες (χρονολογικά, από το idx_tasks_unit_chrono)
+  και σχέσεις μαζί με την κατάσταση των δύο άκρων τους
+- Υπολογισμός στη μνήμη: κάθε ενεργή εργασία που συμμετέχει σε έγκυρη
+  ενεργή σχέση είναι μέλος της αλυσίδας της μονάδας της, και η αλυσίδα
+  είναι τα μέλη ταξινομημένα κατά (created_date, created_at, id)
+- Ελάχιστο diff: DELETE / UPDATE / INSERT με executemany σε ΕΝΑ transaction
+- Dry-run: πλήρης αναφορά χωρίς καμία εγγραφή
+
+Τι διορθώνεται:
+---------------
+- διπλές σχέσεις για το ίδιο ζεύγος (κρατείται η παλαιότερη γραμμή)
+- σχέσεις προς εργασίες που δεν υπάρχουν πια
+- σχέσεις μεταξύ διαφορετικών μονάδων ή εργασίας με τον εαυτό της
+- ενεργές σχέσεις προς διαγραμμένες εργασίες
+- ενεργές σχέσεις που παρακάμπτουν κρίκους (μη διαδοχικά μέλη)
+- backup σχέσεις (is_deleted = 1) ανάμεσα σε δύο ενεργές εργασίες
+- markers χειροκίνητης αφαίρεσης (is_deleted = 2) ανάμεσα σε δύο μέλη αλυσίδας
+- κρίκοι που λείπουν (επανενεργοποίηση υπάρχουσας γραμμής ή INSERT)
+
+Usage:
+------
+    import chain_rebuild
+
+    report = chain_rebuild.rebuild_chains(dry_run=True)
+    print(report.format())
+
+    chain_rebuild.rebuild_chains(unit_id=12)
+"""
+
+import time
+from array import array
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Optional, Dict
+
+import database_refactored as database
+import logger_config
+
+logger = logger_config.get_logger(__name__)
+
+
+# Λόγοι αφαίρεσης γραμμής task_relationships (κλειδιά της αναφοράς)
+REASON_LABELS = {
+    'duplicate': "Διπλές σχέσεις",
+    'dangling': "Σχέσεις προς ανύπαρκτες εργασίες",
+    'inactive_endpoint': "Ενεργές σχέσεις προς διαγραμμένες εργασίες",
+    'cross_unit': "Σχέσεις μεταξύ διαφορετικών μονάδων",
+    'self_loop': "Σχέσεις εργασίας με τον εαυτό της",
+    'off_chain': "Σχέσεις εκτός χρονολογικής σειράς",
+    'stale_backup': "Παλιές backup σχέσεις ενεργών εργασιών",
+    'stale_marker': "Παλιοί markers χειροκίνητης αφαίρεσης",
+}
+
+
+@dataclass
+class ChainRebuildReport:
+    """Αποτέλεσμα rebuild_chains (ίδιο σε dry-run και σε κανονική εκτέλεση)"""
+    dry_run: bool
+    unit_id: Optional[int] = None
+    units: int = 0
+    active_tasks: int = 0
+    chain_members: int = 0
+    edges_scanned: int = 0
+    removed: Counter = field(default_factory=Counter)
+    reactivated: int = 0
+    inserted: int = 0
+    changes_by_unit: Dict[int, int] = field(default_factory=dict)
+    elapsed: float = 0.0
+
+    @property
+    def total_changes(self) -> int:
+        return sum(self.removed.values()) + self.reactivated + self.inserted
+
+    def format(self) -> str:
+        """Αναφορά κειμένου (για εκτύπωση ή εμφάνιση σε dialog)"""
+        scope = f"μονάδα {self.unit_id}" if self.unit_id is not None else "όλες οι μονάδες"
+        mode = "DRY RUN - καμία αλλαγή δεν αποθηκεύτηκε" if self.dry_run else "Οι αλλαγές αποθηκεύτηκαν"
+        lines = [
+            f"Ανακατασκευή αλυσίδων ({scope}) - {mode}",
+            f"  Μονάδες: {self.units}, ενεργές εργασίες: {self.active_tasks}, "
+            f"μέλη αλυσίδων: {self.chain_members}, σχέσεις: {self.edges_scanned}",
+        ]
+        for reason, label in REASON_LABELS.items():
+            if self.removed[reason]:
+                lines.append(f"  - {label}: {self.removed[reason]}")
+        if self.reactivated:
+            lines.append(f"  + Επανενεργοποιημένοι κρίκοι: {self.reactivated}")
+        if self.inserted:
+            lines.append(f"  + Νέοι κρίκοι: {self.inserted}")
+        if not self.total_changes:
+            lines.append("  ✅ Όλες οι αλυσίδες είναι συνεπείς")
+        else:
+            lines.append(f"  Σύνολο αλλαγών: {self.total_changes} σε {len(self.changes_by_unit)} μονάδες")
+        lines.append(f"  Χρόνος: {self.elapsed:.2f}s")
+        return "\n".join(lines)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# LOAD
+# ═══════════════════════════════════════════════════════════════════════════
+
+def _load_task_order(cursor, unit_id):
+    """Ενεργές εργασίες σε χρονολογική σειρά ανά μονάδα → (ids, units)"""
+    if unit_id is None:
+        cursor.execute("""
+            SELECT id, unit_id
+            FROM tasks
+            WHERE is_deleted = 0
+            ORDER BY unit_id, created_date, created_at, id
+        """)
+    else:
+        cursor.execute("""
+            SELECT id, unit_id
+            FROM tasks
+            WHERE unit_id = ? AND is_deleted = 0
+            ORDER BY created_date, created_at, id
+        """, (unit_id,))
+
+    ids, units = array('q'), array('q')
+    for task_id, task_unit in cursor:
+        ids.append(task_id)
+        units.append(task_unit)
+    return ids, units
+
+
+def _load_edges(cursor, unit_id):
+    """
+    Σχέσεις με την κατάσταση των άκρων τους, ταξινομημένες ανά ζεύγος ώστε
+    οι διπλές γραμμές να είναι διαδοχικές.
+    """
+    select = """
+        SELECT tr.id, tr.parent_task_id, tr.child_task_id, COALESCE(tr.is_deleted, 0),
+               p.unit_id, p.is_deleted, c.unit_id, c.is_deleted
+        FROM task_relationships tr
+                 LEFT JOIN tasks p ON p.id = tr.parent_task_id
+                 LEFT JOIN tasks c ON c.id = tr.child_task_id
+    """
+    order = " ORDER BY tr.parent_task_id, tr.child_task_id, tr.id"
+
+    if unit_id is None:
+        cursor.execute(select + order)
+    else:
+        cursor.execute(select + """
+            WHERE tr.id IN (SELECT r.id FROM task_relationships r
+                                JOIN tasks t ON t.id = r.parent_task_id
+                            WHERE t.unit_id = ?
+                            UNION
+                            SELECT r.id FROM task_relationships r
+                                JOIN tasks t ON t.id = r.child_task_id
+                            WHERE t.unit_id = ?)
+        """ + order, (unit_id, unit_id))
+    return cursor
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# REBUILD
+# ═══════════════════════════════════════════════════════════════════════════
+
+def _edge_problem(parent_id, child_id, p_unit, p_deleted, c_unit, c_deleted):
+    """
+    Λόγος για τον οποίο μια σχέση δεν μπορεί να είναι κρίκος (ή None).
+    Το 'inactive_endpoint' αφορά μόνο τις ενεργές σχέσεις - οι backup
+    σχέσεις και οι markers δείχνουν κανονικά σε διαγραμμένες εργασίες.
+    """
+    if p_unit is None or c_unit is None:
+        return 'dangling'
+    if parent_id == child_id:
+        return 'self_loop'
+    if p_unit != c_unit:
+        return 'cross_unit'
+    if p_deleted or c_deleted:
+        return 'inactive_endpoint'
+    return None
+
+
+def rebuild_chains(unit_id: Optional[int] = None, dry_run: bool = False,
+                   conn=None) -> ChainRebuildReport:
+    """
+    Ανακατασκευή των χρονολογικών αλυσίδων μίας ή όλων των μονάδων.
+
+    Args:
+        unit_id: Μόνο αυτή η μονάδα (None = όλες)
+        dry_run: Μόνο αναφορά, χωρίς εγγραφές
+        conn: Σύνδεση με ΗΔΗ ανοιχτό transaction εγγραφής - το diff γράφεται
+              σε αυτό και commit/rollback κάνει ο καλών
+
+    Returns:
+        ChainRebuildReport
+    """
+    started = time.perf_counter()
+    report = ChainRebuildReport(dry_run=dry_run, unit_id=unit_id)
+
+    own_conn = conn is None
+    if own_conn:
+        conn = database.get_connection()
+    cursor = conn.cursor()
+    try:
+        if own_conn and not dry_run:
+            # Κλείδωμα εγγραφής ΠΡΙΝ τη φόρτωση - το diff πρέπει να αφορά
+            # ακριβώς την κατάσταση που θα γραφτεί
+            cursor.execute("BEGIN IMMEDIATE")
+
+        order_ids, order_units = _load_task_order(cursor, unit_id)
+        report.active_tasks = len(order_ids)
+        report.units = len(set(order_units))
+
+        # ── Pass 1: μία ανάγνωση των σχέσεων ────────────────────────────────
+        # Κανονικές γραμμές (πρώτη ανά ζεύγος) σε arrays, διπλές → διαγραφή
+        row_ids, parents, children, flags = array('q'), array('q'), array('q'), array('b')
+        both_active = array('b')
+        unit_of_row = array('q')
+        linked = set()
+        delete_rows = []
+        previous_pair = None
+
+        for (rel_id, parent_id, child_id, flag,
+             p_unit, p_deleted, c_unit, c_deleted) in _load_edges(cursor, unit_id):
+            report.edges_scanned += 1
+            row_unit = p_unit if p_unit is not None else (c_unit if c_unit is not None else -1)
+
+            pair = (parent_id, child_id)
+            if pair == previous_pair:
+                delete_rows.append((rel_id, 'duplicate', row_unit))
+                continue
+            previous_pair = pair
+
+            problem = _edge_problem(parent_id, child_id, p_unit, p_deleted, c_unit, c_deleted)
+            if problem and (flag == 0 or problem != 'inactive_endpoint'):
+                delete_rows.append((rel_id, problem, row_unit))
+                continue
+            if flag == 0:
+                linked.add(parent_id)
+                linked.add(child_id)
+
+            row_ids.append(rel_id)
+            parents.append(parent_id)
+            children.append(child_id)
+            flags.append(flag)
+            both_active.append(not p_deleted and not c_deleted)
+            unit_of_row.append(row_unit)
+
+        # ── Επιθυμητή αλυσίδα: διαδοχικά μέλη ανά μονάδα ───────────────────
+        next_of = {}
+        previous_member, previous_unit = None, None
+        for task_id, task_unit in zip(order_ids, order_units):
+            if task_id not in linked:
+                continue
+            report.chain_members += 1
+            if task_unit == previous_unit:
+                next_of[previous_member] = task_id
+            previous_member, previous_unit = task_id, task_unit
+
+        # ── Pass 2: σύγκριση κανονικών γραμμών με την επιθυμητή αλυσίδα ────
+        reactivate_rows = []
+        present = set()
+        for rel_id, parent_id, child_id, flag, active_pair, row_unit in zip(
+                row_ids, parents, children, flags, both_active, unit_of_row):
+            intended = next_of.get(parent_id) == child_id
+            if intended:
+                present.add(parent_id)
+                if flag != 0:
+                    reactivate_rows.append((rel_id, row_unit))
+            elif flag == 0:
+                delete_rows.append((rel_id, 'off_chain', row_unit))
+            elif flag == 1 and active_pair:
+                delete_rows.append((rel_id, 'stale_backup', row_unit))
+            elif flag == 2 and parent_id in linked and child_id in linked:
+                delete_rows.append((rel_id, 'stale_marker', row_unit))
+
+        insert_pairs, insert_units = [], []
+        for task_id, task_unit in zip(order_ids, order_units):
+            if task_id in next_of and task_id not in present:
+                insert_pairs.append((task_id, next_of[task_id]))
+                insert_units.append(task_unit)
+
+        # ── Αναφορά ─────────────────────────────────────────────────────────
+        changes = Counter()
+        for _, reason, row_unit in delete_rows:
+            report.removed[reason] += 1
+            changes[row_unit] += 1
+        for _, row_unit in reactivate_rows:
+            changes[row_unit] += 1
+        changes.update(insert_units)
+        report.reactivated = len(reactivate_rows)
+        report.inserted = len(insert_pairs)
+        report.changes_by_unit = dict(changes)
+
+        # ── Εγγραφή diff ────────────────────────────────────────────────────
+        if not dry_run:
+            cursor.executemany("DELETE FROM task_relationships WHERE id = ?",
+                               [(rel_id,) for rel_id, _, _ in delete_rows])
+            cursor.executemany("UPDATE task_relationships SET is_deleted = 0 WHERE id = ?",
+                               [(rel_id,) for rel_id, _ in reactivate_rows])
+            cursor.executemany("""
+                INSERT INTO task_relationships (parent_task_id, child_task_id, relationship_type, is_deleted)
+                VALUES (?, ?, 'related', 0)
+            """, insert_pairs)
+            if own_conn:
+                conn.commit()
+
+    except Exception as e:
+        if own_conn:
+            conn.rollback()
+        logger.error(f"❌ Chain rebuild failed: {e}", exc_info=True)
+        raise RuntimeError(f"Σφάλμα ανακατασκευής αλυσίδων: {str(e)}")
+    finally:
+        if own_conn:
+            conn.close()
+
+    report.elapsed = time.perf_counter() - started
+    logger.info(
+        f"Chain rebuild ({'dry run' if dry_run else 'applied'}): "
+        f"{report.total_changes} change(s) in {report.elapsed:.2f}s"
+    )
+    return report
@@ -12,11 +12,13 @@ Components:
 - DatePickerDialog: Επιλογέας ημερομηνίας (138 lines)
 - TaskForm: Φόρμα εργασιών (909 lines)
 - LocationsManagement: Διαχείριση τοποθεσιών (373 lines)
+- LocationTreeSelector: Δέντρο τοποθεσιών με πολλαπλή επιλογή (lazy)
 - UnitsManagement: Διαχείριση μονάδων (753 lines)
 - TaskManagement: Διαχείριση εργασιών (471 lines)
 - TaskHistoryView: Ιστορικό εργασιών (157 lines)
 - RecycleBinView: Κάδος ανακύκλωσης (162 lines)
 - TaskRelationshipsView: Σχέσεις εργασιών (624 lines)
+- ShiftRosterView: Πρόγραμμα βαρδιών (ημερολόγιο μήνα)
 
 Usage:
 ------
@@ -32,11 +34,13 @@ from .task_card import TaskCard
 from .date_picker import DatePickerDialog
 from .task_form import TaskForm
 from .locations_mgmt import LocationsManagement
+from .location_tree import LocationTreeSelector
 from .units_mgmt import UnitsManagement
 from .tasks_mgmt import TaskManagement
 from .history_view import TaskHistoryView
 from .recycle_bin import RecycleBinView
 from .relationships import TaskRelationshipsView
+from .shift_calendar import ShiftCalendarGrid, ShiftRosterView
 
 # Export list για "from components import *"
 __all__ = [
@@ -44,11 +48,14 @@ __all__ = [
     'DatePickerDialog',
     'TaskForm',
     'LocationsManagement',
+    'LocationTreeSelector',
     'UnitsManagement',
     'TaskManagement',
     'TaskHistoryView',
     'RecycleBinView',
     'TaskRelationshipsView',
+    'ShiftCalendarGrid',
+    'ShiftRosterView',
 ]
 
 # Version info
@@ -1,15 +1,21 @@
 """
 Task History View Component - FIXED FINAL
 ==========================================
-Multi-select filtering - FIXED location filtering
+Multi-select filtering
 
-BUG FIX: location is TEXT field matching location.name, not location_id!
+Οι τοποθεσίες επιλέγονται από δέντρο (LocationTreeSelector) και
+φιλτράρονται με location_id - κάθε επιλογή καλύπτει όλο το υποδέντρο.
+
+Το κείμενο αναζήτησης ψάχνεται στη μνήμη (incremental_search): όσο ο χρήστης
+συμπληρώνει το κείμενο στενεύουν τα ήδη φορτωμένα αποτελέσματα, χωρίς query.
 """
 
 import customtkinter as ctk
-import database_refactored as database
+from api_client import db
 import theme_config
+from incremental_search import IncrementalSearch
 from components.task_card import TaskCard
+from components.location_tree import LocationTreeSelector
 
 class TaskHistoryView(ctk.CTkFrame):
     """Προβολή ιστορικού με multi-select filters"""
@@ -20,10 +26,15 @@ class TaskHistoryView(ctk.CTkFrame):
         self.on_task_select = on_task_select
         self.theme = theme_config.get_current_theme()
         
-        # Filtering state - FIXED: Store location NAMES, not IDs
+        # Filtering state - τοποθεσίες ως location_id (integer IN στη database)
         self.selected_group_ids = set()
-        self.selected_location_names = set()  # ← FIXED: names instead of IDs
+        self.selected_location_ids = set()
         self.selected_unit_ids = set()
+
+        # Κείμενο αναζήτησης: στένεμα στη μνήμη, debounce από τον χρόνο της
+        self.search = IncrementalSearch()
+        self.search_timer = None
+        self.last_search_text = None
         
         self.pack(fill="both", expand=True, padx=20, pady=20)
         
@@ -61,7 +72,7 @@ class TaskHistoryView(ctk.CTkFrame):
         self.status_combo.pack(side="left", padx=5)
 
         ctk.CTkLabel(row2, text="Είδος Εργασίας:", font=theme_config.get_font("small", "bold")).pack(side="left", padx=(20, 5))
-        task_types = database.get_all_task_types()
+        task_types = db.get_all_task_types()
         type_names = ["Όλα"] + [tt['name'] for tt in task_types]
         self.types_dict = {tt['name']: tt['id'] for tt in task_types}
         self.type_combo = ctk.CTkComboBox(row2, values=type_names, width=150, state="readonly",
@@ -72,7 +83,7 @@ class TaskHistoryView(ctk.CTkFrame):
         ctk.CTkLabel(row2, text="🔍 Αναζήτηση:", font=theme_config.get_font("small", "bold")).pack(side="left", padx=(20, 5))
         self.search_entry = ctk.CTkEntry(row2, width=250, placeholder_text="Περιγραφή, σημειώσεις...", font=theme_config.get_font("input"))
         self.search_entry.pack(side="left", padx=5)
-        self.search_entry.bind("<KeyRelease>", lambda e: self.apply_filters())
+        self.search_entry.bind("<KeyRelease>", self.on_search_keypress)
         ctk.CTkButton(row2, text="🔍 Αναζήτηση", command=self.apply_filters, width=120,
                       **theme_config.get_button_style("primary")).pack(side="left", padx=5)
         ctk.CTkButton(row2, text="🔄 Καθαρισμός", command=self.clear_filters, width=120,
@@ -144,7 +155,7 @@ class TaskHistoryView(ctk.CTkFrame):
         dialog.geometry("500x400")
         dialog.grab_set()
         
-        groups = database.get_all_groups()
+        groups = db.get_all_groups()
         if not groups:
             ctk.CTkLabel(dialog, text="Δεν υπάρχουν ομάδες", font=theme_config.get_font("body")).pack(pady=50)
             return
@@ -201,55 +212,30 @@ class TaskHistoryView(ctk.CTkFrame):
             self.groups_label.configure(text=f"({len(self.selected_group_ids)} επιλεγμένες)")
     
     # ═══════════════════════════════════════════════════════════════
-    # LOCATIONS SELECTOR - FIXED: Store names not IDs
+    # LOCATIONS SELECTOR
     # ═══════════════════════════════════════════════════════════════
     
     def show_locations_selector(self):
         dialog = ctk.CTkToplevel(self)
         dialog.title("Επιλογή Τοποθεσιών")
-        dialog.geometry("500x400")
+        dialog.geometry("500x500")
         dialog.grab_set()
         
-        locations = database.get_all_locations()
-        if not locations:
-            ctk.CTkLabel(dialog, text="Δεν υπάρχουν τοποθεσίες", font=theme_config.get_font("body")).pack(pady=50)
-            return
-        
         header = ctk.CTkFrame(dialog, fg_color="transparent")
         header.pack(fill="x", padx=20, pady=(20, 10))
-        ctk.CTkLabel(header, text=f"Επιλέξτε τοποθεσίες ({len(locations)})", font=theme_config.get_font("heading", "bold")).pack(side="left")
+        ctk.CTkLabel(header, text="Επιλέξτε τοποθεσίες", font=theme_config.get_font("heading", "bold")).pack(side="left")
+        ctk.CTkLabel(dialog, text="Κάθε επιλογή περιλαμβάνει και όλες τις υποτοποθεσίες της", font=theme_config.get_font("small"), text_color=self.theme["text_secondary"]).pack(anchor="w", padx=20)
+        
+        tree = LocationTreeSelector(dialog, selected_ids=self.selected_location_ids, height=300)
         
         btn_frame = ctk.CTkFrame(header, fg_color="transparent")
         btn_frame.pack(side="right")
+        ctk.CTkButton(btn_frame, text="✗ Καμία", command=tree.clear_selection, width=70, **theme_config.get_button_style("secondary")).pack(side="left", padx=2)
         
-        checkboxes = {}
-        
-        def select_all():
-            for cb in checkboxes.values():
-                cb['var'].set(True)
-        
-        def deselect_all():
-            for cb in checkboxes.values():
-                cb['var'].set(False)
-        
-        ctk.CTkButton(btn_frame, text="✓ Όλες", command=select_all, width=70, **theme_config.get_button_style("secondary")).pack(side="left", padx=2)
-        ctk.CTkButton(btn_frame, text="✗ Καμία", command=deselect_all, width=70, **theme_config.get_button_style("secondary")).pack(side="left", padx=2)
-        
-        scroll = ctk.CTkScrollableFrame(dialog, height=220)
-        scroll.pack(fill="both", expand=True, padx=20, pady=10)
-        
-        for loc in locations:
-            # FIXED: Check if location NAME is in selected set
-            var = ctk.BooleanVar(value=loc['name'] in self.selected_location_names)
-            cb = ctk.CTkCheckBox(scroll, text=loc['name'], variable=var, font=theme_config.get_font("body"))
-            cb.pack(anchor="w", padx=10, pady=3)
-            checkboxes[loc['name']] = {'var': var}  # ← Use NAME as key
+        tree.pack(fill="both", expand=True, padx=20, pady=10)
         
         def save():
-            self.selected_location_names.clear()
-            for loc_name, cb in checkboxes.items():
-                if cb['var'].get():
-                    self.selected_location_names.add(loc_name)  # ← Store NAME
+            self.selected_location_ids = tree.get_selected()
             self.update_locations_label()
             self.selected_unit_ids.clear()
             self.update_units_label()
@@ -262,13 +248,13 @@ class TaskHistoryView(ctk.CTkFrame):
         ctk.CTkButton(btn_container, text="❌ Ακύρωση", command=dialog.destroy, width=140, height=40, **theme_config.get_button_style("secondary")).pack(side="right", padx=5)
     
     def update_locations_label(self):
-        if not self.selected_location_names:
+        if not self.selected_location_ids:
             self.locations_label.configure(text="(Όλες)")
         else:
-            self.locations_label.configure(text=f"({len(self.selected_location_names)} επιλεγμένες)")
+            self.locations_label.configure(text=f"({len(self.selected_location_ids)} επιλεγμένες)")
     
     # ═══════════════════════════════════════════════════════════════
-    # UNITS SELECTOR - FIXED: Filter by location NAME
+    # UNITS SELECTOR
     # ═══════════════════════════════════════════════════════════════
     
     def show_units_selector(self):
@@ -277,26 +263,25 @@ class TaskHistoryView(ctk.CTkFrame):
         dialog.geometry("600x500")
         dialog.grab_set()
         
-        all_units = database.get_all_units()
+        all_units = db.get_all_units()
         units = []
+        location_ids = db.get_location_subtree_ids(self.selected_location_ids)
         
         for unit in all_units:
             # Group filter
             if self.selected_group_ids:
                 unit_in_selected_group = False
                 for gid in self.selected_group_ids:
-                    group_units = database.get_units_by_group(gid)
+                    group_units = db.get_units_by_group(gid)
                     if any(u['id'] == unit['id'] for u in group_units):
                         unit_in_selected_group = True
                         break
                 if not unit_in_selected_group:
                     continue
             
-            # Location filter - FIXED: Compare with NAME
-            if self.selected_location_names:
-                unit_location = unit.get('location', '')
-                if unit_location not in self.selected_location_names:
-                    continue
+            # Location filter
+            if self.selected_location_ids and unit.get('location_id') not in location_ids:
+                continue
             
             units.append(unit)
         
@@ -355,70 +340,57 @@ class TaskHistoryView(ctk.CTkFrame):
             self.units_label.configure(text=f"({len(self.selected_unit_ids)} επιλεγμένες)")
     
     # ═══════════════════════════════════════════════════════════════
-    # FILTERING - FIXED: Compare location NAMES
+    # FILTERING
     # ═══════════════════════════════════════════════════════════════
     
+    def on_search_keypress(self, event=None):
+        """Debounce ανάλογο του κόστους της επόμενης αναζήτησης"""
+        if self.search_entry.get() == self.last_search_text:
+            return  # πλήκτρα χωρίς αλλαγή κειμένου (βέλη, Shift, ...)
+        if self.search_timer is not None:
+            self.after_cancel(self.search_timer)
+        self.search_timer = self.after(self.search.next_delay_ms(), self.apply_filters)
+
     def apply_filters(self):
-        search_text = self.search_entry.get().strip() or None
+        if self.search_timer is not None:
+            self.after_cancel(self.search_timer)
+            self.search_timer = None
+        self.last_search_text = self.search_entry.get()
         status_map = {"Όλες": None, "Εκκρεμείς": "pending", "Ολοκληρωμένες": "completed"}
         status = status_map.get(self.status_combo.get())
         type_key = self.type_combo.get()
         task_type_id = self.types_dict.get(type_key) if type_key != "Όλα" else None
         
-        all_tasks = database.get_all_tasks()
-        filtered_tasks = []
-        
-        for task in all_tasks:
-            if status and task['status'] != status:
-                continue
-            
-            if task_type_id and task['task_type_id'] != task_type_id:
-                continue
-            
-            # Group filter
-            if self.selected_group_ids:
-                task_unit_id = task['unit_id']
-                unit_in_group = False
-                for gid in self.selected_group_ids:
-                    group_units = database.get_units_by_group(gid)
-                    if any(u['id'] == task_unit_id for u in group_units):
-                        unit_in_group = True
-                        break
-                if not unit_in_group:
-                    continue
-            
-            # Location filter - FIXED: Get unit's location NAME and compare
-            if self.selected_location_names:
-                all_units = database.get_all_units()
-                task_unit = next((u for u in all_units if u['id'] == task['unit_id']), None)
-                if not task_unit:
-                    continue
-                unit_location = task_unit.get('location', '')
-                if unit_location not in self.selected_location_names:
-                    continue
-            
-            # Unit filter
-            if self.selected_unit_ids and task['unit_id'] not in self.selected_unit_ids:
-                continue
-            
-            # Search text filter
-            if search_text:
-                search_lower = search_text.lower()
-                searchable = f"{task['description']} {task.get('notes', '')} {task['unit_name']} {task['task_type_name']}".lower()
-                if search_lower not in searchable:
-                    continue
-            
-            filtered_tasks.append(task)
+        # Κατάσταση, τύπος και τοποθεσία (location_id IN) φιλτράρονται στη database,
+        # το κείμενο στη μνήμη (στένεμα των προηγούμενων αποτελεσμάτων)
+        all_tasks = self.search.search(self.last_search_text, status=status, task_type_id=task_type_id,
+                                       location_ids=tuple(sorted(self.selected_location_ids)) or None)
+
+        # Group filter - οι μονάδες των ομάδων μία φορά, όχι ανά εργασία
+        group_unit_ids = None
+        if self.selected_group_ids:
+            group_unit_ids = {unit['id'] for gid in self.selected_group_ids
+                              for unit in db.get_units_by_group(gid)}
+
+        filtered_tasks = [
+            task for task in all_tasks
+            if (group_unit_ids is None or task['unit_id'] in group_unit_ids)
+            and (not self.selected_unit_ids or task['unit_id'] in self.selected_unit_ids)
+        ]
         
         self.load_tasks(filtered_tasks)
     
     def clear_filters(self):
+        if self.search_timer is not None:
+            self.after_cancel(self.search_timer)
+            self.search_timer = None
         self.search_entry.delete(0, "end")
+        self.last_search_text = None
         self.status_combo.set("Όλες")
         self.type_combo.set("Όλα")
         
         self.selected_group_ids.clear()
-        self.selected_location_names.clear()
+        self.selected_location_ids.clear()
         self.selected_unit_ids.clear()
         
         self.update_groups_label()
@@ -436,7 +408,7 @@ class TaskHistoryView(ctk.CTkFrame):
             widget.destroy()
         
         if tasks is None:
-            tasks = database.get_all_tasks()
+            tasks = db.get_all_tasks(include_archived=True)
         
         if not tasks:
             ctk.CTkLabel(self.tasks_frame, text="Δεν βρέθηκαν εργασίες", font=theme_config.get_font("body"), text_color=self.theme["text_secondary"]).pack(pady=50)
@@ -451,3 +423,9 @@ class TaskHistoryView(ctk.CTkFrame):
     def on_task_click(self, task):
         if self.on_task_select:
             self.on_task_select(task)
+
+    def destroy(self):
+        if self.search_timer is not None:
+            self.after_cancel(self.search_timer)
+            self.search_timer = None
+        super().destroy()
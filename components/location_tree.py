@@ -0,0 +1,116 @@
+"""
+Location Tree Selector Component
+================================
+Δέντρο τοποθεσιών με checkboxes (εγκατάσταση → κτίριο → πτέρυγα → όροφος → χώρος)
+
+Features:
+---------
+- Lazy: τα παιδιά ενός κόμβου φορτώνονται μόνο όταν ανοίξει (▸) - χιλιάδες
+  χώροι δεν γίνονται χιλιάδες widgets
+- Η επιλογή ενός κόμβου σημαίνει ΟΛΟ το υποδέντρο του: τα φίλτρα το
+  επεκτείνουν στη database μέσω του location_closure
+- Οι επιλεγμένοι κόμβοι κρατιούνται ανεξάρτητα από το αν είναι ανοιχτοί
+
+Usage:
+------
+    tree = LocationTreeSelector(dialog, selected_ids={3, 7})
+    tree.pack(fill="both", expand=True)
+    ...
+    selected = tree.get_selected()
+"""
+
+import customtkinter as ctk
+import database_refactored as database
+import theme_config
+from config import LocationKind
+
+
+class LocationTreeSelector(ctk.CTkScrollableFrame):
+    """Lazy δέντρο τοποθεσιών με πολλαπλή επιλογή"""
+
+    INDENT = 22
+
+    def __init__(self, parent, selected_ids=None, on_change=None, **kwargs):
+        super().__init__(parent, **kwargs)
+
+        self.theme = theme_config.get_current_theme()
+        self.selected_ids = set(selected_ids or ())
+        self.on_change = on_change
+        self._vars = {}
+
+        self._add_children(self, None, 0)
+
+    # ═══════════════════════════════════════════════════════════════
+    # NODES
+    # ═══════════════════════════════════════════════════════════════
+
+    def _add_children(self, container, parent_id, depth):
+        children = database.get_location_children(parent_id)
+        if not children and parent_id is None:
+            ctk.CTkLabel(container, text="Δεν υπάρχουν τοποθεσίες",
+                         font=theme_config.get_font("body")).pack(pady=30)
+        for location in children:
+            self._add_node(container, location, depth)
+
+    def _add_node(self, container, location, depth):
+        node = ctk.CTkFrame(container, fg_color="transparent")
+        node.pack(fill="x", anchor="w")
+
+        row = ctk.CTkFrame(node, fg_color="transparent")
+        row.pack(fill="x", padx=(depth * self.INDENT, 0))
+
+        children_frame = ctk.CTkFrame(node, fg_color="transparent")
+        state = {'loaded': False, 'open': False}
+
+        def toggle():
+            if state['open']:
+                children_frame.pack_forget()
+                toggle_btn.configure(text="▸")
+            else:
+                if not state['loaded']:
+                    self._add_children(children_frame, location['id'], depth + 1)
+                    state['loaded'] = True
+                children_frame.pack(fill="x", after=row)
+                toggle_btn.configure(text="▾")
+            state['open'] = not state['open']
+
+        toggle_btn = ctk.CTkButton(
+            row, text="▸" if location['child_count'] else "", width=24, height=24,
+            command=toggle if location['child_count'] else None,
+            fg_color="transparent", hover_color=self.theme["bg_secondary"],
+            text_color=self.theme["text_primary"]
+        )
+        toggle_btn.pack(side="left")
+
+        var = ctk.BooleanVar(value=location['id'] in self.selected_ids)
+        self._vars[location['id']] = var
+
+        def changed():
+            if var.get():
+                self.selected_ids.add(location['id'])
+            else:
+                self.selected_ids.discard(location['id'])
+            if self.on_change:
+                self.on_change(self.selected_ids)
+
+        icon = LocationKind.icons().get(location['kind'], "📍")
+        text = f"{icon} {location['name']}"
+        if location['child_count']:
+            text += f"  ({location['child_count']})"
+        ctk.CTkCheckBox(row, text=text, variable=var, command=changed,
+                        font=theme_config.get_font("body")).pack(side="left", padx=5, pady=2)
+
+    # ═══════════════════════════════════════════════════════════════
+    # SELECTION
+    # ═══════════════════════════════════════════════════════════════
+
+    def get_selected(self):
+        """Οι επιλεγμένοι κόμβοι (χωρίς επέκταση υποδέντρου)"""
+        return set(self.selected_ids)
+
+    def clear_selection(self):
+        self.selected_ids.clear()
+        for var in self._vars.values():
+            var.set(False)
+        if self.on_change:
+            self.on_change(self.selected_ids)
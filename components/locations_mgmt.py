@@ -4,6 +4,8 @@ Locations Management Component
 Διαχείριση Τοποθεσιών
 
 Extracted από ui_components.py για καλύτερη οργάνωση.
+Οι τοποθεσίες εμφανίζονται ως δέντρο (γονέας → υποτοποθεσίες) και κάθε
+τοποθεσία έχει γονέα και επίπεδο (εγκατάσταση, κτίριο, πτέρυγα, όροφος, χώρος).
 """
 
 import customtkinter as ctk
@@ -12,6 +14,7 @@ import database_refactored as database
 import theme_config
 import custom_dialogs
 import utils_refactored
+from config import LocationKind
 
 class LocationsManagement(ctk.CTkFrame):
     """Διαχείριση Τοποθεσιών"""
@@ -62,9 +65,9 @@ class LocationsManagement(ctk.CTkFrame):
         for widget in self.scroll_frame.winfo_children():
             widget.destroy()
         
-        # Load locations
+        # Load locations (σε σειρά δέντρου, με depth)
         try:
-            locations = database.get_all_locations()
+            locations = database.get_location_tree()
         except:
             locations = []
         
@@ -132,16 +135,17 @@ class LocationsManagement(ctk.CTkFrame):
             border_width=1,
             border_color=self.theme["card_border"]
         )
-        card.pack(fill="x", padx=10, pady=5)
+        card.pack(fill="x", padx=(10 + location.get('depth', 0) * 25, 10), pady=5)
         
         # Content
         content = ctk.CTkFrame(card, fg_color="transparent")
         content.pack(fill="x", padx=15, pady=12)
         
         # Name
+        icon = LocationKind.icons().get(location.get('kind'), "📍")
         ctk.CTkLabel(
             content,
-            text=f"📍 {location['name']}",
+            text=f"{icon} {location['name']}",
             font=theme_config.get_font("body", "bold"),
             text_color=self.theme["text_primary"]
         ).pack(side="left")
@@ -184,7 +188,7 @@ class LocationsManagement(ctk.CTkFrame):
         
         dialog = ctk.CTkToplevel(self)
         dialog.title("Επεξεργασία Τοποθεσίας" if is_edit else "Νέα Τοποθεσία")
-        dialog.geometry("500x300")
+        dialog.geometry("500x440")
         dialog.resizable(False, False)
         dialog.grab_set()
         
@@ -195,7 +199,7 @@ class LocationsManagement(ctk.CTkFrame):
         parent_width = self.winfo_toplevel().winfo_width()
         parent_height = self.winfo_toplevel().winfo_height()
         x = parent_x + (parent_width - 500) // 2
-        y = parent_y + (parent_height - 300) // 3
+        y = parent_y + (parent_height - 440) // 3
         dialog.geometry(f"+{x}+{y}")
         
         # Name
@@ -216,18 +220,56 @@ class LocationsManagement(ctk.CTkFrame):
         ).pack(anchor="w", padx=20, pady=(10, 5))
         
         desc_entry = ctk.CTkEntry(dialog, width=450, font=theme_config.get_font("input"))
-        desc_entry.pack(padx=20, pady=(0, 20))
+        desc_entry.pack(padx=20, pady=(0, 15))
+        
+        # Parent - όχι η ίδια ή υποτοποθεσία της (θα δημιουργούσε κύκλο)
+        excluded = database.get_location_subtree_ids([location_data['id']]) if is_edit else set()
+        no_parent = "— Καμία (κορυφή) —"
+        parents = {no_parent: None}
+        for loc in database.get_location_tree():
+            if loc['id'] not in excluded:
+                parents[f"{'    ' * loc['depth']}{loc['name']}"] = loc['id']
+        
+        ctk.CTkLabel(
+            dialog,
+            text="Ανήκει σε:",
+            font=theme_config.get_font("body", "bold")
+        ).pack(anchor="w", padx=20, pady=(0, 5))
+        parent_combo = ctk.CTkComboBox(dialog, width=450, values=list(parents), state="readonly")
+        parent_combo.pack(padx=20, pady=(0, 15))
+        parent_combo.set(no_parent)
+        
+        # Kind
+        kind_names = LocationKind.display_names()
+        no_kind = "—"
+        kinds = {no_kind: None, **{label: kind for kind, label in kind_names.items()}}
+        
+        ctk.CTkLabel(
+            dialog,
+            text="Επίπεδο:",
+            font=theme_config.get_font("body", "bold")
+        ).pack(anchor="w", padx=20, pady=(0, 5))
+        kind_combo = ctk.CTkComboBox(dialog, width=450, values=list(kinds), state="readonly")
+        kind_combo.pack(padx=20, pady=(0, 20))
+        kind_combo.set(no_kind)
         
         # Populate if editing
         if is_edit:
             name_entry.insert(0, location_data['name'])
             desc_entry.insert(0, location_data.get('description', ''))
+            for label, parent_id in parents.items():
+                if parent_id == location_data.get('parent_id'):
+                    parent_combo.set(label)
+                    break
+            kind_combo.set(kind_names.get(location_data.get('kind'), no_kind))
             name_entry.focus()
         
         # Save function
         def save():
             name = name_entry.get().strip()
             description = desc_entry.get().strip()
+            parent_id = parents.get(parent_combo.get())
+            kind = kinds.get(kind_combo.get())
             
             if not name:
                 import custom_dialogs
@@ -237,10 +279,12 @@ class LocationsManagement(ctk.CTkFrame):
             try:
                 if is_edit:
                     database.update_location(location_data['id'], name, description)
+                    if (parent_id, kind) != (location_data.get('parent_id'), location_data.get('kind')):
+                        database.move_location(location_data['id'], parent_id, kind)
                     import custom_dialogs
                     custom_dialogs.show_success("Επιτυχία", "Η τοποθεσία ενημερώθηκε!")
                 else:
-                    database.add_location(name, description)
+                    database.add_location(name, description, parent_id, kind)
                     import custom_dialogs
                     custom_dialogs.show_success("Επιτυχία", "Η τοποθεσία προστέθηκε!")
                 
@@ -50,6 +50,28 @@ class RecycleBinView(ctk.CTkFrame):
         )
         info.pack(side="right", padx=15)
 
+        # Bulk actions toolbar (multi-select)
+        self.selected_vars = {}
+        toolbar = ctk.CTkFrame(self, fg_color="transparent")
+        toolbar.pack(fill="x", pady=(0, 4))
+
+        self.select_all_var = ctk.BooleanVar(value=False)
+        select_all = ctk.CTkCheckBox(toolbar, text="Επιλογή Όλων", variable=self.select_all_var,
+                                     command=self._on_select_all, font=theme_config.get_font("small"))
+        select_all.pack(side="left", padx=8)
+
+        empty_btn = self._make_button(toolbar, "🗑️ Άδειασμα Κάδου", self._on_empty_bin,
+                                      style_type="danger", width=150, height=30)
+        empty_btn.pack(side="right", padx=(6, 8))
+
+        bulk_delete_btn = self._make_button(toolbar, "Διάγρ. Επιλεγμένων", self._on_bulk_permanent_delete,
+                                            style_type="danger", width=150, height=30)
+        bulk_delete_btn.pack(side="right", padx=6)
+
+        bulk_restore_btn = self._make_button(toolbar, "Επαναφορά Επιλεγμένων", self._on_bulk_restore,
+                                             style_type="success", width=170, height=30)
+        bulk_restore_btn.pack(side="right", padx=6)
+
         # Scrollable list container
         self.list_frame = ctk.CTkScrollableFrame(self, fg_color="transparent")
         self.list_frame.pack(fill="both", expand=True, pady=(8, 0))
@@ -73,6 +95,8 @@ class RecycleBinView(ctk.CTkFrame):
         # Clear list
         for w in self.list_frame.winfo_children():
             w.destroy()
+        self.selected_vars = {}
+        self.select_all_var.set(False)
 
         deleted = database.get_deleted_tasks()
 
@@ -104,6 +128,12 @@ class RecycleBinView(ctk.CTkFrame):
                            border_color=self.theme["card_border"], border_width=1, corner_radius=8)
         row.pack(fill="x", padx=8, pady=6)
 
+        # Selection checkbox (bulk actions)
+        var = ctk.BooleanVar(value=False)
+        self.selected_vars[task['id']] = var
+        checkbox = ctk.CTkCheckBox(row, text="", variable=var, width=24)
+        checkbox.pack(side="left", padx=(10, 0))
+
         # Left info: basic summary
         left = ctk.CTkFrame(row, fg_color="transparent")
         left.pack(side="left", fill="x", expand=True, padx=(12, 8), pady=8)
@@ -173,6 +203,82 @@ class RecycleBinView(ctk.CTkFrame):
         if callable(self.on_change_callback):
             self.on_change_callback()
 
+    # ----- BULK ACTIONS -----
+
+    def _selected_ids(self):
+        return [task_id for task_id, var in self.selected_vars.items() if var.get()]
+
+    def _on_select_all(self):
+        value = self.select_all_var.get()
+        for var in self.selected_vars.values():
+            var.set(value)
+
+    def _after_bulk_change(self):
+        self.load_deleted_tasks()
+        if callable(self.on_change_callback):
+            self.on_change_callback()
+
+    def _on_bulk_restore(self):
+        """Restore all selected tasks in one transaction."""
+        selected = self._selected_ids()
+        if not selected:
+            custom_dialogs.show_info("Επαναφορά", "Δεν έχετε επιλέξει εργασίες.")
+            return
+
+        if not custom_dialogs.ask_yes_no("Επαναφορά Εργασιών",
+                                         f"Θέλετε να επαναφέρετε {len(selected)} εργασίες;"):
+            return
+
+        try:
+            restored = database.restore_tasks(selected)
+        except Exception as e:
+            custom_dialogs.show_error("Σφάλμα", f"Σφάλμα κατά την επαναφορά: {e}")
+            return
+
+        custom_dialogs.show_success("Επιτυχία", f"Επανήλθαν {restored} εργασίες.")
+        self._after_bulk_change()
+
+    def _on_bulk_permanent_delete(self):
+        """Permanently delete all selected tasks in one transaction."""
+        selected = self._selected_ids()
+        if not selected:
+            custom_dialogs.show_info("Οριστική Διαγραφή", "Δεν έχετε επιλέξει εργασίες.")
+            return
 
+        if not custom_dialogs.ask_yes_no(
+                "Οριστική Διαγραφή",
+                f"{len(selected)} εργασίες θα διαγραφούν οριστικά. Η ενέργεια δεν μπορεί να αναιρεθεί.\n\n"
+                f"Θέλετε να συνεχίσετε?"
+        ):
+            return
 
+        try:
+            deleted = database.permanent_delete_tasks(selected)
+        except Exception as e:
+            custom_dialogs.show_error("Σφάλμα", f"Σφάλμα κατά την οριστική διαγραφή: {e}")
+            return
+
+        custom_dialogs.show_success("Επιτυχία", f"Διαγράφηκαν οριστικά {deleted} εργασίες.")
+        self._after_bulk_change()
+
+    def _on_empty_bin(self):
+        """Permanently delete every task in the recycle bin."""
+        if not self.selected_vars:
+            custom_dialogs.show_info("Άδειασμα Κάδου", "Ο κάδος είναι ήδη άδειος.")
+            return
+
+        if not custom_dialogs.ask_yes_no(
+                "Άδειασμα Κάδου",
+                "ΟΛΕΣ οι εργασίες του κάδου θα διαγραφούν οριστικά. Η ενέργεια δεν μπορεί να αναιρεθεί.\n\n"
+                "Θέλετε να συνεχίσετε?"
+        ):
+            return
+
+        try:
+            deleted = database.empty_recycle_bin()
+        except Exception as e:
+            custom_dialogs.show_error("Σφάλμα", f"Σφάλμα κατά το άδειασμα του κάδου: {e}")
+            return
 
+        custom_dialogs.show_success("Επιτυχία", f"Ο κάδος άδειασε ({deleted} εργασίες).")
+        self._after_bulk_change()
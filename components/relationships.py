@@ -605,46 +605,19 @@ class TaskRelationshipsView(ctk.CTkFrame):
             
             # ═══ CHAIN SYNC ═══
             # After adding relationship, sync entire chain to last task's status
-            try:
-                # Get full chain starting from either parent or child
-                full_chain = utils_refactored.get_full_task_chain(parent_id)
-                
-                if len(full_chain) > 1:
-                    # Get the LAST task's status
-                    last_task = full_chain[-1]
-                    target_status = last_task['status']
-                    target_completed_date = last_task.get('completed_date')
-                    
-                    # Update ALL tasks in chain to match last task
-                    conn = database.get_connection()
-                    cursor = conn.cursor()
-                    
-                    for task in full_chain:
-                        cursor.execute(
-                            "UPDATE tasks SET status = ?, completed_date = ? WHERE id = ?",
-                            (target_status, target_completed_date, task['id'])
-                        )
-                    
-                    conn.commit()
-                    conn.close()
-                    
-                    # Inform user if chain status changed
-                    if target_status == 'pending':
-                        custom_dialogs.show_success(
-                            "Επιτυχία", 
-                            f"Η σύνδεση προστέθηκε!\n\n"
-                            f"ℹ️ Η αλυσίδα ({len(full_chain)} εργασίες) επανανοίγει αυτόματα\n"
-                            f"επειδή η τελευταία εργασία είναι εκκρεμής."
-                        )
-                    else:
-                        custom_dialogs.show_success("Επιτυχία", f"Η σύνδεση προστέθηκε με επιτυχία!")
-                else:
-                    custom_dialogs.show_success("Επιτυχία", f"Η σύνδεση προστέθηκε με επιτυχία!")
-                    
-            except Exception as e:
-                print(f"Chain sync warning after relationship add: {e}")
+            sync = database.sync_chain_status(parent_id)
+
+            # Inform user if chain status changed
+            if sync['updated'] and sync['status'] == 'pending':
+                custom_dialogs.show_success(
+                    "Επιτυχία",
+                    f"Η σύνδεση προστέθηκε!\n\n"
+                    f"ℹ️ Η αλυσίδα ({sync['chain_length']} εργασίες) επανανοίγει αυτόματα\n"
+                    f"επειδή η τελευταία εργασία είναι εκκρεμής."
+                )
+            else:
                 custom_dialogs.show_success("Επιτυχία", f"Η σύνδεση προστέθηκε με επιτυχία!")
-            
+
             dialog.destroy()
             self.load_relationships()
             
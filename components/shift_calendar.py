@@ -0,0 +1,217 @@
+"""
+Shift Calendar Component
+========================
+Μηνιαίο πρόγραμμα βαρδιών σε μορφή ημερολογίου
+
+- ShiftCalendarGrid: πλέγμα 7x6, τα κελιά δημιουργούνται ΜΙΑ φορά και
+  απλώς ξαναγεμίζουν σε κάθε αλλαγή μήνα
+- ShiftRosterView: πλοήγηση μηνών + δημιουργία προγράμματος
+
+Όλος ο μήνας φορτώνεται με ένα query (shift_scheduler.get_roster_month).
+"""
+
+import calendar
+import customtkinter as ctk
+from datetime import datetime, date
+import theme_config
+import custom_dialogs
+import database_refactored as database
+import shift_scheduler
+
+
+MONTH_NAMES = [
+    "", "Ιανουάριος", "Φεβρουάριος", "Μάρτιος", "Απρίλιος", "Μάιος", "Ιούνιος",
+    "Ιούλιος", "Αύγουστος", "Σεπτέμβριος", "Οκτώβριος", "Νοέμβριος", "Δεκέμβριος"
+]
+WEEKDAY_NAMES = ["Δευ", "Τρι", "Τετ", "Πεμ", "Παρ", "Σαβ", "Κυρ"]
+
+
+class ShiftCalendarGrid(ctk.CTkFrame):
+    """Πλέγμα ημερολογίου μήνα με τους τεχνικούς κάθε ημέρας"""
+
+    ROWS = 6
+
+    def __init__(self, parent):
+        super().__init__(parent, fg_color="transparent")
+        self.theme = theme_config.get_current_theme()
+
+        for col in range(7):
+            self.grid_columnconfigure(col, weight=1, uniform="day")
+            header = ctk.CTkLabel(
+                self,
+                text=WEEKDAY_NAMES[col],
+                font=theme_config.get_font("body", "bold"),
+                text_color=self.theme["text_secondary"]
+            )
+            header.grid(row=0, column=col, pady=(0, 4))
+
+        # Σταθερά κελιά: (frame, day_label, names_label)
+        self.cells = []
+        for row in range(self.ROWS):
+            self.grid_rowconfigure(row + 1, weight=1, uniform="week")
+            for col in range(7):
+                cell = ctk.CTkFrame(
+                    self,
+                    corner_radius=6,
+                    fg_color=self.theme["card_bg"],
+                    border_color=self.theme["card_border"],
+                    border_width=1
+                )
+                cell.grid(row=row + 1, column=col, sticky="nsew", padx=2, pady=2)
+
+                day_label = ctk.CTkLabel(cell, text="", font=theme_config.get_font("small", "bold"),
+                                         anchor="w")
+                day_label.pack(fill="x", padx=6, pady=(2, 0))
+
+                names_label = ctk.CTkLabel(cell, text="", font=theme_config.get_font("tiny"),
+                                           justify="left", anchor="nw",
+                                           text_color=self.theme["text_primary"])
+                names_label.pack(fill="both", expand=True, padx=6, pady=(0, 4))
+
+                self.cells.append((cell, day_label, names_label))
+
+    def show_month(self, roster):
+        """
+        Γέμισμα του πλέγματος από το αποτέλεσμα του get_roster_month.
+        Χωρίς πρόσβαση σε database.
+        """
+        year, month = roster['year'], roster['month']
+        days = roster['days']
+        today = date.today().strftime('%Y-%m-%d')
+
+        first_weekday, n_days = calendar.monthrange(year, month)
+
+        for index, (cell, day_label, names_label) in enumerate(self.cells):
+            day = index - first_weekday + 1
+            if not 1 <= day <= n_days:
+                cell.configure(fg_color="transparent", border_width=0)
+                day_label.configure(text="")
+                names_label.configure(text="")
+                continue
+
+            key = f"{year:04d}-{month:02d}-{day:02d}"
+            entries = days.get(key, [])
+            is_today = key == today
+
+            cell.configure(
+                fg_color=self.theme["card_bg"],
+                border_width=2 if is_today else 1,
+                border_color=self.theme["accent_blue"] if is_today else self.theme["card_border"]
+            )
+            day_label.configure(
+                text=str(day),
+                text_color=self.theme["accent_blue"] if is_today else self.theme["text_secondary"]
+            )
+            names_label.configure(
+                text="\n".join(f"{e['technician_name']} ({e['group_name']})" for e in entries)
+            )
+
+
+class ShiftRosterView(ctk.CTkFrame):
+    """Προβολή προγράμματος βαρδιών με πλοήγηση μηνών"""
+
+    def __init__(self, parent):
+        super().__init__(parent, fg_color="transparent")
+        self.parent = parent
+        self.theme = theme_config.get_current_theme()
+
+        now = datetime.now()
+        self.year = now.year
+        self.month = now.month
+
+        self.pack(fill="both", expand=True, padx=20, pady=10)
+
+        # Header
+        header_frame = ctk.CTkFrame(self, corner_radius=10, fg_color=self.theme["bg_secondary"])
+        header_frame.pack(fill="x", pady=(0, 10))
+
+        title = ctk.CTkLabel(
+            header_frame,
+            text="📅 Πρόγραμμα Βαρδιών",
+            font=theme_config.get_font("title", "bold"),
+            text_color=self.theme["accent_blue"]
+        )
+        title.pack(side="left", padx=15, pady=10)
+
+        generate_btn = ctk.CTkButton(
+            header_frame,
+            text="⚙️ Δημιουργία Προγράμματος",
+            command=self.generate,
+            width=200,
+            height=36,
+            **theme_config.get_button_style("success")
+        )
+        generate_btn.pack(side="right", padx=15)
+
+        next_btn = ctk.CTkButton(header_frame, text="▶", command=lambda: self.change_month(1),
+                                 width=40, height=36, **theme_config.get_button_style("primary"))
+        next_btn.pack(side="right", padx=(0, 15))
+
+        self.month_label = ctk.CTkLabel(header_frame, text="", width=180,
+                                        font=theme_config.get_font("heading", "bold"))
+        self.month_label.pack(side="right", padx=5)
+
+        prev_btn = ctk.CTkButton(header_frame, text="◀", command=lambda: self.change_month(-1),
+                                 width=40, height=36, **theme_config.get_button_style("primary"))
+        prev_btn.pack(side="right", padx=5)
+
+        self.status_label = ctk.CTkLabel(self, text="", font=theme_config.get_font("small"),
+                                         text_color=self.theme["text_secondary"])
+        self.status_label.pack(fill="x", pady=(0, 5))
+
+        self.calendar_grid = ShiftCalendarGrid(self)
+        self.calendar_grid.pack(fill="both", expand=True)
+
+        self.load_month()
+
+    def change_month(self, delta):
+        """Μετάβαση στον προηγούμενο/επόμενο μήνα"""
+        month_index = self.year * 12 + (self.month - 1) + delta
+        self.year, self.month = divmod(month_index, 12)
+        self.month += 1
+        self.load_month()
+
+    def load_month(self):
+        """Φόρτωση μήνα (ένα query) και ανανέωση του πλέγματος"""
+        self.month_label.configure(text=f"{MONTH_NAMES[self.month]} {self.year}")
+
+        roster = shift_scheduler.get_roster_month(self.year, self.month)
+        self.calendar_grid.show_month(roster)
+
+        if not roster['exists']:
+            self.status_label.configure(
+                text="Δεν υπάρχει πρόγραμμα για αυτόν τον μήνα - πατήστε «Δημιουργία Προγράμματος»",
+                text_color=self.theme["text_secondary"]
+            )
+        elif roster['uncovered']:
+            self.status_label.configure(
+                text=f"⚠️ {roster['uncovered']} ακάλυπτες θέσεις - προσθέστε τεχνικούς ή χαλαρώστε τους περιορισμούς",
+                text_color=self.theme["accent_orange"]
+            )
+        else:
+            self.status_label.configure(
+                text="✅ Πλήρης κάλυψη όλων των ομάδων",
+                text_color=self.theme["accent_green"]
+            )
+
+    def generate(self):
+        """Δημιουργία (ή αντικατάσταση) του προγράμματος του μήνα"""
+        current = shift_scheduler.get_roster_month(self.year, self.month)
+        if current['exists'] and not custom_dialogs.ask_yes_no(
+                "Αντικατάσταση Προγράμματος",
+                f"Υπάρχει ήδη πρόγραμμα για {MONTH_NAMES[self.month]} {self.year}.\n\nΑντικατάσταση;",
+                parent=self
+        ):
+            return
+
+        try:
+            shift_scheduler.sync_technicians()
+            shift_scheduler.generate_roster(self.year, self.month)
+        except database.ValidationError as e:
+            custom_dialogs.show_error("Σφάλμα", str(e), parent=self)
+            return
+        except Exception as e:
+            custom_dialogs.show_error("Σφάλμα", f"Αποτυχία δημιουργίας προγράμματος:\n{e}", parent=self)
+            return
+
+        self.load_month()
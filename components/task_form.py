@@ -9,7 +9,7 @@ Extracted από ui_components.py για καλύτερη οργάνωση.
 
 import customtkinter as ctk
 from datetime import datetime
-import database_refactored as database
+from api_client import db
 import theme_config
 import custom_dialogs
 import utils_refactored
@@ -97,7 +97,7 @@ class TaskForm(ctk.CTkFrame):
 
         # Get locations from database
         try:
-            locations = database.get_all_locations()
+            locations = db.get_all_locations()
             location_names = [loc['name'] for loc in locations]
             if not location_names:
                 location_names = ["Δεν υπάρχουν τοποθεσίες"]
@@ -128,7 +128,7 @@ class TaskForm(ctk.CTkFrame):
             font=theme_config.get_font("body", "bold")
         ).grid(row=2, column=0, sticky="w", padx=(10, 5), pady=(10, 5))
 
-        groups = database.get_all_groups()
+        groups = db.get_all_groups()
         self.groups_dict = {g['name']: g['id'] for g in groups}
 
         self.group_combo = ctk.CTkComboBox(
@@ -152,7 +152,7 @@ class TaskForm(ctk.CTkFrame):
             font=theme_config.get_font("body", "bold")
         ).grid(row=0, column=1, sticky="w", padx=(5, 10), pady=(10, 5))
 
-        task_types = database.get_all_task_types()
+        task_types = db.get_all_task_types()
         self.task_types_dict = {tt['name']: tt['id'] for tt in task_types}
 
         self.task_type_combo = ctk.CTkComboBox(
@@ -468,7 +468,7 @@ class TaskForm(ctk.CTkFrame):
             return
         
         # Παίρνουμε τις μονάδες της επιλεγμένης ομάδας
-        units = database.get_units_by_group(group_id)
+        units = db.get_units_by_group(group_id)
         self.units_dict = {u['name']: u['id'] for u in units}
         
         # Ενημέρωση dropdown
@@ -553,7 +553,7 @@ class TaskForm(ctk.CTkFrame):
             return
         
         # Παίρνουμε τα είδη του επιλεγμένου τύπου
-        items = database.get_task_items_by_type(type_id)
+        items = db.get_task_items_by_type(type_id)
         self.task_items_dict = {item['name']: item['id'] for item in items}
         
         # Ενημέρωση dropdown
@@ -571,7 +571,7 @@ class TaskForm(ctk.CTkFrame):
             return
         
         # Βρίσκουμε και ορίζουμε την ομάδα (θα trigger-άρει το cascade)
-        unit = database.get_unit_by_id(self.task_data['unit_id'])
+        unit = db.get_unit_by_id(self.task_data['unit_id'])
         if unit:
             for group_name, group_id in self.groups_dict.items():
                 if group_id == unit['group_id']:
@@ -700,39 +700,32 @@ class TaskForm(ctk.CTkFrame):
         try:
             if self.is_edit_mode:
                 # Update existing task
-                database.update_task(
+                update_args = (
                     self.task_data['id'],
                     unit_id, task_type_id, description, status, priority,
                     created_date, completed_date, None,
                     notes if notes else None, task_item_id, location
                 )
+                try:
+                    db.update_task(*update_args, base=self.task_data)
+                except db.ConflictError as conflict:
+                    # Άλλος χρήστης άλλαξε τα ίδια πεδία - ρωτάμε πριν την αντικατάσταση
+                    if not custom_dialogs.ask_yes_no(
+                            "Σύγκρουση αλλαγών",
+                            f"{conflict}\n\nΑντικατάσταση με τις δικές σας τιμές;"
+                    ):
+                        return
+                    db.update_task(*update_args, base=conflict.current)
                 
                 # ═══ CHAIN SYNC ═══
                 # If we're in a chain AND we're the last task, sync ALL
                 if self.chain_info and self.is_last_in_chain:
-                    try:
-                        full_chain = utils_refactored.get_full_task_chain(self.task_data['id'])
-                        
-                        # Update ALL other tasks in chain to same status
-                        conn = database.get_connection()
-                        cursor = conn.cursor()
-                        
-                        for task in full_chain:
-                            if task['id'] != self.task_data['id']:  # Skip current
-                                cursor.execute(
-                                    "UPDATE tasks SET status = ?, completed_date = ? WHERE id = ?",
-                                    (status, completed_date, task['id'])
-                                )
-                        
-                        conn.commit()
-                        conn.close()
-                    except Exception as e:
-                        print(f"Chain sync warning: {e}")
-                
+                    db.sync_chain_status(self.task_data['id'], status, completed_date)
+
                 custom_dialogs.show_success("Επιτυχία", "Η εργασία ενημερώθηκε με επιτυχία!")
             else:
                 # Insert new task
-                database.add_task(
+                db.add_task(
                     unit_id, task_type_id, description, status, priority,
                     created_date, completed_date, None,
                     notes if notes else None, task_item_id, location
@@ -759,7 +752,7 @@ class TaskForm(ctk.CTkFrame):
 
         if result:
             try:
-                database.delete_task(self.task_data['id'])
+                db.delete_task(self.task_data['id'])
                 custom_dialogs.show_success("Επιτυχία", "Η εργασία διαγράφηκε!")
                 self.on_save_callback()
             except Exception as e:
@@ -927,14 +920,14 @@ class TaskForm(ctk.CTkFrame):
         visited_children = set()
 
         # Get all tasks
-        all_tasks = database.get_all_tasks()
+        all_tasks = db.get_all_tasks()
         task_dict = {t['id']: t for t in all_tasks}
 
         def get_parents(tid):
             if tid in visited_parents:
                 return
             visited_parents.add(tid)
-            rels = database.get_related_tasks(tid)
+            rels = db.get_related_tasks(tid)
             for parent in rels['parents']:
                 parent_id = parent['id']
                 if parent_id not in [c['id'] for c in chain]:
@@ -945,7 +938,7 @@ class TaskForm(ctk.CTkFrame):
             if tid in visited_children:
                 return
             visited_children.add(tid)
-            rels = database.get_related_tasks(tid)
+            rels = db.get_related_tasks(tid)
             for child in rels['children']:
                 child_id = child['id']
                 if child_id not in [c['id'] for c in chain]:
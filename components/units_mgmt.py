@@ -9,7 +9,7 @@ Extracted από ui_components.py για καλύτερη οργάνωση.
 
 import customtkinter as ctk
 from datetime import datetime
-import database_refactored as database
+from api_client import db
 import theme_config
 import custom_dialogs
 import utils_refactored
@@ -89,7 +89,7 @@ class UnitsManagement(ctk.CTkFrame):
         scrollable.pack(fill="both", expand=True, padx=10, pady=10)
 
         # Παίρνουμε όλες τις ομάδες
-        groups = database.get_all_groups()
+        groups = db.get_all_groups()
 
         if not groups:
             ctk.CTkLabel(
@@ -116,7 +116,7 @@ class UnitsManagement(ctk.CTkFrame):
         group_container.pack(fill="x", pady=5, padx=5)
 
         # Παίρνουμε τις μονάδες της ομάδας
-        units = database.get_units_by_group(group['id'])
+        units = db.get_units_by_group(group['id'])
         units_count = len(units)
 
         # Header της ομάδας (clickable)
@@ -272,7 +272,7 @@ class UnitsManagement(ctk.CTkFrame):
         scrollable = ctk.CTkScrollableFrame(parent)
         scrollable.pack(fill="both", expand=True, padx=10, pady=10)
 
-        groups = database.get_all_groups()
+        groups = db.get_all_groups()
 
         if not groups:
             ctk.CTkLabel(
@@ -328,7 +328,7 @@ class UnitsManagement(ctk.CTkFrame):
                 desc_label.pack(anchor="w", pady=(5, 0))
 
             # Units count
-            units = database.get_units_by_group(group['id'])
+            units = db.get_units_by_group(group['id'])
             count_label = ctk.CTkLabel(
                 content_frame,
                 text=f"🔧 {len(units)} μονάδες",
@@ -369,7 +369,7 @@ class UnitsManagement(ctk.CTkFrame):
         # Ομάδα
         ctk.CTkLabel(dialog, text="Ομάδα:", font=theme_config.get_font("body", "bold")).pack(anchor="w", padx=20,
                                                                                              pady=(10, 5))
-        groups = database.get_all_groups()
+        groups = db.get_all_groups()
         groups_dict = {g['name']: g['id'] for g in groups}
         group_combo = ctk.CTkComboBox(dialog, values=list(groups_dict.keys()), width=450, state="readonly",
                                       font=theme_config.get_font("input"))
@@ -394,7 +394,7 @@ class UnitsManagement(ctk.CTkFrame):
         
         # Get locations for dropdown
         try:
-            locations = database.get_all_locations()
+            locations = db.get_all_locations()
             location_names = [loc['name'] for loc in locations]
         except:
             location_names = []
@@ -516,10 +516,19 @@ class UnitsManagement(ctk.CTkFrame):
 
             try:
                 if is_edit_mode:
-                    database.update_unit(unit_data['id'], name, group_id, location, model, notes, install_date)
+                    update_args = (unit_data['id'], name, group_id, location, model, notes, install_date)
+                    try:
+                        db.update_unit(*update_args, base=unit_data)
+                    except db.ConflictError as conflict:
+                        if not custom_dialogs.ask_yes_no(
+                                "Σύγκρουση αλλαγών",
+                                f"{conflict}\n\nΑντικατάσταση με τις δικές σας τιμές;"
+                        ):
+                            return
+                        db.update_unit(*update_args, base=conflict.current)
                     custom_dialogs.show_success("Επιτυχία", "Η μονάδα ενημερώθηκε με επιτυχία!")
                 else:
-                    database.add_unit(name, group_id, location, model, notes, install_date)
+                    db.add_unit(name, group_id, location, model, notes, install_date)
                     custom_dialogs.show_success("Επιτυχία", "Η μονάδα προστέθηκε με επιτυχία!")
                 dialog.destroy()
                 self.refresh_callback()
@@ -536,7 +545,7 @@ class UnitsManagement(ctk.CTkFrame):
                 result = custom_dialogs.ask_yes_no("Επιβεβαίωση", "Θέλετε να διαγράψετε αυτή τη μονάδα;")
                 if result:
                     try:
-                        database.soft_delete_unit(unit_data['id'])
+                        db.soft_delete_unit(unit_data['id'])
                         custom_dialogs.show_success("Επιτυχία", "Η μονάδα διαγράφηκε με επιτυχία.")
                         dialog.destroy()
                         self.refresh_callback()
@@ -594,7 +603,7 @@ class UnitsManagement(ctk.CTkFrame):
 
             try:
                 if is_edit_mode:
-                    result = database.update_group(group_data['id'], name, desc)
+                    result = db.update_group(group_data['id'], name, desc)
                     if result:
                         custom_dialogs.show_success("Επιτυχία", "Η ομάδα ενημερώθηκε με επιτυχία!")
                         dialog.destroy()
@@ -603,7 +612,7 @@ class UnitsManagement(ctk.CTkFrame):
                     else:
                         custom_dialogs.show_error("Σφάλμα", "Το όνομα υπάρχει ήδη!")
                 else:
-                    result = database.add_group(name, desc)
+                    result = db.add_group(name, desc)
                     if result:
                         custom_dialogs.show_success("Επιτυχία", "Η ομάδα προστέθηκε με επιτυχία!")
                         dialog.destroy()
@@ -622,7 +631,7 @@ class UnitsManagement(ctk.CTkFrame):
             if custom_dialogs.ask_yes_no("Διαγραφή",
                                    "Θέλετε να διαγράψετε την ομάδα και τις μονάδες της; Η ενέργεια είναι αναστρέψιμη από τον κάδο."):
                 try:
-                    res = database.soft_delete_group(group_data['id'])
+                    res = db.soft_delete_group(group_data['id'])
                     # soft_delete_group returns True on success
                     if res:
                         custom_dialogs.show_success("Επιτυχία", "Η ομάδα διαγράφηκε!")
@@ -718,7 +727,7 @@ class UnitsManagement(ctk.CTkFrame):
                      text_color=theme["accent_blue"]).pack(pady=20)
 
         # Ομάδες Κάδου
-        groups = database.get_deleted_groups()
+        groups = db.get_deleted_groups()
         if groups:
             ctk.CTkLabel(parent, text="Διαγραμμένες Ομάδες", font=theme_config.get_font("body", "bold"),
                          text_color=theme["accent_orange"]).pack(anchor="w", padx=20, pady=(10, 5))
@@ -745,7 +754,7 @@ class UnitsManagement(ctk.CTkFrame):
                          text_color=theme["text_disabled"]).pack(anchor="w", padx=26, pady=0)
 
         # Μονάδες Κάδου
-        units = database.get_deleted_units()
+        units = db.get_deleted_units()
         if units:
             ctk.CTkLabel(parent, text="Διαγραμμένες Μονάδες", font=theme_config.get_font("body", "bold"),
                          text_color=theme["accent_orange"]).pack(anchor="w", padx=20, pady=(26, 7))
@@ -773,14 +782,14 @@ class UnitsManagement(ctk.CTkFrame):
                          text_color=theme["text_disabled"]).pack(anchor="w", padx=26, pady=(7, 0))
 
     def restore_unit_ui(self, unit_id):
-        database.restore_unit(unit_id)
+        db.restore_unit(unit_id)
         # from tkinter import messagebox  # ← Replaced with custom dialogs
         import custom_dialogs
         custom_dialogs.show_success("Επαναφορά", "Η μονάδα επανήλθε από τον κάδο!")
         self.refresh_ui()
 
     def restore_group_ui(self, group_id):
-        database.restore_group(group_id)
+        db.restore_group(group_id)
         # from tkinter import messagebox  # ← Replaced with custom dialogs
         import custom_dialogs
         custom_dialogs.show_success("Επαναφορά", "Η ομάδα και οι μονάδες της επανήλθαν από τον κάδο!")
@@ -794,7 +803,7 @@ class UnitsManagement(ctk.CTkFrame):
         )
         if result:
             try:
-                database.permanent_delete_unit(unit_id)
+                db.permanent_delete_unit(unit_id)
                 custom_dialogs.show_success("Επιτυχία", "Η μονάδα διαγράφηκε οριστικά.")
                 self.create_recycle_tab(self.tab4)
             except Exception as e:
@@ -808,7 +817,7 @@ class UnitsManagement(ctk.CTkFrame):
         )
         if result:
             try:
-                database.permanent_delete_group(group_id)
+                db.permanent_delete_group(group_id)
                 custom_dialogs.show_success("Επιτυχία", "Η ομάδα διαγράφηκε οριστικά.")
                 self.create_recycle_tab(self.tab4)
             except Exception as e:
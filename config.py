@@ -56,6 +56,10 @@ class UIConfig:
     
     # Chain preview
     CHAIN_PREVIEW_HEIGHT: int = 300
+
+    # Αναζήτηση ιστορικού (incremental_search)
+    SEARCH_FRAME_MS: float = 16                  # αποτελέσματα μέσα σε ένα frame
+    SEARCH_DEBOUNCE_MAX_MS: float = 500          # αναμονή για ακριβά queries
     
     # Padding values
     PADDING_TINY: int = 3
@@ -232,6 +236,26 @@ class DatabaseConfig:
     DELETED: int = 1
     PERMANENTLY_DELETED: int = 2
 
+    # Αρχειοθέτηση ολοκληρωμένων αλυσίδων (archive_service)
+    ARCHIVE_AFTER_DAYS: int = 730
+    ARCHIVE_BATCH_SIZE: int = 200
+
+    # Συντήρηση στον νεκρό χρόνο (db_maintenance)
+    MAINTENANCE_IDLE_AFTER_S: float = 60         # χωρίς input πριν ξεκινήσει
+    MAINTENANCE_STEP_BUDGET_MS: float = 5        # μέγιστη διάρκεια βήματος στο UI thread
+    MAINTENANCE_INTERVAL_HOURS: float = 24       # το πολύ ένας κύκλος ανά ...
+    MAINTENANCE_SNAPSHOT_DAYS: float = 7         # compacted snapshot (VACUUM INTO) ανά ...
+    MAINTENANCE_CONVERT_MAX_MB: float = 50       # αυτόματη μετατροπή σε INCREMENTAL ως ...
+
+    # Αναγνώσεις από αντίγραφο στη μνήμη (memory_replica)
+    READ_REPLICA: bool = False
+    READ_REPLICA_MAX_MB: float = 256             # μεγαλύτερη database μένει στον δίσκο
+    READ_REPLICA_RECONCILE_S: float = 30         # σύγκριση με τον δίσκο ανά ...
+
+    # Cache αποτελεσμάτων filter_tasks / lookups εργασιών (query_cache)
+    QUERY_CACHE_MAX_MB: float = 256              # εκτίμηση μεγέθους των αποτελεσμάτων
+    QUERY_CACHE_MAX_ENTRIES: int = 64
+
 
 # ═══════════════════════════════════════════════════════════════════════════
 # VALIDATION RULES
@@ -309,6 +333,39 @@ class TaskPriority:
         }
 
 
+class LocationKind:
+    """Επίπεδα ιεραρχίας τοποθεσιών (locations.kind)"""
+    SITE = "site"
+    BUILDING = "building"
+    WING = "wing"
+    FLOOR = "floor"
+    ROOM = "room"
+
+    @classmethod
+    def all(cls):
+        return [cls.SITE, cls.BUILDING, cls.WING, cls.FLOOR, cls.ROOM]
+
+    @classmethod
+    def display_names(cls):
+        return {
+            cls.SITE: "Εγκατάσταση",
+            cls.BUILDING: "Κτίριο",
+            cls.WING: "Πτέρυγα",
+            cls.FLOOR: "Όροφος",
+            cls.ROOM: "Χώρος"
+        }
+
+    @classmethod
+    def icons(cls):
+        return {
+            cls.SITE: "🏥",
+            cls.BUILDING: "🏢",
+            cls.WING: "🏬",
+            cls.FLOOR: "🪜",
+            cls.ROOM: "🚪"
+        }
+
+
 # ═══════════════════════════════════════════════════════════════════════════
 # USAGE EXAMPLES
 # ═══════════════════════════════════════════════════════════════════════════
@@ -0,0 +1,452 @@
+"""
+Consistency Checker
+===================
+
+Έλεγχος ακεραιότητας της database με set-based SQL και (προαιρετικά)
+επιδιόρθωση σε ΕΝΑ transaction.
+
+Το σχήμα δηλώνει FOREIGN KEYs αλλά το SQLite δεν τα επιβάλλει
+(PRAGMA foreign_keys είναι OFF), οι αλυσίδες είναι απλές γραμμές του
+task_relationships και τα location_id / location_closure είναι παράγωγα
+δεδομένα - όλα μπορούν να αποκλίνουν από εξωτερικά εργαλεία, παλιές
+εκδόσεις ή διακοπτόμενες εγγραφές.
+
+Features:
+---------
+- ΕΝΑ πέρασμα ανά πίνακα: όλοι οι έλεγχοι γραμμής ως SUM(συνθήκη) πάνω
+  σε LEFT JOINs στα primary keys - καμία φόρτωση γραμμών στην Python
+- Αλυσίδες: GROUP BY στα idx_rel_parent_task / idx_rel_child_task (covering)
+  για πολλαπλούς γονείς/παιδιά. Κάθε κύκλος περιέχει μία τουλάχιστον
+  σχέση αντίθετα στη χρονολογική σειρά, οπότε το recursive CTE των
+  κύκλων ξεκινά μόνο από αυτές (και δεν τρέχει καθόλου αν δεν υπάρχουν)
+- location_closure: σύγκριση με επαναϋπολογισμό από τα parent_id
+- Όλοι οι έλεγχοι σε ΕΝΑ read transaction (συνεπές snapshot)
+- Repair: BEGIN IMMEDIATE → set-based διορθώσεις → rebuild_chains στο
+  ίδιο transaction → επανέλεγχος → commit (rollback σε οποιοδήποτε σφάλμα)
+
+Τι ελέγχεται:
+-------------
+- εργασίες/μονάδες/είδη που δείχνουν σε ανύπαρκτη μονάδα/τύπο/είδος/ομάδα
+- location_id που δεν αντιστοιχεί στο κείμενο location
+- σημειώσεις μονάδας γραμμένες στο serial_number (παλιό bug του update_unit)
+- άκυρα is_deleted σε εργασίες και σχέσεις
+- ορφανές σχέσεις, σχέσεις με τον εαυτό, διπλές, μεταξύ μονάδων, ενεργές
+  σχέσεις προς διαγραμμένες εργασίες, πολλαπλοί γονείς/παιδιά, κύκλοι
+- τοποθεσίες με ανύπαρκτο γονέα, κύκλοι τοποθεσιών, λάθος location_closure
+
+Usage:
+------
+    import consistency_check
+
+    report = consistency_check.check_consistency()
+    print(report.format())
+
+    consistency_check.check_consistency(repair=True)
+"""
+
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+import chain_rebuild
+import database_refactored as database
+import logger_config
+
+logger = logger_config.get_logger(__name__)
+
+# Ονόματα εγγραφών-placeholder για ορφανές αναφορές (το ιστορικό δεν σβήνεται)
+RECOVERED_GROUP = "Ανακτημένες μονάδες"
+RECOVERED_DESCRIPTION = "Δημιουργήθηκε από τον έλεγχο συνέπειας"
+
+# Έλεγχοι (κλειδιά της αναφοράς) με τη σειρά εμφάνισης
+CHECK_LABELS = {
+    'task_orphan_unit': "Εργασίες με ανύπαρκτη μονάδα",
+    'task_orphan_type': "Εργασίες με ανύπαρκτο τύπο",
+    'task_orphan_item': "Εργασίες με ανύπαρκτο είδος",
+    'task_bad_flag': "Εργασίες με άκυρο is_deleted",
+    'task_location': "Εργασίες με location_id ≠ location",
+    'unit_orphan_group': "Μονάδες με ανύπαρκτη ομάδα",
+    'unit_location': "Μονάδες με location_id ≠ location",
+    'unit_serial_notes': "Μονάδες με τις σημειώσεις στο serial_number",
+    'item_orphan_type': "Είδη εργασιών με ανύπαρκτο τύπο",
+    'location_orphan_parent': "Τοποθεσίες με ανύπαρκτο γονέα",
+    'location_cycle': "Τοποθεσίες σε κύκλο",
+    'location_closure': "Τοποθεσίες με λάθος location_closure",
+    'edge_bad_flag': "Σχέσεις με άκυρο is_deleted",
+    'edge_dangling': "Σχέσεις προς ανύπαρκτες εργασίες",
+    'edge_self_loop': "Σχέσεις εργασίας με τον εαυτό της",
+    'edge_duplicate': "Ζεύγη με διπλές σχέσεις",
+    'edge_cross_unit': "Ενεργές σχέσεις μεταξύ διαφορετικών μονάδων",
+    'edge_inactive_endpoint': "Ενεργές σχέσεις προς διαγραμμένες εργασίες",
+    'edge_backward': "Ενεργές σχέσεις αντίθετα στη χρονολογική σειρά",
+    'chain_multi_parent': "Εργασίες με πολλούς γονείς στην αλυσίδα",
+    'chain_multi_child': "Εργασίες με πολλά παιδιά στην αλυσίδα",
+    'chain_cycle': "Κύκλοι στις αλυσίδες",
+}
+
+# Προβλήματα που διορθώνει το chain_rebuild (όχι ξεχωριστό SQL)
+CHAIN_CHECKS = ('task_bad_flag', 'edge_bad_flag', 'edge_dangling', 'edge_self_loop', 'edge_duplicate',
+                'edge_cross_unit', 'edge_inactive_endpoint', 'edge_backward', 'chain_multi_parent',
+                'chain_multi_child', 'chain_cycle')
+
+
+@dataclass
+class ConsistencyReport:
+    """Αποτέλεσμα check_consistency"""
+    repair: bool
+    rows: Counter = field(default_factory=Counter)
+    found: Counter = field(default_factory=Counter)
+    samples: Dict[str, List] = field(default_factory=dict)
+    repaired: Counter = field(default_factory=Counter)
+    chain_changes: int = 0
+    remaining: Counter = field(default_factory=Counter)
+    elapsed: float = 0.0
+
+    @property
+    def total_found(self) -> int:
+        return sum(self.found.values())
+
+    @property
+    def total_remaining(self) -> int:
+        return sum(self.remaining.values())
+
+    def format(self) -> str:
+        """Αναφορά κειμένου (για εκτύπωση ή εμφάνιση σε dialog)"""
+        mode = "με επιδιόρθωση" if self.repair else "μόνο έλεγχος"
+        lines = [
+            f"Έλεγχος συνέπειας ({mode})",
+            "  Γραμμές: " + ", ".join(f"{table} {count}" for table, count in self.rows.items()),
+        ]
+        for key, label in CHECK_LABELS.items():
+            if not self.found[key]:
+                continue
+            line = f"  - {label}: {self.found[key]}"
+            if self.samples.get(key):
+                line += f"  (π.χ. {', '.join(str(s) for s in self.samples[key])})"
+            lines.append(line)
+            if self.repair and self.repaired[key]:
+                lines.append(f"      διορθώθηκαν γραμμές: {self.repaired[key]}")
+
+        if not self.total_found:
+            lines.append("  ✅ Η database είναι συνεπής")
+        elif self.repair:
+            if self.chain_changes:
+                lines.append(f"  Αλλαγές αλυσίδων (rebuild_chains): {self.chain_changes}")
+            if self.total_remaining:
+                lines.append(f"  ⚠️ Παραμένουν μετά την επιδιόρθωση: {self.total_remaining}")
+                lines.extend(f"    - {CHECK_LABELS[key]}: {count}"
+                             for key, count in self.remaining.items() if count)
+            else:
+                lines.append("  ✅ Όλα διορθώθηκαν (ένα transaction)")
+        else:
+            lines.append(f"  Σύνολο προβλημάτων: {self.total_found} - επιδιόρθωση με repair=True")
+        lines.append(f"  Χρόνος: {self.elapsed:.2f}s")
+        return "\n".join(lines)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# CHECKS
+# ═══════════════════════════════════════════════════════════════════════════
+
+# Πέρασμα ανά πίνακα: (πίνακας, FROM, στήλη δείγματος, [(κλειδί, συνθήκη γραμμής)])
+# Κάθε LEFT JOIN είναι lookup σε primary key ή UNIQUE index
+_ROW_PASSES = [
+    ('tasks', """
+        tasks t
+            LEFT JOIN units u ON u.id = t.unit_id
+            LEFT JOIN task_types tt ON tt.id = t.task_type_id
+            LEFT JOIN task_items ti ON ti.id = t.task_item_id
+            LEFT JOIN locations l ON l.name = NULLIF(TRIM(t.location), '')
+    """, 't.id', [
+        ('task_orphan_unit', "u.id IS NULL"),
+        ('task_orphan_type', "tt.id IS NULL"),
+        ('task_orphan_item', "t.task_item_id IS NOT NULL AND ti.id IS NULL"),
+        ('task_bad_flag', "t.is_deleted IS NULL OR t.is_deleted NOT IN (0, 1)"),
+        ('task_location', "t.location_id IS NOT l.id"),
+    ]),
+    ('units', """
+        units u
+            LEFT JOIN groups g ON g.id = u.group_id
+            LEFT JOIN locations l ON l.name = NULLIF(TRIM(u.location), '')
+    """, 'u.id', [
+        ('unit_orphan_group', "g.id IS NULL"),
+        ('unit_location', "u.location_id IS NOT l.id"),
+        ('unit_serial_notes', "TRIM(COALESCE(u.serial_number, '')) != '' AND u.serial_number = u.notes"),
+    ]),
+    ('task_items', """
+        task_items ti
+            LEFT JOIN task_types tt ON tt.id = ti.task_type_id
+    """, 'ti.id', [
+        ('item_orphan_type', "tt.id IS NULL"),
+    ]),
+    ('locations', """
+        locations l
+            LEFT JOIN locations p ON p.id = l.parent_id
+    """, 'l.id', [
+        ('location_orphan_parent', "l.parent_id IS NOT NULL AND p.id IS NULL"),
+    ]),
+    ('task_relationships', """
+        task_relationships tr
+            LEFT JOIN tasks p ON p.id = tr.parent_task_id
+            LEFT JOIN tasks c ON c.id = tr.child_task_id
+    """, 'tr.id', [
+        ('edge_bad_flag', "tr.is_deleted IS NULL OR tr.is_deleted NOT IN (0, 1, 2)"),
+        ('edge_dangling', "p.id IS NULL OR c.id IS NULL"),
+        ('edge_self_loop', "tr.parent_task_id = tr.child_task_id"),
+        ('edge_cross_unit', "tr.is_deleted = 0 AND p.unit_id != c.unit_id"),
+        ('edge_inactive_endpoint', "tr.is_deleted = 0 AND (p.is_deleted != 0 OR c.is_deleted != 0)"),
+        ('edge_backward', "tr.is_deleted = 0 AND (p.created_date, p.created_at, p.id) "
+                          "> (c.created_date, c.created_at, c.id)"),
+    ]),
+]
+
+# Ο κανονικός location_closure από τα parent_id. Το όριο βάθους τερματίζει
+# την αναδρομή ακόμα και αν υπάρχει κύκλος (που το trigger δεν επιτρέπει)
+_EXPECTED_CLOSURE = """
+    WITH RECURSIVE tree(ancestor_id, descendant_id, depth) AS (
+        SELECT id, id, 0 FROM locations
+        UNION ALL
+        SELECT t.ancestor_id, l.id, t.depth + 1
+        FROM tree t JOIN locations l ON l.parent_id = t.descendant_id
+        WHERE t.depth < (SELECT COUNT(*) FROM locations)
+    )
+"""
+
+# Έλεγχοι συνόλου: query που επιστρέφει μία γραμμή ανά πρόβλημα
+_SET_CHECKS = {
+    'edge_duplicate': """
+        SELECT parent_task_id || '→' || child_task_id
+        FROM task_relationships
+        GROUP BY parent_task_id, child_task_id
+        HAVING COUNT(*) > 1
+    """,
+    'chain_multi_parent': """
+        SELECT child_task_id FROM task_relationships WHERE is_deleted = 0
+        GROUP BY child_task_id HAVING COUNT(*) > 1
+    """,
+    'chain_multi_child': """
+        SELECT parent_task_id FROM task_relationships WHERE is_deleted = 0
+        GROUP BY parent_task_id HAVING COUNT(*) > 1
+    """,
+    # Περίπατος από κάθε σχέση αντίθετα στη σειρά: κύκλος αν φτάσει πίσω
+    # στον γονέα της. Μία γραμμή (η εργασία-γονέας) ανά τέτοια σχέση.
+    'chain_cycle': """
+        WITH RECURSIVE walk(origin, node) AS (
+            SELECT tr.parent_task_id, tr.child_task_id
+            FROM task_relationships tr
+                     JOIN tasks p ON p.id = tr.parent_task_id
+                     JOIN tasks c ON c.id = tr.child_task_id
+            WHERE tr.is_deleted = 0 AND tr.parent_task_id != tr.child_task_id
+              AND (p.created_date, p.created_at, p.id) > (c.created_date, c.created_at, c.id)
+            UNION
+            SELECT w.origin, r.child_task_id
+            FROM walk w JOIN task_relationships r ON r.parent_task_id = w.node
+            WHERE r.is_deleted = 0 AND w.node != w.origin
+        )
+        SELECT DISTINCT origin FROM walk WHERE node = origin
+    """,
+    'location_cycle': _EXPECTED_CLOSURE + """
+        SELECT DISTINCT ancestor_id FROM tree WHERE ancestor_id = descendant_id AND depth > 0
+    """,
+    'location_closure': _EXPECTED_CLOSURE + """
+        SELECT descendant_id FROM (SELECT ancestor_id, descendant_id, depth FROM tree
+                                   EXCEPT
+                                   SELECT ancestor_id, descendant_id, depth FROM location_closure)
+        UNION
+        SELECT descendant_id FROM (SELECT ancestor_id, descendant_id, depth FROM location_closure
+                                   EXCEPT
+                                   SELECT ancestor_id, descendant_id, depth FROM tree)
+    """,
+}
+
+
+# Έλεγχοι που τρέχουν μόνο αν βρέθηκε κάτι στον προαπαιτούμενο
+_PREREQUISITES = {'chain_cycle': 'edge_backward'}
+
+
+def _run_checks(cursor, report, sample_size):
+    """Όλοι οι έλεγχοι → Counter {κλειδί: πλήθος} (+ δείγματα στο report)"""
+    found = Counter()
+    for table, source, sample_column, checks in _ROW_PASSES:
+        sums = ", ".join(f"COALESCE(SUM({condition}), 0)" for _, condition in checks)
+        cursor.execute(f"SELECT COUNT(*), {sums} FROM {source}")
+        row = cursor.fetchone()
+        report.rows[table] = row[0]
+        for (key, _), count in zip(checks, row[1:]):
+            found[key] = count
+
+        # Δείγματα: ΕΝΑ ακόμα πέρασμα για όλους τους έλεγχους του πίνακα,
+        # που σταματά μόλις γεμίσουν
+        failing = [(key, condition) for key, condition in checks if found[key]]
+        if not failing or not sample_size:
+            continue
+        samples = {key: [] for key, _ in failing}
+        flags = ", ".join(condition for _, condition in failing)
+        where = " OR ".join(f"({condition})" for _, condition in failing)
+        cursor.execute(f"SELECT {sample_column}, {flags} FROM {source} WHERE {where}")
+        for sample_id, *matches in cursor:
+            for (key, _), matched in zip(failing, matches):
+                if matched and len(samples[key]) < sample_size:
+                    samples[key].append(sample_id)
+            if all(len(ids) >= min(sample_size, found[key]) for key, ids in samples.items()):
+                break
+        report.samples.update(samples)
+
+    for key, sql in _SET_CHECKS.items():
+        if key in _PREREQUISITES and not found[_PREREQUISITES[key]]:
+            found[key] = 0
+            continue
+        # Μία γραμμή ανά πρόβλημα: πλήθος και δείγματα από ΜΙΑ εκτέλεση
+        cursor.execute(sql)
+        problems = [row[0] for row in cursor.fetchall()]
+        found[key] = len(problems)
+        if problems and sample_size:
+            report.samples[key] = problems[:sample_size]
+    return found
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# REPAIR
+# ═══════════════════════════════════════════════════════════════════════════
+
+def _location_repair(table):
+    """Τοποθεσίες που λείπουν + location_id από το κείμενο (όπως τα triggers)"""
+    return [f"""
+        INSERT OR IGNORE INTO locations (name, description)
+        SELECT DISTINCT TRIM(location), '' FROM {table}
+        WHERE TRIM(COALESCE(location, '')) != ''
+    """, f"""
+        UPDATE {table}
+        SET location_id = (SELECT id FROM locations WHERE name = NULLIF(TRIM({table}.location), ''))
+        WHERE location_id IS NOT (SELECT id FROM locations WHERE name = NULLIF(TRIM({table}.location), ''))
+    """]
+
+
+# Set-based διορθώσεις ανά έλεγχο, με τη σειρά εκτέλεσης. Οι ορφανές
+# αναφορές αποκτούν ανενεργή εγγραφή-placeholder αντί να σβηστεί ιστορικό.
+_REPAIRS = [
+    ('unit_orphan_group', ["""
+        INSERT OR IGNORE INTO groups (id, name, description)
+        SELECT DISTINCT u.group_id, 'Ανακτημένη ομάδα #' || u.group_id, :description
+        FROM units u WHERE NOT EXISTS (SELECT 1 FROM groups g WHERE g.id = u.group_id)
+    """]),
+    ('task_orphan_unit', ["""
+        INSERT OR IGNORE INTO groups (name, description) VALUES (:group, :description)
+    """, """
+        INSERT INTO units (id, name, group_id, is_active)
+        SELECT DISTINCT t.unit_id, 'Ανακτημένη μονάδα #' || t.unit_id,
+                        (SELECT id FROM groups WHERE name = :group), 0
+        FROM tasks t WHERE NOT EXISTS (SELECT 1 FROM units u WHERE u.id = t.unit_id)
+    """]),
+    ('task_orphan_type', ["""
+        INSERT OR IGNORE INTO task_types (id, name, description, is_predefined)
+        SELECT DISTINCT t.task_type_id, 'Ανακτημένος τύπος #' || t.task_type_id, :description, 0
+        FROM tasks t WHERE NOT EXISTS (SELECT 1 FROM task_types tt WHERE tt.id = t.task_type_id)
+    """]),
+    ('item_orphan_type', ["""
+        INSERT OR IGNORE INTO task_types (id, name, description, is_predefined)
+        SELECT DISTINCT ti.task_type_id, 'Ανακτημένος τύπος #' || ti.task_type_id, :description, 0
+        FROM task_items ti WHERE NOT EXISTS (SELECT 1 FROM task_types tt WHERE tt.id = ti.task_type_id)
+    """]),
+    ('task_orphan_item', ["""
+        UPDATE tasks SET task_item_id = NULL
+        WHERE task_item_id IS NOT NULL
+          AND NOT EXISTS (SELECT 1 FROM task_items ti WHERE ti.id = tasks.task_item_id)
+    """]),
+    # NULL → 0 (η προεπιλογή της στήλης), άγνωστη τιμή → κάδος ανακύκλωσης
+    ('task_bad_flag', ["""
+        UPDATE tasks SET is_deleted = CASE WHEN is_deleted IS NULL THEN 0 ELSE 1 END
+        WHERE is_deleted IS NULL OR is_deleted NOT IN (0, 1)
+    """]),
+    ('unit_serial_notes', ["""
+        UPDATE units SET serial_number = NULL
+        WHERE TRIM(COALESCE(serial_number, '')) != '' AND serial_number = notes
+    """]),
+    ('task_location', _location_repair('tasks')),
+    ('unit_location', _location_repair('units')),
+    ('location_orphan_parent', ["""
+        UPDATE locations SET parent_id = NULL
+        WHERE parent_id IS NOT NULL AND NOT EXISTS (SELECT 1 FROM locations p WHERE p.id = locations.parent_id)
+    """]),
+    ('location_cycle', [f"""
+        UPDATE locations SET parent_id = NULL
+        WHERE id IN ({_SET_CHECKS['location_cycle']})
+    """]),
+    ('location_closure', ["DELETE FROM location_closure", f"""
+        INSERT INTO location_closure (ancestor_id, descendant_id, depth)
+        {_EXPECTED_CLOSURE}
+        SELECT ancestor_id, descendant_id, depth FROM tree
+    """]),
+    # NULL → 0 όπως το διαβάζει το chain_rebuild, άγνωστη τιμή → backup
+    ('edge_bad_flag', ["""
+        UPDATE task_relationships SET is_deleted = CASE WHEN is_deleted IS NULL THEN 0 ELSE 1 END
+        WHERE is_deleted IS NULL OR is_deleted NOT IN (0, 1, 2)
+    """]),
+]
+
+
+def _repair(conn, found, report):
+    cursor = conn.cursor()
+    params = {'group': RECOVERED_GROUP, 'description': RECOVERED_DESCRIPTION}
+    closure_dirty = False
+
+    for key, statements in _REPAIRS:
+        # Οι αλλαγές parent_id περνούν από το trigger μετακίνησης - ο
+        # closure ξαναχτίζεται ολόκληρος μετά από αυτές
+        if not found[key] and not (key == 'location_closure' and closure_dirty):
+            continue
+        for sql in statements:
+            cursor.execute(sql, {name: value for name, value in params.items() if f":{name}" in sql})
+            report.repaired[key] += max(cursor.rowcount, 0)
+        closure_dirty = closure_dirty or key in ('location_orphan_parent', 'location_cycle')
+        logger.info(f"Consistency repair {key}: {report.repaired[key]} row(s)")
+
+    # Οι αλυσίδες ΟΛΩΝ των ειδών ξαναχτίζονται μαζί, με ελάχιστο diff
+    if any(found[key] for key in CHAIN_CHECKS):
+        chain_report = chain_rebuild.rebuild_chains(conn=conn)
+        report.chain_changes = chain_report.total_changes
+
+
+def check_consistency(repair: bool = False, sample_size: int = 5) -> ConsistencyReport:
+    """
+    Έλεγχος (και προαιρετικά επιδιόρθωση) ακεραιότητας.
+
+    Args:
+        repair: Επιδιόρθωση σε ΕΝΑ transaction (commit μόνο αν όλα πετύχουν)
+        sample_size: Ενδεικτικά ids ανά πρόβλημα στην αναφορά (0 = κανένα)
+
+    Returns:
+        ConsistencyReport
+    """
+    started = time.perf_counter()
+    report = ConsistencyReport(repair=repair)
+
+    conn = database.get_connection()
+    cursor = conn.cursor()
+    try:
+        # Έλεγχος: ένα read snapshot. Repair: κλείδωμα εγγραφής ΠΡΙΝ τον
+        # έλεγχο - διορθώνεται ακριβώς η κατάσταση που μετρήθηκε
+        cursor.execute("BEGIN IMMEDIATE" if repair else "BEGIN")
+        report.found = _run_checks(cursor, report, sample_size)
+
+        if repair and report.total_found:
+            _repair(conn, report.found, report)
+            report.remaining = _run_checks(cursor, ConsistencyReport(repair=True), 0)
+            conn.commit()
+        else:
+            conn.rollback()
+
+    except Exception as e:
+        conn.rollback()
+        logger.error(f"❌ Consistency check failed: {e}", exc_info=True)
+        raise RuntimeError(f"Σφάλμα ελέγχου συνέπειας: {str(e)}")
+    finally:
+        conn.close()
+
+    report.elapsed = time.perf_counter() - started
+    logger.info(
+        f"Consistency check ({'repair' if repair else 'check'}): {report.total_found} issue(s), "
+        f"{report.total_remaining} remaining in {report.elapsed:.2f}s"
+    )
+    return report
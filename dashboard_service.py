@@ -0,0 +1,315 @@
+"""
+Dashboard Data Service
+======================
+
+Δεδομένα αρχικής οθόνης με σταθερό κόστος, ανεξάρτητα από το μέγεθος
+του πίνακα tasks.
+
+Features:
+---------
+- Πίνακας dashboard_counters (scope, key) → value, ενημερώνεται από
+  triggers σε κάθε INSERT/UPDATE/DELETE στα tasks και units
+- Μετρητές: εκκρεμείς/ολοκληρωμένες, ανά ημερομηνία (για "σήμερα"),
+  εκκρεμείς ανά ομάδα (μόνο ενεργών μονάδων, όπως το total_units),
+  εκκρεμείς ανά προτεραιότητα, ενεργές μονάδες
+- Όλοι οι μετρητές διαβάζονται με ΕΝΑ query στο primary key
+- Εκκρεμείς εργασίες από index (status, is_deleted, created_at) - όχι
+  φιλτράρισμα των "πρόσφατων" στην Python
+
+Usage:
+------
+    import dashboard_service
+
+    counters = dashboard_service.get_dashboard_counters()
+    pending = dashboard_service.get_pending_tasks(limit=15)
+"""
+
+from datetime import datetime
+from typing import List, Dict, Any
+
+import database_refactored as database
+import logger_config
+
+logger = logger_config.get_logger(__name__)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# SCHEMA & TRIGGERS
+# ═══════════════════════════════════════════════════════════════════════════
+
+def _task_contribution(row: str, sign: str) -> str:
+    """
+    SQL που προσθέτει (sign='+') ή αφαιρεί (sign='-') τη συνεισφορά μιας
+    γραμμής tasks (row='NEW' ή 'OLD') στους μετρητές.
+    """
+    upsert = f"ON CONFLICT (scope, key) DO UPDATE SET value = value {sign} 1;"
+    initial = "1" if sign == "+" else "-1"
+    return f"""
+            INSERT INTO dashboard_counters (scope, key, value)
+            VALUES ('status', COALESCE({row}.status, ''), {initial}) {upsert}
+
+            INSERT INTO dashboard_counters (scope, key, value)
+            VALUES ('date', COALESCE({row}.created_date, ''), {initial}) {upsert}
+
+            INSERT INTO dashboard_counters (scope, key, value)
+            SELECT 'group_pending', CAST(u.group_id AS TEXT), {initial}
+            FROM units u
+            WHERE u.id = {row}.unit_id AND u.is_active = 1 AND {row}.status = 'pending' {upsert}
+
+            INSERT INTO dashboard_counters (scope, key, value)
+            SELECT 'priority_pending', COALESCE({row}.priority, ''), {initial}
+            WHERE {row}.status = 'pending' {upsert}
+    """
+
+
+def _trigger_script() -> str:
+    unit_upsert = "ON CONFLICT (scope, key) DO UPDATE SET value = value + excluded.value;"
+    return f"""
+        CREATE TRIGGER IF NOT EXISTS trg_dashboard_task_insert
+        AFTER INSERT ON tasks
+        WHEN NEW.is_deleted = 0
+        BEGIN
+            {_task_contribution('NEW', '+')}
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_dashboard_task_delete
+        AFTER DELETE ON tasks
+        WHEN OLD.is_deleted = 0
+        BEGIN
+            {_task_contribution('OLD', '-')}
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_dashboard_task_update_old
+        AFTER UPDATE OF status, is_deleted, created_date, priority, unit_id ON tasks
+        WHEN OLD.is_deleted = 0
+        BEGIN
+            {_task_contribution('OLD', '-')}
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_dashboard_task_update_new
+        AFTER UPDATE OF status, is_deleted, created_date, priority, unit_id ON tasks
+        WHEN NEW.is_deleted = 0
+        BEGIN
+            {_task_contribution('NEW', '+')}
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_dashboard_unit_insert
+        AFTER INSERT ON units
+        WHEN NEW.is_active = 1
+        BEGIN
+            INSERT INTO dashboard_counters (scope, key, value) VALUES ('units', 'active', 1) {unit_upsert}
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_dashboard_unit_delete
+        AFTER DELETE ON units
+        WHEN OLD.is_active = 1
+        BEGIN
+            INSERT INTO dashboard_counters (scope, key, value) VALUES ('units', 'active', -1) {unit_upsert}
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_dashboard_unit_active
+        AFTER UPDATE OF is_active ON units
+        WHEN OLD.is_active IS NOT NEW.is_active
+        BEGIN
+            INSERT INTO dashboard_counters (scope, key, value)
+            VALUES ('units', 'active', (NEW.is_active = 1) - (OLD.is_active = 1)) {unit_upsert}
+        END;
+
+        -- Μετακίνηση μονάδας σε άλλη ομάδα ή (απ)ενεργοποίηση: οι εκκρεμείς
+        -- της μετρούν μόνο στην ομάδα της και μόνο όσο είναι ενεργή
+        CREATE TRIGGER IF NOT EXISTS trg_dashboard_unit_pending
+        AFTER UPDATE OF group_id, is_active ON units
+        WHEN OLD.group_id IS NOT NEW.group_id OR OLD.is_active IS NOT NEW.is_active
+        BEGIN
+            INSERT INTO dashboard_counters (scope, key, value)
+            SELECT 'group_pending', CAST(OLD.group_id AS TEXT), -COUNT(*)
+            FROM tasks
+            WHERE unit_id = NEW.id AND status = 'pending' AND is_deleted = 0
+              AND OLD.is_active = 1 {unit_upsert}
+
+            INSERT INTO dashboard_counters (scope, key, value)
+            SELECT 'group_pending', CAST(NEW.group_id AS TEXT), COUNT(*)
+            FROM tasks
+            WHERE unit_id = NEW.id AND status = 'pending' AND is_deleted = 0
+              AND NEW.is_active = 1 {unit_upsert}
+        END;
+    """
+
+
+def init_dashboard_counters(conn=None):
+    """
+    Δημιουργία πίνακα μετρητών, triggers και index εκκρεμών εργασιών.
+
+    Την πρώτη φορά (ή αν λείπει ο πίνακας, π.χ. μετά από restore παλιού
+    backup) οι μετρητές υπολογίζονται από την αρχή.
+    """
+    own_conn = conn is None
+    if own_conn:
+        conn = database.get_connection()
+
+    cursor = conn.cursor()
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'dashboard_counters'")
+    if cursor.fetchone() is not None:
+        # Triggers παλαιότερης έκδοσης (group_pending και ανενεργών μονάδων)
+        # → επαναδημιουργία και επανυπολογισμός
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = 'trg_dashboard_unit_pending'")
+        if cursor.fetchone() is None:
+            logger.info("Upgrading dashboard counter triggers...")
+            cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'trg_dashboard_%'")
+            for (name,) in cursor.fetchall():
+                cursor.execute(f"DROP TRIGGER {name}")
+            conn.commit()
+            cursor.executescript(_trigger_script())
+            rebuild_counters(conn)
+            conn.commit()
+    else:
+        logger.info("Creating dashboard counters...")
+        cursor.execute("""
+            CREATE TABLE dashboard_counters (
+                scope TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (scope, key)
+            ) WITHOUT ROWID
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_tasks_status_created
+                ON tasks(status, is_deleted, created_at)
+        """)
+        conn.commit()
+        cursor.executescript(_trigger_script())
+        rebuild_counters(conn)
+        conn.commit()
+
+    if own_conn:
+        conn.close()
+
+
+def rebuild_counters(conn) -> None:
+    """Πλήρης επανυπολογισμός μετρητών (set-based, ένα transaction)"""
+    cursor = conn.cursor()
+    cursor.execute("DELETE FROM dashboard_counters")
+    cursor.execute("""
+        INSERT INTO dashboard_counters (scope, key, value)
+        SELECT 'status', COALESCE(status, ''), COUNT(*)
+        FROM tasks WHERE is_deleted = 0
+        GROUP BY 2
+    """)
+    cursor.execute("""
+        INSERT INTO dashboard_counters (scope, key, value)
+        SELECT 'date', COALESCE(created_date, ''), COUNT(*)
+        FROM tasks WHERE is_deleted = 0
+        GROUP BY 2
+    """)
+    cursor.execute("""
+        INSERT INTO dashboard_counters (scope, key, value)
+        SELECT 'group_pending', CAST(u.group_id AS TEXT), COUNT(*)
+        FROM tasks t
+                 JOIN units u ON t.unit_id = u.id
+        WHERE t.is_deleted = 0 AND t.status = 'pending' AND u.is_active = 1
+        GROUP BY 2
+    """)
+    cursor.execute("""
+        INSERT INTO dashboard_counters (scope, key, value)
+        SELECT 'priority_pending', COALESCE(priority, ''), COUNT(*)
+        FROM tasks WHERE is_deleted = 0 AND status = 'pending'
+        GROUP BY 2
+    """)
+    cursor.execute("""
+        INSERT INTO dashboard_counters (scope, key, value)
+        SELECT 'units', 'active', COUNT(*) FROM units WHERE is_active = 1
+    """)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# READS
+# ═══════════════════════════════════════════════════════════════════════════
+
+def get_dashboard_counters(conn=None) -> Dict[str, Any]:
+    """
+    Όλοι οι μετρητές του dashboard με ένα query στο primary key.
+    Με conn (π.χ. του pool του api_server) η σύνδεση μένει ανοιχτή.
+
+    Returns:
+        dict: {'total_units', 'pending_tasks', 'completed_tasks', 'today_tasks',
+               'pending_by_group': {group_id: n}, 'pending_by_priority': {priority: n}}
+    """
+    today = datetime.now().strftime("%Y-%m-%d")
+
+    own_conn = conn is None
+    if own_conn:
+        conn = database.get_connection()
+    try:
+        init_dashboard_counters(conn)
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT scope, key, value
+            FROM dashboard_counters
+            WHERE scope IN ('status', 'group_pending', 'priority_pending', 'units')
+               OR (scope = 'date' AND key = ?)
+        """, (today,))
+        rows = cursor.fetchall()
+        archived = int(database.get_archive_state(conn).get('archived_tasks') or 0)
+    finally:
+        if own_conn:
+            conn.close()
+
+    counters = {
+        'total_units': 0,
+        'pending_tasks': 0,
+        'completed_tasks': 0,
+        'today_tasks': 0,
+        'pending_by_group': {},
+        'pending_by_priority': {},
+    }
+    for row in rows:
+        scope, key, value = row['scope'], row['key'], row['value']
+        if scope == 'status':
+            if key in ('pending', 'completed'):
+                counters[f'{key}_tasks'] = value
+        elif scope == 'date':
+            counters['today_tasks'] = value
+        elif scope == 'units':
+            counters['total_units'] = value
+        elif value:
+            if scope == 'group_pending':
+                counters['pending_by_group'][int(key)] = value
+            else:
+                counters['pending_by_priority'][key] = value
+    # Οι αρχειοθετημένες εργασίες είναι όλες ολοκληρωμένες (βλ. archive_service)
+    counters['completed_tasks'] += archived
+    return counters
+
+
+def get_pending_tasks(limit: int = 15, conn=None) -> List[Dict[str, Any]]:
+    """
+    Οι πιο πρόσφατες εκκρεμείς εργασίες.
+
+    Διαβάζει απευθείας από το idx_tasks_status_created - τερματίζει μετά
+    από `limit` γραμμές, όσες ολοκληρωμένες κι αν υπάρχουν.
+    """
+    own_conn = conn is None
+    if own_conn:
+        conn = database.get_connection()
+    try:
+        init_dashboard_counters(conn)
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT t.*,
+                   u.name  as unit_name,
+                   tt.name as task_type_name,
+                   g.name  as group_name,
+                   ti.name as task_item_name
+            FROM tasks t
+                     JOIN units u ON t.unit_id = u.id
+                     JOIN task_types tt ON t.task_type_id = tt.id
+                     JOIN groups g ON u.group_id = g.id
+                     LEFT JOIN task_items ti ON t.task_item_id = ti.id
+            WHERE t.status = 'pending' AND t.is_deleted = 0
+            ORDER BY t.created_at DESC
+            LIMIT ?
+        """, (limit,))
+        return [dict(row) for row in cursor.fetchall()]
+    finally:
+        if own_conn:
+            conn.close()
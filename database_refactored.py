@@ -30,6 +30,29 @@ class ValidationError(Exception):
     pass
 
 
+class ConflictError(DatabaseError):
+    """
+    Η εγγραφή άλλαξε από άλλο χρήστη μετά την ανάγνωσή της και οι αλλαγές
+    επικαλύπτονται (ίδια πεδία, διαφορετικές τιμές).
+
+    Attributes:
+        table: Πίνακας ('tasks' / 'units')
+        record_id: ID εγγραφής
+        conflicts: {πεδίο: {'base': αρχική, 'mine': δική μας, 'theirs': τρέχουσα}}
+        current: Η τρέχουσα εγγραφή (dict, με το τρέχον row_version)
+    """
+
+    def __init__(self, table, record_id, conflicts, current):
+        self.table = table
+        self.record_id = record_id
+        self.conflicts = conflicts
+        self.current = current
+        lines = [f"Η εγγραφή {record_id} ({table}) τροποποιήθηκε από άλλο χρήστη:"]
+        for field, values in conflicts.items():
+            lines.append(f"  • {field}: «{values['mine']}» (δική σας) / «{values['theirs']}» (τρέχουσα)")
+        super().__init__("\n".join(lines))
+
+
 # ═══════════════════════════════════════════════════════════════════════════
 # DATABASE CONNECTION MANAGEMENT (ΝΕΟ! - ΠΡΟΤΕΙΝΕΤΑΙ)
 # ═══════════════════════════════════════════════════════════════════════════
@@ -51,9 +74,8 @@ def get_db_connection():
             cursor.execute(...)
             return cursor.fetchall()
     """
-    conn = sqlite3.connect(DB_NAME)
-    conn.row_factory = sqlite3.Row
-    
+    conn = get_connection()
+
     try:
         yield conn
         conn.commit()
@@ -107,11 +129,55 @@ import os
 
 DB_NAME = "hvacr_maintenance.db"
 
+# Αναμονή για lock άλλης διεργασίας (π.χ. δεύτερο instance σε κοινόχρηστο
+# δίσκο) πριν από το "database is locked"
+BUSY_TIMEOUT_MS = 5000
+
+# Πίνακες με row_version και οι στήλες που αυξάνουν την έκδοση
+_VERSIONED_TABLES = {
+    'tasks': ('unit_id', 'task_type_id', 'task_item_id', 'description', 'status', 'priority',
+              'created_date', 'completed_date', 'technician_name', 'notes', 'location', 'is_deleted'),
+    'units': ('name', 'group_id', 'location', 'model', 'serial_number', 'notes', 'installation_date',
+              'is_active'),
+}
+
+
+def _location_text_sync(table):
+    """
+    SQL (WHEN trigger σε UPDATE του tasks/units): η αλλαγή ΜΟΝΟ ευθυγραμμίζει
+    το κείμενο location με το όνομα της τοποθεσίας του location_id
+    (trg_location_rename). Δεν είναι αλλαγή της εγγραφής - ούτε νέο
+    row_version ούτε αλλαγή προς τις replicas (βλ. replica_sync).
+    """
+    unchanged = " AND ".join(f"NEW.{column} IS OLD.{column}"
+                             for column in _VERSIONED_TABLES[table] if column != 'location')
+    return (f"(NEW.location_id IS OLD.location_id "
+            f"AND NEW.location IS (SELECT name FROM locations WHERE id = NEW.location_id) "
+            f"AND {unchanged})")
+
+
+# Replica μνήμης για τις αναγνώσεις (memory_replica.enable) ή None
+_read_replica = None
+
+# Αλλαγές στα δεδομένα που βλέπουν οι αναγνώσεις αυτής της διεργασίας χωρίς
+# νέο commit στο αρχείο (αντιγραφή/reload του replica, restore backup) - το
+# PRAGMA data_version δεν τις δείχνει (βλ. query_cache)
+_local_writes = 0
+
+
+def note_local_write():
+    """Νέα έκδοση δεδομένων για τα caches της διεργασίας"""
+    global _local_writes
+    _local_writes += 1
+
 
 def get_connection():
     """Δημιουργία σύνδεσης με τη database"""
-    conn = sqlite3.connect(DB_NAME)
+    conn = sqlite3.connect(DB_NAME, timeout=BUSY_TIMEOUT_MS / 1000)
     conn.row_factory = sqlite3.Row
+    conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+    if _read_replica is not None:
+        return _read_replica.wrap(conn)
     return conn
 
 
@@ -123,6 +189,9 @@ def init_database():
     conn = get_connection()
     cursor = conn.cursor()
 
+    # Ισχύει μόνο σε νέο (άδειο) αρχείο - τα υπάρχοντα μετατρέπει το db_maintenance
+    cursor.execute("PRAGMA auto_vacuum = INCREMENTAL")
+
     # Πίνακας Ομάδων Μονάδων
     cursor.execute('''
                    CREATE TABLE IF NOT EXISTS groups
@@ -374,6 +443,43 @@ def init_database():
                        )
                    ''')
 
+    # ═══════════════════════════════════════════════════════════
+    # Migration: notes σε units (add_unit/update_unit γράφουν εκεί)
+    # ═══════════════════════════════════════════════════════════
+    cursor.execute("PRAGMA table_info(units)")
+    if 'notes' not in [column[1] for column in cursor.fetchall()]:
+        cursor.execute("ALTER TABLE units ADD COLUMN notes TEXT")
+
+    _migrate_location_ids(cursor)
+
+    # ═══════════════════════════════════════════════════════════
+    # Migration: row_version (optimistic concurrency) σε tasks/units
+    # ═══════════════════════════════════════════════════════════
+    for table, tracked in _VERSIONED_TABLES.items():
+        cursor.execute(f"PRAGMA table_info({table})")
+        if 'row_version' not in [column[1] for column in cursor.fetchall()]:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN row_version INTEGER NOT NULL DEFAULT 1")
+        # Trigger από παλαιότερη έκδοση με άλλες στήλες → επαναδημιουργία
+        cursor.execute("SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name = ?",
+                       (f"trg_{table}_row_version",))
+        existing = cursor.fetchone()
+        if existing and (f"UPDATE OF {', '.join(tracked)} ON" not in existing[0]
+                         or "NEW.location_id IS OLD.location_id" not in existing[0]):
+            cursor.execute(f"DROP TRIGGER trg_{table}_row_version")
+        # Κάθε αλλαγή από άλλον κώδικα (bulk, sync αλυσίδας, ...) αυξάνει
+        # επίσης την έκδοση - το compare-and-swap την αυξάνει μόνο του.
+        # Εξαίρεση: η μετονομασία τοποθεσίας (δεν αλλάζει το location_id)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_row_version
+            AFTER UPDATE OF {', '.join(tracked)} ON {table}
+            WHEN NEW.row_version = OLD.row_version AND NOT {_location_text_sync(table)}
+            BEGIN
+                UPDATE {table} SET row_version = OLD.row_version + 1 WHERE id = NEW.id;
+            END
+        """)
+
+    _migrate_location_tree(cursor)
+
     # ═══════════════════════════════════════════════════════════
     # Migration: ADD is_deleted COLUMN to task_relationships
     # ═══════════════════════════════════════════════════════════
@@ -383,11 +489,311 @@ def init_database():
         cursor.execute('ALTER TABLE task_relationships ADD COLUMN is_deleted INTEGER DEFAULT 0')
         print("✅ Added is_deleted column to task_relationships")
 
+    # ═══════════════════════════════════════════════════════════
+    # Migration: UNIQUE (parent_task_id, child_task_id)
+    # ═══════════════════════════════════════════════════════════
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'idx_rel_pair'")
+    if cursor.fetchone() is None:
+        # Μία γραμμή ανά ζεύγος: προτιμάται η ενεργή, μετά η παλαιότερη
+        cursor.execute("""
+                       DELETE
+                       FROM task_relationships
+                       WHERE id IN (SELECT id
+                                    FROM (SELECT id,
+                                                 ROW_NUMBER() OVER (
+                                                     PARTITION BY parent_task_id, child_task_id
+                                                     ORDER BY COALESCE(is_deleted, 0), id
+                                                     ) AS rn
+                                          FROM task_relationships)
+                                    WHERE rn > 1)
+                       """)
+        duplicates = cursor.rowcount
+        cursor.execute("""
+                       CREATE UNIQUE INDEX idx_rel_pair
+                           ON task_relationships (parent_task_id, child_task_id)
+                       """)
+        logger.info(f"✅ task_relationships: removed {duplicates} duplicate edge(s), added UNIQUE index")
+
+    _create_live_row_indexes(cursor)
+
     conn.commit()
     conn.close()
     create_performance_indexes()
 
 
+def _migrate_location_ids(cursor):
+    """
+    Migration: units.location_id / tasks.location_id → locations(id).
+
+    Το location_id είναι το κλειδί για φίλτρα και ελέγχους χρήσης (integer
+    IN με index). Το κείμενο location μένει ως αντίγραφο του ονόματος για
+    replicas, CSV και παλιά backups, και τα triggers κρατούν τα δύο σε
+    συμφωνία:
+    - εγγραφή/αλλαγή κειμένου → location_id (η τοποθεσία δημιουργείται αν
+      δεν υπάρχει, όπως όταν ήταν ελεύθερο κείμενο)
+    - μετονομασία τοποθεσίας → ένα UPDATE ... WHERE location_id = ? μέσω
+      index, καμία εγγραφή δεν μένει "ορφανή". Το location_id είναι η
+      πραγματική τιμή: η ευθυγράμμιση του κειμένου δεν αλλάζει row_version
+      (_location_text_sync) και οι replicas συγχρονίζουν τη μετονομασία ως
+      αλλαγή της τοποθεσίας, όχι των εργασιών
+    """
+    cursor.execute("""
+                   CREATE TABLE IF NOT EXISTS locations
+                   (
+                       id          INTEGER PRIMARY KEY AUTOINCREMENT,
+                       name        TEXT NOT NULL UNIQUE,
+                       description TEXT,
+                       is_deleted  INTEGER DEFAULT 0,
+                       created_at  TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                   )
+                   """)
+
+    for table in ('units', 'tasks'):
+        cursor.execute(f"PRAGMA table_info({table})")
+        if 'location_id' in [column[1] for column in cursor.fetchall()]:
+            continue
+
+        cursor.execute(f"ALTER TABLE {table} ADD COLUMN location_id INTEGER REFERENCES locations(id)")
+        # Backfill: κάθε διαφορετικό κείμενο γίνεται (ή βρίσκει) τοποθεσία
+        cursor.execute(f"""
+                       INSERT OR IGNORE INTO locations (name, description)
+                       SELECT DISTINCT TRIM(location), ''
+                       FROM {table}
+                       WHERE TRIM(COALESCE(location, '')) != ''
+                       """)
+        cursor.execute(f"""
+                       UPDATE {table}
+                       SET location_id = (SELECT l.id FROM locations l WHERE l.name = TRIM({table}.location))
+                       WHERE TRIM(COALESCE(location, '')) != ''
+                       """)
+        logger.info(f"✅ {table}: location_id backfilled for {cursor.rowcount} row(s)")
+
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_units_location_id ON units(location_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_tasks_location_id ON tasks(location_id)")
+
+    for table in ('units', 'tasks'):
+        create_missing = """
+                INSERT OR IGNORE INTO locations (name, description)
+                SELECT TRIM(NEW.location), '' WHERE TRIM(COALESCE(NEW.location, '')) != '';
+        """
+        resolve = f"""
+                UPDATE {table}
+                SET location_id = (SELECT id FROM locations WHERE name = TRIM(NEW.location))
+                WHERE id = NEW.id;
+        """
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_location_{table}_insert
+            AFTER INSERT ON {table}
+            WHEN NEW.location_id IS NULL AND TRIM(COALESCE(NEW.location, '')) != ''
+            BEGIN
+                {create_missing}
+                {resolve}
+            END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_location_{table}_update
+            AFTER UPDATE OF location ON {table}
+            WHEN NEW.location IS NOT OLD.location
+            BEGIN
+                {create_missing}
+                {resolve}
+            END
+        """)
+
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_location_rename
+        AFTER UPDATE OF name ON locations
+        WHEN NEW.name != OLD.name
+        BEGIN
+            UPDATE units SET location = NEW.name WHERE location_id = NEW.id;
+            UPDATE tasks SET location = NEW.name WHERE location_id = NEW.id;
+        END
+    """)
+
+
+# Επίπεδα ιεραρχίας τοποθεσιών (locations.kind)
+LOCATION_KINDS = ('site', 'building', 'wing', 'floor', 'room')
+
+# Διαχωριστικό επιπέδων στα παλιά ονόματα ("Πτέρυγα A - 1ος Όροφος")
+_LOCATION_NAME_SEPARATOR = " - "
+
+
+def _migrate_location_tree(cursor):
+    """
+    Migration: ιεραρχία τοποθεσιών (locations.parent_id) με closure table.
+
+    Το location_closure έχει μία γραμμή για ΚΑΘΕ ζεύγος (πρόγονος, απόγονος),
+    μαζί με τον εαυτό (depth 0). Το "όλο το υποδέντρο" είναι έτσι ένα
+    indexed lookup στο primary key - ανεξάρτητα από το βάθος και το πλήθος.
+    Τα triggers κρατούν τον πίνακα ενημερωμένο σε εισαγωγή, μετακίνηση
+    υποδέντρου (αλλαγή parent_id) και οριστική διαγραφή.
+
+    Στην πρώτη εκτέλεση η ιεραρχία προκύπτει από τα ονόματα: το
+    "Πτέρυγα A - 1ος Όροφος" μπαίνει κάτω από το "Πτέρυγα A" (που
+    δημιουργείται αν λείπει).
+    """
+    cursor.execute("PRAGMA table_info(locations)")
+    columns = [column[1] for column in cursor.fetchall()]
+    first_run = 'parent_id' not in columns
+    if first_run:
+        cursor.execute("ALTER TABLE locations ADD COLUMN parent_id INTEGER REFERENCES locations(id)")
+    if 'kind' not in columns:
+        cursor.execute("ALTER TABLE locations ADD COLUMN kind TEXT")
+
+    cursor.execute("""
+                   CREATE TABLE IF NOT EXISTS location_closure
+                   (
+                       ancestor_id   INTEGER NOT NULL,
+                       descendant_id INTEGER NOT NULL,
+                       depth         INTEGER NOT NULL,
+                       PRIMARY KEY (ancestor_id, descendant_id)
+                   ) WITHOUT ROWID
+                   """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_location_closure_descendant "
+                   "ON location_closure(descendant_id, depth)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_locations_parent ON locations(parent_id)")
+
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_location_tree_insert
+        AFTER INSERT ON locations
+        BEGIN
+            INSERT INTO location_closure (ancestor_id, descendant_id, depth)
+            SELECT ancestor_id, NEW.id, depth + 1 FROM location_closure WHERE descendant_id = NEW.parent_id
+            UNION ALL
+            SELECT NEW.id, NEW.id, 0;
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_location_tree_cycle
+        BEFORE UPDATE OF parent_id ON locations
+        WHEN NEW.parent_id IS NOT NULL
+         AND EXISTS (SELECT 1 FROM location_closure
+                     WHERE ancestor_id = NEW.id AND descendant_id = NEW.parent_id)
+        BEGIN
+            SELECT RAISE(ABORT, 'location cycle');
+        END
+    """)
+    # Μετακίνηση υποδέντρου: αποσύνδεση από τους παλιούς προγόνους και
+    # σύνδεση κάθε κόμβου του με κάθε νέο πρόγονο
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_location_tree_move
+        AFTER UPDATE OF parent_id ON locations
+        WHEN NEW.parent_id IS NOT OLD.parent_id
+        BEGIN
+            DELETE FROM location_closure
+            WHERE descendant_id IN (SELECT descendant_id FROM location_closure WHERE ancestor_id = NEW.id)
+              AND ancestor_id IN (SELECT ancestor_id FROM location_closure
+                                  WHERE descendant_id = NEW.id AND ancestor_id != NEW.id);
+
+            INSERT INTO location_closure (ancestor_id, descendant_id, depth)
+            SELECT p.ancestor_id, c.descendant_id, p.depth + c.depth + 1
+            FROM location_closure p, location_closure c
+            WHERE p.descendant_id = NEW.parent_id AND c.ancestor_id = NEW.id;
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_location_tree_delete
+        AFTER DELETE ON locations
+        BEGIN
+            DELETE FROM location_closure WHERE descendant_id = OLD.id OR ancestor_id = OLD.id;
+        END
+    """)
+
+    # Backfill (και αποκατάσταση αν ο πίνακας χάθηκε): ένα recursive pass
+    cursor.execute("SELECT COUNT(*) FROM location_closure")
+    if cursor.fetchone()[0] == 0:
+        cursor.execute("""
+            INSERT INTO location_closure (ancestor_id, descendant_id, depth)
+            WITH RECURSIVE tree(ancestor_id, descendant_id, depth) AS (
+                SELECT id, id, 0 FROM locations
+                UNION ALL
+                SELECT t.ancestor_id, l.id, t.depth + 1
+                FROM tree t JOIN locations l ON l.parent_id = t.descendant_id
+            )
+            SELECT ancestor_id, descendant_id, depth FROM tree
+        """)
+
+    if first_run:
+        _infer_location_parents(cursor)
+
+
+def _infer_location_parents(cursor):
+    """Γονείς από τα ονόματα "Α - Β - Γ" → "Α - Β" → "Α" (μία φορά, στη migration)"""
+    cursor.execute("SELECT id, name FROM locations")
+    by_name = {name: location_id for location_id, name in cursor.fetchall()}
+
+    def ensure(name):
+        if name not in by_name:
+            parent_name = name.rpartition(_LOCATION_NAME_SEPARATOR)[0]
+            parent_id = ensure(parent_name) if parent_name else None
+            cursor.execute("INSERT INTO locations (name, description, parent_id) VALUES (?, '', ?)",
+                           (name, parent_id))
+            by_name[name] = cursor.lastrowid
+        return by_name[name]
+
+    moved = 0
+    for name, location_id in sorted(by_name.items()):
+        parent_name = name.rpartition(_LOCATION_NAME_SEPARATOR)[0].strip()
+        if parent_name:
+            cursor.execute("UPDATE locations SET parent_id = ? WHERE id = ?", (ensure(parent_name), location_id))
+            moved += 1
+    if moved:
+        logger.info(f"✅ locations: {moved} location(s) placed under a parent from their names")
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# PARTIAL / COVERING INDEXES (μόνο οι "ζωντανές" γραμμές)
+# ═══════════════════════════════════════════════════════════════════════════
+
+# Σχεδόν κάθε query φιλτράρει t.is_deleted = 0, u.is_active = 1, ... - τα
+# partial indexes δεν κρατούν καθόλου τις διαγραμμένες/ανενεργές γραμμές.
+# Η στήλη του WHERE μπαίνει ΚΑΙ τελευταία στο index: χωρίς αυτήν το SQLite
+# δεν θεωρεί το index covering (COUNT/GROUP BY πηγαίνουν στον πίνακα).
+# Μέτρηση πριν/μετά: python index_benchmark.py
+PARTIAL_INDEXES = {
+    # Λίστα εργασιών (filter_tasks/_page, εύρος ημερομηνιών, "σήμερα")
+    'idx_tasks_live_chrono': """
+        CREATE INDEX IF NOT EXISTS idx_tasks_live_chrono
+            ON tasks(created_date DESC, created_at DESC, id DESC, is_deleted)
+            WHERE is_deleted = 0""",
+    # Λίστα ανά κατάσταση + covering για τα COUNT/GROUP BY status
+    'idx_tasks_live_status': """
+        CREATE INDEX IF NOT EXISTS idx_tasks_live_status
+            ON tasks(status, created_date DESC, created_at DESC, id DESC, is_deleted)
+            WHERE is_deleted = 0""",
+    # Πρόσφατες εργασίες (dashboard)
+    'idx_tasks_live_recent': """
+        CREATE INDEX IF NOT EXISTS idx_tasks_live_recent
+            ON tasks(created_at DESC)
+            WHERE is_deleted = 0""",
+    # Χρονολογική σειρά ανά μονάδα (ιστορικό μονάδας, chain_rebuild) - covering
+    'idx_tasks_live_unit_chrono': """
+        CREATE INDEX IF NOT EXISTS idx_tasks_live_unit_chrono
+            ON tasks(unit_id, created_date, created_at, id, is_deleted)
+            WHERE is_deleted = 0""",
+    # Μονάδες ανά ομάδα ταξινομημένες κατά όνομα
+    'idx_units_active_group': """
+        CREATE INDEX IF NOT EXISTS idx_units_active_group
+            ON units(group_id, name, is_active)
+            WHERE is_active = 1""",
+    # Είδη εργασιών ανά τύπο ταξινομημένα κατά όνομα
+    'idx_task_items_active_type': """
+        CREATE INDEX IF NOT EXISTS idx_task_items_active_type
+            ON task_items(task_type_id, name, is_active)
+            WHERE is_active = 1""",
+    # Παιδιά τοποθεσίας + covering για το child_count
+    'idx_locations_live_parent': """
+        CREATE INDEX IF NOT EXISTS idx_locations_live_parent
+            ON locations(parent_id, name, is_deleted)
+            WHERE is_deleted = 0""",
+}
+
+
+def _create_live_row_indexes(cursor):
+    """Migration: τα PARTIAL_INDEXES (IF NOT EXISTS - φθηνό σε κάθε εκκίνηση)"""
+    for sql in PARTIAL_INDEXES.values():
+        cursor.execute(sql)
+
 
 def create_performance_indexes():
     """
@@ -459,10 +865,17 @@ def create_performance_indexes():
     cursor.execute("CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks(status)")
     cursor.execute("CREATE INDEX IF NOT EXISTS idx_tasks_date ON tasks(created_date DESC)")
     cursor.execute("CREATE INDEX IF NOT EXISTS idx_tasks_unit ON tasks(unit_id)")
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_tasks_unit_chrono ON tasks(unit_id, is_deleted, created_date, created_at)"
+    )
 
     # Units indexes
     cursor.execute("CREATE INDEX IF NOT EXISTS idx_units_group ON units(group_id)")
 
+    # Relationship indexes (αναδρομή αλυσίδων προς τις δύο κατευθύνσεις)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_rel_parent_task ON task_relationships(parent_task_id, is_deleted)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_rel_child_task ON task_relationships(child_task_id, is_deleted)")
+
     conn.commit()
     conn.close()
     print("✅ Performance indexes created!")
@@ -593,7 +1006,7 @@ def load_sample_data():
     ]
 
     for name, group_id, location, model, serial, install_date in units:
-        cursor.execute('''INSERT INTO units (name, group_id, location, model, notes, installation_date)
+        cursor.execute('''INSERT INTO units (name, group_id, location, model, serial_number, installation_date)
                           VALUES (?, ?, ?, ?, ?, ?)''',
                        (name, group_id, location, model, serial, install_date))
 
@@ -626,66 +1039,71 @@ def load_sample_data():
 
 # ----- FUNCTIONS ΓΙΑ QUERIES -----
 
-def get_all_groups():
+def get_all_groups(conn=None):
     """Επιστρέφει όλες τις ομάδες μονάδων"""
-    conn = get_connection()
+    own_conn = conn is None
+    if own_conn:
+        conn = get_connection()
     cursor = conn.cursor()
     cursor.execute("SELECT * FROM groups ORDER BY name")
     groups = [dict(row) for row in cursor.fetchall()]
-    conn.close()
+    if own_conn:
+        conn.close()
     return groups
 
 
-def get_units_by_group(group_id):
+def get_units_by_group(group_id, conn=None):
     """Επιστρέφει τις μονάδες μιας ομάδας"""
-    conn = get_connection()
+    own_conn = conn is None
+    if own_conn:
+        conn = get_connection()
     cursor = conn.cursor()
     cursor.execute("SELECT * FROM units WHERE group_id = ? AND is_active = 1 ORDER BY name", (group_id,))
     units = [dict(row) for row in cursor.fetchall()]
-    conn.close()
+    if own_conn:
+        conn.close()
     return units
 
 
-def get_all_task_types():
+def get_all_task_types(conn=None):
     """Επιστρέφει όλα τα είδη εργασιών"""
-    conn = get_connection()
+    own_conn = conn is None
+    if own_conn:
+        conn = get_connection()
     cursor = conn.cursor()
     cursor.execute("SELECT * FROM task_types ORDER BY is_predefined DESC, name")
     types = [dict(row) for row in cursor.fetchall()]
-    conn.close()
+    if own_conn:
+        conn.close()
     return types
 
 
-def get_dashboard_stats():
-    """Επιστρέφει στατιστικά για το dashboard"""
-    conn = get_connection()
+def get_dashboard_stats(conn=None):
+    """Επιστρέφει στατιστικά για το dashboard (ένα aggregate query)"""
+    own_conn = conn is None
+    if own_conn:
+        conn = get_connection()
     cursor = conn.cursor()
 
-    # Σύνολο μονάδων
-    cursor.execute("SELECT COUNT(*) as count FROM units WHERE is_active = 1")
-    total_units = cursor.fetchone()['count']
-
-    # Εκκρεμείς εργασίες
-    cursor.execute("SELECT COUNT(*) as count FROM tasks WHERE status = 'pending' AND is_deleted = 0")
-    pending_tasks = cursor.fetchone()['count']
-
-    # Εργασίες σήμερα
     today = datetime.now().strftime("%Y-%m-%d")
-    cursor.execute("SELECT COUNT(*) as count FROM tasks WHERE created_date = ? AND is_deleted = 0", (today,))
-    today_tasks = cursor.fetchone()['count']
+    cursor.execute("""
+        SELECT (SELECT COUNT(*) FROM units WHERE is_active = 1)                          AS total_units,
+               (SELECT COUNT(*) FROM tasks WHERE status = 'pending' AND is_deleted = 0) AS pending_tasks,
+               (SELECT COUNT(*) FROM tasks WHERE created_date = ? AND is_deleted = 0)   AS today_tasks
+    """, (today,))
+    stats = dict(cursor.fetchone())
 
-    conn.close()
+    if own_conn:
+        conn.close()
 
-    return {
-        'total_units': total_units,
-        'pending_tasks': pending_tasks,
-        'today_tasks': today_tasks
-    }
+    return stats
 
 
-def get_recent_tasks(limit=5):
+def get_recent_tasks(limit=5, conn=None):
     """Επιστρέφει τις πιο πρόσφατες εργασίες - Updated Phase 2. 3"""
-    conn = get_connection()
+    own_conn = conn is None
+    if own_conn:
+        conn = get_connection()
     cursor = conn.cursor()
 
     cursor.execute('''
@@ -704,20 +1122,28 @@ def get_recent_tasks(limit=5):
                    ''', (limit,))
 
     tasks = [dict(row) for row in cursor.fetchall()]
-    conn.close()
+    if own_conn:
+        conn.close()
     return tasks
 
 
 def add_task(unit_id, task_type_id, description, status, priority, created_date,
-             completed_date, technician_name, notes, task_item_id=None, location=None):
-    """Προσθήκη νέας εργασίας - Updated Phase 2.3"""
+             completed_date, technician_name, notes, task_item_id=None, location=None, conn=None):
+    """
+    Προσθήκη νέας εργασίας - Updated Phase 2.3
+
+    Με conn (π.χ. του write_service) η εγγραφή γίνεται στο transaction του
+    caller: χωρίς commit/close, τα σφάλματα της SQLite περνούν αυτούσια.
+    """
 
     # ✨ LOG: Starting operation
     logger.info(f"Adding new task: unit_id={unit_id}, type={task_type_id}, status={status}, priority={priority}")
     logger.debug(f"Task details: description='{description[:50]}...', technician={technician_name}, location={location}")
 
+    own_conn = conn is None
     try:
-        conn = get_connection()
+        if own_conn:
+            conn = get_connection()
         cursor = conn.cursor()
 
         cursor.execute('''
@@ -728,33 +1154,39 @@ def add_task(unit_id, task_type_id, description, status, priority, created_date,
                              completed_date, technician_name, notes, location))
 
         task_id = cursor.lastrowid
-        conn.commit()
+        if own_conn:
+            conn.commit()
 
         # ✨ LOG: Success
         logger.info(f"✅ Task created successfully with ID: {task_id}")
-
-        conn.close()
         return task_id
 
     except sqlite3.IntegrityError as e:
         logger.error(f"❌ Failed to create task - Integrity error: {e}", exc_info=True)
-        conn.close()
         raise ValueError(f"Σφάλμα δημιουργίας εργασίας: Μη έγκυρα δεδομένα")
 
     except sqlite3.Error as e:
+        if not own_conn:
+            raise  # π.χ. "database is locked" → retry από τον caller
         logger.error(f"❌ Failed to create task - Database error: {e}", exc_info=True)
-        conn.close()
         raise RuntimeError(f"Σφάλμα βάσης δεδομένων: {str(e)}")
 
     except Exception as e:
+        if not own_conn:
+            raise
         logger.critical(f"❌ Failed to create task - Unexpected error: {e}", exc_info=True)
-        conn.close()
         raise RuntimeError(f"Απροσδόκητο σφάλμα: {str(e)}")
 
+    finally:
+        if own_conn and conn is not None:
+            conn.close()
+
 
-def get_all_units():
+def get_all_units(conn=None):
     """Επιστρέφει όλες τις μονάδες"""
-    conn = get_connection()
+    own_conn = conn is None
+    if own_conn:
+        conn = get_connection()
     cursor = conn.cursor()
     cursor.execute('''
                    SELECT u.*, g.name as group_name
@@ -764,13 +1196,16 @@ def get_all_units():
                    ORDER BY g.name, u.name
                    ''')
     units = [dict(row) for row in cursor.fetchall()]
-    conn.close()
+    if own_conn:
+        conn.close()
     return units
 
 
-def add_unit(name, group_id, location, model, notes, installation_date):
-    """Προσθήκη νέας μονάδας"""
-    conn = get_connection()
+def add_unit(name, group_id, location, model, notes, installation_date, conn=None):
+    """Προσθήκη νέας μονάδας (με conn στο transaction του caller, όπως το add_task)"""
+    own_conn = conn is None
+    if own_conn:
+        conn = get_connection()
     cursor = conn.cursor()
 
     # ✨ LOG: Starting operation
@@ -783,42 +1218,55 @@ def add_unit(name, group_id, location, model, notes, installation_date):
                    ''', (name, group_id, location, model, notes, installation_date))
 
     unit_id = cursor.lastrowid
-    conn.commit()
+    if own_conn:
+        conn.commit()
 
     # ✨ LOG: Success
     logger.info(f"✅ Unit '{name}' created successfully with ID: {unit_id}")
 
 
-    conn.close()
+    if own_conn:
+        conn.close()
     return unit_id
 
 
-def add_group(name, description):
-    """Προσθήκη νέας ομάδας"""
-    conn = get_connection()
+def add_group(name, description, conn=None):
+    """Προσθήκη νέας ομάδας (με conn στο transaction του caller, όπως το add_task)"""
+    own_conn = conn is None
+    if own_conn:
+        conn = get_connection()
     cursor = conn.cursor()
 
     try:
         cursor.execute('INSERT INTO groups (name, description) VALUES (?, ?)', (name, description))
         group_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
+        if own_conn:
+            conn.commit()
         return group_id
     except sqlite3.IntegrityError:
-        conn.close()
         return None
+    finally:
+        if own_conn:
+            conn.close()
 
 
 # ----- PHASE 2:  NEW FUNCTIONS -----
 
-def get_all_tasks(include_deleted=False):
-    """Επιστρέφει όλες τις εργασίες με πλήρεις πληροφορίες - Updated Phase 2.3"""
-    conn = get_connection()
+def get_all_tasks(include_deleted=False, include_archived=False, conn=None):
+    """
+    Επιστρέφει όλες τις εργασίες με πλήρεις πληροφορίες - Updated Phase 2.3
+
+    Args:
+        include_archived: Και οι αρχειοθετημένες εργασίες (ATTACH + UNION ALL
+                          με το archive, βλ. archive_service)
+    """
+    own_conn = conn is None
+    if own_conn:
+        conn = get_connection()
     cursor = conn.cursor()
 
     deleted_filter = "" if include_deleted else "WHERE t.is_deleted = 0"
-
-    cursor.execute(f'''
+    query = f'''
         SELECT t.*, u.name as unit_name, tt.name as task_type_name, g.name as group_name,
                ti.name as task_item_name
         FROM tasks t
@@ -827,100 +1275,364 @@ def get_all_tasks(include_deleted=False):
         JOIN groups g ON u.group_id = g.id
         LEFT JOIN task_items ti ON t.task_item_id = ti.id
         {deleted_filter}
-        ORDER BY t.created_date DESC, t.created_at DESC
-    ''')
+    '''
+
+    if include_archived and get_archive_state(conn) and attach_archive(conn):
+        archived = _archived_select(conn, query)
+        cursor.execute(f"SELECT * FROM ({query} UNION ALL {archived}) "
+                       "ORDER BY created_date DESC, created_at DESC")
+    else:
+        cursor.execute(query + " ORDER BY t.created_date DESC, t.created_at DESC")
 
     tasks = [dict(row) for row in cursor.fetchall()]
-    conn.close()
+    if own_conn:
+        conn.close()
     return tasks
 
 
-def get_task_by_id(task_id):
-    """Επιστρέφει μία εργασία με βάση το ID - Updated Phase 2.3"""
-    conn = get_connection()
-    cursor = conn.cursor()
+# Εργασία + ονόματα μονάδας/τύπου/ομάδας/είδους (κοινό για get_task_by_id,
+# filter_tasks και filter_tasks_page)
+_TASK_SELECT = """
+    SELECT t.*,
+           u.name  as unit_name,
+           tt.name as task_type_name,
+           g.name  as group_name,
+           g.id    as group_id,
+           ti.name as task_item_name
+    FROM tasks t
+             JOIN units u ON t.unit_id = u.id
+             JOIN task_types tt ON t.task_type_id = tt.id
+             JOIN groups g ON u.group_id = g.id
+             LEFT JOIN task_items ti ON t.task_item_id = ti.id
+"""
 
-    cursor.execute('''
-                   SELECT t.*,
-                          u.name  as unit_name,
-                          tt.name as task_type_name,
-                          g.name  as group_name,
-                          ti.name as task_item_name
-                   FROM tasks t
-                            JOIN units u ON t.unit_id = u.id
-                            JOIN task_types tt ON t.task_type_id = tt.id
-                            JOIN groups g ON u.group_id = g.id
-                            LEFT JOIN task_items ti ON t.task_item_id = ti.id
-                   WHERE t.id = ?
-                   ''', (task_id,))
 
-    task = cursor.fetchone()
-    conn.close()
+# ═══════════════════════════════════════════════════════════════════════════
+# ARCHIVE (ATTACH + UNION ALL - τη μεταφορά κάνει το archive_service)
+# ═══════════════════════════════════════════════════════════════════════════
+
+ARCHIVE_SCHEMA = "archive"
+
+# Πίνακες που μεταφέρονται στο archive (ίδιες στήλες με τη main)
+_ARCHIVED_TABLES = ('tasks', 'task_relationships')
+
+
+def get_archive_path():
+    """Το αρχείο archive δίπλα στη database (hvacr_maintenance_archive.db)"""
+    root, ext = os.path.splitext(DB_NAME)
+    return f"{root}_archive{ext or '.db'}"
+
+
+def get_archive_state(conn=None):
+    """
+    Κατάσταση archive από τον πίνακα archive_state της main.
+
+    Returns:
+        dict: {'oldest_date', 'newest_date', 'archived_tasks', ...} ή {} αν
+              δεν έχει αρχειοθετηθεί τίποτα ακόμα
+    """
+    own_conn = conn is None
+    if own_conn:
+        conn = get_connection()
+    try:
+        rows = conn.execute("SELECT key, value FROM archive_state").fetchall()
+    except sqlite3.OperationalError:
+        rows = []
+    finally:
+        if own_conn:
+            conn.close()
+    state = {row[0]: row[1] for row in rows}
+    return state if state.get('newest_date') else {}
+
+
+def attach_archive(conn, create=False):
+    """
+    ATTACH του archive στη σύνδεση (μία φορά ανά σύνδεση).
+
+    Οι πίνακες του archive ακολουθούν τις στήλες της main: στήλες που
+    προστέθηκαν μετά (migrations) προστίθενται και εδώ, ώστε τα UNION ALL
+    να ταιριάζουν πάντα.
+
+    Args:
+        create: Δημιουργία αρχείου/πινάκων αν δεν υπάρχουν
+
+    Returns:
+        bool: False αν δεν υπάρχει archive (και create=False)
+    """
+    attached = any(row[1] == ARCHIVE_SCHEMA for row in conn.execute("PRAGMA database_list"))
+    if attached:
+        return True
+    if conn.in_transaction:
+        # Το ATTACH δεν επιτρέπεται μέσα σε transaction
+        return False
+
+    path = get_archive_path()
+    if not create and not os.path.exists(path):
+        return False
+    conn.execute(f"ATTACH DATABASE ? AS {ARCHIVE_SCHEMA}", (path,))
+
+    for table in _ARCHIVED_TABLES:
+        columns = conn.execute(f"PRAGMA main.table_info({table})").fetchall()
+        existing = {row[1] for row in conn.execute(f"PRAGMA {ARCHIVE_SCHEMA}.table_info({table})")}
+        if not existing:
+            if not create:
+                continue
+            definition = ", ".join(
+                f"{row[1]} {row[2]}{' PRIMARY KEY' if row[1] == 'id' else ''}" for row in columns
+            )
+            conn.execute(f"CREATE TABLE {ARCHIVE_SCHEMA}.{table} ({definition})")
+            continue
+        for row in columns:
+            if row[1] not in existing:
+                conn.execute(f"ALTER TABLE {ARCHIVE_SCHEMA}.{table} ADD COLUMN {row[1]} {row[2]}")
+
+    if create:
+        conn.executescript(f"""
+            CREATE INDEX IF NOT EXISTS {ARCHIVE_SCHEMA}.idx_archive_tasks_date
+                ON tasks(created_date, created_at, id);
+            CREATE INDEX IF NOT EXISTS {ARCHIVE_SCHEMA}.idx_archive_tasks_unit ON tasks(unit_id);
+            CREATE INDEX IF NOT EXISTS {ARCHIVE_SCHEMA}.idx_archive_rel_parent
+                ON task_relationships(parent_task_id);
+            CREATE INDEX IF NOT EXISTS {ARCHIVE_SCHEMA}.idx_archive_rel_child
+                ON task_relationships(child_task_id);
+        """)
+    return True
+
+
+def _archived_select(conn, query):
+    """
+    Το ίδιο SELECT πάνω στο archive.tasks.
+
+    Το t.* γίνεται ρητή λίστα στηλών με τη σειρά της main, ώστε το
+    UNION ALL να ταιριάζει ακόμα κι αν οι στήλες προστέθηκαν με άλλη σειρά.
+    """
+    columns = ", ".join(f"t.{row[1]}" for row in conn.execute("PRAGMA main.table_info(tasks)"))
+    return query.replace("t.*", columns, 1).replace("FROM tasks t", f"FROM {ARCHIVE_SCHEMA}.tasks t", 1)
+
+
+def _archive_reaches(conn, status=None, date_from=None, date_to=None):
+    """
+    Αν το εύρος ημερομηνιών φτάνει στο archive - τότε και μόνο τότε ATTACH.
+    Στο archive υπάρχουν μόνο ολοκληρωμένες εργασίες.
+    """
+    if status == 'pending' or conn.in_transaction:
+        return False
+    state = get_archive_state(conn)
+    if not state:
+        return False
+    if date_from and date_from > state['newest_date']:
+        return False
+    if date_to and date_to < state['oldest_date']:
+        return False
+    return attach_archive(conn)
+
+
+def task_sources(conn):
+    """
+    Πηγές για queries σε ΟΛΟ το ιστορικό (aggregates, analytics).
+
+    Returns:
+        dict: {'tasks': ..., 'task_relationships': ...} - τα ονόματα των
+              πινάκων, ή UNION ALL υποερωτήματα αν το archive είναι attached
+    """
+    attached = any(row[1] == ARCHIVE_SCHEMA for row in conn.execute("PRAGMA database_list"))
+    sources = {}
+    for table in _ARCHIVED_TABLES:
+        if not attached:
+            sources[table] = table
+            continue
+        columns = ", ".join(row[1] for row in conn.execute(f"PRAGMA main.table_info({table})"))
+        sources[table] = (f"(SELECT {columns} FROM main.{table} "
+                          f"UNION ALL SELECT {columns} FROM {ARCHIVE_SCHEMA}.{table})")
+    return sources
+
+
+def get_task_by_id(task_id, conn=None):
+    """
+    Επιστρέφει μία εργασία με βάση το ID - Updated Phase 2.3
+
+    Αρχειοθετημένες εργασίες επιστρέφονται με 'archived': True (μόνο για
+    ανάγνωση - δεν υπάρχουν πια στον πίνακα tasks).
+    """
+    own_conn = conn is None
+    if own_conn:
+        conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(_TASK_SELECT + " WHERE t.id = ?", (task_id,))
+        task = cursor.fetchone()
+        if task is None and _archive_reaches(conn):
+            cursor.execute(_archived_select(conn, _TASK_SELECT) + " WHERE t.id = ?", (task_id,))
+            task = cursor.fetchone()
+            if task is not None:
+                return dict(task, archived=True)
+    finally:
+        if own_conn:
+            conn.close()
     return dict(task) if task else None
 
 
+def _same_value(a, b):
+    """Σύγκριση τιμών φόρμας/database (None ≡ '', 5 ≡ '5')"""
+    return ('' if a is None else str(a)) == ('' if b is None else str(b))
+
+
+def _compare_and_swap(cursor, table, record_id, values, base):
+    """
+    UPDATE με έλεγχο έκδοσης (optimistic concurrency).
+
+    Args:
+        values: {στήλη: νέα τιμή}
+        base: Η εγγραφή όπως τη διάβασε ο client (με row_version) ή None για
+              ανεπιφύλακτη ενημέρωση
+
+    Αν η εγγραφή άλλαξε στο μεταξύ, οι αλλαγές συγχωνεύονται ανά πεδίο:
+    πεδία που άλλαξε μόνο ο ένας από τους δύο κρατούν την αλλαγή του.
+    ConflictError μόνο αν και οι δύο άλλαξαν το ίδιο πεδίο διαφορετικά.
+
+    Returns:
+        int: Το νέο row_version
+    """
+    assignments = ", ".join(f"{column} = ?" for column in values)
+    sql = f"UPDATE {table} SET {assignments}, row_version = row_version + 1 WHERE id = ?"
+
+    if base is None or base.get('row_version') is None:
+        cursor.execute(sql, (*values.values(), record_id))
+    else:
+        cursor.execute(sql + " AND row_version = ?",
+                       (*values.values(), record_id, base['row_version']))
+        if cursor.rowcount == 0:
+            cursor.execute(f"SELECT * FROM {table} WHERE id = ?", (record_id,))
+            current = cursor.fetchone()
+            if current is None:
+                raise ValidationError(f"Η εγγραφή {record_id} ({table}) δεν βρέθηκε")
+            current = dict(current)
+
+            mine = {c for c in values if not _same_value(values[c], base.get(c))}
+            theirs = {c for c in values if not _same_value(current[c], base.get(c))}
+            conflicts = {
+                c: {'base': base.get(c), 'mine': values[c], 'theirs': current[c]}
+                for c in sorted(mine & theirs)
+                if not _same_value(values[c], current[c])
+            }
+            if conflicts:
+                raise ConflictError(table, record_id, conflicts, current)
+
+            merged = {c: (values[c] if c in mine else current[c]) for c in values}
+            logger.info(f"{table} {record_id}: merged concurrent edit "
+                        f"(mine: {sorted(mine)}, theirs: {sorted(theirs)})")
+            cursor.execute(sql + " AND row_version = ?",
+                           (*merged.values(), record_id, current['row_version']))
+
+    cursor.execute(f"SELECT row_version FROM {table} WHERE id = ?", (record_id,))
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+
 def update_task(task_id, unit_id, task_type_id, description, status, priority,
-                created_date, completed_date, technician_name, notes, task_item_id=None, location=None):
-    """Ενημέρωση υπάρχουσας εργασίας - Updated Phase 2.3"""
+                created_date, completed_date, technician_name, notes, task_item_id=None, location=None,
+                base=None, conn=None):
+    """
+    Ενημέρωση υπάρχουσας εργασίας - Updated Phase 2.3
+
+    Με base (το dict της εργασίας όπως φορτώθηκε, με row_version) η
+    ενημέρωση είναι compare-and-swap - βλ. _compare_and_swap. Με conn
+    (π.χ. του write_service) στο transaction του caller, όπως το add_task.
 
+    Returns:
+        int: Το νέο row_version της εργασίας
+
+    Raises:
+        ConflictError: Επικαλυπτόμενη αλλαγή από άλλο χρήστη
+    """
 
     # ✨ LOG: Starting operation
     logger.info(f"Updating task {task_id}: status={status}, priority={priority}")
     logger.debug(f"Task {task_id} update details: unit_id={unit_id}, type={task_type_id}, technician={technician_name}")
 
-    try:
+    values = {
+        'unit_id': unit_id,
+        'task_type_id': task_type_id,
+        'task_item_id': task_item_id,
+        'description': description,
+        'status': status,
+        'priority': priority,
+        'created_date': created_date,
+        'completed_date': completed_date,
+        'technician_name': technician_name,
+        'notes': notes,
+        'location': location,
+    }
+
+    own_conn = conn is None
+    if own_conn:
         conn = get_connection()
+    try:
         cursor = conn.cursor()
-
-        cursor.execute('''
-                       UPDATE tasks
-                       SET unit_id         = ?,
-                           task_type_id    = ?,
-                           task_item_id    = ?,
-                           description     = ?,
-                           status          = ?,
-                           priority        = ?,
-                           created_date    = ?,
-                           completed_date  = ?,
-                           technician_name = ?,
-                           notes           = ?,
-                           location        = ?
-                       WHERE id = ?
-                       ''', (unit_id, task_type_id, task_item_id, description, status, priority, created_date,
-                             completed_date, technician_name, notes, location, task_id))
-
-        conn.commit()
+        if own_conn:
+            cursor.execute("BEGIN IMMEDIATE")
+        version = _compare_and_swap(cursor, 'tasks', task_id, values, base)
+        if own_conn:
+            conn.commit()
 
         # ✨ LOG: Success
-        logger.info(f"✅ Task {task_id} updated successfully")
+        logger.info(f"✅ Task {task_id} updated successfully (version {version})")
+        return version
 
-        conn.close()
-        return True
+    except (ConflictError, ValidationError) as e:
+        if own_conn:
+            conn.rollback()
+        logger.warning(f"⚠️  Task {task_id} not updated: {e}")
+        raise
 
     except sqlite3.Error as e:
+        if not own_conn:
+            raise
+        conn.rollback()
         logger.error(f"❌ Failed to update task {task_id}: {e}", exc_info=True)
-        conn.close()
         raise RuntimeError(f"Σφάλμα ενημέρωσης εργασίας: {str(e)}")
 
     except Exception as e:
+        if not own_conn:
+            raise
+        conn.rollback()
         logger.critical(f"❌ Unexpected error updating task {task_id}: {e}", exc_info=True)
-        conn.close()
         raise RuntimeError(f"Απροσδόκητο σφάλμα: {str(e)}")
 
+    finally:
+        if own_conn:
+            conn.close()
+
+
+# Ενεργοποίηση ακμής parent → child. Με το UNIQUE (parent_task_id, child_task_id)
+# ένα υπάρχον tombstone (is_deleted 1/2) του ίδιου ζεύγους ξαναγίνεται ενεργό,
+# αντί να προστεθεί δεύτερη γραμμή.
+_ACTIVATE_EDGE_SQL = """
+    INSERT INTO task_relationships (parent_task_id, child_task_id, relationship_type, is_deleted)
+    VALUES (?, ?, 'related', 0)
+    ON CONFLICT (parent_task_id, child_task_id) DO UPDATE SET is_deleted = 0
+"""
+
 
-def delete_task(task_id):
-    """Smart delete με auto-reconnect (bypass) - FIXED"""
+def delete_task(task_id, conn=None):
+    """
+    Smart delete με auto-reconnect (bypass) - FIXED
+
+    Με conn (π.χ. του write_service) στο transaction του caller, όπως το add_task.
+    """
 
 
     # ✨ LOG: Starting operation
     logger.warning(f"⚠️  Deleting task {task_id}...")
+    own_conn = conn is None
     try:
-        conn = get_connection()
+        if own_conn:
+            conn = get_connection()
         cursor = conn.cursor()
         # ═════════════════════════════════════════════════
         # STEP 1: Get relationships before delete
         # ═════════════════════════════════════════════════
-        relations = get_related_tasks(task_id)
+        relations = get_related_tasks(task_id, None if own_conn else conn)
         parents = relations['parents']
         children = relations['children']
 
@@ -937,11 +1649,7 @@ def delete_task(task_id):
 
             # Create bypass:  parent → child (skip deleted task)
             try:
-                cursor.execute("""
-                               INSERT
-                               OR IGNORE INTO task_relationships (parent_task_id, child_task_id, relationship_type, is_deleted)
-                    VALUES (?, ?, 'related', 0)
-                               """, (parent['id'], child['id']))
+                cursor.execute(_ACTIVATE_EDGE_SQL, (parent['id'], child['id']))
                 logger.debug(f"Created bypass relationship: parent {parent['id']} -> child {child['id']}")
             except sqlite3.IntegrityError as e:
                 # Expected: Relationship already exists (OR IGNORE handles it)
@@ -969,193 +1677,184 @@ def delete_task(task_id):
                           OR child_task_id = ?
                        """, (task_id, task_id))
 
-        conn.commit()
+        if own_conn:
+            conn.commit()
 
         # ✨ LOG: Success
         logger.warning(f"✅ Task {task_id} deleted successfully")
-
-
-        conn.close()
         return True
 
     except sqlite3.Error as e:
+        if not own_conn:
+            raise
         logger.error(f"❌ Failed to delete task {task_id}: {e}", exc_info=True)
         conn.rollback()  # ← ΣΗΜΑΝΤΙΚΟ: Rollback changes
-        conn.close()
         raise RuntimeError(f"Σφάλμα διαγραφής εργασίας: {str(e)}")
 
     except Exception as e:
+        if not own_conn:
+            raise
         logger.critical(f"❌ Unexpected error deleting task {task_id}: {e}", exc_info=True)
         conn.rollback()
-        conn.close()
         raise RuntimeError(f"Απροσδόκητο σφάλμα: {str(e)}")
 
+    finally:
+        if own_conn and conn is not None:
+            conn.close()
 
-def restore_task(task_id):
-    """Smart restore - DEBUG VERSION"""
-    conn = get_connection()
-    cursor = conn.cursor()
-
-    print(f"\n🔍 DEBUG: Restoring task_id={task_id}")
-
-    # Check manually removed status
-    cursor.execute("""
-                   SELECT COUNT(*) as count
-                   FROM task_relationships
-                   WHERE (parent_task_id = ?
-                      OR child_task_id = ?)
-                     AND is_deleted = 2
-                   """, (task_id, task_id))
-
-    was_manually_removed = cursor.fetchone()['count'] > 0
-    print(f"   was_manually_removed = {was_manually_removed}")
 
-    # Restore task
-    cursor.execute("UPDATE tasks SET is_deleted = 0 WHERE id = ?", (task_id,))
+def get_chronological_neighbors(unit_id, created_date, created_at, task_id, cursor=None):
+    """
+    Οι ενεργές εργασίες της μονάδας ακριβώς πριν και ακριβώς μετά από ένα
+    σημείο (created_date, created_at, id) στη χρονολογική σειρά.
 
-    # Get task details
-    cursor.execute("""
-                   SELECT t.*, u.name as unit_name
-                   FROM tasks t
-                            JOIN units u ON t.unit_id = u.id
-                   WHERE t.id = ?
-                   """, (task_id,))
+    Δύο ORDER BY ... LIMIT 1 στο idx_tasks_unit_chrono
+    (unit_id, is_deleted, created_date, created_at) - O(log n), ανεξάρτητα
+    από το ιστορικό της μονάδας.
 
-    restored_task = dict(cursor.fetchone())
-    unit_id = restored_task['unit_id']
-    restored_date = restored_task['created_date']
+    Returns:
+        tuple: (previous, next) ως dict {'id', 'created_date', 'created_at'} ή None
+    """
+    own_conn = cursor is None
+    if own_conn:
+        conn = get_connection()
+        cursor = conn.cursor()
 
-    print(f"   unit_id={unit_id}, date={restored_date}")
+    try:
+        cursor.execute("""
+                       SELECT id, created_date, created_at
+                       FROM tasks
+                       WHERE unit_id = ?
+                         AND is_deleted = 0
+                         AND (created_date, created_at, id) < (?, ?, ?)
+                       ORDER BY created_date DESC, created_at DESC, id DESC
+                       LIMIT 1
+                       """, (unit_id, created_date, created_at, task_id))
+        previous = cursor.fetchone()
 
-    # Get ALL relationships for this unit (including is_deleted)
-    cursor.execute("""
-                   SELECT tr.id,
-                          tr.parent_task_id,
-                          tr.child_task_id,
-                          tr.is_deleted,
-                          t1.created_date as parent_date,
-                          t2.created_date as child_date
-                   FROM task_relationships tr
-                            JOIN tasks t1 ON tr.parent_task_id = t1.id
-                            JOIN tasks t2 ON tr.child_task_id = t2.id
-                   WHERE (t1.unit_id = ? OR t2.unit_id = ?)
-                   """, (unit_id, unit_id))
-
-    all_rels = cursor.fetchall()
-    print(f"\n   All relationships in unit {unit_id}:")
-    for rel in all_rels:
-        print(f"      {rel['parent_task_id']}→{rel['child_task_id']} | is_deleted={rel['is_deleted']}")
-
-    # If manually removed, check for bypass
-    if was_manually_removed:
-        print(f"\n   🔍 Checking for bypass...")
-
-        # Find bypass relationships
-        bypass_found = False
-        for rel in all_rels:
-            if rel['is_deleted'] == 0:  # Active relationship
-                print(f"      Active:  {rel['parent_task_id']}→{rel['child_task_id']}")
-                bypass_found = True
-
-        if bypass_found:
-            print(f"   ✅ Bypass found! Will do chronological insert.")
-            # Delete old markers
-            cursor.execute("""
-                           DELETE
-                           FROM task_relationships
-                           WHERE (parent_task_id = ? OR child_task_id = ?)
-                             AND is_deleted = 2
-                           """, (task_id, task_id))
-        else:
-            print(f"   ❌ No bypass found!  Task stays standalone.")
-            cursor.execute("""
-                           DELETE
-                           FROM task_relationships
-                           WHERE (parent_task_id = ? OR child_task_id = ?)
-                             AND is_deleted = 2
-                           """, (task_id, task_id))
-            conn.commit()
+        cursor.execute("""
+                       SELECT id, created_date, created_at
+                       FROM tasks
+                       WHERE unit_id = ?
+                         AND is_deleted = 0
+                         AND (created_date, created_at, id) > (?, ?, ?)
+                       ORDER BY created_date, created_at, id
+                       LIMIT 1
+                       """, (unit_id, created_date, created_at, task_id))
+        following = cursor.fetchone()
+    finally:
+        if own_conn:
             conn.close()
-            return
-
-    # Get active tasks for chronological insert
-    cursor.execute("""
-                   SELECT t.id, t.created_date, t.created_at
-                   FROM tasks t
-                   WHERE t.unit_id = ?
-                     AND t.is_deleted = 0
-                     AND t.id != ?
-                   ORDER BY t.created_date ASC, t.created_at ASC
-                   """, (unit_id, task_id))
-
-    unit_tasks = [dict(row) for row in cursor.fetchall()]
-    print(f"\n   Active tasks in unit:  {[t['id'] for t in unit_tasks]}")
 
-    # Find insertion point
-    insert_after = None
-    insert_before = None
+    return (dict(previous) if previous else None,
+            dict(following) if following else None)
 
-    for task in unit_tasks:
-        if task['created_date'] < restored_date:
-            insert_after = task
-        elif task['created_date'] > restored_date and insert_before is None:
-            insert_before = task
-            break
 
-    print(f"   insert_after = {insert_after['id'] if insert_after else None}")
-    print(f"   insert_before = {insert_before['id'] if insert_before else None}")
-
-    # Rebuild relationships
-    if insert_after and insert_before:
-        print(f"\n   🔧 MIDDLE INSERT: {insert_after['id']}→{task_id}→{insert_before['id']}")
-
-        # Remove bypass
+def _link_between(cursor, task_id, previous_id, next_id):
+    """Ένταξη εργασίας στην αλυσίδα: previous → task → next (αντί για previous → next)"""
+    if previous_id and next_id:
         cursor.execute("""
                        DELETE
                        FROM task_relationships
                        WHERE parent_task_id = ?
                          AND child_task_id = ?
-                        """, (insert_after['id'], insert_before['id']))
-        print(f"      Removed bypass: {insert_after['id']}→{insert_before['id']}")
+                       """, (previous_id, next_id))
 
-        # Create new relationships
-        cursor.execute("""
-                       INSERT
-                       OR IGNORE INTO task_relationships 
-            (parent_task_id, child_task_id, relationship_type, is_deleted)
-            VALUES (?, ?, 'related', 0)
-                       """, (insert_after['id'], task_id))
-        print(f"      Created:  {insert_after['id']}→{task_id}")
+    for parent_id, child_id in ((previous_id, task_id), (task_id, next_id)):
+        if parent_id and child_id:
+            cursor.execute(_ACTIVATE_EDGE_SQL, (parent_id, child_id))
 
+
+def restore_task(task_id, conn=None):
+    """
+    Smart restore - χρονολογική ένταξη στην αλυσίδα της μονάδας.
+
+    Οι γείτονες βρίσκονται με get_chronological_neighbors (index lookup),
+    όχι με σάρωση όλων των εργασιών/σχέσεων της μονάδας. Με conn (π.χ. του
+    write_service) στο transaction του caller, όπως το add_task.
+    """
+    logger.info(f"Restoring task {task_id}...")
+    own_conn = conn is None
+    if own_conn:
+        conn = get_connection()
+    cursor = conn.cursor()
+
+    try:
+        if own_conn:
+            cursor.execute("BEGIN IMMEDIATE")
+
+        # Είχε αφαιρεθεί χειροκίνητα από αλυσίδα;
         cursor.execute("""
-                       INSERT
-                       OR IGNORE INTO task_relationships 
-            (parent_task_id, child_task_id, relationship_type, is_deleted)
-            VALUES (?, ?, 'related', 0)
-                       """, (task_id, insert_before['id']))
-        print(f"      Created: {task_id}→{insert_before['id']}")
-
-    elif insert_after and not insert_before:
-        print(f"\n   🔧 APPEND TO END: {insert_after['id']}→{task_id}")
-        cursor.execute("""
-                       INSERT
-                       OR IGNORE INTO task_relationships 
-            (parent_task_id, child_task_id, relationship_type, is_deleted)
-            VALUES (?, ?, 'related', 0)
-                       """, (insert_after['id'], task_id))
-
-    elif not insert_after and insert_before:
-        print(f"\n   🔧 PREPEND TO START: {task_id}→{insert_before['id']}")
+                       SELECT EXISTS (SELECT 1
+                                      FROM task_relationships
+                                      WHERE (parent_task_id = ? OR child_task_id = ?)
+                                        AND is_deleted = 2) AS was_removed
+                       """, (task_id, task_id))
+        was_manually_removed = bool(cursor.fetchone()['was_removed'])
+
+        cursor.execute("UPDATE tasks SET is_deleted = 0 WHERE id = ?", (task_id,))
+
         cursor.execute("""
-                       INSERT
-                       OR IGNORE INTO task_relationships 
-            (parent_task_id, child_task_id, relationship_type, is_deleted)
-            VALUES (?, ?, 'related', 0)
-                       """, (task_id, insert_before['id']))
+                       SELECT unit_id, created_date, created_at
+                       FROM tasks
+                       WHERE id = ?
+                       """, (task_id,))
+        restored = cursor.fetchone()
+        if restored is None:
+            raise ValidationError(f"Η εργασία {task_id} δεν βρέθηκε")
+        unit_id = restored['unit_id']
 
-    conn.commit()
-    conn.close()
-    print(f"✅ Restore complete!\n")
+        if was_manually_removed:
+            cursor.execute("""
+                           DELETE
+                           FROM task_relationships
+                           WHERE (parent_task_id = ? OR child_task_id = ?)
+                             AND is_deleted = 2
+                           """, (task_id, task_id))
+
+            # Χωρίς καμία ενεργή αλυσίδα στη μονάδα η εργασία μένει standalone
+            cursor.execute("""
+                           SELECT EXISTS (SELECT 1
+                                          FROM tasks t
+                                                   JOIN task_relationships tr ON tr.parent_task_id = t.id
+                                          WHERE t.unit_id = ? AND tr.is_deleted = 0)
+                               OR EXISTS (SELECT 1
+                                          FROM tasks t
+                                                   JOIN task_relationships tr ON tr.child_task_id = t.id
+                                          WHERE t.unit_id = ? AND tr.is_deleted = 0) AS has_chain
+                           """, (unit_id, unit_id))
+            if not cursor.fetchone()['has_chain']:
+                if own_conn:
+                    conn.commit()
+                logger.info(f"✅ Task {task_id} restored as standalone (no active chain in unit {unit_id})")
+                return True
+
+        previous, following = get_chronological_neighbors(
+            unit_id, restored['created_date'], restored['created_at'], task_id, cursor
+        )
+        previous_id = previous['id'] if previous else None
+        next_id = following['id'] if following else None
+
+        _link_between(cursor, task_id, previous_id, next_id)
+
+        if own_conn:
+            conn.commit()
+        logger.info(f"✅ Task {task_id} restored: {previous_id} → {task_id} → {next_id}")
+        return True
+
+    except sqlite3.Error as e:
+        if not own_conn:
+            raise
+        logger.error(f"❌ Failed to restore task {task_id}: {e}", exc_info=True)
+        conn.rollback()
+        raise RuntimeError(f"Σφάλμα επαναφοράς εργασίας: {str(e)}")
+    except Exception:
+        if own_conn:
+            conn.rollback()
+        raise
+    finally:
+        if own_conn:
+            conn.close()
 
 
 def permanent_delete_task(task_id):
@@ -1187,11 +1886,7 @@ def permanent_delete_task(task_id):
     # Δημιουργούμε τη σχέση Task1 → Task3 (γονέας → παιδί) αν υπάρχουν
     if parent_id and child_id:
         try:
-            cursor.execute("""
-                           INSERT
-                           OR IGNORE INTO task_relationships (parent_task_id, child_task_id, relationship_type, is_deleted)
-                VALUES (?, ?, 'related', 0)
-                           """, (parent_id, child_id))
+            cursor.execute(_ACTIVATE_EDGE_SQL, (parent_id, child_id))
             logger.debug(f"Created bypass relationship: parent {parent_id} -> child {child_id}")
         except sqlite3.IntegrityError as e:
             # Expected: Relationship already exists (OR IGNORE handles it)
@@ -1217,9 +1912,11 @@ def permanent_delete_task(task_id):
     return True
 
 
-def get_deleted_tasks():
+def get_deleted_tasks(conn=None):
     """Επιστρέφει διαγραμμένες εργασίες - Updated Phase 2.3"""
-    conn = get_connection()
+    own_conn = conn is None
+    if own_conn:
+        conn = get_connection()
     cursor = conn.cursor()
 
     cursor.execute('''
@@ -1238,30 +1935,297 @@ def get_deleted_tasks():
                    ''')
 
     tasks = [dict(row) for row in cursor.fetchall()]
-    conn.close()
+    if own_conn:
+        conn.close()
     return tasks
 
 
-def filter_tasks(status=None, unit_id=None, task_type_id=None, date_from=None, date_to=None, search_text=None):
-    """Φιλτράρισμα εργασιών με πολλαπλά κριτήρια - FIXED: Comprehensive Search"""
+# ═══════════════════════════════════════════════════════════════════════════
+# BULK RECYCLE BIN OPERATIONS
+# ═══════════════════════════════════════════════════════════════════════════
+
+def _load_bulk_ids(cursor, task_ids):
+    """Φόρτωση IDs σε temp table (χωρίς όριο παραμέτρων στα IN (...))"""
+    cursor.execute("CREATE TEMP TABLE IF NOT EXISTS bulk_task_ids (id INTEGER PRIMARY KEY)")
+    cursor.execute("DELETE FROM bulk_task_ids")
+    cursor.executemany("INSERT OR IGNORE INTO bulk_task_ids (id) VALUES (?)", [(int(t),) for t in task_ids])
+
+
+def _replace_edges(cursor, removed, added):
+    """Αφαίρεση/προσθήκη ακμών αλυσίδας (χωρίς διπλές ακμές για το ίδιο ζεύγος)"""
+    cursor.executemany("""
+                       DELETE
+                       FROM task_relationships
+                       WHERE parent_task_id = ?
+                         AND child_task_id = ?
+                       """, list(removed) + list(added))
+    cursor.executemany("""
+                       INSERT INTO task_relationships (parent_task_id, child_task_id, relationship_type, is_deleted)
+                       VALUES (?, ?, 'related', 0)
+                       """, list(added))
+
+
+def restore_tasks(task_ids):
+    """
+    Μαζική επαναφορά εργασιών από τον κάδο (ένα transaction).
+
+    Ίδια λογική με το restore_task: κάθε εργασία μπαίνει χρονολογικά
+    ανάμεσα στις ενεργές εργασίες της μονάδας της. Οι θέσεις υπολογίζονται
+    ΜΙΑ φορά ανά μονάδα - διαδοχικές επαναφερόμενες εργασίες ενώνονται
+    μεταξύ τους και το bypass των γειτόνων αφαιρείται μία φορά.
+
+    Returns:
+        int: Πλήθος εργασιών που επανήλθαν
+    """
+    task_ids = list(task_ids)
+    if not task_ids:
+        return 0
+
+    logger.info(f"Bulk restore of {len(task_ids)} task(s)...")
     conn = get_connection()
     cursor = conn.cursor()
 
-    query = '''
-            SELECT t.*,
-                   u.name  as unit_name,
-                   tt.name as task_type_name,
-                   g.name  as group_name,
-                   g.id    as group_id,
-                   ti.name as task_item_name
-            FROM tasks t
-        JOIN units u ON t.unit_id = u.id
-        JOIN task_types tt ON t.task_type_id = tt.id
-        JOIN groups g ON u.group_id = g.id
-        LEFT JOIN task_items ti ON t.task_item_id = ti.id
-        WHERE t.is_deleted = 0
-    '''
+    try:
+        cursor.execute("BEGIN IMMEDIATE")
+        _load_bulk_ids(cursor, task_ids)
 
+        # Μόνο όσες είναι πράγματι στον κάδο
+        cursor.execute("""
+                       DELETE FROM bulk_task_ids
+                       WHERE id NOT IN (SELECT id FROM tasks WHERE is_deleted = 1)
+                       """)
+
+        cursor.execute("""
+                       SELECT DISTINCT t.unit_id
+                       FROM tasks t
+                                JOIN bulk_task_ids b ON b.id = t.id
+                       """)
+        unit_ids = [row['unit_id'] for row in cursor.fetchall()]
+        if not unit_ids:
+            conn.rollback()
+            return 0
+
+        # Εργασίες που είχαν αφαιρεθεί χειροκίνητα από αλυσίδα (is_deleted = 2)
+        cursor.execute("""
+                       SELECT DISTINCT b.id
+                       FROM bulk_task_ids b
+                                JOIN task_relationships tr
+                                     ON tr.parent_task_id = b.id OR tr.child_task_id = b.id
+                       WHERE tr.is_deleted = 2
+                       """)
+        manually_removed = {row['id'] for row in cursor.fetchall()}
+
+        # Μονάδες με τουλάχιστον μία ενεργή σχέση (χρειάζεται μόνο για τις παραπάνω)
+        placeholders = ','.join('?' * len(unit_ids))
+        units_with_chains = set()
+        if manually_removed:
+            cursor.execute(f"""
+                           SELECT t.unit_id
+                           FROM task_relationships tr
+                                    JOIN tasks t ON t.id = tr.parent_task_id
+                           WHERE tr.is_deleted = 0
+                             AND t.unit_id IN ({placeholders})
+                           UNION
+                           SELECT t.unit_id
+                           FROM task_relationships tr
+                                    JOIN tasks t ON t.id = tr.child_task_id
+                           WHERE tr.is_deleted = 0
+                             AND t.unit_id IN ({placeholders})
+                           """, unit_ids + unit_ids)
+            units_with_chains = {row['unit_id'] for row in cursor.fetchall()}
+
+        cursor.execute("""
+                       DELETE
+                       FROM task_relationships
+                       WHERE is_deleted = 2
+                         AND (parent_task_id IN (SELECT id FROM bulk_task_ids)
+                           OR child_task_id IN (SELECT id FROM bulk_task_ids))
+                       """)
+        cursor.execute("UPDATE tasks SET is_deleted = 0 WHERE id IN (SELECT id FROM bulk_task_ids)")
+        restored = cursor.rowcount
+
+        cursor.execute("SELECT id FROM bulk_task_ids")
+        restored_ids = {row['id'] for row in cursor.fetchall()}
+
+        # Όλες οι ενεργές εργασίες των μονάδων, χρονολογικά - ΕΝΑ query
+        cursor.execute(f"""
+                       SELECT id, unit_id
+                       FROM tasks
+                       WHERE is_deleted = 0
+                         AND unit_id IN ({placeholders})
+                       ORDER BY unit_id, created_date, created_at, id
+                       """, unit_ids)
+
+        by_unit = {}
+        for row in cursor.fetchall():
+            task_id, unit_id = row['id'], row['unit_id']
+            # Χειροκίνητα αφαιρεμένη + καμία αλυσίδα στη μονάδα → μένει standalone
+            if task_id in manually_removed and unit_id not in units_with_chains:
+                continue
+            by_unit.setdefault(unit_id, []).append(task_id)
+
+        removed_edges, added_edges = [], []
+        for ordered in by_unit.values():
+            k = 0
+            while k < len(ordered):
+                if ordered[k] not in restored_ids:
+                    k += 1
+                    continue
+                # Συνεχόμενη ομάδα επαναφερόμενων: [start, end)
+                start = k
+                while k < len(ordered) and ordered[k] in restored_ids:
+                    k += 1
+                before = ordered[start - 1] if start > 0 else None
+                after = ordered[k] if k < len(ordered) else None
+
+                path = ([before] if before else []) + ordered[start:k] + ([after] if after else [])
+                if before and after:
+                    removed_edges.append((before, after))
+                added_edges.extend(zip(path, path[1:]))
+
+        _replace_edges(cursor, removed_edges, added_edges)
+
+        conn.commit()
+        logger.info(f"✅ Restored {restored} task(s) in {len(unit_ids)} unit(s), "
+                    f"{len(added_edges)} chain link(s) created")
+        return restored
+
+    except sqlite3.Error as e:
+        logger.error(f"❌ Bulk restore failed: {e}", exc_info=True)
+        conn.rollback()
+        raise RuntimeError(f"Σφάλμα μαζικής επαναφοράς: {str(e)}")
+    finally:
+        conn.close()
+
+
+def _purge(cursor):
+    """
+    Οριστική διαγραφή των εργασιών του bulk_task_ids.
+
+    Αν μια ενεργή αλυσίδα περνάει από διαγραφόμενες εργασίες, ο γονέας
+    πριν από αυτές συνδέεται με το πρώτο παιδί μετά από αυτές (bypass).
+    """
+    cursor.execute("""
+                   SELECT parent_task_id, child_task_id
+                   FROM task_relationships
+                   WHERE is_deleted = 0
+                     AND relationship_type = 'related'
+                     AND (parent_task_id IN (SELECT id FROM bulk_task_ids)
+                       OR child_task_id IN (SELECT id FROM bulk_task_ids))
+                   """)
+    edges = cursor.fetchall()
+
+    cursor.execute("SELECT id FROM bulk_task_ids")
+    purged = {row['id'] for row in cursor.fetchall()}
+
+    children = {}
+    for edge in edges:
+        children.setdefault(edge['parent_task_id'], []).append(edge['child_task_id'])
+
+    bypass = []
+    for edge in edges:
+        parent_id, child_id = edge['parent_task_id'], edge['child_task_id']
+        if parent_id in purged or child_id not in purged:
+            continue
+        # Από τον επιζώντα γονέα, διασχίζουμε τις διαγραφόμενες μέχρι επιζώντα
+        stack, seen = [child_id], set()
+        while stack:
+            node = stack.pop()
+            if node in seen:
+                continue
+            seen.add(node)
+            for nxt in children.get(node, ()):
+                if nxt in purged:
+                    stack.append(nxt)
+                elif nxt != parent_id:
+                    bypass.append((parent_id, nxt))
+
+    cursor.execute("""
+                   DELETE
+                   FROM task_relationships
+                   WHERE parent_task_id IN (SELECT id FROM bulk_task_ids)
+                      OR child_task_id IN (SELECT id FROM bulk_task_ids)
+                   """)
+    _replace_edges(cursor, [], sorted(set(bypass)))
+
+    cursor.execute("DELETE FROM tasks WHERE id IN (SELECT id FROM bulk_task_ids)")
+    return cursor.rowcount
+
+
+def permanent_delete_tasks(task_ids):
+    """
+    Μαζική οριστική διαγραφή εργασιών του κάδου (ένα transaction).
+
+    Returns:
+        int: Πλήθος εργασιών που διαγράφηκαν
+    """
+    task_ids = list(task_ids)
+    if not task_ids:
+        return 0
+
+    logger.warning(f"⚠️  Bulk permanent delete of {len(task_ids)} task(s)...")
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    try:
+        cursor.execute("BEGIN IMMEDIATE")
+        _load_bulk_ids(cursor, task_ids)
+        cursor.execute("""
+                       DELETE FROM bulk_task_ids
+                       WHERE id NOT IN (SELECT id FROM tasks WHERE is_deleted = 1)
+                       """)
+        deleted = _purge(cursor)
+        conn.commit()
+        logger.warning(f"✅ {deleted} task(s) permanently deleted")
+        return deleted
+
+    except sqlite3.Error as e:
+        logger.error(f"❌ Bulk permanent delete failed: {e}", exc_info=True)
+        conn.rollback()
+        raise RuntimeError(f"Σφάλμα οριστικής διαγραφής: {str(e)}")
+    finally:
+        conn.close()
+
+
+def empty_recycle_bin():
+    """
+    Άδειασμα κάδου: οριστική διαγραφή ΟΛΩΝ των διαγραμμένων εργασιών.
+
+    Returns:
+        int: Πλήθος εργασιών που διαγράφηκαν
+    """
+    logger.warning("⚠️  Emptying recycle bin...")
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    try:
+        cursor.execute("BEGIN IMMEDIATE")
+        cursor.execute("CREATE TEMP TABLE IF NOT EXISTS bulk_task_ids (id INTEGER PRIMARY KEY)")
+        cursor.execute("DELETE FROM bulk_task_ids")
+        cursor.execute("INSERT INTO bulk_task_ids (id) SELECT id FROM tasks WHERE is_deleted = 1")
+        deleted = _purge(cursor)
+        conn.commit()
+        logger.warning(f"✅ Recycle bin emptied: {deleted} task(s) permanently deleted")
+        return deleted
+
+    except sqlite3.Error as e:
+        logger.error(f"❌ Emptying recycle bin failed: {e}", exc_info=True)
+        conn.rollback()
+        raise RuntimeError(f"Σφάλμα αδειάσματος κάδου: {str(e)}")
+    finally:
+        conn.close()
+
+
+def _task_filter_sql(status=None, unit_id=None, task_type_id=None, date_from=None, date_to=None,
+                     search_text=None, location_ids=None, select=_TASK_SELECT):
+    """
+    Query (χωρίς ORDER BY) και παράμετροι για τα φίλτρα εργασιών
+
+    Args:
+        location_ids: Τοποθεσίες μονάδας - μαζί με ΟΛΟ το υποδέντρο τους
+                      (location_closure → integer IN στο idx_units_location_id)
+    """
+    query = select + " WHERE t.is_deleted = 0"
     params = []
 
     if status:
@@ -1284,6 +2248,12 @@ def filter_tasks(status=None, unit_id=None, task_type_id=None, date_from=None, d
         query += " AND t.created_date <= ?"
         params.append(date_to)
 
+    if location_ids:
+        location_ids = list(location_ids)
+        query += (" AND u.location_id IN (SELECT descendant_id FROM location_closure "
+                  f"WHERE ancestor_id IN ({','.join('?' * len(location_ids))}))")
+        params.extend(location_ids)
+
     # ✅ FIXED: Comprehensive search across ALL relevant fields
     if search_text:
         query += """ AND (
@@ -1300,132 +2270,187 @@ def filter_tasks(status=None, unit_id=None, task_type_id=None, date_from=None, d
         # Add 8 parameters (one for each field)
         params.extend([search_param] * 8)
 
-    query += " ORDER BY t.created_date DESC, t.created_at DESC"
+    return query, params
+
+
+def filter_tasks(status=None, unit_id=None, task_type_id=None, date_from=None, date_to=None, search_text=None,
+                 location_ids=None):
+    """Φιλτράρισμα εργασιών με πολλαπλά κριτήρια - FIXED: Comprehensive Search"""
+    query, params = _task_filter_sql(status, unit_id, task_type_id, date_from, date_to, search_text,
+                                     location_ids)
 
-    cursor.execute(query, params)
+    conn = get_connection()
+    cursor = conn.cursor()
+    if _archive_reaches(conn, status, date_from, date_to):
+        archived, archived_params = _task_filter_sql(status, unit_id, task_type_id, date_from, date_to,
+                                                     search_text, location_ids,
+                                                     _archived_select(conn, _TASK_SELECT))
+        cursor.execute(f"SELECT * FROM ({query} UNION ALL {archived}) "
+                       "ORDER BY created_date DESC, created_at DESC", params + archived_params)
+    else:
+        cursor.execute(query + " ORDER BY t.created_date DESC, t.created_at DESC", params)
     tasks = [dict(row) for row in cursor.fetchall()]
     conn.close()
     return tasks
 
 
+def filter_tasks_page(status=None, unit_id=None, task_type_id=None, date_from=None, date_to=None,
+                      search_text=None, after=None, limit=100, conn=None, location_ids=None):
+    """
+    Μία σελίδα του filter_tasks με keyset pagination.
+
+    Ίδια σειρά με το filter_tasks (νεότερες πρώτα), με το id ως τελικό
+    κριτήριο. Η επόμενη σελίδα ξεκινά ΑΜΕΣΑ μετά το κλειδί της τελευταίας
+    γραμμής - χωρίς OFFSET, άρα σταθερό κόστος σε οποιοδήποτε βάθος.
+
+    Args:
+        after: Κλειδί (created_date, created_at, id) της τελευταίας γραμμής
+               της προηγούμενης σελίδας, ή None για την πρώτη
+        limit: Γραμμές ανά σελίδα
+        location_ids: Τοποθεσίες μονάδας (όπως στο filter_tasks)
+
+    Returns:
+        tuple: (tasks, next_after) - next_after None στην τελευταία σελίδα
+    """
+    def page_sql(select=_TASK_SELECT):
+        query, params = _task_filter_sql(status, unit_id, task_type_id, date_from, date_to,
+                                         search_text, location_ids, select)
+        if after is not None:
+            condition, condition_params = _keyset_after(
+                (('t.created_date', after[0]), ('t.created_at', after[1]), ('t.id', after[2]))
+            )
+            query += f" AND {condition}"
+            params.extend(condition_params)
+        # Ίδια σειρά με το idx_tasks_date ώστε το LIMIT να σταματά νωρίς
+        query += " ORDER BY t.created_date DESC, t.created_at DESC, t.id DESC LIMIT ?"
+        params.append(limit)
+        return query, params
+
+    own_conn = conn is None
+    if own_conn:
+        conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        query, params = page_sql()
+        if _archive_reaches(conn, status, date_from, date_to):
+            # Κάθε πλευρά σταματά στις `limit` γραμμές της, η συγχώνευση κρατά τις πρώτες
+            archived, archived_params = page_sql(_archived_select(conn, _TASK_SELECT))
+            query = (f"SELECT * FROM (SELECT * FROM ({query}) UNION ALL SELECT * FROM ({archived})) "
+                     "ORDER BY created_date DESC, created_at DESC, id DESC LIMIT ?")
+            params = params + archived_params + [limit]
+        cursor.execute(query, params)
+        tasks = [dict(row) for row in cursor.fetchall()]
+    finally:
+        if own_conn:
+            conn.close()
+
+    next_after = None
+    if len(tasks) == limit:
+        last = tasks[-1]
+        next_after = (last['created_date'], last['created_at'], last['id'])
+    return tasks, next_after
+
+
+def _keyset_after(key):
+    """
+    Συνθήκη "μετά από το κλειδί" για ORDER BY ... DESC σε όλες τις στήλες
+    (τα NULL ταξινομούνται τελευταία). Το row-value (a, b) < (?, ?) δεν
+    αρκεί, γιατί κάθε σύγκριση με NULL αποκλείει τη γραμμή.
+
+    Args:
+        key: ((στήλη, τιμή κλειδιού), ...)
+
+    Returns:
+        tuple: (SQL συνθήκη, παράμετροι)
+    """
+    column, value = key[0]
+    if value is None:
+        after, after_params = "0", []
+    else:
+        after, after_params = f"({column} < ? OR {column} IS NULL)", [value]
+    if len(key) == 1:
+        return after, after_params
+
+    rest, rest_params = _keyset_after(key[1:])
+    return (f"({after} OR ({column} IS ? AND {rest}))",
+            after_params + [value] + rest_params)
+
+
 def add_task_relationship(parent_task_id, child_task_id, relationship_type="related"):
-    """Δημιουργία σχέσης μεταξύ δύο εργασιών - SMART VERSION"""
+    """
+    Δημιουργία σχέσης μεταξύ δύο εργασιών - SMART VERSION
+
+    Αν ο parent έχει ήδη child και το νέο child είναι χρονολογικά
+    παλαιότερο, μπαίνει ανάμεσα: parent → child → old_child.
+    """
     conn = get_connection()
     cursor = conn.cursor()
 
-    # ═════════════════════════════════════════════════
-    # STEP 1: Check if child was manually removed from chain
-    # ═════════════════════════════════════════════════
-    cursor.execute("""
-                   SELECT COUNT(*) as count
-                   FROM task_relationships
-                   WHERE (parent_task_id = ?
-                      OR child_task_id = ?)
-                     AND is_deleted = 2
-                   """, (child_task_id, child_task_id))
-
-    child_was_removed = cursor.fetchone()['count'] > 0
-
-    if child_was_removed:
-        print(f"🔍 Child task {child_task_id} was manually removed - cleaning up...")
+    try:
+        cursor.execute("BEGIN IMMEDIATE")
 
-        # Delete old manually-removed markers
+        # ═════════════════════════════════════════════════
+        # STEP 1: Clean up markers if child was manually removed from chain
+        # ═════════════════════════════════════════════════
         cursor.execute("""
                        DELETE
                        FROM task_relationships
                        WHERE (parent_task_id = ? OR child_task_id = ?)
                          AND is_deleted = 2
-                        """, (child_task_id, child_task_id))
+                       """, (child_task_id, child_task_id))
+        if cursor.rowcount:
+            logger.debug(f"Child task {child_task_id} was manually removed - markers cleaned up")
 
-    # ═════════════════════════════════════════════════
-    # STEP 2: Check if parent already has a child (bypass scenario)
-    # ═════════════════════════════════════════════════
-    cursor.execute("""
-                   SELECT child_task_id
-                   FROM task_relationships
-                   WHERE parent_task_id = ?
-                     AND is_deleted = 0
-                     AND relationship_type = 'related'
-                   """, (parent_task_id,))
-
-    existing_child = cursor.fetchone()
-
-    if existing_child:
-        old_child_id = existing_child['child_task_id']
-
-        print(f"🔍 Parent {parent_task_id} already has child {old_child_id}")
-        print(f"   Checking if {child_task_id} should be inserted between...")
-
-        # Get created_date for chronological check
+        # ═════════════════════════════════════════════════
+        # STEP 2: Existing child of parent + chronological check (one lookup)
+        # ═════════════════════════════════════════════════
         cursor.execute("""
-                       SELECT id, created_date, created_at
-                       FROM tasks
-                       WHERE id IN (?, ?)
-                       """, (child_task_id, old_child_id))
-
-        # ✅ FIX: Convert to dict properly
-        rows = cursor.fetchall()
-        dates = {}
-        for row in rows:
-            task_id = row['id']
-            dates[task_id] = (row['created_date'], row['created_at'])
-
-        print(f"   Task {child_task_id}:  {dates.get(child_task_id)}")
-        print(f"   Task {old_child_id}:  {dates.get(old_child_id)}")
-
-        # If child_task_id is OLDER than old_child_id, it should be inserted before
-        if child_task_id in dates and old_child_id in dates:
-            if dates[child_task_id] < dates[old_child_id]:
-                print(f"   ✅ Inserting {child_task_id} BETWEEN {parent_task_id} and {old_child_id}")
-
-                # Remove old bypass:  parent → old_child
-                cursor.execute("""
-                               DELETE
-                               FROM task_relationships
-                               WHERE parent_task_id = ?
-                                 AND child_task_id = ?
-                               """, (parent_task_id, old_child_id))
-
-                # Create new chain: parent → child → old_child
-                cursor.execute("""
-                               INSERT INTO task_relationships
-                                   (parent_task_id, child_task_id, relationship_type, is_deleted)
-                               VALUES (?, ?, ?, 0)
-                               """, (parent_task_id, child_task_id, relationship_type))
-
-                cursor.execute("""
-                               INSERT
-                               OR IGNORE INTO task_relationships 
-                    (parent_task_id, child_task_id, relationship_type, is_deleted)
-                    VALUES (?, ?, 'related', 0)
-                               """, (child_task_id, old_child_id))
-
-                conn.commit()
-                conn.close()
-                print(f"✅ Relationship created: {parent_task_id}→{child_task_id}→{old_child_id}")
-                return True
-            else:
-                print(f"   ℹ️ Task {child_task_id} is NEWER than {old_child_id} - not inserting between")
+                       SELECT tr.child_task_id                               AS old_child_id,
+                              (n.created_date, n.created_at, n.id)
+                                  < (o.created_date, o.created_at, o.id)     AS is_older
+                       FROM task_relationships tr
+                                JOIN tasks o ON o.id = tr.child_task_id
+                                JOIN tasks n ON n.id = ?
+                       WHERE tr.parent_task_id = ?
+                         AND tr.is_deleted = 0
+                         AND tr.relationship_type = 'related'
+                       LIMIT 1
+                       """, (child_task_id, parent_task_id))
+        existing = cursor.fetchone()
+
+        if existing and existing['is_older']:
+            old_child_id = existing['old_child_id']
+            _link_between(cursor, child_task_id, parent_task_id, old_child_id)
+            conn.commit()
+            logger.info(f"✅ Relationship created: {parent_task_id}→{child_task_id}→{old_child_id}")
+            return True
 
-    # ═════════════════════════════════════════════════
-    # STEP 3: Normal insert (no bypass to handle)
-    # ═════════════════════════════════════════════════
-    print(f"   Creating normal relationship: {parent_task_id}→{child_task_id}")
+        # ═════════════════════════════════════════════════
+        # STEP 3: Normal insert (no bypass to handle)
+        # ═════════════════════════════════════════════════
+        cursor.execute('''
+                       INSERT INTO task_relationships (parent_task_id, child_task_id, relationship_type, is_deleted)
+                       VALUES (?, ?, ?, 0)
+                       ON CONFLICT (parent_task_id, child_task_id)
+                           DO UPDATE SET is_deleted = 0, relationship_type = excluded.relationship_type
+                       ''', (parent_task_id, child_task_id, relationship_type))
 
-    cursor.execute('''
-                   INSERT INTO task_relationships (parent_task_id, child_task_id, relationship_type)
-                   VALUES (?, ?, ?)
-                   ''', (parent_task_id, child_task_id, relationship_type))
+        conn.commit()
+        logger.info(f"✅ Relationship created: {parent_task_id}→{child_task_id}")
+        return True
 
-    conn.commit()
-    conn.close()
-    print(f"✅ Relationship created: {parent_task_id}→{child_task_id}")
-    return True
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
 
 
-def get_related_tasks(task_id):
+def get_related_tasks(task_id, conn=None):
     """Παίρνει τις συνδεδεμένες εργασίες (parents & children)"""
-    conn = get_connection()
+    own_conn = conn is None
+    if own_conn:
+        conn = get_connection()
     cursor = conn.cursor()
 
     # Parents
@@ -1468,7 +2493,8 @@ def get_related_tasks(task_id):
 
     children = [dict(row) for row in cursor.fetchall()]
 
-    conn.close()
+    if own_conn:
+        conn.close()
 
     return {
         'parents': parents,
@@ -1512,11 +2538,7 @@ def remove_task_from_chain(task_id):
 
         # Create bypass: parent → child (skip removed task)
         try:
-            cursor.execute("""
-                           INSERT
-                           OR IGNORE INTO task_relationships (parent_task_id, child_task_id, relationship_type, is_deleted)
-                VALUES (?, ?, 'related', 0)
-                           """, (parent_id, child_id))
+            cursor.execute(_ACTIVATE_EDGE_SQL, (parent_id, child_id))
         except:
             pass
 
@@ -1555,11 +2577,128 @@ def mark_relationship_manually_removed(parent_task_id, child_task_id):
     return True
 
 
+# Μέλη αλυσίδας: ο κρίκος, όλοι οι πρόγονοι (parents) και όλοι οι απόγονοι
+# (children) μέσω ενεργών σχέσεων - ίδιος ορισμός με το get_full_task_chain.
+# Το UNION (όχι UNION ALL) σταματά την αναδρομή σε τυχόν κύκλους.
+_CHAIN_MEMBERS_CTE = """
+    WITH RECURSIVE
+        up(id) AS (
+            SELECT ?
+            UNION
+            SELECT tr.parent_task_id
+            FROM task_relationships tr
+                     JOIN up ON tr.child_task_id = up.id
+                     JOIN tasks p ON p.id = tr.parent_task_id
+            WHERE tr.is_deleted = 0 AND p.is_deleted = 0
+        ),
+        down(id) AS (
+            SELECT ?
+            UNION
+            SELECT tr.child_task_id
+            FROM task_relationships tr
+                     JOIN down ON tr.parent_task_id = down.id
+                     JOIN tasks c ON c.id = tr.child_task_id
+            WHERE tr.is_deleted = 0 AND c.is_deleted = 0
+        ),
+        chain(id) AS (
+            SELECT id FROM up
+            UNION
+            SELECT id FROM down
+        )
+"""
+
+
+def sync_chain_status(task_id, status=None, completed_date=None, conn=None):
+    """
+    Συγχρονισμός κατάστασης σε ΟΛΗ την αλυσίδα μιας εργασίας.
+
+    Η αλυσίδα υπολογίζεται με recursive CTE και όλα τα μέλη ενημερώνονται
+    με ένα UPDATE, σε ένα transaction.
+
+    Args:
+        task_id: Οποιοσδήποτε κρίκος της αλυσίδας
+        status: Νέα κατάσταση ('pending'/'completed'). None = η κατάσταση
+                του τελευταίου κρίκου της αλυσίδας
+        completed_date: Ημερομηνία ολοκλήρωσης (αγνοείται όταν status=None)
+        conn: Σύνδεση του caller (π.χ. του write_service) - στο δικό του
+              transaction, όπως το add_task
+
+    Returns:
+        dict: {'chain_length', 'updated', 'status', 'completed_date'}
+    """
+    own_conn = conn is None
+    if own_conn:
+        conn = get_connection()
+    cursor = conn.cursor()
+
+    try:
+        if own_conn:
+            cursor.execute("BEGIN IMMEDIATE")
+
+        if status is None:
+            # Τελευταίος κρίκος: απόγονος χωρίς ενεργό child
+            cursor.execute(_CHAIN_MEMBERS_CTE + """
+                SELECT t.status, t.completed_date
+                FROM tasks t
+                WHERE t.id IN (SELECT id FROM down)
+                  AND NOT EXISTS (SELECT 1
+                                  FROM task_relationships tr
+                                           JOIN tasks c ON c.id = tr.child_task_id
+                                  WHERE tr.parent_task_id = t.id
+                                    AND tr.is_deleted = 0
+                                    AND c.is_deleted = 0)
+                ORDER BY t.created_date DESC, t.created_at DESC
+                LIMIT 1
+            """, (task_id, task_id))
+            last = cursor.fetchone()
+            if last is None:
+                raise ValidationError(f"Η εργασία {task_id} δεν βρέθηκε")
+            status, completed_date = last['status'], last['completed_date']
+
+        if status not in ('pending', 'completed'):
+            raise ValidationError(f"Μη έγκυρη κατάσταση: {status}")
+        if status == 'pending':
+            completed_date = None
+
+        cursor.execute(_CHAIN_MEMBERS_CTE + "SELECT COUNT(*) AS count FROM chain", (task_id, task_id))
+        chain_length = cursor.fetchone()['count']
+
+        cursor.execute(_CHAIN_MEMBERS_CTE + """
+            UPDATE tasks
+            SET status = ?, completed_date = ?
+            WHERE id IN (SELECT id FROM chain)
+              AND (status IS NOT ? OR completed_date IS NOT ?)
+        """, (task_id, task_id, status, completed_date, status, completed_date))
+        # cursor.rowcount δεν ισχύει για "WITH ... UPDATE" - το changes()
+        # μετράει μόνο τις γραμμές του UPDATE (όχι όσες άλλαξαν triggers)
+        updated = cursor.execute("SELECT changes()").fetchone()[0]
+
+        if own_conn:
+            conn.commit()
+    except Exception:
+        if own_conn:
+            conn.rollback()
+        raise
+    finally:
+        if own_conn:
+            conn.close()
+
+    logger.info(f"Chain of task {task_id}: {updated}/{chain_length} task(s) set to '{status}'")
+    return {
+        'chain_length': chain_length,
+        'updated': updated,
+        'status': status,
+        'completed_date': completed_date,
+    }
+
+
 # ----- PHASE 2.1: NEW FUNCTIONS FOR UNITS, GROUPS, AND TASK TYPES -----
 
-def get_unit_by_id(unit_id):
+def get_unit_by_id(unit_id, conn=None):
     """Επιστρέφει μία μονάδα με βάση το ID"""
-    conn = get_connection()
+    own_conn = conn is None
+    if own_conn:
+        conn = get_connection()
     cursor = conn.cursor()
 
     cursor.execute('''
@@ -1570,7 +2709,8 @@ def get_unit_by_id(unit_id):
                    ''', (unit_id,))
 
     unit = cursor.fetchone()
-    conn.close()
+    if own_conn:
+        conn.close()
     return dict(unit) if unit else None
 
 
@@ -1586,39 +2726,60 @@ def get_group_by_id(group_id):
     return dict(group) if group else None
 
 
-def update_unit(unit_id, name, group_id, location, model, notes, installation_date):
-    """Ενημέρωση υπάρχουσας μονάδας"""
-    conn = get_connection()
-    cursor = conn.cursor()
+def update_unit(unit_id, name, group_id, location, model, notes, installation_date, base=None, conn=None):
+    """
+    Ενημέρωση υπάρχουσας μονάδας
+
+    Με base (το dict της μονάδας όπως φορτώθηκε, με row_version) η
+    ενημέρωση είναι compare-and-swap - βλ. _compare_and_swap. Με conn
+    (π.χ. του write_service) στο transaction του caller, όπως το add_task.
+
+    Returns:
+        int: Το νέο row_version της μονάδας
 
+    Raises:
+        ConflictError: Επικαλυπτόμενη αλλαγή από άλλο χρήστη
+    """
     # ✨ LOG: Starting operation
     logger.info(f"Updating unit {unit_id}: name='{name}', group_id={group_id}, location='{location}'")
 
+    values = {
+        'name': name,
+        'group_id': group_id,
+        'location': location,
+        'model': model,
+        'notes': notes,
+        'installation_date': installation_date,
+    }
 
-    cursor.execute('''
-                   UPDATE units
-                   SET name              = ?,
-                       group_id          = ?,
-                       location          = ?,
-                       model             = ?,
-                       serial_number     = ?,
-                       installation_date = ?
-                   WHERE id = ?
-                   ''', (name, group_id, location, model, notes, installation_date, unit_id))
-
-    conn.commit()
+    own_conn = conn is None
+    if own_conn:
+        conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        if own_conn:
+            cursor.execute("BEGIN IMMEDIATE")
+        version = _compare_and_swap(cursor, 'units', unit_id, values, base)
+        if own_conn:
+            conn.commit()
+    except Exception:
+        if own_conn:
+            conn.rollback()
+        raise
+    finally:
+        if own_conn:
+            conn.close()
 
     # ✨ LOG: Success
-    logger.info(f"✅ Unit {unit_id} ('{name}') updated successfully")
-
-
-    conn.close()
-    return True
+    logger.info(f"✅ Unit {unit_id} ('{name}') updated successfully (version {version})")
+    return version
 
 
-def update_group(group_id, name, description):
-    """Ενημέρωση υπάρχουσας ομάδας"""
-    conn = get_connection()
+def update_group(group_id, name, description, conn=None):
+    """Ενημέρωση υπάρχουσας ομάδας (με conn στο transaction του caller, όπως το add_task)"""
+    own_conn = conn is None
+    if own_conn:
+        conn = get_connection()
     cursor = conn.cursor()
 
     try:
@@ -1629,12 +2790,14 @@ def update_group(group_id, name, description):
                        WHERE id = ?
                        ''', (name, description, group_id))
 
-        conn.commit()
-        conn.close()
+        if own_conn:
+            conn.commit()
         return True
     except sqlite3.IntegrityError:
-        conn.close()
         return False
+    finally:
+        if own_conn:
+            conn.close()
 
 
 def add_task_type(name, description):
@@ -1705,9 +2868,11 @@ def delete_task_type(type_id):
 
 # ----- PHASE 2.3: TASK ITEMS FUNCTIONS -----
 
-def get_task_items_by_type(task_type_id):
+def get_task_items_by_type(task_type_id, conn=None):
     """Επιστρέφει τα είδη εργασιών ενός συγκεκριμένου τύπου"""
-    conn = get_connection()
+    own_conn = conn is None
+    if own_conn:
+        conn = get_connection()
     cursor = conn.cursor()
 
     cursor.execute('''
@@ -1719,7 +2884,8 @@ def get_task_items_by_type(task_type_id):
                    ''', (task_type_id,))
 
     items = [dict(row) for row in cursor.fetchall()]
-    conn.close()
+    if own_conn:
+        conn.close()
     return items
 
 
@@ -1828,15 +2994,17 @@ def get_task_item_by_id(item_id):
 # RECYCLE BIN & SOFT DELETE FUNCTIONS (Προστέθηκαν για compatibility)
 # ═══════════════════════════════════════════════════════════════════════════
 
-def get_deleted_groups():
+def get_deleted_groups(conn=None):
     """Επιστρέφει διαγραμμένες ομάδες (placeholder - δεν έχουμε soft delete για groups)"""
     # Επειδή δεν έχουμε is_deleted στον πίνακα groups, επιστρέφουμε κενή λίστα
     return []
 
 
-def get_deleted_units():
+def get_deleted_units(conn=None):
     """Επιστρέφει διαγραμμένες μονάδες (soft deleted με is_active = 0)"""
-    conn = get_connection()
+    own_conn = conn is None
+    if own_conn:
+        conn = get_connection()
     cursor = conn.cursor()
     
     cursor.execute('''
@@ -1848,13 +3016,16 @@ def get_deleted_units():
     ''')
     
     units = [dict(row) for row in cursor.fetchall()]
-    conn.close()
+    if own_conn:
+        conn.close()
     return units
 
 
-def soft_delete_unit(unit_id):
+def soft_delete_unit(unit_id, conn=None):
     """Soft delete μονάδας (is_active = 0) - FIXED: Raise exception on error"""
-    conn = get_connection()
+    own_conn = conn is None
+    if own_conn:
+        conn = get_connection()
     cursor = conn.cursor()
     
     # Έλεγχος αν η μονάδα έχει ενεργές εργασίες
@@ -1867,31 +3038,38 @@ def soft_delete_unit(unit_id):
     count = cursor.fetchone()['count']
     
     if count > 0:
-        conn.close()
+        if own_conn:
+            conn.close()
         # FIXED: Raise exception αντί για return False
         raise ValidationError(f'Η μονάδα έχει {count} ενεργές εργασίες και δεν μπορεί να διαγραφεί')
     
     # Soft delete
     cursor.execute('UPDATE units SET is_active = 0 WHERE id = ?', (unit_id,))
-    conn.commit()
-    conn.close()
+    if own_conn:
+        conn.commit()
+        conn.close()
     return True
 
 
-def restore_unit(unit_id):
+def restore_unit(unit_id, conn=None):
     """Επαναφορά soft deleted μονάδας"""
-    conn = get_connection()
+    own_conn = conn is None
+    if own_conn:
+        conn = get_connection()
     cursor = conn.cursor()
     
     cursor.execute('UPDATE units SET is_active = 1 WHERE id = ?', (unit_id,))
-    conn.commit()
-    conn.close()
+    if own_conn:
+        conn.commit()
+        conn.close()
     return True
 
 
-def permanent_delete_unit(unit_id):
+def permanent_delete_unit(unit_id, conn=None):
     """Μόνιμη διαγραφή μονάδας"""
-    conn = get_connection()
+    own_conn = conn is None
+    if own_conn:
+        conn = get_connection()
     cursor = conn.cursor()
     
     # Έλεγχος αν η μονάδα έχει εργασίες
@@ -1904,13 +3082,15 @@ def permanent_delete_unit(unit_id):
     count = cursor.fetchone()['count']
     
     if count > 0:
-        conn.close()
+        if own_conn:
+            conn.close()
         return False  # Δεν μπορεί να διαγραφεί μόνιμα
     
     # Μόνιμη διαγραφή
     cursor.execute('DELETE FROM units WHERE id = ?', (unit_id,))
-    conn.commit()
-    conn.close()
+    if own_conn:
+        conn.commit()
+        conn.close()
     return True
 
 
@@ -1920,9 +3100,11 @@ def permanent_delete_unit(unit_id):
 
 
 
-def permanent_delete_group(group_id):
+def permanent_delete_group(group_id, conn=None):
     """Οριστική διαγραφή ομάδας από τη βάση"""
-    conn = get_connection()
+    own_conn = conn is None
+    if own_conn:
+        conn = get_connection()
     cursor = conn.cursor()
     
     # Check if group has units
@@ -1935,14 +3117,16 @@ def permanent_delete_group(group_id):
     count = cursor.fetchone()['count']
     
     if count > 0:
-        conn.close()
+        if own_conn:
+            conn.close()
         raise ValidationError(f'Η ομάδα έχει {count} μονάδες. Διαγράψτε πρώτα τις μονάδες.')
     
     # Permanent delete
     cursor.execute("DELETE FROM groups WHERE id = ?", (group_id,))
     
-    conn.commit()
-    conn.close()
+    if own_conn:
+        conn.commit()
+        conn.close()
     return True
 
 
@@ -1955,7 +3139,7 @@ def permanent_delete_location(location_id):
     cursor.execute("""
         SELECT COUNT(*) as count
         FROM units
-        WHERE location = (SELECT name FROM locations WHERE id = ?)
+        WHERE location_id = ?
     """, (location_id,))
     
     count = cursor.fetchone()['count']
@@ -1963,6 +3147,12 @@ def permanent_delete_location(location_id):
     if count > 0:
         conn.close()
         raise ValidationError(f'Η τοποθεσία χρησιμοποιείται από {count} μονάδες.')
+
+    cursor.execute("SELECT COUNT(*) as count FROM locations WHERE parent_id = ?", (location_id,))
+    children = cursor.fetchone()['count']
+    if children > 0:
+        conn.close()
+        raise ValidationError(f'Η τοποθεσία έχει {children} υποτοποθεσίες. Μετακινήστε ή διαγράψτε τις πρώτα.')
     
     # Permanent delete
     cursor.execute("DELETE FROM locations WHERE id = ?", (location_id,))
@@ -2006,13 +3196,15 @@ def delete_group(group_id):
         return {'success': False, 'error': str(e)}
 
 
-def soft_delete_group(group_id):
+def soft_delete_group(group_id, conn=None):
     """
     Soft delete ομάδας (placeholder - δεν έχουμε is_deleted στον πίνακα groups)
     ΣΗΜΕΙΩΣΗ: Επειδή ο πίνακας groups δεν έχει is_deleted field, 
               κάνουμε απευθείας DELETE (hard delete)
     """
-    conn = get_connection()
+    own_conn = conn is None
+    if own_conn:
+        conn = get_connection()
     cursor = conn.cursor()
     
     # Έλεγχος αν η ομάδα έχει μονάδες
@@ -2025,31 +3217,36 @@ def soft_delete_group(group_id):
     count = cursor.fetchone()['count']
     
     if count > 0:
-        conn.close()
+        if own_conn:
+            conn.close()
         raise ValidationError(f'Η ομάδα έχει {count} ενεργές μονάδες και δεν μπορεί να διαγραφεί')
     
     # Hard delete (δεν έχουμε soft delete για groups)
     try:
         cursor.execute('DELETE FROM groups WHERE id = ?', (group_id,))
-        conn.commit()
-        conn.close()
+        if own_conn:
+            conn.commit()
         return True
     except Exception as e:
-        conn.close()
         raise DatabaseError(f'Αποτυχία διαγραφής ομάδας: {str(e)}')
+    finally:
+        if own_conn:
+            conn.close()
 
 
 # ═══════════════════════════════════════════════════════════════════════════
 # LOCATIONS MANAGEMENT
 # ═══════════════════════════════════════════════════════════════════════════
 
-def get_all_locations():
+def get_all_locations(conn=None):
     """Retrieve all active locations"""
-    conn = get_connection()
+    own_conn = conn is None
+    if own_conn:
+        conn = get_connection()
     cursor = conn.cursor()
     
     cursor.execute("""
-        SELECT id, name, description, created_at
+        SELECT id, name, description, parent_id, kind, created_at
         FROM locations
         WHERE is_deleted = 0
         ORDER BY name
@@ -2059,24 +3256,27 @@ def get_all_locations():
     for row in cursor.fetchall():
         locations.append(dict(row))
     
-    conn.close()
+    if own_conn:
+        conn.close()
     return locations
 
-def add_location(name, description=''):
-    """Add new location"""
+def add_location(name, description='', parent_id=None, kind=None):
+    """Add new location (parent_id: θέση στην ιεραρχία, None = ρίζα)"""
     name = name.strip()
     
     if not name:
         raise ValidationError("Location name is required")
+    if kind is not None and kind not in LOCATION_KINDS:
+        raise ValidationError(f"Μη έγκυρο επίπεδο τοποθεσίας: {kind}")
     
     conn = get_connection()
     cursor = conn.cursor()
     
     try:
         cursor.execute("""
-            INSERT INTO locations (name, description)
-            VALUES (?, ?)
-        """, (name, description))
+            INSERT INTO locations (name, description, parent_id, kind)
+            VALUES (?, ?, ?, ?)
+        """, (name, description, parent_id, kind))
         
         conn.commit()
         location_id = cursor.lastrowid
@@ -2112,6 +3312,110 @@ def update_location(location_id, name, description=''):
         conn.close()
         raise ValidationError(f"Location '{name}' already exists")
 
+def move_location(location_id, parent_id, kind=None):
+    """
+    Μετακίνηση τοποθεσίας (μαζί με το υποδέντρο της) κάτω από άλλη.
+
+    Args:
+        parent_id: Νέος γονέας ή None για ρίζα
+        kind: Επίπεδο (LOCATION_KINDS) ή None
+
+    Raises:
+        ValidationError: Αν ο νέος γονέας είναι η ίδια ή απόγονός της
+    """
+    if kind is not None and kind not in LOCATION_KINDS:
+        raise ValidationError(f"Μη έγκυρο επίπεδο τοποθεσίας: {kind}")
+
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        if parent_id is not None:
+            cursor.execute("""
+                SELECT 1 FROM location_closure WHERE ancestor_id = ? AND descendant_id = ?
+            """, (location_id, parent_id))
+            if cursor.fetchone() is not None:
+                raise ValidationError("Η τοποθεσία δεν μπορεί να μπει κάτω από τον εαυτό της ή υποτοποθεσία της")
+        cursor.execute("UPDATE locations SET parent_id = ?, kind = ? WHERE id = ?",
+                       (parent_id, kind, location_id))
+        conn.commit()
+        return True
+    except sqlite3.IntegrityError as e:
+        conn.rollback()
+        raise ValidationError(f"Αδύνατη μετακίνηση τοποθεσίας: {e}")
+    finally:
+        conn.close()
+
+
+def get_location_children(parent_id=None):
+    """
+    Άμεσα παιδιά μιας τοποθεσίας (ή οι ρίζες) - για lazy δέντρα στο UI.
+
+    Returns:
+        List[Dict]: id, name, kind, parent_id, child_count
+    """
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT l.id, l.name, l.description, l.kind, l.parent_id,
+                   (SELECT COUNT(*) FROM locations c
+                    WHERE c.parent_id = l.id AND c.is_deleted = 0) AS child_count
+            FROM locations l
+            WHERE l.parent_id IS ? AND l.is_deleted = 0
+            ORDER BY l.name
+        """, (parent_id,))
+        return [dict(row) for row in cursor.fetchall()]
+    finally:
+        conn.close()
+
+
+def get_location_tree():
+    """
+    Όλες οι ενεργές τοποθεσίες σε σειρά δέντρου (γονέας πριν από τα παιδιά).
+
+    Returns:
+        List[Dict]: Οι εγγραφές του get_all_locations με 'depth'
+    """
+    locations = get_all_locations()
+    children = {}
+    for location in locations:
+        children.setdefault(location['parent_id'], []).append(location)
+
+    active_ids = {location['id'] for location in locations}
+    ordered = []
+
+    def visit(location, depth):
+        ordered.append(dict(location, depth=depth))
+        for child in children.get(location['id'], ()):
+            visit(child, depth + 1)
+
+    # Ρίζες: χωρίς γονέα ή με γονέα στον κάδο
+    for location in locations:
+        if location['parent_id'] is None or location['parent_id'] not in active_ids:
+            visit(location, 0)
+    return ordered
+
+
+def get_location_subtree_ids(location_ids, conn=None):
+    """Οι τοποθεσίες και ΟΛΟΙ οι απόγονοί τους (ένα lookup στο location_closure)"""
+    location_ids = list(location_ids)
+    if not location_ids:
+        return set()
+    own_conn = conn is None
+    if own_conn:
+        conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(f"""
+            SELECT descendant_id FROM location_closure
+            WHERE ancestor_id IN ({','.join('?' * len(location_ids))})
+        """, location_ids)
+        return {row[0] for row in cursor.fetchall()}
+    finally:
+        if own_conn:
+            conn.close()
+
+
 def soft_delete_location(location_id):
     """Soft delete location"""
     conn = get_connection()
@@ -2121,7 +3425,7 @@ def soft_delete_location(location_id):
     cursor.execute("""
         SELECT COUNT(*) as count
         FROM units
-        WHERE location = (SELECT name FROM locations WHERE id = ?)
+        WHERE location_id = ?
         AND is_active = 1
     """, (location_id,))
     
@@ -2130,6 +3434,13 @@ def soft_delete_location(location_id):
     if count > 0:
         conn.close()
         raise ValidationError(f'Location is used by {count} units')
+
+    cursor.execute("SELECT COUNT(*) as count FROM locations WHERE parent_id = ? AND is_deleted = 0",
+                   (location_id,))
+    children = cursor.fetchone()['count']
+    if children > 0:
+        conn.close()
+        raise ValidationError(f'Location has {children} active sub-locations')
     
     cursor.execute("UPDATE locations SET is_deleted = 1 WHERE id = ?", (location_id,))
     
@@ -0,0 +1,685 @@
+"""
+Database Maintenance
+====================
+
+Συντήρηση της database στον νεκρό χρόνο της εφαρμογής.
+
+Features:
+---------
+- auto_vacuum = INCREMENTAL: οι νέες databases το παίρνουν στη δημιουργία,
+  οι υπάρχουσες μετατρέπονται μία φορά (VACUUM) - στην εκκίνηση αν είναι
+  μικρές, αλλιώς με `python -m hvacr maintenance --convert`
+- Ένας κύκλος συντήρησης:
+    * PRAGMA optimize
+    * ANALYZE μόνο στους πίνακες που άλλαξαν αισθητά από τα τελευταία
+      στατιστικά (με analysis_limit - προσεγγιστικά αλλά φθηνά)
+    * PRAGMA incremental_vacuum σε μικρά κομμάτια - οι σελίδες από
+      διαγραφές, tombstones και αρχειοθέτηση επιστρέφουν στο σύστημα
+    * Μετρικές: σελίδες, freelist, fragmentation (dbstat) → maintenance_state
+- Compacted snapshots με VACUUM INTO στα backups (ίδια ονομασία/rotation
+  με το backup_manager - επαναφέρονται όπως κάθε backup)
+- IdleMaintenance: ο κύκλος τρέχει ΒΗΜΑ-ΒΗΜΑ σε Tk idle callbacks, μόνο
+  όταν ο χρήστης δεν έχει αγγίξει πληκτρολόγιο/ποντίκι για λίγο:
+    * κάθε βήμα έχει budget λίγων ms - ο progress handler του SQLite
+      διακόπτει ό,τι το ξεπερνά (και το incremental_vacuum μικραίνει)
+    * σύνδεση με busy timeout 0: αν η database είναι κλειδωμένη, το βήμα
+      απλώς ξαναδοκιμάζεται αργότερα
+    * κάθε input σταματά τον κύκλο (συνεχίζει από το ίδιο σημείο) και
+      διακόπτει το snapshot που τρέχει
+    * το πολύ ένας κύκλος ανά DatabaseConfig.MAINTENANCE_INTERVAL_HOURS
+
+Usage:
+------
+    import db_maintenance
+
+    # Στο UI (μετά τη δημιουργία του παραθύρου)
+    maintenance = db_maintenance.IdleMaintenance(app)
+    maintenance.start()
+
+    # Headless / CLI
+    report = db_maintenance.run_maintenance(snapshot=True)
+    print(report.format())
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+import backup_manager
+import database_refactored as database
+import logger_config
+from config import DatabaseConfig
+
+logger = logger_config.get_logger(__name__)
+
+AUTO_VACUUM_INCREMENTAL = 2
+
+ANALYSIS_LIMIT = 1000         # γραμμές ανά index για το ANALYZE
+STALE_STATS_RATIO = 0.1       # ANALYZE όταν οι γραμμές άλλαξαν > 10%
+VACUUM_CHUNK_PAGES = 128      # σελίδες ανά βήμα incremental_vacuum (αρχικά)
+MIN_VACUUM_CHUNK_PAGES = 8
+STEP_GAP_MS = 50              # ανάσα για το event loop ανάμεσα στα βήματα
+_PROGRESS_OPS = 1000          # κάθε πόσες εντολές VDBE ελέγχεται το budget
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# METRICS
+# ═══════════════════════════════════════════════════════════════════════════
+
+@dataclass
+class MaintenanceMetrics:
+    """Μέγεθος και "υγεία" του αρχείου"""
+    page_size: int = 0
+    page_count: int = 0
+    freelist_count: int = 0
+    auto_vacuum: int = 0
+    fragmentation_pct: Optional[float] = None
+
+    @property
+    def free_pct(self) -> float:
+        return 100.0 * self.freelist_count / self.page_count if self.page_count else 0.0
+
+    @property
+    def size_kb(self) -> float:
+        return self.page_size * self.page_count / 1024
+
+    def format(self) -> str:
+        modes = {0: "NONE", 1: "FULL", 2: "INCREMENTAL"}
+        fragmentation = ("-" if self.fragmentation_pct is None
+                         else f"{self.fragmentation_pct:.1f}%")
+        return (f"{self.size_kb:.0f} KB ({self.page_count} σελίδες), "
+                f"ελεύθερες: {self.freelist_count} ({self.free_pct:.1f}%), "
+                f"fragmentation: {fragmentation}, auto_vacuum: {modes.get(self.auto_vacuum, '?')}")
+
+
+@dataclass
+class MaintenanceReport:
+    """Αποτέλεσμα ενός κύκλου συντήρησης"""
+    before: MaintenanceMetrics = field(default_factory=MaintenanceMetrics)
+    after: MaintenanceMetrics = field(default_factory=MaintenanceMetrics)
+    analyzed: List[str] = field(default_factory=list)
+    pages_reclaimed: int = 0
+    interrupted: int = 0
+    steps: int = 0
+    snapshot: Optional[str] = None
+    elapsed: float = 0.0
+
+    def format(self) -> str:
+        lines = [
+            "Συντήρηση database",
+            f"  Πριν:  {self.before.format()}",
+            f"  Μετά:  {self.after.format()}",
+            f"  ANALYZE: {', '.join(self.analyzed) if self.analyzed else '-'}",
+            f"  Σελίδες που επεστράφησαν: {self.pages_reclaimed}",
+            f"  Βήματα: {self.steps}, διακοπές (budget/lock): {self.interrupted}, "
+            f"χρόνος: {self.elapsed:.2f}s",
+        ]
+        if self.snapshot:
+            lines.append(f"  Snapshot: {self.snapshot}")
+        return "\n".join(lines)
+
+
+def _pragma(cursor, name):
+    cursor.execute(f"PRAGMA {name}")
+    return cursor.fetchone()[0]
+
+
+def collect_metrics(cursor) -> MaintenanceMetrics:
+    """Φθηνές μετρικές από PRAGMAs (χωρίς fragmentation)"""
+    return MaintenanceMetrics(
+        page_size=_pragma(cursor, "page_size"),
+        page_count=_pragma(cursor, "page_count"),
+        freelist_count=_pragma(cursor, "freelist_count"),
+        auto_vacuum=_pragma(cursor, "auto_vacuum"),
+    )
+
+
+def _btree_layout(cursor, name):
+    """
+    (σελίδες, "άλματα") ενός B-tree: οι σελίδες του σε λογική σειρά (dbstat)
+    που ΔΕΝ ακολουθούν αμέσως την προηγούμενη στο αρχείο.
+    None αν διακόπηκε ή αν το SQLite δεν έχει dbstat.
+    """
+    try:
+        cursor.execute("SELECT pageno FROM dbstat WHERE name = ?", (name,))
+        pages = [row[0] for row in cursor.fetchall()]
+    except sqlite3.OperationalError as e:
+        if not _is_transient(e) and "dbstat" not in str(e):
+            raise
+        return None
+    jumps = sum(1 for previous, page in zip(pages, pages[1:]) if page != previous + 1)
+    return len(pages), jumps
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# STATE
+# ═══════════════════════════════════════════════════════════════════════════
+
+def _ensure_state_table(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS maintenance_state (
+            key TEXT PRIMARY KEY,
+            value
+        )
+    """)
+
+
+def get_maintenance_state(conn=None) -> Dict[str, object]:
+    """Τελευταίος κύκλος, snapshot και μετρικές - {} αν δεν έχει τρέξει ποτέ"""
+    own_conn = conn is None
+    if own_conn:
+        conn = database.get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'maintenance_state'")
+        if cursor.fetchone() is None:
+            return {}
+        cursor.execute("SELECT key, value FROM maintenance_state")
+        return {row[0]: row[1] for row in cursor.fetchall()}
+    finally:
+        if own_conn:
+            conn.close()
+
+
+def _save_state(cursor, values):
+    _ensure_state_table(cursor)
+    cursor.executemany("INSERT OR REPLACE INTO maintenance_state (key, value) VALUES (?, ?)",
+                       list(values.items()))
+
+
+def _run_state(cursor, values):
+    """_save_state - False αν διακόπηκε (budget/lock)"""
+    try:
+        _save_state(cursor, values)
+        return True
+    except sqlite3.OperationalError as e:
+        if not _is_transient(e):
+            raise
+        return False
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# MAINTENANCE STEPS
+# ═══════════════════════════════════════════════════════════════════════════
+
+def _is_transient(error):
+    """Διακοπή από το budget ή κλειδωμένη database - ξαναδοκιμάζεται αργότερα"""
+    message = str(error).lower()
+    return "interrupted" in message or "locked" in message or "busy" in message
+
+
+def _run(cursor, sql):
+    """
+    Εκτέλεση ΜΕΧΡΙ ΤΕΛΟΥΣ - False αν διακόπηκε. Το executescript τρέχει το
+    statement ως το τέλος· το execute κάνει ένα μόνο step σε statements χωρίς
+    γραμμές, και το incremental_vacuum ελευθερώνει μία σελίδα ανά step.
+    """
+    try:
+        cursor.executescript(sql)
+        return True
+    except sqlite3.OperationalError as e:
+        if not _is_transient(e):
+            raise
+        logger.debug(f"Maintenance step postponed ({e}): {sql}")
+        return False
+
+
+def _stats_stale(cursor, table, analyzed_rows):
+    """
+    (χρειάζεται ANALYZE, γραμμές τώρα) - None αν διακόπηκε.
+
+    Με analysis_limit οι γραμμές στο sqlite_stat1 είναι εκτιμήσεις, γι' αυτό
+    η σύγκριση γίνεται με το πλήθος που μετρήθηκε στο τελευταίο ANALYZE
+    (maintenance_state 'rows:<πίνακας>').
+    """
+    try:
+        cursor.execute(f'SELECT COUNT(*) FROM "{table}"')
+        rows = cursor.fetchone()[0]
+        try:
+            cursor.execute("SELECT 1 FROM sqlite_stat1 WHERE tbl = ? LIMIT 1", (table,))
+            has_stats = cursor.fetchone() is not None
+        except sqlite3.OperationalError as e:
+            if "no such table" not in str(e):
+                raise
+            has_stats = False
+    except sqlite3.OperationalError as e:
+        if not _is_transient(e):
+            raise
+        return None
+
+    if not has_stats or analyzed_rows is None:
+        return rows > 0, rows
+    analyzed_rows = int(analyzed_rows)
+    return abs(rows - analyzed_rows) > STALE_STATS_RATIO * max(analyzed_rows, 1), rows
+
+
+def maintenance_steps(conn, report: MaintenanceReport) -> Iterator[str]:
+    """
+    Ο κύκλος συντήρησης ως generator: κάθε next() κάνει ΕΝΑ μικρό κομμάτι
+    δουλειάς και επιστρέφει την περιγραφή του. Βήματα που διακόπηκαν
+    (budget/lock) μετριούνται στο report.interrupted και παραλείπονται.
+
+    Args:
+        conn: Σύνδεση σε autocommit (isolation_level=None)
+        report: Συμπληρώνεται όσο προχωρά ο κύκλος
+    """
+    cursor = conn.cursor()
+    report.before = collect_metrics(cursor)
+    previous = get_maintenance_state(conn)
+    analyzed_rows = {}
+    yield "metrics"
+
+    if not _run(cursor, "PRAGMA optimize"):
+        report.interrupted += 1
+    yield "optimize"
+
+    cursor.execute(f"PRAGMA analysis_limit = {ANALYSIS_LIMIT}")
+    cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'")
+    for table in [row[0] for row in cursor.fetchall()]:
+        stale = _stats_stale(cursor, table, previous.get(f"rows:{table}"))
+        yield f"check {table}"
+        if stale is None:
+            report.interrupted += 1
+        elif stale[0]:
+            if _run(cursor, f'ANALYZE "{table}"'):
+                report.analyzed.append(table)
+                analyzed_rows[f"rows:{table}"] = stale[1]
+            else:
+                report.interrupted += 1
+            yield f"analyze {table}"
+
+    if report.before.auto_vacuum == AUTO_VACUUM_INCREMENTAL:
+        chunk = VACUUM_CHUNK_PAGES
+        while True:
+            free = _pragma(cursor, "freelist_count")
+            if not free:
+                break
+            if _run(cursor, f"PRAGMA incremental_vacuum({min(chunk, free)})"):
+                report.pages_reclaimed += free - _pragma(cursor, "freelist_count")
+            else:
+                report.interrupted += 1
+                if chunk == MIN_VACUUM_CHUNK_PAGES:
+                    break
+                chunk = max(MIN_VACUUM_CHUNK_PAGES, chunk // 2)
+            yield "incremental_vacuum"
+
+    cursor.execute("SELECT name FROM sqlite_master WHERE rootpage > 0")
+    pages = jumps = 0
+    for name in [row[0] for row in cursor.fetchall()]:
+        layout = _btree_layout(cursor, name)
+        if layout is not None:
+            pages += layout[0]
+            jumps += layout[1]
+        yield f"layout {name}"
+
+    report.after = collect_metrics(cursor)
+    if pages:
+        report.after.fragmentation_pct = 100.0 * jumps / pages
+
+    yield "metrics"
+
+    if not _run_state(cursor, {
+        **analyzed_rows,
+        'last_cycle': datetime.now().isoformat(timespec='seconds'),
+        'page_count': report.after.page_count,
+        'freelist_count': report.after.freelist_count,
+        'fragmentation_pct': (None if report.after.fragmentation_pct is None
+                              else round(report.after.fragmentation_pct, 2)),
+        'pages_reclaimed': int(previous.get('pages_reclaimed') or 0) + report.pages_reclaimed,
+        'last_analyzed': ", ".join(report.analyzed),
+    }):
+        report.interrupted += 1
+    yield "state"
+
+
+def _maintenance_connection(timeout=0.0):
+    """Autocommit σύνδεση· timeout 0 = ποτέ αναμονή για lock στο UI thread"""
+    conn = sqlite3.connect(database.DB_NAME, timeout=timeout, isolation_level=None)
+    conn.execute(f"PRAGMA busy_timeout = {int(timeout * 1000)}")
+    return conn
+
+
+def run_maintenance(snapshot: bool = False) -> MaintenanceReport:
+    """
+    Ολόκληρος ο κύκλος σε μία κλήση (CLI / nightly jobs) - χωρίς budget,
+    με το κανονικό busy timeout
+
+    Args:
+        snapshot: Και compacted snapshot (VACUUM INTO) στα backups
+    """
+    started = time.perf_counter()
+    report = MaintenanceReport()
+    conn = _maintenance_connection(database.BUSY_TIMEOUT_MS / 1000)
+    try:
+        for _ in maintenance_steps(conn, report):
+            report.steps += 1
+        if snapshot:
+            report.snapshot = create_snapshot(conn=conn)
+    except sqlite3.Error as e:
+        logger.error(f"❌ Database maintenance failed: {e}", exc_info=True)
+        raise RuntimeError(f"Σφάλμα συντήρησης database: {str(e)}")
+    finally:
+        conn.close()
+
+    report.elapsed = time.perf_counter() - started
+    logger.info(f"Database maintenance: {report.after.format()} "
+                f"({report.pages_reclaimed} page(s) reclaimed, {report.elapsed:.2f}s)")
+    return report
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# AUTO_VACUUM & SNAPSHOTS
+# ═══════════════════════════════════════════════════════════════════════════
+
+def enable_incremental_vacuum(max_mb: Optional[float] = None) -> bool:
+    """
+    Μετατροπή σε auto_vacuum = INCREMENTAL (ένα πλήρες VACUUM, μία φορά).
+    Καλείται όταν καμία άλλη σύνδεση δεν έχει ανοιχτό transaction.
+
+    Args:
+        max_mb: Μόνο αν το αρχείο είναι μικρότερο (αλλιώς μόνο hint στο log)
+
+    Returns:
+        bool: True αν έγινε μετατροπή
+    """
+    conn = _maintenance_connection(database.BUSY_TIMEOUT_MS / 1000)
+    try:
+        cursor = conn.cursor()
+        if _pragma(cursor, "auto_vacuum") == AUTO_VACUUM_INCREMENTAL:
+            return False
+        size_mb = _pragma(cursor, "page_count") * _pragma(cursor, "page_size") / (1024 * 1024)
+        if max_mb is not None and size_mb > max_mb:
+            logger.info(f"auto_vacuum is not INCREMENTAL ({size_mb:.0f} MB) - "
+                        "run `python -m hvacr maintenance --convert` to enable it")
+            return False
+
+        started = time.perf_counter()
+        cursor.execute(f"PRAGMA auto_vacuum = {AUTO_VACUUM_INCREMENTAL}")
+        cursor.execute("VACUUM")
+        logger.info(f"✅ auto_vacuum = INCREMENTAL ({size_mb:.1f} MB, "
+                    f"{time.perf_counter() - started:.2f}s)")
+        return True
+    except sqlite3.Error as e:
+        logger.error(f"❌ auto_vacuum conversion failed: {e}", exc_info=True)
+        raise RuntimeError(f"Σφάλμα μετατροπής auto_vacuum: {str(e)}")
+    finally:
+        conn.close()
+
+
+def create_snapshot(path: Optional[str] = None, conn=None) -> str:
+    """
+    Compacted αντίγραφο με VACUUM INTO (χωρίς ελεύθερες σελίδες, με
+    auto_vacuum = INCREMENTAL) - ως backup του backup_manager
+
+    Args:
+        path: Αρχείο προορισμού (προεπιλογή: νέο backup στο BACKUP_DIR)
+        conn: Σύνδεση (π.χ. για interrupt() από άλλο thread)
+
+    Returns:
+        str: Το path του snapshot
+    """
+    if path is None:
+        Path(backup_manager.BACKUP_DIR).mkdir(exist_ok=True)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        path = os.path.join(backup_manager.BACKUP_DIR, f"{backup_manager.BACKUP_PREFIX}{timestamp}.db")
+    if os.path.exists(path):
+        raise database.ValidationError(f"Το αρχείο υπάρχει ήδη: {path}")
+
+    own_conn = conn is None
+    if own_conn:
+        conn = _maintenance_connection(database.BUSY_TIMEOUT_MS / 1000)
+    try:
+        started = time.perf_counter()
+        # Εκκρεμής ρύθμιση: την εφαρμόζει μόνο το VACUUM INTO στο αντίγραφο
+        conn.execute(f"PRAGMA auto_vacuum = {AUTO_VACUUM_INCREMENTAL}")
+        conn.execute("VACUUM INTO ?", (path,))
+        _save_state(conn.cursor(), {'last_snapshot': datetime.now().isoformat(timespec='seconds')})
+    except sqlite3.Error:
+        if os.path.exists(path):
+            os.remove(path)
+        raise
+    finally:
+        if own_conn:
+            conn.close()
+
+    logger.info(f"✅ Compacted snapshot: {path} ({os.path.getsize(path) / 1024:.1f} KB, "
+                f"{time.perf_counter() - started:.2f}s)")
+    backup_manager.cleanup_old_backups()
+    return path
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# IDLE SCHEDULER (Tk)
+# ═══════════════════════════════════════════════════════════════════════════
+
+class _StepBudget:
+    """Progress handler που διακόπτει ό,τι ξεπερνά τα `budget_ms`"""
+
+    def __init__(self, conn, budget_ms):
+        self.conn = conn
+        self.budget = budget_ms / 1000
+        self.deadline = 0.0
+
+    def _check(self):
+        return 1 if time.perf_counter() > self.deadline else 0
+
+    def __enter__(self):
+        self.deadline = time.perf_counter() + self.budget
+        self.conn.set_progress_handler(self._check, _PROGRESS_OPS)
+        return self
+
+    def __exit__(self, *exc):
+        self.conn.set_progress_handler(None, 0)
+        return False
+
+
+class IdleMaintenance:
+    """Ο κύκλος συντήρησης σε Tk idle callbacks, όσο ο χρήστης δεν κάνει τίποτα"""
+
+    _INPUT_EVENTS = ("<Any-KeyPress>", "<Any-ButtonPress>", "<Motion>", "<MouseWheel>")
+
+    def __init__(self, root,
+                 idle_after: float = DatabaseConfig.MAINTENANCE_IDLE_AFTER_S,
+                 step_budget_ms: float = DatabaseConfig.MAINTENANCE_STEP_BUDGET_MS,
+                 interval_hours: float = DatabaseConfig.MAINTENANCE_INTERVAL_HOURS,
+                 snapshot_days: float = DatabaseConfig.MAINTENANCE_SNAPSHOT_DAYS):
+        self.root = root
+        self.idle_after = idle_after
+        self.step_budget_ms = step_budget_ms
+        self.interval = timedelta(hours=interval_hours)
+        self.snapshot_interval = timedelta(days=snapshot_days)
+
+        self.last_report: Optional[MaintenanceReport] = None
+        self._last_input = time.monotonic()
+        self._after_id = None
+        self._conn = None
+        self._steps = None
+        self._report = None
+        self._started = 0.0
+        self._state = None            # maintenance_state (φορτώνεται μία φορά)
+        self._paused_until = 0.0      # μετά από σφάλμα: όχι νέος κύκλος για interval
+        self._snapshot_thread = None
+        self._snapshot_conn = None
+        self._running = False
+
+    # ═══════════════════════════════════════════════════════════════
+    # LIFECYCLE
+    # ═══════════════════════════════════════════════════════════════
+
+    def start(self):
+        if self._running:
+            return self
+        self._running = True
+        for event in self._INPUT_EVENTS:
+            self.root.bind_all(event, self._on_input, add="+")
+        self._schedule_check(self.idle_after)
+        return self
+
+    def stop(self):
+        self._running = False
+        self._cancel()
+        self._close_cycle()
+        if self._snapshot_conn is not None:
+            self._snapshot_conn.interrupt()
+
+    def _cancel(self):
+        if self._after_id is not None:
+            try:
+                self.root.after_cancel(self._after_id)
+            except Exception:
+                pass
+            self._after_id = None
+
+    def _on_input(self, event=None):
+        self._last_input = time.monotonic()
+        if self._snapshot_conn is not None:
+            self._snapshot_conn.interrupt()
+
+    # ═══════════════════════════════════════════════════════════════
+    # SCHEDULING
+    # ═══════════════════════════════════════════════════════════════
+
+    def _schedule_check(self, seconds):
+        if self._running:
+            self._after_id = self.root.after(max(1, int(seconds * 1000)), self._check)
+
+    def _schedule_step(self):
+        if self._running:
+            self._after_id = self.root.after(STEP_GAP_MS, self._queue_step)
+
+    def _queue_step(self):
+        # Το βήμα τρέχει όταν η ουρά γεγονότων του Tk αδειάσει
+        self._after_id = self.root.after_idle(self._step)
+
+    def _idle_for(self):
+        return time.monotonic() - self._last_input
+
+    def _check(self):
+        self._after_id = None
+        if self._idle_for() < self.idle_after:
+            self._schedule_check(self.idle_after - self._idle_for())
+            return
+
+        if self._steps is None:
+            if self._state is None:
+                self._state = self._load_state()
+            if (self._state is None or time.monotonic() < self._paused_until
+                    or not self._due(self._state.get('last_cycle'), self.interval)):
+                self._maybe_snapshot()
+                self._schedule_check(self.idle_after)
+                return
+            self._begin_cycle()
+        self._queue_step()
+
+    @staticmethod
+    def _load_state():
+        conn = _maintenance_connection()
+        try:
+            return get_maintenance_state(conn)
+        except sqlite3.OperationalError as e:
+            if not _is_transient(e):
+                raise
+            return None
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _due(last, interval):
+        if not last:
+            return True
+        try:
+            return datetime.now() - datetime.fromisoformat(last) >= interval
+        except ValueError:
+            return True
+
+    # ═══════════════════════════════════════════════════════════════
+    # CYCLE
+    # ═══════════════════════════════════════════════════════════════
+
+    def _begin_cycle(self):
+        self._conn = _maintenance_connection()
+        self._report = MaintenanceReport()
+        self._steps = maintenance_steps(self._conn, self._report)
+        self._started = time.perf_counter()
+        logger.debug("Idle maintenance cycle started")
+
+    def _close_cycle(self):
+        if self._steps is not None:
+            self._steps.close()
+        if self._conn is not None:
+            self._conn.close()
+        self._steps = self._conn = None
+
+    def _step(self):
+        self._after_id = None
+        if self._steps is None:
+            return
+        if self._idle_for() < self.idle_after:
+            # Ο χρήστης επέστρεψε: παύση, συνέχεια από το ίδιο βήμα
+            self._schedule_check(self.idle_after)
+            return
+
+        try:
+            with _StepBudget(self._conn, self.step_budget_ms):
+                next(self._steps)
+            self._report.steps += 1
+        except StopIteration:
+            self._finish_cycle()
+            return
+        except Exception as e:
+            self._close_cycle()
+            if isinstance(e, sqlite3.OperationalError) and _is_transient(e):
+                # Lock/budget εκτός των βημάτων που το χειρίζονται: από την αρχή αργότερα
+                logger.debug(f"Idle maintenance cycle postponed: {e}")
+            else:
+                logger.warning(f"⚠️  Idle maintenance stopped: {e}")
+                self._paused_until = time.monotonic() + self.interval.total_seconds()
+            self._schedule_check(self.idle_after)
+            return
+        self._schedule_step()
+
+    def _finish_cycle(self):
+        report = self._report
+        report.elapsed = time.perf_counter() - self._started
+        self._close_cycle()
+        self.last_report = report
+        logger.info(f"Idle maintenance: {report.after.format()} - {report.steps} step(s), "
+                    f"{report.pages_reclaimed} page(s) reclaimed, {report.interrupted} postponed")
+        self._state['last_cycle'] = datetime.now().isoformat(timespec='seconds')
+        self._maybe_snapshot()
+        self._schedule_check(self.idle_after)
+
+    # ═══════════════════════════════════════════════════════════════
+    # SNAPSHOT (thread - το VACUUM INTO δεν χωράει σε βήμα λίγων ms)
+    # ═══════════════════════════════════════════════════════════════
+
+    def _maybe_snapshot(self):
+        if self._state is None or not self._running:
+            return
+        if self._snapshot_thread is not None and self._snapshot_thread.is_alive():
+            return
+        if not self._due(self._state.get('last_snapshot'), self.snapshot_interval):
+            return
+
+        def run():
+            try:
+                self._snapshot_conn = _maintenance_connection(database.BUSY_TIMEOUT_MS / 1000)
+                create_snapshot(conn=self._snapshot_conn)
+                self._state['last_snapshot'] = datetime.now().isoformat(timespec='seconds')
+            except sqlite3.OperationalError as e:
+                # Interrupt από input του χρήστη: ξανά στον επόμενο νεκρό χρόνο
+                logger.info(f"Compacted snapshot postponed: {e}")
+            except Exception as e:
+                logger.warning(f"⚠️  Compacted snapshot failed: {e}")
+            finally:
+                conn, self._snapshot_conn = self._snapshot_conn, None
+                if conn is not None:
+                    conn.close()
+
+        self._snapshot_thread = threading.Thread(target=run, name="db-snapshot", daemon=True)
+        self._snapshot_thread.start()
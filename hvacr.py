@@ -0,0 +1,470 @@
+"""
+HVACR Command Line Interface
+============================
+
+Headless πρόσβαση στη database - για nightly jobs, μαζικές εισαγωγές και
+ερωτήματα χωρίς οθόνη. ΔΕΝ φορτώνει customtkinter / theme.
+
+Features:
+---------
+- query: φιλτράρισμα εργασιών → CSV / JSON / JSON Lines (keyset σελίδες,
+  σταθερή μνήμη ανεξάρτητα από το πλήθος)
+- export / import: πίνακες σε/από CSV ή JSON Lines, σε batches
+- bulk-import: μονάδες / ιστορικό εργασιών από CSV με ονόματα (bulk_importer)
+- backup / restore: μέσω του backup_manager
+- rebuild-chains: ανακατασκευή χρονολογικών αλυσίδων (με --dry-run)
+- archive: μεταφορά παλιών κλειστών αλυσίδων στο archive (archive_service)
+- maintenance: optimize / ANALYZE / incremental_vacuum, μετρικές, compacted
+  snapshot (db_maintenance)
+- check: έλεγχος συνέπειας (ορφανές αναφορές, αλυσίδες, τοποθεσίες) και
+  --repair σε ένα transaction (consistency_check)
+- stats: σύνοψη database (dashboard, πλήθη πινάκων, μέγεθος αρχείου)
+- Έξοδος στο stdout (ή --output), μηνύματα/logs στο stderr
+- Exit codes: 0 επιτυχία, 1 σφάλμα, 2 λάθος ορίσματα
+
+Usage:
+------
+    python -m hvacr query --status pending --format csv > pending.csv
+    python -m hvacr query --from 2026-01-01 --search "φίλτρ" --format jsonl
+    python -m hvacr export tasks --output tasks.csv --batch-size 5000
+    python -m hvacr import units units.csv
+    python -m hvacr bulk-import tasks history.csv --create-missing --rejects bad.csv
+    python -m hvacr backup --description "Nightly"
+    python -m hvacr restore backups/hvacr_backup_20260101_020000.db --yes
+    python -m hvacr rebuild-chains --dry-run
+    python -m hvacr archive --older-than-days 365
+    python -m hvacr maintenance --convert --snapshot
+    python -m hvacr check --repair
+    python -m hvacr stats --format json
+"""
+
+import argparse
+import contextlib
+import csv
+import json
+import logging
+import os
+import sqlite3
+import sys
+import time
+
+import database_refactored as database
+from config import DatabaseConfig
+
+DEFAULT_BATCH_SIZE = 1000
+
+EXPORT_TABLES = ("groups", "units", "task_types", "task_items", "tasks", "task_relationships")
+
+QUERY_COLUMNS = (
+    "id", "created_date", "unit_name", "group_name", "task_type_name", "task_item_name",
+    "description", "status", "priority", "technician_name", "completed_date", "location", "notes",
+)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# OUTPUT
+# ═══════════════════════════════════════════════════════════════════════════
+
+@contextlib.contextmanager
+def _open_output(path):
+    """Αρχείο εξόδου ή stdout (χωρίς να κλείνει το stdout)"""
+    if path in (None, "-"):
+        yield sys.stdout
+    else:
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            yield f
+
+
+class _RowWriter:
+    """Streaming γραφή γραμμών σε csv / json (array) / jsonl"""
+
+    def __init__(self, out, fmt, columns):
+        self.out = out
+        self.fmt = fmt
+        self.columns = list(columns)
+        self.count = 0
+        if fmt == "csv":
+            self._csv = csv.writer(out)
+            self._csv.writerow(self.columns)
+        elif fmt == "json":
+            out.write("[")
+
+    def write_many(self, rows):
+        for row in rows:
+            values = [row[c] for c in self.columns]
+            if self.fmt == "csv":
+                self._csv.writerow(values)
+            else:
+                text = json.dumps(dict(zip(self.columns, values)), ensure_ascii=False, default=str)
+                if self.fmt == "json":
+                    self.out.write(("\n" if self.count == 0 else ",\n") + text)
+                else:
+                    self.out.write(text + "\n")
+            self.count += 1
+
+    def close(self):
+        if self.fmt == "json":
+            self.out.write("\n]\n" if self.count else "]\n")
+        self.out.flush()
+
+
+def _info(message):
+    print(message, file=sys.stderr)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# COMMANDS
+# ═══════════════════════════════════════════════════════════════════════════
+
+def cmd_query(args):
+    columns = args.columns.split(",") if args.columns else QUERY_COLUMNS
+    conn = database.get_connection()
+    try:
+        with _open_output(args.output) as out:
+            writer = _RowWriter(out, args.format, columns)
+            after = None
+            while True:
+                tasks, after = database.filter_tasks_page(
+                    status=args.status, unit_id=args.unit_id, task_type_id=args.task_type_id,
+                    date_from=args.date_from, date_to=args.date_to, search_text=args.search,
+                    after=after, limit=args.batch_size, conn=conn)
+                if args.limit is not None:
+                    tasks = tasks[:args.limit - writer.count]
+                writer.write_many(tasks)
+                if after is None or (args.limit is not None and writer.count >= args.limit):
+                    break
+            writer.close()
+    finally:
+        conn.close()
+    _info(f"{writer.count} εργασίες")
+    return 0
+
+
+def _table_columns(cursor, table):
+    cursor.execute(f"PRAGMA table_info({table})")
+    return [row[1] for row in cursor.fetchall()]
+
+
+def cmd_export(args):
+    tables = EXPORT_TABLES if args.table == "all" else (args.table,)
+    if len(tables) > 1 and not args.output:
+        raise database.ValidationError("Για export όλων των πινάκων δώστε φάκελο με --output")
+
+    conn = database.get_connection()
+    try:
+        cursor = conn.cursor()
+        for table in tables:
+            path = args.output
+            if len(tables) > 1:
+                os.makedirs(args.output, exist_ok=True)
+                path = os.path.join(args.output, f"{table}.{args.format}")
+
+            columns = _table_columns(cursor, table)
+            cursor.execute(f"SELECT * FROM {table} ORDER BY rowid")
+            with _open_output(path) as out:
+                writer = _RowWriter(out, args.format, columns)
+                while True:
+                    rows = cursor.fetchmany(args.batch_size)
+                    if not rows:
+                        break
+                    writer.write_many(rows)
+                writer.close()
+            _info(f"{table}: {writer.count} γραμμές")
+    finally:
+        conn.close()
+    return 0
+
+
+def _read_rows(path):
+    """Γραμμές (dict) από CSV, JSON array ή JSON Lines - ανάλογα με την κατάληξη"""
+    if path.lower().endswith(".json"):
+        with open(path, "r", encoding="utf-8") as f:
+            yield from json.load(f)
+    elif path.lower().endswith(".jsonl"):
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    else:
+        with open(path, "r", encoding="utf-8-sig", newline="") as f:
+            for row in csv.DictReader(f):
+                yield {k: (v if v != "" else None) for k, v in row.items()}
+
+
+def cmd_import(args):
+    conn = database.get_connection()
+    cursor = conn.cursor()
+    table_columns = set(_table_columns(cursor, args.table))
+    verb = "INSERT OR REPLACE" if args.replace else "INSERT"
+
+    rows = _read_rows(args.file)
+    first = next(rows, None)
+    if first is None:
+        conn.close()
+        _info("Κενό αρχείο - τίποτα για εισαγωγή")
+        return 0
+
+    columns = [c for c in first if c in table_columns]
+    ignored = [c for c in first if c not in table_columns]
+    if ignored:
+        _info(f"Αγνοούνται στήλες: {', '.join(ignored)}")
+    if not columns:
+        conn.close()
+        raise database.ValidationError(f"Καμία στήλη του αρχείου δεν υπάρχει στον πίνακα {args.table}")
+
+    sql = f"{verb} INTO {args.table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+    imported = 0
+    started = time.perf_counter()
+    try:
+        batch = [[first.get(c) for c in columns]]
+        for row in rows:
+            batch.append([row.get(c) for c in columns])
+            if len(batch) >= args.batch_size:
+                cursor.executemany(sql, batch)
+                imported += len(batch)
+                batch = []
+        if batch:
+            cursor.executemany(sql, batch)
+            imported += len(batch)
+        # Ένα transaction για όλο το αρχείο - όλα ή τίποτα
+        conn.commit()
+    except sqlite3.Error as e:
+        conn.rollback()
+        raise database.DatabaseError(f"Η εισαγωγή απέτυχε μετά από {imported} γραμμές: {e}")
+    finally:
+        conn.close()
+
+    _info(f"{args.table}: {imported} γραμμές σε {time.perf_counter() - started:.2f}s")
+    return 0
+
+
+def cmd_bulk_import(args):
+    import bulk_importer
+
+    run = bulk_importer.import_units if args.table == "units" else bulk_importer.import_tasks
+    report = run(args.file, reject_path=args.rejects, create_missing=args.create_missing,
+                 chunk_size=args.batch_size)
+    _info(report.format())
+    return 0
+
+
+def cmd_backup(args):
+    import backup_manager
+
+    if args.list:
+        for backup in backup_manager.list_backups():
+            print(backup_manager.format_backup_name(backup))
+        return 0
+
+    path = backup_manager.create_backup(args.description)
+    if not path:
+        _info("Το backup απέτυχε (δείτε τα logs)")
+        return 1
+    print(path)
+    return 0
+
+
+def cmd_restore(args):
+    import backup_manager
+
+    if not backup_manager.is_backup_valid(args.path):
+        _info(f"Μη έγκυρο backup: {args.path}")
+        return 1
+    if not args.yes:
+        _info("Η επαναφορά αντικαθιστά την τρέχουσα database - επιβεβαιώστε με --yes")
+        return 1
+    return 0 if backup_manager.restore_backup(args.path) else 1
+
+
+def cmd_rebuild_chains(args):
+    import chain_rebuild
+
+    report = chain_rebuild.rebuild_chains(unit_id=args.unit_id, dry_run=args.dry_run)
+    print(report.format())
+    return 0
+
+
+def cmd_archive(args):
+    import archive_service
+
+    report = archive_service.archive_tasks(older_than_days=args.older_than_days,
+                                           batch_size=args.batch_size)
+    print(report.format())
+    return 0
+
+
+def cmd_maintenance(args):
+    import db_maintenance
+
+    if args.convert and db_maintenance.enable_incremental_vacuum():
+        _info("auto_vacuum = INCREMENTAL")
+    report = db_maintenance.run_maintenance(snapshot=args.snapshot)
+    print(report.format())
+    return 0
+
+
+def cmd_check(args):
+    import consistency_check
+
+    report = consistency_check.check_consistency(repair=args.repair, sample_size=args.samples)
+    print(report.format())
+    # Exit 1 αν μένουν προβλήματα (για nightly jobs)
+    return 1 if (report.total_remaining if args.repair else report.total_found) else 0
+
+
+def cmd_stats(args):
+    stats = {'database': database.DB_NAME}
+    if os.path.exists(database.DB_NAME):
+        stats['size_kb'] = round(os.path.getsize(database.DB_NAME) / 1024, 1)
+    stats.update(database.get_dashboard_stats())
+
+    conn = database.get_connection()
+    try:
+        cursor = conn.cursor()
+        counts = {}
+        for table in EXPORT_TABLES:
+            cursor.execute(f"SELECT COUNT(*) FROM {table}")
+            counts[table] = cursor.fetchone()[0]
+        cursor.execute("SELECT status, COUNT(*) FROM tasks WHERE is_deleted = 0 GROUP BY status")
+        stats['tasks_by_status'] = {row[0]: row[1] for row in cursor.fetchall()}
+        cursor.execute("SELECT COUNT(*) FROM tasks WHERE is_deleted = 1")
+        stats['recycle_bin'] = cursor.fetchone()[0]
+        stats['rows'] = counts
+    finally:
+        conn.close()
+
+    if args.format == "json":
+        print(json.dumps(stats, ensure_ascii=False, indent=2))
+    else:
+        for key, value in stats.items():
+            if isinstance(value, dict):
+                print(f"{key}:")
+                for sub_key, sub_value in value.items():
+                    print(f"  {sub_key:<20} {sub_value}")
+            else:
+                print(f"{key:<22} {value}")
+    return 0
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# ARGUMENTS
+# ═══════════════════════════════════════════════════════════════════════════
+
+def _positive_int(value):
+    number = int(value)
+    if number <= 0:
+        raise argparse.ArgumentTypeError("πρέπει να είναι θετικός ακέραιος")
+    return number
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="hvacr", description="HVACR Maintenance - γραμμή εντολών")
+    parser.add_argument("--db", help=f"Αρχείο database (προεπιλογή: {database.DB_NAME})")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Logs INFO στο stderr")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    batch = argparse.ArgumentParser(add_help=False)
+    batch.add_argument("--batch-size", type=_positive_int, default=DEFAULT_BATCH_SIZE,
+                       help=f"Γραμμές ανά batch (προεπιλογή: {DEFAULT_BATCH_SIZE})")
+
+    query = commands.add_parser("query", parents=[batch], help="Φιλτράρισμα εργασιών")
+    query.add_argument("--status")
+    query.add_argument("--unit-id", type=int)
+    query.add_argument("--task-type-id", type=int)
+    query.add_argument("--from", dest="date_from", help="YYYY-MM-DD")
+    query.add_argument("--to", dest="date_to", help="YYYY-MM-DD")
+    query.add_argument("--search")
+    query.add_argument("--limit", type=_positive_int)
+    query.add_argument("--columns", help="Στήλες χωρισμένες με κόμμα")
+    query.add_argument("--format", choices=("csv", "json", "jsonl"), default="csv")
+    query.add_argument("-o", "--output", help="Αρχείο εξόδου (προεπιλογή: stdout)")
+    query.set_defaults(func=cmd_query)
+
+    export = commands.add_parser("export", parents=[batch], help="Export πίνακα σε CSV/JSON Lines")
+    export.add_argument("table", choices=EXPORT_TABLES + ("all",))
+    export.add_argument("--format", choices=("csv", "jsonl"), default="csv")
+    export.add_argument("-o", "--output", help="Αρχείο (ή φάκελος για 'all')")
+    export.set_defaults(func=cmd_export)
+
+    imp = commands.add_parser("import", parents=[batch], help="Import πίνακα από CSV/JSON/JSON Lines")
+    imp.add_argument("table", choices=EXPORT_TABLES)
+    imp.add_argument("file")
+    imp.add_argument("--replace", action="store_true", help="INSERT OR REPLACE για υπάρχοντα ids")
+    imp.set_defaults(func=cmd_import)
+
+    bulk = commands.add_parser("bulk-import", help="Μαζική εισαγωγή μονάδων/εργασιών από CSV με ονόματα")
+    bulk.add_argument("table", choices=("units", "tasks"))
+    bulk.add_argument("file")
+    bulk.add_argument("--rejects", help="Αρχείο απορρίψεων (προεπιλογή: <file>_rejects.csv)")
+    bulk.add_argument("--create-missing", action="store_true",
+                      help="Δημιουργία ομάδων/τύπων/ειδών/τοποθεσιών που λείπουν")
+    bulk.add_argument("--batch-size", type=_positive_int, default=10000,
+                      help="Γραμμές ανά executemany (προεπιλογή: 10000)")
+    bulk.set_defaults(func=cmd_bulk_import)
+
+    backup = commands.add_parser("backup", help="Δημιουργία (ή λίστα) backups")
+    backup.add_argument("--description", default="CLI backup")
+    backup.add_argument("--list", action="store_true")
+    backup.set_defaults(func=cmd_backup)
+
+    restore = commands.add_parser("restore", help="Επαναφορά από backup")
+    restore.add_argument("path")
+    restore.add_argument("--yes", action="store_true", help="Επιβεβαίωση αντικατάστασης")
+    restore.set_defaults(func=cmd_restore)
+
+    rebuild = commands.add_parser("rebuild-chains", help="Ανακατασκευή χρονολογικών αλυσίδων")
+    rebuild.add_argument("--unit-id", type=int)
+    rebuild.add_argument("--dry-run", action="store_true")
+    rebuild.set_defaults(func=cmd_rebuild_chains)
+
+    archive = commands.add_parser("archive", help="Αρχειοθέτηση παλιών ολοκληρωμένων αλυσίδων")
+    archive.add_argument("--older-than-days", type=_positive_int, default=DatabaseConfig.ARCHIVE_AFTER_DAYS)
+    archive.add_argument("--batch-size", type=_positive_int, default=DatabaseConfig.ARCHIVE_BATCH_SIZE)
+    archive.set_defaults(func=cmd_archive)
+
+    maintenance = commands.add_parser("maintenance", help="Συντήρηση database (optimize, ANALYZE, vacuum)")
+    maintenance.add_argument("--convert", action="store_true",
+                             help="Μετατροπή σε auto_vacuum = INCREMENTAL (πλήρες VACUUM)")
+    maintenance.add_argument("--snapshot", action="store_true",
+                             help="Και compacted snapshot (VACUUM INTO) στα backups")
+    maintenance.set_defaults(func=cmd_maintenance)
+
+    check = commands.add_parser("check", help="Έλεγχος συνέπειας database")
+    check.add_argument("--repair", action="store_true", help="Επιδιόρθωση σε ένα transaction")
+    check.add_argument("--samples", type=int, default=5, help="Ενδεικτικά ids ανά πρόβλημα")
+    check.set_defaults(func=cmd_check)
+
+    stats = commands.add_parser("stats", help="Σύνοψη database")
+    stats.add_argument("--format", choices=("text", "json"), default="text")
+    stats.set_defaults(func=cmd_stats)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING, stream=sys.stderr,
+                        format="%(levelname)-8s | %(name)s | %(message)s")
+
+    if args.db:
+        import backup_manager
+        database.DB_NAME = args.db
+        backup_manager.DB_FILE = args.db
+
+    try:
+        if args.command not in ("restore", "backup"):
+            # Migrations - τα μηνύματά τους στο stderr, το stdout μένει για τα δεδομένα
+            with contextlib.redirect_stdout(sys.stderr):
+                database.init_database()
+        return args.func(args)
+    except BrokenPipeError:
+        # π.χ. "python -m hvacr query | head"
+        sys.stderr.close()
+        return 0
+    except (database.ValidationError, database.DatabaseError, RuntimeError, OSError) as e:
+        _info(f"Σφάλμα: {e}")
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,148 @@
+"""
+Incremental Search
+==================
+
+Αναζήτηση κειμένου στο ιστορικό εργασιών χωρίς query ανά πλήκτρο: τα φίλτρα
+(κατάσταση, τύπος, τοποθεσίες, μονάδα) πάνε στη database, το κείμενο
+ψάχνεται στη μνήμη σε προϋπολογισμένα κλειδιά χωρίς τόνους / πεζά.
+
+Features:
+---------
+- Κλειδί αναζήτησης ανά εργασία: τα πεδία του filter_tasks (περιγραφή,
+  σημειώσεις, μονάδα, ομάδα, τύπος, είδος, τεχνικός, id), χωρίς τόνους, πεζά
+  ("ΨΎΞΗ" → "ψυξη"), με διαχωριστικό ώστε ένα κείμενο να μη "γεφυρώνει" πεδία
+- Τα κλειδιά υπολογίζονται μία φορά ανά σύνολο αποτελεσμάτων, με ένα
+  normalize για όλο το σύνολο (όχι ανά εργασία)
+- Στένεμα: όταν το νέο κείμενο περιέχει το προηγούμενο ("comp" → "compr"),
+  ελέγχονται μόνο τα τρέχοντα αποτελέσματα
+- Άνοιγμα (σβήσιμο, άλλο κείμενο): πάλι από όλο το σύνολο στη μνήμη
+- Database (μέσω query_cache) μόνο όταν αλλάζουν τα φίλτρα ή τα δεδομένα
+  (query_cache.data_version)
+- Προσαρμοστικό debounce από τον μετρημένο χρόνο: αναζήτηση στη μνήμη →
+  αποτελέσματα μέσα σε ένα frame, query στη database → αναμονή ανάλογη του
+  κόστους του (ως UIConfig.SEARCH_DEBOUNCE_MAX_MS)
+
+Usage:
+------
+    search = IncrementalSearch()
+    tasks = search.search("compr", status="pending", location_ids={3})
+    widget.after(search.next_delay_ms(), run_search)
+"""
+
+import re
+import time
+import unicodedata
+from operator import itemgetter
+
+import logger_config
+import query_cache
+from config import UIConfig
+
+logger = logger_config.get_logger(__name__)
+
+# Πεδία που ψάχνει και το filter_tasks (_task_filter_sql)
+SEARCH_FIELDS = ('description', 'notes', 'unit_name', 'group_name', 'task_type_name',
+                 'task_item_name', 'technician_name', 'id')
+
+_search_values = itemgetter(*SEARCH_FIELDS)
+_FIELD_SEP = "\x00"
+_ROW_SEP = "\x01"
+_COMBINING = re.compile("[\u0300-\u036f]")
+_SPACES = re.compile(r"\s+")
+
+# Εκθετικός μέσος όρος των χρόνων (βάρος της νέας μέτρησης)
+_LATENCY_WEIGHT = 0.3
+
+
+def fold_text(text) -> str:
+    """Χωρίς τόνους, πεζά, ενιαία κενά (όπως το bulk_importer.fold_key)"""
+    decomposed = unicodedata.normalize("NFD", _SPACES.sub(" ", str(text)))
+    return _COMBINING.sub("", decomposed).casefold()
+
+
+def build_search_keys(tasks) -> list:
+    """Ένα κλειδί αναζήτησης ανά εργασία (ίδια σειρά)"""
+    texts = [_FIELD_SEP.join(["" if value is None else str(value) for value in _search_values(task)])
+             for task in tasks]
+    keys = fold_text(_ROW_SEP.join(texts)).split(_ROW_SEP)
+    if len(keys) != len(texts):
+        # Ο διαχωριστής υπήρχε μέσα σε κάποιο πεδίο
+        keys = [fold_text(text) for text in texts]
+    return keys
+
+
+class IncrementalSearch:
+    """Αποτελέσματα φίλτρων + κείμενο, με στένεμα στη μνήμη"""
+
+    def __init__(self):
+        self._filters = None
+        self._version = None
+        self._tasks = None          # αποτελέσματα των φίλτρων (χωρίς κείμενο)
+        self._keys = None
+        self._needle = ""
+        self._matches = None        # θέσεις στο _tasks για το _needle
+        self._latency = {'database': None, 'memory': None}
+        self.last_source = None
+        self.last_ms = 0.0
+
+    def search(self, text=None, **filters) -> list:
+        """
+        Εργασίες που περνούν τα φίλτρα (ορίσματα του filter_tasks) και
+        περιέχουν το κείμενο σε κάποιο πεδίο (χωρίς τόνους / πεζά)
+        """
+        started = time.perf_counter()
+        needle = fold_text(text or "").strip()
+        version = query_cache.data_version()
+
+        if self._tasks is None or filters != self._filters or version != self._version:
+            self._tasks = query_cache.filter_tasks(**filters)
+            self._keys = build_search_keys(self._tasks)
+            self._filters = filters
+            self._version = version
+            self._needle = ""
+            self._matches = range(len(self._tasks))
+            source = 'database'
+        else:
+            source = 'memory'
+
+        if needle != self._needle:
+            # Στένεμα από τα τρέχοντα, αλλιώς από όλο το σύνολο
+            candidates = self._matches if self._needle in needle else range(len(self._tasks))
+            keys = self._keys
+            self._matches = [i for i in candidates if needle in keys[i]]
+            self._needle = needle
+
+        tasks = self._tasks
+        result = [tasks[i] for i in self._matches]
+        self._record(source, (time.perf_counter() - started) * 1000)
+        return result
+
+    def _record(self, source, elapsed_ms) -> None:
+        previous = self._latency[source]
+        self._latency[source] = elapsed_ms if previous is None else (
+            previous + _LATENCY_WEIGHT * (elapsed_ms - previous))
+        self.last_source = source
+        self.last_ms = elapsed_ms
+        logger.debug(f"History search ({source}): {elapsed_ms:.1f} ms")
+
+    def next_delay_ms(self) -> int:
+        """
+        Debounce για το επόμενο πλήκτρο: στη μνήμη ώστε τα αποτελέσματα να
+        βγουν μέσα σε ένα frame, στη database όσο κοστίζει ένα query
+        """
+        if self._tasks is None:
+            predicted = self._latency['database']
+            if predicted is None:
+                return int(UIConfig.SEARCH_DEBOUNCE_MAX_MS)
+            return int(min(UIConfig.SEARCH_DEBOUNCE_MAX_MS, max(UIConfig.SEARCH_FRAME_MS, predicted)))
+        predicted = self._latency['memory'] or 0.0
+        return int(max(0.0, UIConfig.SEARCH_FRAME_MS - predicted))
+
+    def reset(self) -> None:
+        """Αποδέσμευση των αποτελεσμάτων (οι μετρήσεις χρόνου μένουν)"""
+        self._filters = None
+        self._version = None
+        self._tasks = None
+        self._keys = None
+        self._needle = ""
+        self._matches = None
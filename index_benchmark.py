@@ -0,0 +1,252 @@
+"""
+Index Benchmark
+===============
+
+Γραμμές που αγγίζει κάθε query της εφαρμογής ΠΡΙΝ και ΜΕΤΑ τα partial /
+covering indexes (database_refactored.PARTIAL_INDEXES).
+
+Features:
+---------
+- Τρέχει σε ΑΝΤΙΓΡΑΦΟ της database (backup API) - η πραγματική δεν αλλάζει
+- Πριν: το αντίγραφο χωρίς τα PARTIAL_INDEXES, μετά: με αυτά
+- Μετρητές του SQLite ανά statement (sqlite_stmt, δηλαδή sqlite3_stmt_status):
+    scan  - βήματα σε πλήρη σάρωση πίνακα/index (FULLSCAN_STEP)
+    sort  - ταξινομήσεις σε προσωρινό B-tree (SORT)
+    autoix- γραμμές σε αυτόματα (προσωρινά) indexes (AUTOINDEX)
+    vm    - εντολές του VDBE που εκτελέστηκαν (VM_STEP) - η συνολική δουλειά
+- Το EXPLAIN QUERY PLAN κάθε query (SCAN/SEARCH, COVERING INDEX, TEMP B-TREE)
+- Χωρίς το sqlite_stmt (SQLite χωρίς SQLITE_ENABLE_STMTVTAB) μετριούνται
+  μόνο οι εντολές VDBE, μέσω progress handler
+
+Usage:
+------
+    python index_benchmark.py
+    python index_benchmark.py --db αντίγραφο.db --repeat 10 --plans
+"""
+
+import argparse
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+
+import database_refactored as database
+import logger_config
+
+logger = logger_config.get_logger(__name__)
+
+# ═══════════════════════════════════════════════════════════════════════════
+# QUERIES (ίδια SQL με τις αντίστοιχες συναρτήσεις)
+# ═══════════════════════════════════════════════════════════════════════════
+
+_TASK_LIST = """
+    SELECT t.*, u.name AS unit_name, tt.name AS task_type_name, g.name AS group_name,
+           ti.name AS task_item_name
+    FROM tasks t
+             JOIN units u ON t.unit_id = u.id
+             JOIN task_types tt ON t.task_type_id = tt.id
+             JOIN groups g ON u.group_id = g.id
+             LEFT JOIN task_items ti ON t.task_item_id = ti.id
+    WHERE t.is_deleted = 0
+"""
+
+# (όνομα, SQL, συνάρτηση παραμέτρων από το context)
+QUERIES = [
+    ("filter_tasks_page", _TASK_LIST + """
+        ORDER BY t.created_date DESC, t.created_at DESC, t.id DESC LIMIT 100""",
+     lambda ctx: ()),
+    ("filter_tasks_page(status)", _TASK_LIST + """
+        AND t.status = ?
+        ORDER BY t.created_date DESC, t.created_at DESC, t.id DESC LIMIT 100""",
+     lambda ctx: ('pending',)),
+    ("filter_tasks(date range)", _TASK_LIST + """
+        AND t.created_date >= ? AND t.created_date <= ?
+        ORDER BY t.created_date DESC, t.created_at DESC""",
+     lambda ctx: (ctx['month_start'], ctx['newest'])),
+    ("get_recent_tasks", _TASK_LIST + """
+        ORDER BY t.created_at DESC LIMIT 10""",
+     lambda ctx: ()),
+    ("get_dashboard_stats", """
+        SELECT (SELECT COUNT(*) FROM units WHERE is_active = 1),
+               (SELECT COUNT(*) FROM tasks WHERE status = 'pending' AND is_deleted = 0),
+               (SELECT COUNT(*) FROM tasks WHERE created_date = ? AND is_deleted = 0)""",
+     lambda ctx: (ctx['newest'],)),
+    ("status counts", """
+        SELECT status, COUNT(*) FROM tasks WHERE is_deleted = 0 GROUP BY status""",
+     lambda ctx: ()),
+    ("chain order (all units)", """
+        SELECT id, unit_id FROM tasks WHERE is_deleted = 0
+        ORDER BY unit_id, created_date, created_at, id""",
+     lambda ctx: ()),
+    ("chronological neighbor", """
+        SELECT id, created_date, created_at FROM tasks
+        WHERE unit_id = ? AND is_deleted = 0 AND (created_date, created_at, id) < (?, ?, ?)
+        ORDER BY created_date DESC, created_at DESC, id DESC LIMIT 1""",
+     lambda ctx: ctx['neighbor']),
+    ("get_all_units", """
+        SELECT u.*, g.name AS group_name FROM units u JOIN groups g ON u.group_id = g.id
+        WHERE u.is_active = 1 ORDER BY g.name, u.name""",
+     lambda ctx: ()),
+    ("get_units_by_group", """
+        SELECT * FROM units WHERE group_id = ? AND is_active = 1 ORDER BY name""",
+     lambda ctx: (ctx['group_id'],)),
+    ("get_task_items_by_type", """
+        SELECT * FROM task_items WHERE task_type_id = ? AND is_active = 1 ORDER BY name""",
+     lambda ctx: (ctx['task_type_id'],)),
+    ("get_location_children", """
+        SELECT l.id, l.name, l.description, l.kind, l.parent_id,
+               (SELECT COUNT(*) FROM locations c
+                WHERE c.parent_id = l.id AND c.is_deleted = 0) AS child_count
+        FROM locations l WHERE l.parent_id IS ? AND l.is_deleted = 0 ORDER BY l.name""",
+     lambda ctx: (None,)),
+]
+
+_COUNTERS = ('scan', 'sort', 'autoix', 'vm')
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# MEASUREMENT
+# ═══════════════════════════════════════════════════════════════════════════
+
+def _context(conn):
+    """Παράμετροι που ταιριάζουν στα δεδομένα (νεότερος μήνας, υπαρκτά ids)"""
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT unit_id, created_date, created_at, id FROM tasks
+        WHERE is_deleted = 0 ORDER BY created_date DESC, created_at DESC, id DESC LIMIT 1
+    """)
+    newest = cursor.fetchone() or (0, '', '', 0)
+    cursor.execute("SELECT MIN(id) FROM groups")
+    group_id = cursor.fetchone()[0]
+    cursor.execute("SELECT MIN(task_type_id) FROM task_items")
+    task_type_id = cursor.fetchone()[0]
+    return {
+        'newest': newest[1],
+        'month_start': (newest[1] or '')[:8] + '01',
+        'neighbor': newest,
+        'group_id': group_id,
+        'task_type_id': task_type_id,
+    }
+
+
+def _stmt_counters(conn, sql):
+    """Αθροιστικοί μετρητές του (cached) prepared statement ή None"""
+    try:
+        row = conn.execute("SELECT nscan, nsort, naidx, nstep FROM sqlite_stmt WHERE sql = ?",
+                           (sql,)).fetchone()
+    except sqlite3.OperationalError:
+        return None
+    return row or (0, 0, 0, 0)
+
+
+def measure(conn, sql, params, repeat=5):
+    """
+    Μία εκτέλεση για τους μετρητές + `repeat` για τον χρόνο
+
+    Returns:
+        dict: rows, scan, sort, autoix, vm, ms (καλύτερος χρόνος), plan
+    """
+    steps = [0]
+
+    def count_step():
+        steps[0] += 1
+        return 0
+
+    before = _stmt_counters(conn, sql)
+    if before is None:
+        conn.set_progress_handler(count_step, 1)
+    rows = len(conn.execute(sql, params).fetchall())
+    conn.set_progress_handler(None, 0)
+    after = _stmt_counters(conn, sql)
+
+    if before is None:
+        counters = dict.fromkeys(_COUNTERS)
+        counters['vm'] = steps[0]
+    else:
+        counters = dict(zip(_COUNTERS, (b - a for a, b in zip(before, after))))
+
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        conn.execute(sql, params).fetchall()
+        best = min(best, time.perf_counter() - started)
+
+    plan = [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params)]
+    return {'rows': rows, **counters, 'ms': best * 1000, 'plan': plan}
+
+
+def _run_all(path, repeat):
+    # Νέα σύνδεση ανά φάση: κανένα prepared statement από το παλιό σχήμα
+    conn = sqlite3.connect(path)
+    try:
+        context = _context(conn)
+        return {name: measure(conn, sql, make_params(context), repeat)
+                for name, sql, make_params in QUERIES}
+    finally:
+        conn.close()
+
+
+def run_benchmark(db_path=None, repeat=5):
+    """
+    Πριν/μετά σε αντίγραφο της database
+
+    Returns:
+        list: [(όνομα query, μέτρηση πριν, μέτρηση μετά), ...]
+    """
+    workdir = tempfile.mkdtemp(prefix="hvacr_ixbench_")
+    path = os.path.join(workdir, "bench.db")
+    try:
+        source = sqlite3.connect(db_path) if db_path else database.get_connection()
+        target = sqlite3.connect(path)
+        source.backup(target)
+        source.close()
+
+        for name in database.PARTIAL_INDEXES:
+            target.execute(f"DROP INDEX IF EXISTS {name}")
+        target.commit()
+        target.close()
+        before = _run_all(path, repeat)
+
+        target = sqlite3.connect(path)
+        for sql in database.PARTIAL_INDEXES.values():
+            target.execute(sql)
+        target.commit()
+        target.close()
+        after = _run_all(path, repeat)
+
+        logger.info(f"Index benchmark: {len(QUERIES)} queries measured")
+        return [(name, before[name], after[name]) for name, _, _ in QUERIES]
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def format_report(results, plans=False):
+    """Πίνακας κειμένου: πριν → μετά ανά μετρητή"""
+    def cell(value):
+        return "-" if value is None else f"{value:,}"
+
+    lines = [f"{'query':<28}{'rows':>7}  " + "".join(f"{c + ' before→after':>24}" for c in _COUNTERS)
+             + f"{'ms before→after':>20}"]
+    for name, before, after in results:
+        line = f"{name:<28}{after['rows']:>7}  "
+        line += "".join(f"{cell(before[c]) + ' → ' + cell(after[c]):>24}" for c in _COUNTERS)
+        line += f"{before['ms']:>11.2f} → {after['ms']:<6.2f}"
+        lines.append(line)
+        if plans:
+            lines.extend(f"    before: {step}" for step in before['plan'])
+            lines.extend(f"    after:  {step}" for step in after['plan'])
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Partial/covering indexes: πριν και μετά")
+    parser.add_argument("--db", help="Αρχείο database (προεπιλογή: η database της εφαρμογής)")
+    parser.add_argument("--repeat", type=int, default=5, help="Εκτελέσεις για τον χρόνο")
+    parser.add_argument("--plans", action="store_true", help="Και το EXPLAIN QUERY PLAN")
+    args = parser.parse_args()
+    print(format_report(run_benchmark(args.db, args.repeat), args.plans))
+
+
+if __name__ == "__main__":
+    main()
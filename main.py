@@ -6,13 +6,24 @@ import os
 
 import customtkinter as ctk
 from datetime import datetime
-import database_refactored as database
+import api_client
+from api_client import db
 import ui_components
 import theme_config
 import utils_refactored
 import logger_config
 import backup_manager
+import maintenance_scheduler
+import archive_service
+import db_maintenance
+import memory_replica
+import query_cache
+from incremental_search import IncrementalSearch
+import relationship_compaction
+import replica_sync
+import dashboard_service
 import custom_dialogs
+from config import DatabaseConfig
 
 
 class HVACRApp(ctk.CTk):
@@ -31,6 +42,7 @@ class HVACRApp(ctk.CTk):
 
             # ✨ NEW: Debounce timer για search (για FIX 2.1)
             self.search_timer = None
+            self.history_search = IncrementalSearch()
             # ✨ NEW: Tab tracking
             self.current_tab = None
 
@@ -41,23 +53,14 @@ class HVACRApp(ctk.CTk):
             self.minsize(1200, 700)
             self.configure(fg_color=self.theme["bg_primary"])
 
-            # Αρχικοποίηση database
-            self.logger.info("Initializing database...")
-            try:
-                database.init_database()
-                self.logger.info("Database initialized successfully")
-            except Exception as e:
-                self.logger.error(f"Database initialization failed: {e}", exc_info=True)
-                raise
-
-            # ✨ AUTO BACKUP
-            self.logger.info("Creating automatic backup...")
-            backup_file = backup_manager.create_backup("Auto backup on startup")
-            if backup_file:
-                self.logger.info(f"✅ Backup created: {backup_file}")
+            # Transport: απευθείας sqlite3, ή ο API server αν το settings.json έχει server_url
+            api_client.init_transport()
+            self.remote = api_client.is_remote()
+            if self.remote:
+                # Schema, backups, συντήρηση και background εργασίες ανήκουν στον server
+                self.logger.info("Using API server - local database setup skipped")
             else:
-                self.logger.warning("⚠️  Backup failed (app will continue)")
-
+                self.init_local_database()
 
             # Δημιουργία UI layout
             self.logger.info("Creating UI layout...")
@@ -72,6 +75,10 @@ class HVACRApp(ctk.CTk):
             # Maximize window (μετά το UI setup)
             self.after(10, lambda: self.state('zoomed'))
 
+            # ✨ Συντήρηση database (optimize/ANALYZE/vacuum) στον νεκρό χρόνο
+            if not self.remote:
+                self.maintenance = db_maintenance.IdleMaintenance(self).start()
+
             # ✨ Log app ready
             self.logger.info("=" * 70)
             self.logger.info("HVAC Maintenance App is READY!")
@@ -89,6 +96,56 @@ class HVACRApp(ctk.CTk):
             # Exit gracefully
             raise
 
+    def init_local_database(self):
+        """Αρχείο database, backup και background εργασίες (μόνο χωρίς API server)"""
+        # Αρχικοποίηση database
+        self.logger.info("Initializing database...")
+        try:
+            db.init_database()
+            self.logger.info("Database initialized successfully")
+        except Exception as e:
+            self.logger.error(f"Database initialization failed: {e}", exc_info=True)
+            raise
+
+        # ✨ Καταγραφή αλλαγών για offline συγχρονισμό (replicas)
+        try:
+            replica_sync.init_replica()
+        except Exception as e:
+            self.logger.warning(f"⚠️  Replica change tracking unavailable (app will continue): {e}")
+
+        # ✨ AUTO BACKUP
+        self.logger.info("Creating automatic backup...")
+        backup_file = backup_manager.create_backup("Auto backup on startup")
+        if backup_file:
+            self.logger.info(f"✅ Backup created: {backup_file}")
+        else:
+            self.logger.warning("⚠️  Backup failed (app will continue)")
+
+        # ✨ Προγραμματισμένα Service (μετά το backup)
+        try:
+            maintenance_scheduler.generate_due_tasks()
+        except Exception as e:
+            self.logger.warning(f"⚠️  Maintenance scheduler failed (app will continue): {e}")
+
+        # ✨ auto_vacuum = INCREMENTAL (μία φορά, πριν ξεκινήσουν τα background threads)
+        try:
+            db_maintenance.enable_incremental_vacuum(max_mb=DatabaseConfig.MAINTENANCE_CONVERT_MAX_MB)
+        except Exception as e:
+            self.logger.warning(f"⚠️  auto_vacuum conversion failed (app will continue): {e}")
+
+        # ✨ Αναγνώσεις από αντίγραφο στη μνήμη (προαιρετικό)
+        if DatabaseConfig.READ_REPLICA:
+            try:
+                memory_replica.enable()
+            except Exception as e:
+                self.logger.warning(f"⚠️  Memory replica unavailable (app will continue): {e}")
+
+        # ✨ Καθαρισμός νεκρών σχέσεων στο παρασκήνιο (μικρά batches)
+        relationship_compaction.start_background_compaction()
+
+        # ✨ Αρχειοθέτηση παλιών κλειστών αλυσίδων στο παρασκήνιο
+        archive_service.start_background_archiving()
+
     def create_layout(self):
         """Δημιουργία του βασικού layout"""
 
@@ -231,7 +288,18 @@ class HVACRApp(ctk.CTk):
         )
         subtitle.pack(pady=10)
 
-        # Stats removed για περισσότερο χώρο στις εργασίες
+        # Σύνοψη μετρητών (μία γραμμή - ένα query στο dashboard_counters)
+        counters = db.get_dashboard_counters() if self.remote else dashboard_service.get_dashboard_counters()
+        summary = ctk.CTkLabel(
+            self.main_frame,
+            text=(f"🏢 Μονάδες: {counters['total_units']}   |   "
+                  f"⏳ Εκκρεμείς: {counters['pending_tasks']}   |   "
+                  f"🔴 Υψηλής προτεραιότητας: {counters['pending_by_priority'].get('high', 0)}   |   "
+                  f"📅 Σήμερα: {counters['today_tasks']}"),
+            font=theme_config.get_font("body", "bold"),
+            text_color=self.theme["text_secondary"]
+        )
+        summary.pack(pady=(5, 0))
 
         # Εκκρεμείς εργασίες
         recent_label = ctk.CTkLabel(
@@ -260,14 +328,13 @@ class HVACRApp(ctk.CTk):
             for widget in self.dashboard_tasks_frame.winfo_children():
                 widget.destroy()
 
-        # ΑΛΛΑΓΗ: Φέρνουμε ΜΟΝΟ εκκρεμείς εργασίες
-        all_tasks = database.get_recent_tasks(20)  # Φέρνουμε περισσότερα για να φιλτράρουμε
-        tasks = [t for t in all_tasks if t.get('status') == 'pending'][:15]  # Κρατάμε τις 15 πρώτες εκκρεμείς
+        # Εκκρεμείς απευθείας από το status index (όχι φιλτράρισμα των πρόσφατων)
+        tasks = db.get_pending_tasks(15) if self.remote else dashboard_service.get_pending_tasks(15)
 
         if not tasks:
             no_tasks = ctk.CTkLabel(
                 self.dashboard_tasks_frame,
-                text="Δεν υπάρχουν πρόσφατες εργασίες",
+                text="Δεν υπάρχουν εκκρεμείς εργασίες",
                 font=theme_config.get_font("body"),
                 text_color=self.theme["text_secondary"]
             )
@@ -311,7 +378,7 @@ class HVACRApp(ctk.CTk):
 
     def show_recent_tasks(self):
         """Εμφάνιση πρόσφατων εργασιών"""
-        tasks = database.get_recent_tasks(5)
+        tasks = db.get_recent_tasks(5)
 
         if not tasks:
             no_tasks = ctk.CTkLabel(
@@ -421,7 +488,7 @@ class HVACRApp(ctk.CTk):
         if hasattr(self, 'unit_filter_buttons'):
             for group_id, dropdown in self.unit_filter_buttons.items():
                 current = dropdown.get()
-                groups = database.get_all_groups()
+                groups = db.get_all_groups()
                 group_names = [g['name'] for g in groups]
 
                 is_active = current not in group_names
@@ -471,7 +538,7 @@ class HVACRApp(ctk.CTk):
 
         # 5. Reset Unit/Group dropdowns to group name
         if hasattr(self, 'unit_filter_buttons'):
-            groups = database.get_all_groups()
+            groups = db.get_all_groups()
             group_map = {g['id']: g['name'] for g in groups}
 
             for group_id, dropdown in self.unit_filter_buttons.items():
@@ -488,7 +555,7 @@ class HVACRApp(ctk.CTk):
         self.load_history_tasks()
 
     def on_search_keypress(self, event):
-        """Debounced search handler - Περιμένει 500ms μετά το τελευταίο keystroke"""
+        """Debounced search handler - αναμονή ανάλογη του κόστους της αναζήτησης"""
 
         # Cancel previous timer
         if self.search_timer is not None:
@@ -500,11 +567,11 @@ class HVACRApp(ctk.CTk):
         else:
             self.search_clear_btn.place_forget()
 
-        # Start new timer (500ms delay)
-        self.search_timer = self.after(500, self.on_search_change)
+        # Start new timer (ένα frame στη μνήμη, ως 500ms για query στη database)
+        self.search_timer = self.after(self.history_search.next_delay_ms(), self.on_search_change)
 
     def on_search_change(self):
-        """Actual search execution (called after 500ms delay)"""
+        """Actual search execution (called after the debounce delay)"""
         self.search_timer = None
         self.apply_history_filters()
 
@@ -551,12 +618,12 @@ class HVACRApp(ctk.CTk):
         task_type_id = self.history_types_dict.get(type_key) if type_key != "Όλα" else None
         location_filter = self.history_location_combo.get() if hasattr(self, 'history_location_combo') else "Όλες"
 
-        # Apply filters
-        filtered_tasks = database.filter_tasks(
+        # Apply filters (κείμενο στη μνήμη - στένεμα των προηγούμενων αποτελεσμάτων)
+        filtered_tasks = self.history_search.search(
+            search_text,
             status=status,
             unit_id=self.current_unit_filter,
-            task_type_id=task_type_id,
-            search_text=search_text
+            task_type_id=task_type_id
         )
 
         # Filter by group (client-side) if group selected
@@ -968,14 +1035,13 @@ class HVACRApp(ctk.CTk):
         visited_children = set()
 
         # Get task data
-        tasks = database.get_all_tasks()
-        task_dict = {t['id']: t for t in tasks}
+        current = query_cache.get_task_by_id(task_id)
 
         def get_parents(tid):
             if tid in visited_parents:
                 return
             visited_parents.add(tid)
-            rels = database.get_related_tasks(tid)
+            rels = query_cache.get_related_tasks(tid)
             for parent in rels['parents']:
                 parent_id = parent['id']
                 if parent_id not in [c['id'] for c in chain]:
@@ -986,7 +1052,7 @@ class HVACRApp(ctk.CTk):
             if tid in visited_children:
                 return
             visited_children.add(tid)
-            rels = database.get_related_tasks(tid)
+            rels = query_cache.get_related_tasks(tid)
             for child in rels['children']:
                 child_id = child['id']
                 if child_id not in [c['id'] for c in chain]:
@@ -997,8 +1063,8 @@ class HVACRApp(ctk.CTk):
         get_parents(task_id)
 
         # Add current task
-        if task_id in task_dict:
-            chain.append(task_dict[task_id])
+        if current is not None:
+            chain.append(current)
 
         get_children(task_id)
 
@@ -1042,21 +1108,7 @@ class HVACRApp(ctk.CTk):
         """Πρόγραμμα βαρδιών"""
         self.clear_main_frame()
 
-        title = ctk.CTkLabel(
-            self.main_frame,
-            text="📅 Πρόγραμμα Βαρδιών",
-            font=theme_config.get_font("title", "bold"),
-            text_color=self.theme["text_primary"]
-        )
-        title.pack(pady=20)
-
-        label = ctk.CTkLabel(
-            self.main_frame,
-            text="Εδώ θα εμφανίζεται το μηνιαίο πρόγραμμα βαρδιών\n(Υλοποιείται στην επόμενη φάση)",
-            font=theme_config.get_font("body"),
-            text_color=self.theme["text_secondary"]
-        )
-        label.pack(pady=50)
+        ui_components.ShiftRosterView(self.main_frame)
 
     def show_export(self):
         """Εξαγωγή δεδομένων"""
@@ -1070,13 +1122,90 @@ class HVACRApp(ctk.CTk):
         )
         title.pack(pady=20)
 
+        # ═══════════════════════════════════════════════
+        # PDF REPORTS SECTION
+        # ═══════════════════════════════════════════════
+
+        reports_frame = ctk.CTkFrame(
+            self.main_frame,
+            corner_radius=15,
+            fg_color=self.theme["card_bg"],
+            border_color=self.theme["card_border"],
+            border_width=1
+        )
+        reports_frame.pack(fill="x", padx=40, pady=(0, 20))
+
+        ctk.CTkLabel(
+            reports_frame,
+            text="📄 Αναφορές Συντήρησης (PDF)",
+            font=theme_config.get_font("heading", "bold"),
+            text_color=self.theme["text_primary"]
+        ).pack(anchor="w", padx=20, pady=(20, 10))
+
+        ctk.CTkLabel(
+            reports_frame,
+            text="Εργασίες ανά τύπο, ανοιχτές βλάβες, μέσος χρόνος επισκευής (Βλάβη → Επισκευή) "
+                 "και τελευταίο Service.",
+            font=theme_config.get_font("small"),
+            text_color=self.theme["text_secondary"],
+            wraplength=650,
+            justify="left"
+        ).pack(anchor="w", padx=20, pady=(0, 15))
+
+        buttons_frame = ctk.CTkFrame(reports_frame, fg_color="transparent")
+        buttons_frame.pack(fill="x", padx=20, pady=(0, 20))
+
+        ctk.CTkButton(
+            buttons_frame,
+            text="🏢 Αναφορά ανά Μονάδα",
+            command=lambda: self.export_pdf_report("units"),
+            width=220,
+            height=40,
+            **theme_config.get_button_style("primary")
+        ).pack(side="left", padx=(0, 10))
+
+        ctk.CTkButton(
+            buttons_frame,
+            text="📊 Αναφορά ανά Ομάδα",
+            command=lambda: self.export_pdf_report("groups"),
+            width=220,
+            height=40,
+            **theme_config.get_button_style("primary")
+        ).pack(side="left")
+
         label = ctk.CTkLabel(
             self.main_frame,
-            text="Εδώ θα μπορείτε να εξάγετε αναφορές σε PDF/Excel\n(Υλοποιείται στην επόμενη φάση)",
+            text="Εξαγωγή σε Excel\n(Υλοποιείται στην επόμενη φάση)",
             font=theme_config.get_font("body"),
             text_color=self.theme["text_secondary"]
         )
-        label.pack(pady=50)
+        label.pack(pady=30)
+
+    def export_pdf_report(self, report_type):
+        """Δημιουργία PDF αναφοράς (ανά μονάδα ή ανά ομάδα)"""
+        from tkinter import filedialog
+        import report_generator
+
+        default_name = f"hvacr_report_{report_type}_{datetime.now().strftime('%Y%m%d')}.pdf"
+        path = filedialog.asksaveasfilename(
+            title="Αποθήκευση Αναφοράς",
+            defaultextension=".pdf",
+            initialfile=default_name,
+            filetypes=[("PDF", "*.pdf")]
+        )
+        if not path:
+            return
+
+        try:
+            if report_type == "groups":
+                report_generator.generate_group_report(path)
+            else:
+                report_generator.generate_unit_report(path)
+
+            custom_dialogs.show_success("Επιτυχία", f"Η αναφορά δημιουργήθηκε!\n\n{os.path.basename(path)}")
+        except Exception as e:
+            self.logger.error(f"Failed to generate report: {e}", exc_info=True)
+            custom_dialogs.show_error("Σφάλμα", f"Αποτυχία δημιουργίας αναφοράς: {str(e)}")
 
     def show_recycle_bin(self):
         """Κάδος ανακύκλωσης"""
@@ -1444,7 +1573,8 @@ class HVACRApp(ctk.CTk):
 
     def load_initial_data(self):
         """Φόρτωση αρχικών δεδομένων δοκιμών"""
-        database.load_sample_data()
+        if not self.remote:
+            db.load_sample_data()
         
         # Maximize window μετά από rendering (100ms delay)
         self.after(100, lambda: self.state('zoomed'))
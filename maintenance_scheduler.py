@@ -0,0 +1,364 @@
+"""
+Preventive Maintenance Scheduler
+================================
+
+Προγραμματισμός περιοδικών Service ανά μονάδα.
+
+Features:
+---------
+- Κανόνες επανάληψης ανά μονάδα, δεμένοι με task_items
+  (π.χ. 'Ετήσιο Service' κάθε 12 μήνες)
+- Index στο next_due_date - το "τι λήγει τις επόμενες N ημέρες"
+  είναι indexed range query
+- Batch generator: δημιουργεί τις εκκρεμείς εργασίες με executemany
+  σε ΕΝΑ transaction
+- Idempotent & incremental: κάθε εκτέλεση αγγίζει ΜΟΝΟ τους κανόνες
+  που έχουν λήξει και μεταφέρει το next_due_date στο μέλλον
+
+Usage:
+------
+    import maintenance_scheduler
+
+    # Κανόνας: Ετήσιο Service για τη μονάδα 5
+    maintenance_scheduler.add_schedule(unit_id=5, task_item_id=1)
+
+    # Τι λήγει τις επόμενες 30 ημέρες
+    due = maintenance_scheduler.get_due_schedules(days_ahead=30)
+
+    # Καθημερινή εκτέλεση (καλείται στο startup)
+    created = maintenance_scheduler.generate_due_tasks()
+"""
+
+import calendar
+from datetime import datetime, date, timedelta
+from typing import Optional, List, Dict, Any, Iterable
+
+import database_refactored as database
+import logger_config
+
+logger = logger_config.get_logger(__name__)
+
+# ═══════════════════════════════════════════════════════════════════════════
+# CONFIGURATION
+# ═══════════════════════════════════════════════════════════════════════════
+
+# Προεπιλεγμένο διάστημα (μήνες) για τα προκαθορισμένα είδη Service
+DEFAULT_INTERVALS = {
+    'Ετήσιο Service': 12,
+    'Εξαμηνιαίο Service': 6,
+    'Τριμηνιαίο Service': 3,
+    'Μηνιαίο Service': 1,
+}
+
+DEFAULT_PRIORITY = "medium"
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# SCHEMA
+# ═══════════════════════════════════════════════════════════════════════════
+
+def init_schedule_tables(conn=None):
+    """Δημιουργία του πίνακα maintenance_schedules και του due-date index"""
+    own_conn = conn is None
+    if own_conn:
+        conn = database.get_connection()
+
+    cursor = conn.cursor()
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS maintenance_schedules (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            unit_id INTEGER NOT NULL,
+            task_item_id INTEGER NOT NULL,
+            interval_months INTEGER NOT NULL CHECK (interval_months > 0),
+            start_date DATE NOT NULL,
+            next_due_date DATE NOT NULL,
+            last_generated_date DATE,
+            is_active INTEGER NOT NULL DEFAULT 1,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (unit_id) REFERENCES units (id),
+            FOREIGN KEY (task_item_id) REFERENCES task_items (id),
+            UNIQUE (unit_id, task_item_id)
+        )
+    """)
+
+    # Due-date index: range scan ΜΟΝΟ στους ενεργούς κανόνες
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_schedules_due
+            ON maintenance_schedules(is_active, next_due_date)
+    """)
+
+    if own_conn:
+        conn.commit()
+        conn.close()
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# DATE HELPERS
+# ═══════════════════════════════════════════════════════════════════════════
+
+def add_months(start: date, months: int) -> date:
+    """Προσθήκη μηνών σε ημερομηνία (31/01 + 1 μήνας → 28/02 ή 29/02)"""
+    month_index = start.month - 1 + months
+    year = start.year + month_index // 12
+    month = month_index % 12 + 1
+    day = min(start.day, calendar.monthrange(year, month)[1])
+    return date(year, month, day)
+
+
+def _parse_date(value) -> date:
+    if isinstance(value, date):
+        return value
+    return datetime.strptime(value, '%Y-%m-%d').date()
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# SCHEDULE RULES
+# ═══════════════════════════════════════════════════════════════════════════
+
+def add_schedule(unit_id: int, task_item_id: int, interval_months: Optional[int] = None,
+                 start_date: Optional[str] = None) -> int:
+    """
+    Προσθήκη (ή ενημέρωση) κανόνα επανάληψης για μία μονάδα.
+
+    Args:
+        unit_id: ID μονάδας
+        task_item_id: ID είδους εργασίας (π.χ. 'Ετήσιο Service')
+        interval_months: Διάστημα σε μήνες (default: από το όνομα του είδους)
+        start_date: Πρώτη ημερομηνία λήξης YYYY-MM-DD (default: σήμερα)
+
+    Returns:
+        int: ID του κανόνα
+    """
+    return assign_schedule([unit_id], task_item_id, interval_months, start_date)[0]
+
+
+def assign_schedule(unit_ids: Iterable[int], task_item_id: int, interval_months: Optional[int] = None,
+                    start_date: Optional[str] = None) -> List[int]:
+    """
+    Ίδιος κανόνας για πολλές μονάδες μαζί (executemany, ένα transaction).
+
+    Returns:
+        List[int]: IDs των κανόνων, με τη σειρά των unit_ids (κενή λίστα χωρίς μονάδες)
+    """
+    unit_ids = list(unit_ids)
+    if not unit_ids:
+        return []
+    start_date = start_date or datetime.now().strftime('%Y-%m-%d')
+
+    conn = database.get_connection()
+    try:
+        init_schedule_tables(conn)
+        cursor = conn.cursor()
+
+        if interval_months is None:
+            cursor.execute("SELECT name FROM task_items WHERE id = ?", (task_item_id,))
+            item = cursor.fetchone()
+            if not item:
+                raise database.ValidationError(f"Το είδος εργασίας {task_item_id} δεν βρέθηκε")
+            interval_months = DEFAULT_INTERVALS.get(item['name'])
+            if interval_months is None:
+                raise database.ValidationError(
+                    f"Δεν υπάρχει προεπιλεγμένο διάστημα για '{item['name']}' - δώστε interval_months"
+                )
+
+        if interval_months <= 0:
+            raise database.ValidationError("Το διάστημα πρέπει να είναι θετικός αριθμός μηνών")
+
+        cursor.executemany("""
+            INSERT INTO maintenance_schedules (unit_id, task_item_id, interval_months, start_date, next_due_date)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (unit_id, task_item_id) DO UPDATE
+                SET interval_months = excluded.interval_months,
+                    start_date = excluded.start_date,
+                    next_due_date = excluded.next_due_date,
+                    is_active = 1
+        """, [(unit_id, task_item_id, interval_months, start_date, start_date) for unit_id in unit_ids])
+
+        placeholders = ','.join('?' * len(unit_ids))
+        cursor.execute(f"""
+            SELECT id, unit_id FROM maintenance_schedules
+            WHERE task_item_id = ? AND unit_id IN ({placeholders})
+        """, [task_item_id] + unit_ids)
+        ids = {row['unit_id']: row['id'] for row in cursor.fetchall()}
+
+        conn.commit()
+    finally:
+        conn.close()
+
+    logger.info(f"Schedule for item {task_item_id} every {interval_months} month(s) "
+                f"assigned to {len(unit_ids)} unit(s)")
+    return [ids[unit_id] for unit_id in unit_ids]
+
+
+def deactivate_schedule(schedule_id: int) -> bool:
+    """Απενεργοποίηση κανόνα (δεν δημιουργεί πλέον εργασίες)"""
+    conn = database.get_connection()
+    try:
+        init_schedule_tables(conn)
+        conn.execute("UPDATE maintenance_schedules SET is_active = 0 WHERE id = ?", (schedule_id,))
+        conn.commit()
+    finally:
+        conn.close()
+    return True
+
+
+def get_unit_schedules(unit_id: int) -> List[Dict[str, Any]]:
+    """Όλοι οι ενεργοί κανόνες μιας μονάδας"""
+    conn = database.get_connection()
+    try:
+        init_schedule_tables(conn)
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT s.*, ti.name AS task_item_name
+            FROM maintenance_schedules s
+                     JOIN task_items ti ON s.task_item_id = ti.id
+            WHERE s.unit_id = ? AND s.is_active = 1
+            ORDER BY s.next_due_date
+        """, (unit_id,))
+        return [dict(row) for row in cursor.fetchall()]
+    finally:
+        conn.close()
+
+
+def get_due_schedules(days_ahead: int = 30, as_of: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Κανόνες που λήγουν μέχρι as_of + days_ahead (συμπεριλαμβάνονται και
+    όσοι έχουν ήδη λήξει).
+
+    Indexed range query στο idx_schedules_due (is_active, next_due_date).
+    """
+    as_of_date = _parse_date(as_of) if as_of else date.today()
+    until = (as_of_date + timedelta(days=days_ahead)).strftime('%Y-%m-%d')
+
+    conn = database.get_connection()
+    try:
+        init_schedule_tables(conn)
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT s.*,
+                   u.name  AS unit_name,
+                   u.location,
+                   g.name  AS group_name,
+                   ti.name AS task_item_name
+            FROM maintenance_schedules s
+                     JOIN units u ON s.unit_id = u.id
+                     JOIN groups g ON u.group_id = g.id
+                     JOIN task_items ti ON s.task_item_id = ti.id
+            WHERE s.is_active = 1
+              AND s.next_due_date <= ?
+              AND u.is_active = 1
+            ORDER BY s.next_due_date
+        """, (until,))
+        return [dict(row) for row in cursor.fetchall()]
+    finally:
+        conn.close()
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# BATCH GENERATOR
+# ═══════════════════════════════════════════════════════════════════════════
+
+def generate_due_tasks(as_of: Optional[str] = None) -> int:
+    """
+    Δημιουργία εκκρεμών εργασιών για όλους τους κανόνες που έχουν λήξει.
+
+    - Διαβάζει ΜΟΝΟ τους κανόνες με next_due_date <= as_of (index range)
+    - Μία εργασία ανά κανόνα, ακόμα κι αν χάθηκαν πολλές περίοδοι
+    - Αν υπάρχει ήδη εκκρεμής εργασία του ίδιου είδους στη μονάδα,
+      δεν δημιουργείται δεύτερη
+    - Inserts + μετακίνηση next_due_date στο ίδιο transaction, άρα μια
+      δεύτερη εκτέλεση την ίδια μέρα δεν κάνει τίποτα
+
+    Args:
+        as_of: Ημερομηνία αναφοράς YYYY-MM-DD (default: σήμερα)
+
+    Returns:
+        int: Πλήθος εργασιών που δημιουργήθηκαν
+    """
+    as_of_date = _parse_date(as_of) if as_of else date.today()
+    as_of_str = as_of_date.strftime('%Y-%m-%d')
+
+    conn = database.get_connection()
+    try:
+        init_schedule_tables(conn)
+        cursor = conn.cursor()
+
+        # BEGIN IMMEDIATE: δύο instances του app δεν μπορούν να παράγουν διπλές εργασίες
+        cursor.execute("BEGIN IMMEDIATE")
+
+        cursor.execute("""
+            SELECT s.id,
+                   s.unit_id,
+                   s.task_item_id,
+                   s.interval_months,
+                   s.start_date,
+                   s.next_due_date,
+                   ti.task_type_id,
+                   ti.name    AS task_item_name,
+                   u.name     AS unit_name,
+                   u.location AS unit_location,
+                   EXISTS (SELECT 1
+                           FROM tasks t
+                           WHERE t.unit_id = s.unit_id
+                             AND t.task_item_id = s.task_item_id
+                             AND t.status = 'pending'
+                             AND t.is_deleted = 0) AS has_open_task
+            FROM maintenance_schedules s
+                     JOIN task_items ti ON s.task_item_id = ti.id
+                     JOIN units u ON s.unit_id = u.id
+            WHERE s.is_active = 1
+              AND s.next_due_date <= ?
+              AND u.is_active = 1
+        """, (as_of_str,))
+        due = cursor.fetchall()
+
+        if not due:
+            conn.commit()
+            logger.debug(f"Scheduler: nothing due on {as_of_str}")
+            return 0
+
+        new_tasks = []
+        advances = []
+        for row in due:
+            # Πρώτη μελλοντική ημερομηνία, πάντα από το start_date
+            # (αλλιώς 31/01 → 28/02 → 28/03 ... η μέρα "γλιστράει")
+            start = _parse_date(row['start_date'])
+            periods = 1
+            next_due = add_months(start, row['interval_months'])
+            while next_due <= as_of_date:
+                periods += 1
+                next_due = add_months(start, periods * row['interval_months'])
+
+            if not row['has_open_task']:
+                new_tasks.append((
+                    row['unit_id'], row['task_type_id'], row['task_item_id'],
+                    f"{row['task_item_name']} - {row['unit_name']}",
+                    'pending', DEFAULT_PRIORITY, row['next_due_date'], row['unit_location'],
+                    row['id']
+                ))
+
+            advances.append((next_due.strftime('%Y-%m-%d'), as_of_str, row['id']))
+
+        cursor.executemany("""
+            INSERT INTO tasks (unit_id, task_type_id, task_item_id, description, status, priority,
+                               created_date, location, notes)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, 'Αυτόματη δημιουργία (πρόγραμμα #' || ? || ')')
+        """, new_tasks)
+
+        cursor.executemany("""
+            UPDATE maintenance_schedules
+            SET next_due_date = ?, last_generated_date = ?
+            WHERE id = ?
+        """, advances)
+
+        conn.commit()
+
+    except Exception as e:
+        conn.rollback()
+        logger.error(f"❌ Scheduler failed: {e}", exc_info=True)
+        raise
+    finally:
+        conn.close()
+
+    logger.info(f"✅ Scheduler: {len(due)} rule(s) due, {len(new_tasks)} task(s) created")
+    return len(new_tasks)
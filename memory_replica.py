@@ -0,0 +1,830 @@
+"""
+In-Memory Read Replica
+======================
+
+Αντίγραφο ολόκληρης της database σε μια SQLite σύνδεση ":memory:" για τις
+οθόνες που μόνο διαβάζουν (dashboard, ιστορικό, προεπισκόπηση αλυσίδων,
+selectors) - χωρίς άνοιγμα αρχείου και I/O δίσκου ανά ανάγνωση.
+
+Features:
+---------
+- Φόρτωση στην εκκίνηση με το backup API (ένα βήμα, συνεπές snapshot)
+- Διαφανές: το database.get_connection() επιστρέφει σύνδεση-router
+    * SELECT / WITH (χωρίς DML) / PRAGMA πληροφοριών → μνήμη
+    * οτιδήποτε άλλο (INSERT/UPDATE/DELETE/DDL, BEGIN, ATTACH, ...) → δίσκος,
+      και από εκεί και πέρα ΟΛΗ η σύνδεση μένει στον δίσκο (ένα transaction
+      διαβάζει πάντα τις δικές του εγγραφές)
+- Διπλή εγγραφή: κάθε σύνδεση που γράφει καταγράφει με temp triggers τα
+  κλειδιά των γραμμών που αλλάζει (και μέσω triggers/cascades). Στο commit
+  οι γραμμές αυτές διαβάζονται από τον δίσκο και αντιγράφονται όπως είναι
+  στη μνήμη (read-your-writes στην ίδια διεργασία) - οι τιμές από
+  CURRENT_TIMESTAMP, randomblob, HLC κλπ. είναι ίδιες με του δίσκου
+- Αλλαγή σχήματος (schema_version) ή αποτυχία αντιγραφής → reload. Ως
+  τότε, αναγνώσεις που αναφέρουν πίνακα/στήλη που λείπει από τη μνήμη
+  (π.χ. πίνακας που δημιουργήθηκε μετά το enable) πάνε στον δίσκο
+- Οι αναγνώσεις από τη μνήμη τρέχουν ολόκληρες υπό το lock του replica
+  (ποτέ ανάμεσα σε μισή αντιγραφή άλλου thread)
+- Περιοδικό reconciliation (thread): PRAGMA data_version του δίσκου και,
+  αν άλλαξε, αποτύπωμα ανά πίνακα (πλήθος, MAX(rowid), άθροισμα
+  row_version/is_deleted/is_active) δίσκου vs μνήμης - αλλαγές από άλλες
+  διεργασίες ή χρήστες φαίνονται το πολύ μετά από ένα διάστημα
+- Όσο η μνήμη είναι stale ή φορτώνει, οι αναγνώσεις πάνε στον δίσκο
+- benchmark(): filter_tasks, αλυσίδες και μία εγγραφή, δίσκος vs μνήμη
+
+Περιορισμοί:
+------------
+- Εγγραφές σε attached βάσεις (archive) δεν αντιγράφονται - αφορούν άλλο
+  αρχείο, που οι αναγνώσεις διαβάζουν πάντα από τον δίσκο
+- Η μνήμη δεν έχει triggers (έχουν ήδη τρέξει στον δίσκο) - τα queries
+  στο sqlite_master πάνε στον δίσκο
+
+Usage:
+------
+    import memory_replica
+
+    memory_replica.enable()                  # μετά το init_database
+    tasks = database.filter_tasks(status="pending")   # από τη μνήμη
+    print(memory_replica.get_replica().stats.format())
+
+    python memory_replica.py --repeat 20     # benchmark
+"""
+
+import argparse
+import json
+import os
+import re
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+import database_refactored as database
+import logger_config
+from config import DatabaseConfig
+
+logger = logger_config.get_logger(__name__)
+
+# ═══════════════════════════════════════════════════════════════════════════
+# STATEMENT ROUTING
+# ═══════════════════════════════════════════════════════════════════════════
+
+_READ = re.compile(r"^\s*(SELECT|VALUES)\b", re.IGNORECASE)
+_WITH = re.compile(r"^\s*WITH\b", re.IGNORECASE)
+_DML = re.compile(r"\b(INSERT|UPDATE|DELETE)\b|\bREPLACE\s+INTO\b", re.IGNORECASE)
+_READ_PRAGMA = re.compile(
+    r"^\s*PRAGMA\s+(\w+\.)?(table_info|table_xinfo|index_list|index_info|index_xinfo|"
+    r"foreign_key_list|database_list)\b", re.IGNORECASE)
+_WRITE = re.compile(r"^\s*(INSERT|UPDATE|DELETE|REPLACE|CREATE|DROP|ALTER)\b", re.IGNORECASE)
+# Ο κατάλογος σχήματος έρχεται από τον δίσκο (η μνήμη δεν κρατά triggers)
+_SCHEMA_READ = re.compile(r"\bsqlite_(master|schema)\b", re.IGNORECASE)
+_PRAGMA = re.compile(r"^\s*PRAGMA\b", re.IGNORECASE)
+# COMMIT/END σε SQL - οι εικόνες των γραμμών διαβάζονται πριν από αυτό
+_COMMIT = re.compile(r"^\s*(COMMIT|END)\b", re.IGNORECASE)
+
+# Κλειδιά των γραμμών που άλλαξε μια σύνδεση. Temp: ακολουθεί το commit /
+# rollback (και ROLLBACK TO) του transaction της. Χωρίς UNIQUE - το ON CONFLICT
+# της εξωτερικής εντολής (upsert) θα υπερίσχυε του OR IGNORE του trigger.
+_TOUCHED_TABLE = """
+    CREATE TEMP TABLE IF NOT EXISTS replica_touched (
+        tbl TEXT NOT NULL,
+        key TEXT NOT NULL
+    );
+"""
+
+# Κλειδιά ανά εντολή (όριο παραμέτρων του SQLite)
+_KEY_CHUNK = 500
+
+
+def _classify(sql):
+    """'read' (μνήμη), 'write' (δίσκος + αντιγραφή) ή 'other' (μόνο δίσκος)"""
+    if _READ.match(sql) or _READ_PRAGMA.match(sql):
+        return 'read'
+    if _WITH.match(sql):
+        return 'write' if _DML.search(sql) else 'read'
+    if _WRITE.match(sql):
+        return 'write'
+    return 'other'
+
+
+def _ident(column):
+    # rowid χωρίς εισαγωγικά: το "rowid" χωρίς τέτοια στήλη γίνεται string
+    return column if column == 'rowid' else f'"{column}"'
+
+
+def _key_filter(key_columns, keys):
+    """WHERE για ένα κομμάτι κλειδιών (μία στήλη: IN, πολλές: row values)"""
+    if len(key_columns) == 1:
+        return f"{_ident(key_columns[0])} IN ({', '.join('?' * len(keys))})", [key[0] for key in keys]
+    row = "(" + ", ".join("?" * len(key_columns)) + ")"
+    columns = ", ".join(_ident(column) for column in key_columns)
+    return (f"({columns}) IN (VALUES {', '.join([row] * len(keys))})",
+            [value for key in keys for value in key])
+
+
+def _load_schema(memory):
+    """
+    Πίνακες του main: {όνομα: (στήλες κλειδιού, στήλες αντιγραφής)} - rowid
+    για τους κανονικούς πίνακες, το PRIMARY KEY για τους WITHOUT ROWID
+    """
+    tables = {}
+    for name, sql in memory.execute("""
+        SELECT name, sql FROM sqlite_master
+        WHERE type = 'table' AND name NOT LIKE 'sqlite_%' AND sql NOT LIKE 'CREATE VIRTUAL%'
+    """).fetchall():
+        info = memory.execute(f'PRAGMA table_info("{name}")').fetchall()
+        columns = [row[1] for row in info]
+        if sql.upper().rstrip().endswith("WITHOUT ROWID"):
+            key = [row[1] for row in sorted(info, key=lambda row: row[5]) if row[5]]
+        else:
+            key = ['rowid']
+            columns = ['rowid'] + columns
+        tables[name] = (key, columns)
+    return tables
+
+
+def _tracking_script(tables):
+    """Temp triggers που γράφουν στο replica_touched κάθε γραμμή που αλλάζει"""
+    script = [_TOUCHED_TABLE]
+    for index, (name, (key, _)) in enumerate(sorted(tables.items())):
+        def touched(row):
+            values = ", ".join(f"{row}.{_ident(column)}" for column in key)
+            return f"INSERT INTO replica_touched VALUES ('{name}', json_array({values}));"
+        for event, rows in (('INSERT', ('NEW',)), ('UPDATE', ('OLD', 'NEW')), ('DELETE', ('OLD',))):
+            script.append(f"""
+                CREATE TEMP TRIGGER IF NOT EXISTS replica_track_{index}_{event.lower()}
+                AFTER {event} ON main."{name}"
+                BEGIN
+                    {' '.join(touched(row) for row in rows)}
+                END;""")
+    return "\n".join(script)
+
+
+class _MemoryResult:
+    """Αποτέλεσμα ανάγνωσης από τη μνήμη - διαβασμένο ολόκληρο υπό το lock"""
+
+    rowcount = -1
+    lastrowid = None
+    arraysize = 1
+
+    def __init__(self, rows, description):
+        self._rows = rows
+        self._position = 0
+        self.description = description
+
+    def fetchone(self):
+        if self._position >= len(self._rows):
+            return None
+        self._position += 1
+        return self._rows[self._position - 1]
+
+    def fetchmany(self, size=None):
+        size = self.arraysize if size is None else size
+        rows = self._rows[self._position:self._position + size]
+        self._position += len(rows)
+        return rows
+
+    def fetchall(self):
+        rows = self._rows[self._position:]
+        self._position = len(self._rows)
+        return rows
+
+    def __iter__(self):
+        return iter(self.fetchall())
+
+    def close(self):
+        self._rows = []
+        self._position = 0
+
+
+class _ReplicaCursor:
+    """Cursor που εκτελεί κάθε εντολή στη μνήμη ή στον δίσκο"""
+
+    def __init__(self, connection):
+        self._connection = connection
+        self._disk_cursor = connection._disk.cursor()
+        self._cursor = self._disk_cursor
+
+    def execute(self, sql, parameters=()):
+        connection = self._connection
+        kind = _classify(sql)
+        missing = None
+        if kind == 'read' and not connection._pinned and not _SCHEMA_READ.search(sql):
+            try:
+                result = connection._replica.read(sql, parameters, connection._row_factory)
+            except sqlite3.OperationalError as e:
+                # Πίνακας/στήλη που δεν έχει (ακόμα) η μνήμη - ο δίσκος αποφασίζει
+                result, missing = None, e
+            if result is not None:
+                self._cursor = result
+                return self
+        if kind == 'read':
+            connection._replica.stats.disk_reads += 1
+        else:
+            connection._pin(sql)
+
+        changes = connection._capture() if _COMMIT.match(sql) and connection.in_transaction else None
+        self._cursor = self._disk_cursor
+        self._disk_cursor.row_factory = connection._row_factory
+        self._disk_cursor.execute(sql, parameters)
+        if missing is not None:
+            # Ο δίσκος έχει σχήμα που λείπει από τη μνήμη (π.χ. πίνακας μετά το enable)
+            connection._replica.mark_stale(f"schema change ({missing})")
+        if kind != 'read':
+            connection._after_statement(changes)
+        return self
+
+    def executemany(self, sql, seq_of_parameters):
+        connection = self._connection
+        connection._pin(sql)
+        self._cursor = self._disk_cursor
+        self._disk_cursor.executemany(sql, seq_of_parameters)
+        connection._after_statement()
+        return self
+
+    def executescript(self, script):
+        self._connection.executescript(script)
+        return self
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __getattr__(self, name):
+        # fetchone/fetchall/fetchmany, rowcount, lastrowid, description, close, ...
+        return getattr(self._cursor, name)
+
+
+class _ReplicaConnection:
+    """
+    Σύνδεση-router: αναγνώσεις από τη μνήμη ως την πρώτη εντολή που
+    αλλάζει κάτι, εγγραφές στον δίσκο και, μετά το commit, αντιγραφή των
+    γραμμών που άλλαξαν (όπως είναι στον δίσκο) στη μνήμη.
+    Ό,τι δεν ορίζεται εδώ (backup, interrupt, create_function, ...)
+    πηγαίνει στη σύνδεση του δίσκου.
+    """
+
+    def __init__(self, replica, disk):
+        self._replica = replica
+        self._disk = disk
+        self._row_factory = disk.row_factory
+        self._pinned = False
+        self._writing = False
+        self._tracked_version = None
+
+    @property
+    def row_factory(self):
+        return self._row_factory
+
+    @row_factory.setter
+    def row_factory(self, factory):
+        self._row_factory = factory
+        self._disk.row_factory = factory
+
+    @property
+    def isolation_level(self):
+        return self._disk.isolation_level
+
+    @isolation_level.setter
+    def isolation_level(self, level):
+        self._disk.isolation_level = level
+
+    @property
+    def in_transaction(self):
+        return self._disk.in_transaction
+
+    def cursor(self):
+        return _ReplicaCursor(self)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, script):
+        # Το executescript κάνει πρώτα commit ό,τι εκκρεμεί
+        self._pin(script)
+        self._disk.executescript(script)
+        self._after_statement()
+
+    def commit(self):
+        changes = self._capture() if self._disk.in_transaction else None
+        self._disk.commit()
+        self._after_statement(changes)
+
+    def rollback(self):
+        # Οι γραμμές του replica_touched ακυρώνονται μαζί με το transaction
+        self._disk.rollback()
+
+    def close(self):
+        self._disk.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.rollback()
+        return False
+
+    def __getattr__(self, name):
+        return getattr(self._disk, name)
+
+    # ── αντιγραφή στη μνήμη ─────────────────────────────────────────────────
+
+    def _pin(self, sql):
+        """Από εδώ και πέρα όλα στον δίσκο - και καταγραφή αλλαγών από την πρώτη μη-PRAGMA"""
+        self._pinned = True
+        if _PRAGMA.match(sql):
+            return
+        if self._writing and (self._disk.in_transaction
+                              or self._tracked_version == self._replica._schema_version):
+            return
+        # Πρώτη εγγραφή, ή νέο transaction μακρόβιας σύνδεσης (π.χ. write_service)
+        # μετά από reload με άλλο σχήμα → triggers για τους τρέχοντες πίνακες.
+        # Στήνονται εκτός transaction (αλλιώς ένα rollback τα σβήνει).
+        self._writing = True
+        if not self._disk.in_transaction:
+            self._tracked_version = self._replica.install_tracking(self._disk)
+
+    def _capture(self):
+        """Οι γραμμές που άλλαξαν, ή None αν οι αλλαγές δεν καταγράφονται"""
+        if self._tracked_version is None:
+            return None
+        return self._replica.capture(self._disk, self._tracked_version)
+
+    def _after_statement(self, changes=None):
+        # Autocommit, COMMIT ή ROLLBACK - ό,τι άλλαξε είναι πλέον στον δίσκο
+        if not self._writing or self._disk.in_transaction:
+            return
+        if changes is None:
+            changes = self._capture()
+        # Χωρίς γραμμές σε γνωστούς πίνακες, αλλά ίσως με νέο σχήμα (CREATE TABLE
+        # και γραμμές σε αυτόν) - το apply το ελέγχει και κάνει reload
+        if changes is not None and not changes['tables'] and \
+                changes['schema_version'] == changes['tracked_version']:
+            return
+        if changes is not None:
+            self._disk.execute("DELETE FROM temp.replica_touched")
+            if self._disk.in_transaction:
+                self._disk.commit()
+        self._replica.apply(changes)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# REPLICA
+# ═══════════════════════════════════════════════════════════════════════════
+
+@dataclass
+class ReplicaStats:
+    """Μετρητές του replica (από την εκκίνηση)"""
+    memory_reads: int = 0
+    disk_reads: int = 0
+    copied_commits: int = 0
+    copied_rows: int = 0
+    divergences: int = 0
+    reconciliations: int = 0
+    reloads: int = 0
+    last_load_ms: float = 0.0
+    size_kb: float = 0.0
+
+    def format(self) -> str:
+        return (f"Replica μνήμης ({self.size_kb:,.0f} KB, φόρτωση {self.last_load_ms:.0f} ms): "
+                f"αναγνώσεις μνήμη {self.memory_reads} / δίσκος {self.disk_reads}, "
+                f"αντιγραφή {self.copied_commits} commits ({self.copied_rows} γραμμές), "
+                f"αποκλίσεις {self.divergences}, reconciliations {self.reconciliations}, "
+                f"reloads {self.reloads}")
+
+
+class MemoryReplica:
+    """Η μνήμη, η αντιγραφή των εγγραφών και το reconciliation thread"""
+
+    def __init__(self, db_path: Optional[str] = None, reconcile_interval: float = 30.0):
+        self.db_path = db_path or database.DB_NAME
+        self.reconcile_interval = reconcile_interval
+        self.stats = ReplicaStats()
+        self._memory = None
+        self._stale = True
+        self._lock = threading.RLock()
+        self._wake = threading.Event()
+        self._stopping = False
+        self._thread = None
+        self._watch = None
+        self._data_version = None
+        self._tables = {}
+        self._tracking = None
+        self._schema_version = None
+
+    def start(self) -> "MemoryReplica":
+        self._watch = sqlite3.connect(self.db_path, timeout=database.BUSY_TIMEOUT_MS / 1000,
+                                      check_same_thread=False)
+        self.reload()
+        if self.reconcile_interval:
+            self._thread = threading.Thread(target=self._run, name="memory-replica", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stopping = True
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+        with self._lock:
+            self._memory = None
+            self._stale = True
+        if self._watch:
+            self._watch.close()
+            self._watch = None
+
+    def wrap(self, disk_conn):
+        """Η σύνδεση του δίσκου τυλιγμένη σε router"""
+        return _ReplicaConnection(self, disk_conn)
+
+    def read(self, sql, parameters, row_factory):
+        """
+        Ανάγνωση από τη μνήμη υπό το lock (ποτέ ανάμεσα σε μισή αντιγραφή),
+        ή None όσο είναι stale (ανάγνωση από τον δίσκο)
+        """
+        with self._lock:
+            memory = self._memory
+            if memory is None or self._stale:
+                return None
+            cursor = memory.cursor()
+            cursor.row_factory = row_factory
+            cursor.execute(sql, parameters)
+            result = _MemoryResult(cursor.fetchall(), cursor.description)
+            cursor.close()
+            self.stats.memory_reads += 1
+            return result
+
+    # ── αντιγραφή εγγραφών ──────────────────────────────────────────────────
+
+    def install_tracking(self, disk):
+        """
+        Temp triggers καταγραφής στη σύνδεση του δίσκου
+
+        Returns:
+            Το schema_version για το οποίο στήθηκαν, ή None (χωρίς μνήμη)
+        """
+        with self._lock:
+            script, version = self._tracking, self._schema_version
+        if script is None:
+            return None
+        stale = disk.execute("SELECT name FROM sqlite_temp_master "
+                             "WHERE type = 'trigger' AND name LIKE 'replica_track_%'").fetchall()
+        disk.executescript("".join(f'DROP TRIGGER temp."{name}";' for (name,) in stale) + script)
+        return version
+
+    def capture(self, disk, tracked_version):
+        """
+        Οι τρέχουσες εικόνες (στον δίσκο) των γραμμών του replica_touched -
+        με τις τιμές που έβαλαν defaults και triggers (CURRENT_TIMESTAMP,
+        randomblob, HLC), όχι ξανά εκτέλεση της SQL
+
+        Returns:
+            dict: tables [(πίνακας, κλειδιά, γραμμές)], sequence, schema_version,
+                  tracked_version
+        """
+        cursor = disk.cursor()
+        cursor.row_factory = None
+        touched = {}
+        for table, key in cursor.execute("SELECT DISTINCT tbl, key FROM temp.replica_touched").fetchall():
+            touched.setdefault(table, []).append(json.loads(key))
+
+        schema_version = cursor.execute("PRAGMA main.schema_version").fetchone()[0]
+        tables = self._tables
+        images = []
+        for table, keys in touched.items():
+            if table not in tables:
+                continue  # πίνακας μετά το reload - το schema_version οδηγεί σε νέο reload
+            key_columns, columns = tables[table]
+            select = ", ".join(_ident(column) for column in columns)
+            rows = []
+            for start in range(0, len(keys), _KEY_CHUNK):
+                condition, params = _key_filter(key_columns, keys[start:start + _KEY_CHUNK])
+                rows.extend(cursor.execute(f'SELECT {select} FROM main."{table}" WHERE {condition}',
+                                           params).fetchall())
+            images.append((table, keys, rows))
+
+        sequence = None
+        if images and cursor.execute(
+                "SELECT 1 FROM main.sqlite_master WHERE name = 'sqlite_sequence'").fetchone():
+            sequence = cursor.execute("SELECT name, seq FROM main.sqlite_sequence").fetchall()
+        return {'tables': images, 'sequence': sequence, 'schema_version': schema_version,
+                'tracked_version': tracked_version}
+
+    def apply(self, changes) -> None:
+        """Οι γραμμές ενός transaction που έγινε commit στον δίσκο → μνήμη"""
+        with self._lock:
+            if self._memory is None or self._stale:
+                return
+            if changes is None:
+                self.mark_stale("writes without tracking")
+                return
+            if self._schema_version != changes['schema_version'] or \
+                    self._schema_version != changes['tracked_version']:
+                self.mark_stale("schema change")
+                return
+            memory = self._memory
+            copied = 0
+            try:
+                for table, keys, rows in changes['tables']:
+                    key_columns, columns = self._tables[table]
+                    for start in range(0, len(keys), _KEY_CHUNK):
+                        condition, params = _key_filter(key_columns, keys[start:start + _KEY_CHUNK])
+                        memory.execute(f'DELETE FROM main."{table}" WHERE {condition}', params)
+                    if rows:
+                        memory.executemany(
+                            f'INSERT INTO main."{table}" ({", ".join(_ident(c) for c in columns)}) '
+                            f'VALUES ({", ".join("?" * len(columns))})', rows)
+                    copied += len(rows)
+                if changes['sequence'] is not None:
+                    memory.execute("DELETE FROM sqlite_sequence")
+                    memory.executemany("INSERT INTO sqlite_sequence (name, seq) VALUES (?, ?)",
+                                       changes['sequence'])
+                memory.commit()
+                database.note_local_write()
+                self.stats.copied_commits += 1
+                self.stats.copied_rows += copied
+            except sqlite3.Error as e:
+                memory.rollback()
+                self.stats.divergences += 1
+                self.mark_stale(f"copy: {e}")
+
+    # ── load / reconcile ────────────────────────────────────────────────────
+
+    def reload(self) -> None:
+        """Πλήρης φόρτωση με το backup API (οι εγγραφές περιμένουν στο lock)"""
+        started = time.perf_counter()
+        memory = sqlite3.connect(":memory:", check_same_thread=False)
+        with self._lock:
+            source = sqlite3.connect(self.db_path, timeout=database.BUSY_TIMEOUT_MS / 1000)
+            try:
+                source.backup(memory)
+                # Της πηγής: το backup αλλάζει το schema_version του αντιγράφου
+                self._schema_version = source.execute("PRAGMA schema_version").fetchone()[0]
+            finally:
+                source.close()
+            # Η μνήμη παίρνει έτοιμες γραμμές - τα triggers της έχουν ήδη τρέξει στον δίσκο
+            for (name,) in memory.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'").fetchall():
+                memory.execute(f'DROP TRIGGER "{name}"')
+            memory.commit()
+            self._tables = _load_schema(memory)
+            self._tracking = _tracking_script(self._tables)
+            memory.row_factory = sqlite3.Row
+            self._memory = memory
+            self._stale = False
+            self._data_version = self._watch.execute("PRAGMA data_version").fetchone()[0]
+            database.note_local_write()
+
+        page_size, page_count = memory.execute(
+            "SELECT * FROM pragma_page_size, pragma_page_count").fetchone()
+        self.stats.size_kb = page_size * page_count / 1024
+        self.stats.reloads += 1
+        self.stats.last_load_ms = (time.perf_counter() - started) * 1000
+        logger.info(f"Memory replica loaded: {self.stats.size_kb:,.0f} KB in {self.stats.last_load_ms:.0f} ms")
+
+    def mark_stale(self, reason: str) -> None:
+        """Αναγνώσεις στον δίσκο ως το επόμενο reload (από το thread)"""
+        if not self._stale:
+            logger.warning(f"Memory replica stale ({reason}) - reloading")
+        self._stale = True
+        database.note_local_write()
+        self._wake.set()
+
+    def reconcile(self, force: bool = False) -> bool:
+        """
+        Σύγκριση δίσκου/μνήμης και reload αν διαφέρουν.
+
+        Returns:
+            bool: True αν έγινε reload
+        """
+        self.stats.reconciliations += 1
+        if force or self._stale or self._memory is None:
+            self.reload()
+            return True
+
+        version = self._watch.execute("PRAGMA data_version").fetchone()[0]
+        if version == self._data_version:
+            return False
+        self._data_version = version
+
+        with self._lock:
+            same = _fingerprint(self._watch) == _fingerprint(self._memory)
+        if same:
+            return False
+        logger.info("Memory replica differs from disk (external writes) - reloading")
+        self.reload()
+        return True
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.reconcile_interval)
+            self._wake.clear()
+            if self._stopping:
+                return
+            try:
+                self.reconcile()
+            except sqlite3.Error as e:
+                logger.warning(f"Memory replica reconciliation failed: {e}")
+
+
+def _fingerprint(conn):
+    """
+    Αποτύπωμα ανά πίνακα: πλήθος, MAX(rowid) και άθροισμα των στηλών που
+    αλλάζουν στις συνήθεις ενημερώσεις (row_version, is_deleted, is_active)
+    """
+    tables = conn.execute("""
+        SELECT name FROM sqlite_master
+        WHERE type = 'table' AND name NOT LIKE 'sqlite_%' AND sql NOT LIKE 'CREATE VIRTUAL%'
+        ORDER BY name
+    """).fetchall()
+    result = {'sqlite_sequence': conn.execute("SELECT TOTAL(seq) FROM sqlite_sequence").fetchone()[0]
+              if conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_sequence'").fetchone()
+              else None}
+    for (table,) in tables:
+        columns = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+        sums = [f"TOTAL({c})" for c in ('row_version', 'is_deleted', 'is_active') if c in columns]
+        without_rowid = conn.execute("SELECT sql FROM sqlite_master WHERE name = ?",
+                                     (table,)).fetchone()[0].upper().rstrip().endswith("WITHOUT ROWID")
+        parts = ["COUNT(*)"] + ([] if without_rowid else ["MAX(rowid)"]) + sums
+        result[table] = tuple(conn.execute(f"SELECT {', '.join(parts)} FROM {table}").fetchone())
+    return result
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# ENABLE / DISABLE
+# ═══════════════════════════════════════════════════════════════════════════
+
+_replica: Optional[MemoryReplica] = None
+
+
+def enable(db_path: Optional[str] = None, reconcile_interval: Optional[float] = None,
+           max_mb: Optional[float] = None) -> Optional[MemoryReplica]:
+    """
+    Φόρτωση της database στη μνήμη και δρομολόγηση των αναγνώσεων εκεί.
+
+    Args:
+        reconcile_interval: Δευτερόλεπτα ανάμεσα στα reconciliations (0 = ποτέ)
+        max_mb: Όριο μεγέθους αρχείου - μεγαλύτερη database μένει στον δίσκο
+
+    Returns:
+        MemoryReplica, ή None αν η database είναι μεγαλύτερη από το όριο
+    """
+    global _replica
+    path = db_path or database.DB_NAME
+    max_mb = DatabaseConfig.READ_REPLICA_MAX_MB if max_mb is None else max_mb
+    size_mb = os.path.getsize(path) / (1024 * 1024) if os.path.exists(path) else 0
+    if max_mb and size_mb > max_mb:
+        logger.info(f"Memory replica skipped: database is {size_mb:.0f} MB (limit {max_mb:.0f} MB)")
+        return None
+
+    disable()
+    interval = DatabaseConfig.READ_REPLICA_RECONCILE_S if reconcile_interval is None else reconcile_interval
+    _replica = MemoryReplica(path, interval).start()
+    database._read_replica = _replica
+    return _replica
+
+
+def disable() -> None:
+    """Επιστροφή όλων των αναγνώσεων στον δίσκο"""
+    global _replica
+    database._read_replica = None
+    if _replica is not None:
+        _replica.stop()
+        _replica = None
+
+
+def get_replica() -> Optional[MemoryReplica]:
+    return _replica
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# BENCHMARK
+# ═══════════════════════════════════════════════════════════════════════════
+
+def _chain_start(conn):
+    """Η πρώτη εργασία της μεγαλύτερης ενεργής αλυσίδας"""
+    row = conn.execute("""
+        SELECT t.unit_id FROM task_relationships tr JOIN tasks t ON t.id = tr.parent_task_id
+        WHERE tr.is_deleted = 0 GROUP BY t.unit_id ORDER BY COUNT(*) DESC LIMIT 1
+    """).fetchone()
+    if row is None:
+        return None
+    return conn.execute("""
+        SELECT t.id FROM tasks t
+        WHERE t.unit_id = ? AND t.is_deleted = 0
+          AND EXISTS (SELECT 1 FROM task_relationships WHERE parent_task_id = t.id AND is_deleted = 0)
+          AND NOT EXISTS (SELECT 1 FROM task_relationships WHERE child_task_id = t.id AND is_deleted = 0)
+        LIMIT 1
+    """, (row[0],)).fetchone()[0]
+
+
+def _walk_chain(task_id):
+    """Όπως η προεπισκόπηση αλυσίδας: get_related_tasks ανά κρίκο"""
+    visited = 0
+    while task_id is not None and visited < 500:
+        children = database.get_related_tasks(task_id)['children']
+        visited += 1
+        task_id = children[0]['id'] if children else None
+    return visited
+
+
+def _add_task(ctx):
+    return database.add_task(ctx['unit_id'], ctx['task_type_id'], "replica benchmark", "pending", "low",
+                             ctx['date'], None, None, None)
+
+
+_BENCH_CALLS = [
+    ("filter_tasks()", lambda ctx: database.filter_tasks()),
+    ("filter_tasks(pending)", lambda ctx: database.filter_tasks(status="pending")),
+    ("filter_tasks(unit)", lambda ctx: database.filter_tasks(unit_id=ctx['unit_id'])),
+    ("filter_tasks(search)", lambda ctx: database.filter_tasks(search_text="task 1")),
+    ("get_dashboard_stats", lambda ctx: database.get_dashboard_stats()),
+    ("get_task_by_id", lambda ctx: database.get_task_by_id(ctx['task_id'])),
+    ("chain walk (related)", lambda ctx: _walk_chain(ctx['chain_start'])),
+    ("add_task (dual write)", _add_task),
+]
+
+
+def _time_calls(ctx, repeat):
+    results = {}
+    for name, call in _BENCH_CALLS:
+        best = float('inf')
+        for _ in range(repeat):
+            started = time.perf_counter()
+            call(ctx)
+            best = min(best, time.perf_counter() - started)
+        results[name] = best * 1000
+    return results
+
+
+def benchmark(db_path: Optional[str] = None, repeat: int = 5) -> dict:
+    """
+    Καλύτερος χρόνος (ms) κάθε κλήσης με αναγνώσεις από δίσκο και από μνήμη,
+    σε ΑΝΤΙΓΡΑΦΟ της database (το add_task γράφει).
+
+    Returns:
+        dict: {'disk': {κλήση: ms}, 'memory': {...}, 'load_ms': ..., 'stats': ReplicaStats}
+    """
+    workdir = tempfile.mkdtemp(prefix="hvacr_replica_")
+    path = os.path.join(workdir, "bench.db")
+    original_db = database.DB_NAME
+    original_replica = database._read_replica
+    try:
+        source = sqlite3.connect(db_path or original_db)
+        target = sqlite3.connect(path)
+        source.backup(target)
+        source.close()
+        ctx = {'chain_start': _chain_start(target)}
+        ctx['unit_id'], ctx['task_type_id'], ctx['task_id'], ctx['date'] = target.execute("""
+            SELECT unit_id, task_type_id, id, created_date FROM tasks
+            WHERE is_deleted = 0 ORDER BY id DESC LIMIT 1
+        """).fetchone()
+        target.close()
+
+        database.DB_NAME = path
+        database._read_replica = None
+        disk = _time_calls(ctx, repeat)
+
+        replica = MemoryReplica(path, reconcile_interval=0).start()
+        database._read_replica = replica
+        try:
+            memory = _time_calls(ctx, repeat)
+        finally:
+            database._read_replica = None
+            replica.stop()
+
+        logger.info(f"Replica benchmark: {len(_BENCH_CALLS)} calls measured")
+        return {'disk': disk, 'memory': memory, 'load_ms': replica.stats.last_load_ms, 'stats': replica.stats}
+    finally:
+        database.DB_NAME = original_db
+        database._read_replica = original_replica
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def format_benchmark(results) -> str:
+    """Πίνακας κειμένου: δίσκος → μνήμη ανά κλήση"""
+    lines = [f"{'κλήση':<26}{'δίσκος ms':>12}{'μνήμη ms':>12}{'x':>8}"]
+    for name, disk_ms in results['disk'].items():
+        memory_ms = results['memory'][name]
+        lines.append(f"{name:<26}{disk_ms:>12.2f}{memory_ms:>12.2f}{disk_ms / max(memory_ms, 1e-6):>8.1f}")
+    lines.append(f"Φόρτωση στη μνήμη: {results['load_ms']:.0f} ms")
+    lines.append(results['stats'].format())
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Αναγνώσεις από δίσκο vs replica μνήμης")
+    parser.add_argument("--db", help="Αρχείο database (προεπιλογή: η database της εφαρμογής)")
+    parser.add_argument("--repeat", type=int, default=5, help="Εκτελέσεις ανά κλήση")
+    args = parser.parse_args()
+    print(format_benchmark(benchmark(args.db, args.repeat)))
+
+
+if __name__ == "__main__":
+    main()
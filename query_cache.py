@@ -0,0 +1,263 @@
+"""
+Query Result Cache
+==================
+
+LRU cache αποτελεσμάτων για τα queries που ξανατρέχουν οι οθόνες με τα ίδια
+ορίσματα: filter_tasks (φίλτρα ιστορικού) και lookups εργασιών (λεπτομέρειες,
+προεπισκόπηση αλυσίδας).
+
+Features:
+---------
+- Κλειδί: (συνάρτηση, κανονικοποιημένα ορίσματα) - None/""/0 είναι το ίδιο
+  "χωρίς φίλτρο" (όπως στο _task_filter_sql), τα location_ids ως ταξινομημένο
+  tuple
+- Έκδοση δεδομένων: (DB_NAME, PRAGMA data_version σε μόνιμη σύνδεση,
+  database._local_writes)
+    * data_version - commits από ΟΠΟΙΑΔΗΠΟΤΕ άλλη σύνδεση (κάθε εγγραφή της
+      εφαρμογής ανοίγει δική της σύνδεση, άρα και οι δικές μας)
+    * _local_writes - αλλαγές που δεν είναι commit στο αρχείο: αντιγραφή/reload
+      του replica μνήμης, restore backup (database.note_local_write)
+  Διαφορετική έκδοση → άδειασμα ολόκληρου του cache
+- Με API server (api_client.init_transport) τα queries πάνε στον server και
+  η έκδοση είναι το /api/version του
+- Όριο μεγέθους (εκτίμηση bytes των αποτελεσμάτων) και πλήθους, με LRU
+  eviction (OrderedDict)
+- Μετρικές: hits, misses, evictions, invalidations (get_stats)
+- Επιστρέφει αντίγραφα (νέα λίστα / dicts) - οι callers μπορούν να τα αλλάξουν
+
+Usage:
+------
+    import query_cache
+
+    tasks = query_cache.filter_tasks(status="pending")
+    task = query_cache.get_task_by_id(12)
+    print(query_cache.get_stats().format())
+"""
+
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import api_client
+import database_refactored as database
+import logger_config
+from config import DatabaseConfig
+
+logger = logger_config.get_logger(__name__)
+
+# Γραμμές από τις οποίες εκτιμάται το μέγεθος ενός αποτελέσματος
+_SIZE_SAMPLE = 16
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# STATS
+# ═══════════════════════════════════════════════════════════════════════════
+
+@dataclass
+class CacheStats:
+    """Μετρητές του cache (από την εκκίνηση ή το reset_stats)"""
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    invalidations: int = 0
+    entries: int = 0
+    size_bytes: int = 0
+    max_bytes: int = 0
+    miss_ms: float = 0.0
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def format(self) -> str:
+        return (f"Query cache: {self.entries} entries, {self.size_bytes / 1024 / 1024:.1f}/"
+                f"{self.max_bytes / 1024 / 1024:.0f} MB, hits {self.hits} / misses {self.misses} "
+                f"({self.hit_ratio:.0%}), χρόνος misses {self.miss_ms:.0f} ms, "
+                f"evictions {self.evictions}, invalidations {self.invalidations}")
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# CACHE
+# ═══════════════════════════════════════════════════════════════════════════
+
+def _estimate_size(value) -> int:
+    """Εκτίμηση bytes: δείγμα γραμμών (dict + τιμές) × πλήθος"""
+    if isinstance(value, list):
+        if not value:
+            return sys.getsizeof(value)
+        sample = value[:_SIZE_SAMPLE]
+        per_row = sum(_estimate_size(row) for row in sample) / len(sample)
+        return sys.getsizeof(value) + int(per_row * len(value))
+    if isinstance(value, dict):
+        # Γραμμή, ή {'parents': [...], 'children': [...]} του get_related_tasks
+        return sys.getsizeof(value) + sum(_estimate_size(v) if isinstance(v, list) else sys.getsizeof(v)
+                                          for v in value.values())
+    return sys.getsizeof(value)
+
+
+def _copy(value):
+    if isinstance(value, list):
+        return [dict(row) for row in value]
+    if isinstance(value, dict):
+        return {key: _copy(v) if isinstance(v, list) else v for key, v in value.items()}
+    return value
+
+
+class QueryCache:
+    """LRU αποτελεσμάτων με κλειδί (συνάρτηση, ορίσματα) και έκδοση δεδομένων"""
+
+    def __init__(self, max_bytes: int, max_entries: int):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.stats = CacheStats(max_bytes=max_bytes)
+        self._entries = OrderedDict()     # key → (value, size)
+        self._size = 0
+        self._stamp = None
+        self._lock = threading.RLock()
+        self._watch = None
+        self._watch_path = None
+
+    def _data_version(self):
+        """PRAGMA data_version σε μόνιμη σύνδεση (νέα αν άλλαξε το DB_NAME)"""
+        if self._watch_path != database.DB_NAME:
+            if self._watch is not None:
+                self._watch.close()
+            self._watch = sqlite3.connect(database.DB_NAME, timeout=database.BUSY_TIMEOUT_MS / 1000,
+                                          check_same_thread=False)
+            self._watch_path = database.DB_NAME
+        return self._watch.execute("PRAGMA data_version").fetchone()[0]
+
+    def _check_version(self) -> None:
+        transport = api_client.current_transport()
+        if api_client.is_remote():
+            stamp = (transport.base_url, transport.data_version(), None)
+        else:
+            stamp = (database.DB_NAME, self._data_version(), database._local_writes)
+        if stamp != self._stamp:
+            if self._entries:
+                self.stats.invalidations += 1
+            self._clear()
+            self._stamp = stamp
+
+    def _clear(self) -> None:
+        self._entries.clear()
+        self._size = 0
+        self.stats.entries = 0
+        self.stats.size_bytes = 0
+
+    def get(self, key, compute):
+        """
+        Το αποτέλεσμα του `compute()` για το `key` (από το cache αν ισχύει)
+
+        Returns:
+            Αντίγραφο του αποτελέσματος
+        """
+        with self._lock:
+            self._check_version()
+            stamp = self._stamp
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.stats.hits += 1
+                return _copy(entry[0])
+            self.stats.misses += 1
+
+        started = time.perf_counter()
+        value = compute()
+        elapsed = (time.perf_counter() - started) * 1000
+
+        with self._lock:
+            self.stats.miss_ms += elapsed
+            # Εγγραφή όσο τρέχαμε το query: το αποτέλεσμα μπορεί να είναι παλιό
+            if stamp == self._stamp:
+                self._check_version()
+            if stamp == self._stamp:
+                self._store(key, value)
+        return _copy(value)
+
+    def _store(self, key, value) -> None:
+        size = _estimate_size(value)
+        if size > self.max_bytes:
+            return
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._size -= old[1]
+        self._entries[key] = (value, size)
+        self._size += size
+        while self._size > self.max_bytes or len(self._entries) > self.max_entries:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self._size -= evicted
+            self.stats.evictions += 1
+        self.stats.entries = len(self._entries)
+        self.stats.size_bytes = self._size
+
+    def invalidate(self) -> None:
+        """Άδειασμα (το επόμενο get ξανατρέχει τα queries)"""
+        with self._lock:
+            self.stats.invalidations += 1
+            self._clear()
+            self._stamp = None
+
+    def close(self) -> None:
+        with self._lock:
+            self._clear()
+            self._stamp = None
+            if self._watch is not None:
+                self._watch.close()
+                self._watch = None
+                self._watch_path = None
+
+
+_cache = QueryCache(int(DatabaseConfig.QUERY_CACHE_MAX_MB * 1024 * 1024),
+                    DatabaseConfig.QUERY_CACHE_MAX_ENTRIES)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# CACHED QUERIES
+# ═══════════════════════════════════════════════════════════════════════════
+
+def filter_tasks(status=None, unit_id=None, task_type_id=None, date_from=None, date_to=None,
+                 search_text=None, location_ids=None):
+    """database.filter_tasks με cache (ίδια ορίσματα και αποτέλεσμα)"""
+    location_ids = tuple(sorted(set(location_ids))) if location_ids else None
+    filters = (status or None, unit_id or None, task_type_id or None, date_from or None,
+               date_to or None, search_text or None, location_ids)
+    return _cache.get(('filter_tasks', filters), lambda: api_client.db.filter_tasks(*filters))
+
+
+def get_task_by_id(task_id):
+    """database.get_task_by_id με cache"""
+    return _cache.get(('get_task_by_id', task_id), lambda: api_client.db.get_task_by_id(task_id))
+
+
+def get_related_tasks(task_id):
+    """database.get_related_tasks με cache"""
+    return _cache.get(('get_related_tasks', task_id), lambda: api_client.db.get_related_tasks(task_id))
+
+
+def data_version():
+    """Η τρέχουσα έκδοση δεδομένων (ίδια τιμή = ίδια αποτελέσματα)"""
+    with _cache._lock:
+        _cache._check_version()
+        return _cache._stamp
+
+
+def invalidate():
+    """Άδειασμα του cache (π.χ. μετά από αλλαγή εκτός της εφαρμογής)"""
+    _cache.invalidate()
+
+
+def get_stats() -> CacheStats:
+    """Αντίγραφο των μετρητών"""
+    with _cache._lock:
+        return CacheStats(**vars(_cache.stats))
+
+
+def reset_stats() -> None:
+    with _cache._lock:
+        _cache.stats = CacheStats(entries=len(_cache._entries), size_bytes=_cache._size,
+                                  max_bytes=_cache.max_bytes)
@@ -0,0 +1,220 @@
+"""
+Relationship Tombstone Compaction
+=================================
+
+Garbage collection των "νεκρών" γραμμών του task_relationships.
+
+Features:
+---------
+- Tombstones που ΧΡΕΙΑΖΟΝΤΑΙ: όσα αγγίζουν εργασία που βρίσκεται στον κάδο
+  (is_deleted = 1) - κρατούν τη θέση της στην αλυσίδα μέχρι την επαναφορά
+  ή την οριστική διαγραφή της
+- Διαγράφονται:
+    * backups (is_deleted = 1) και markers (is_deleted = 2) ανάμεσα σε
+      εργασίες που δεν είναι στον κάδο (ενεργές ή ανύπαρκτες)
+    * κάθε σχέση προς εργασία που δεν υπάρχει πια
+- Μικρά batches κατά id (keyset), ΕΝΑ σύντομο transaction το καθένα -
+  η εφαρμογή δεν μπλοκάρει όσο τρέχει
+- Background thread με δική του σύνδεση (start_background_compaction)
+- Αναφορά μεγέθους πίνακα πριν/μετά (γραμμές και bytes από dbstat)
+
+Usage:
+------
+    import relationship_compaction
+
+    report = relationship_compaction.compact_relationships()
+    print(report.format())
+
+    relationship_compaction.start_background_compaction()
+"""
+
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+import database_refactored as database
+import logger_config
+
+logger = logger_config.get_logger(__name__)
+
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_PAUSE = 0.05          # δευτερόλεπτα ανάμεσα στα batches
+
+
+@dataclass
+class CompactionReport:
+    """Αποτέλεσμα compact_relationships"""
+    rows_before: int = 0
+    rows_after: int = 0
+    bytes_before: Optional[int] = None
+    bytes_after: Optional[int] = None
+    batches: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def removed(self) -> int:
+        return self.rows_before - self.rows_after
+
+    @property
+    def reduction_pct(self) -> float:
+        return 100.0 * self.removed / self.rows_before if self.rows_before else 0.0
+
+    def format(self) -> str:
+        lines = [
+            "Συμπίεση task_relationships",
+            f"  Γραμμές: {self.rows_before} → {self.rows_after} "
+            f"(-{self.removed}, -{self.reduction_pct:.1f}%)",
+        ]
+        if self.bytes_before is not None and self.bytes_after is not None:
+            lines.append(
+                f"  Μέγεθος (πίνακας + indexes): {self.bytes_before / 1024:.0f} KB → "
+                f"{self.bytes_after / 1024:.0f} KB"
+            )
+        lines.append(f"  Batches: {self.batches}, χρόνος: {self.elapsed:.2f}s")
+        return "\n".join(lines)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# SIZE
+# ═══════════════════════════════════════════════════════════════════════════
+
+def _table_size(cursor):
+    """(γραμμές, bytes πίνακα + indexes). bytes = None αν δεν υπάρχει dbstat."""
+    cursor.execute("SELECT COUNT(*) FROM task_relationships")
+    rows = cursor.fetchone()[0]
+    try:
+        cursor.execute("""
+            SELECT SUM(pgsize - unused)
+            FROM dbstat
+            WHERE name = 'task_relationships'
+               OR name IN (SELECT name FROM sqlite_master
+                           WHERE type = 'index' AND tbl_name = 'task_relationships')
+        """)
+        size = cursor.fetchone()[0]
+    except sqlite3.OperationalError:
+        size = None
+    return rows, size
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# COMPACTION
+# ═══════════════════════════════════════════════════════════════════════════
+
+# Γραμμές του παραθύρου (id > ? ... LIMIT ?) που δεν χρειάζονται πια.
+# Το παράθυρο ορίζεται πάνω σε ΟΛΕΣ τις γραμμές, ώστε κάθε batch να
+# προχωράει σταθερά - ανεξάρτητα από το πόσες κρατούνται.
+_GARBAGE_IN_WINDOW = """
+    SELECT tr.id
+    FROM (SELECT id, parent_task_id, child_task_id, is_deleted
+          FROM task_relationships
+          WHERE id > ?
+          ORDER BY id
+          LIMIT ?) AS tr
+             LEFT JOIN tasks p ON p.id = tr.parent_task_id
+             LEFT JOIN tasks c ON c.id = tr.child_task_id
+    WHERE p.id IS NULL
+       OR c.id IS NULL
+       OR (COALESCE(tr.is_deleted, 0) != 0 AND p.is_deleted != 1 AND c.is_deleted != 1)
+"""
+
+
+def compact_relationships(batch_size: int = DEFAULT_BATCH_SIZE, pause: float = 0.0,
+                          stop_event: Optional[threading.Event] = None) -> CompactionReport:
+    """
+    Διαγραφή των tombstones που δεν χρειάζονται για επαναφορά.
+
+    Args:
+        batch_size: Γραμμές που εξετάζονται ανά transaction
+        pause: Αναμονή ανάμεσα στα batches (για background εκτέλεση)
+        stop_event: Διακοπή μετά το τρέχον batch (π.χ. στο κλείσιμο της εφαρμογής)
+
+    Returns:
+        CompactionReport
+    """
+    started = time.perf_counter()
+    report = CompactionReport()
+
+    conn = database.get_connection()
+    cursor = conn.cursor()
+    try:
+        report.rows_before, report.bytes_before = _table_size(cursor)
+
+        last_id = 0
+        while not (stop_event and stop_event.is_set()):
+            cursor.execute("BEGIN IMMEDIATE")
+            try:
+                cursor.execute("""
+                    SELECT MAX(id) FROM (SELECT id FROM task_relationships
+                                         WHERE id > ? ORDER BY id LIMIT ?)
+                """, (last_id, batch_size))
+                window_end = cursor.fetchone()[0]
+                if window_end is None:
+                    conn.rollback()
+                    break
+
+                cursor.execute(_GARBAGE_IN_WINDOW, (last_id, batch_size))
+                garbage = [(row[0],) for row in cursor.fetchall()]
+                cursor.executemany("DELETE FROM task_relationships WHERE id = ?", garbage)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+
+            report.batches += 1
+            last_id = window_end
+            if pause:
+                time.sleep(pause)
+
+        report.rows_after, report.bytes_after = _table_size(cursor)
+
+    except sqlite3.Error as e:
+        logger.error(f"❌ Relationship compaction failed: {e}", exc_info=True)
+        raise RuntimeError(f"Σφάλμα συμπίεσης σχέσεων: {str(e)}")
+    finally:
+        conn.close()
+
+    report.elapsed = time.perf_counter() - started
+    logger.info(
+        f"Relationship compaction: {report.rows_before} → {report.rows_after} rows "
+        f"({report.reduction_pct:.1f}% smaller) in {report.elapsed:.2f}s"
+    )
+    return report
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# BACKGROUND
+# ═══════════════════════════════════════════════════════════════════════════
+
+_worker = None
+_stop_event = threading.Event()
+
+
+def start_background_compaction(batch_size: int = DEFAULT_BATCH_SIZE,
+                                pause: float = DEFAULT_PAUSE) -> threading.Thread:
+    """
+    Εκκίνηση της συμπίεσης σε daemon thread (μία φορά ανά εκτέλεση).
+    Σφάλματα καταγράφονται στο log - ποτέ δεν φτάνουν στο UI.
+    """
+    global _worker
+    if _worker is not None and _worker.is_alive():
+        return _worker
+
+    def run():
+        try:
+            compact_relationships(batch_size=batch_size, pause=pause, stop_event=_stop_event)
+        except Exception as e:
+            logger.warning(f"⚠️  Background relationship compaction stopped: {e}")
+
+    _stop_event.clear()
+    _worker = threading.Thread(target=run, name="relationship-compaction", daemon=True)
+    _worker.start()
+    return _worker
+
+
+def stop_background_compaction(timeout: float = 2.0) -> None:
+    """Διακοπή μετά το τρέχον batch"""
+    _stop_event.set()
+    if _worker is not None:
+        _worker.join(timeout)
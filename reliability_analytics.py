@@ -0,0 +1,380 @@
+"""
+Unit Reliability Analytics
+==========================
+
+MTBF / MTTR ανά μονάδα, από τις Βλάβες και τις συνδεδεμένες Επισκευές.
+
+Features:
+---------
+- ΔΥΟ bulk queries (εργασίες + σχέσεις) → columnar arrays
+- Υπολογισμός σε ένα vectorized pass (NumPy αν υπάρχει, αλλιώς
+  array module με ένα γραμμικό pass - ίδια αποτελέσματα)
+- Cache ανά data-version stamp: ένας μετρητής που αυξάνεται από
+  triggers σε κάθε σχετική αλλαγή, άρα ο έλεγχος "άλλαξε κάτι;"
+  είναι μία ανάγνωση primary key
+
+Ορισμοί:
+--------
+- MTBF: μέσο διάστημα (ημέρες) ανάμεσα σε διαδοχικές Βλάβες της μονάδας
+- MTTR: μέσος χρόνος (ημέρες) από τη Βλάβη έως την ολοκλήρωση της
+  τελευταίας συνδεδεμένης (child) Επισκευής της
+- Availability: MTBF / (MTBF + MTTR)
+
+Usage:
+------
+    import reliability_analytics
+
+    stats = reliability_analytics.get_unit_reliability()
+    print(stats[unit_id]['mtbf_days'], stats[unit_id]['mttr_days'])
+"""
+
+import math
+import time
+from array import array
+from typing import Optional, Dict, Any, Iterable
+
+import database_refactored as database
+import logger_config
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+logger = logger_config.get_logger(__name__)
+
+FAULT_TYPE_NAME = "Βλάβη"
+REPAIR_TYPE_NAME = "Επισκευή"
+
+KIND_OTHER = 0
+KIND_FAULT = 1
+KIND_REPAIR = 2
+
+# Cache: αποτελέσματα του τελευταίου υπολογισμού και το stamp τους
+_cache: Dict[str, Any] = {'version': None, 'units': None}
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# DATA VERSION
+# ═══════════════════════════════════════════════════════════════════════════
+
+def init_data_version(conn=None):
+    """
+    Πίνακας analytics_data_version (μία γραμμή) και triggers που αυξάνουν
+    τον μετρητή σε κάθε αλλαγή που επηρεάζει τα analytics.
+    """
+    own_conn = conn is None
+    if own_conn:
+        conn = database.get_connection()
+
+    cursor = conn.cursor()
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'analytics_data_version'")
+    if cursor.fetchone() is None:
+        cursor.executescript("""
+            CREATE TABLE IF NOT EXISTS analytics_data_version (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                version INTEGER NOT NULL
+            );
+            INSERT OR IGNORE INTO analytics_data_version (id, version) VALUES (1, 0);
+
+            CREATE TRIGGER IF NOT EXISTS trg_analytics_task_insert
+            AFTER INSERT ON tasks
+            BEGIN
+                UPDATE analytics_data_version SET version = version + 1 WHERE id = 1;
+            END;
+
+            CREATE TRIGGER IF NOT EXISTS trg_analytics_task_update
+            AFTER UPDATE OF unit_id, task_type_id, status, created_date, completed_date, is_deleted ON tasks
+            BEGIN
+                UPDATE analytics_data_version SET version = version + 1 WHERE id = 1;
+            END;
+
+            CREATE TRIGGER IF NOT EXISTS trg_analytics_task_delete
+            AFTER DELETE ON tasks
+            BEGIN
+                UPDATE analytics_data_version SET version = version + 1 WHERE id = 1;
+            END;
+
+            CREATE TRIGGER IF NOT EXISTS trg_analytics_rel_insert
+            AFTER INSERT ON task_relationships
+            BEGIN
+                UPDATE analytics_data_version SET version = version + 1 WHERE id = 1;
+            END;
+
+            CREATE TRIGGER IF NOT EXISTS trg_analytics_rel_update
+            AFTER UPDATE ON task_relationships
+            BEGIN
+                UPDATE analytics_data_version SET version = version + 1 WHERE id = 1;
+            END;
+
+            CREATE TRIGGER IF NOT EXISTS trg_analytics_rel_delete
+            AFTER DELETE ON task_relationships
+            BEGIN
+                UPDATE analytics_data_version SET version = version + 1 WHERE id = 1;
+            END;
+
+            CREATE TRIGGER IF NOT EXISTS trg_analytics_type_update
+            AFTER UPDATE OF name ON task_types
+            BEGIN
+                UPDATE analytics_data_version SET version = version + 1 WHERE id = 1;
+            END;
+        """)
+
+    if own_conn:
+        conn.close()
+
+
+def get_data_version(conn) -> int:
+    """Τρέχον data-version stamp (μία ανάγνωση primary key)"""
+    row = conn.execute("SELECT version FROM analytics_data_version WHERE id = 1").fetchone()
+    return row[0] if row else 0
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# BULK LOAD
+# ═══════════════════════════════════════════════════════════════════════════
+
+def _load_columns(conn):
+    """
+    Δύο queries → columnar arrays.
+
+    Οι εργασίες έρχονται ταξινομημένες ανά (μονάδα, ημερομηνία), ώστε τα
+    διαδοχικά διαστήματα να είναι απλά διαφορές γειτονικών στοιχείων.
+    """
+    conn.row_factory = None
+    cursor = conn.cursor()
+    sources = database.task_sources(conn)
+
+    cursor.execute(f"""
+        SELECT t.id,
+               t.unit_id,
+               julianday(t.created_date),
+               COALESCE(julianday(t.completed_date), julianday(t.created_date)),
+               t.status = 'completed',
+               CASE tt.name WHEN ? THEN ? WHEN ? THEN ? ELSE ? END
+        FROM {sources['tasks']} t
+                 JOIN task_types tt ON tt.id = t.task_type_id
+        WHERE t.is_deleted = 0
+          AND julianday(t.created_date) IS NOT NULL
+        ORDER BY t.unit_id, julianday(t.created_date), t.id
+    """, (FAULT_TYPE_NAME, KIND_FAULT, REPAIR_TYPE_NAME, KIND_REPAIR, KIND_OTHER))
+    rows = cursor.fetchall()
+
+    if rows:
+        ids, units, created, done, completed, kind = zip(*rows)
+    else:
+        ids = units = created = done = completed = kind = ()
+
+    tasks = {
+        'id': array('q', ids),
+        'unit': array('q', units),
+        'created': array('d', created),
+        'done': array('d', done),
+        'completed': array('b', completed),
+        'kind': array('b', kind),
+    }
+
+    cursor.execute(f"""
+        SELECT parent_task_id, child_task_id
+        FROM {sources['task_relationships']}
+        WHERE is_deleted = 0
+    """)
+    edges = cursor.fetchall()
+    parents, children = zip(*edges) if edges else ((), ())
+
+    return tasks, {'parent': array('q', parents), 'child': array('q', children)}
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# COMPUTATION
+# ═══════════════════════════════════════════════════════════════════════════
+
+def _finish(unit_ids, fault_count, gap_sum, gap_count, repair_sum, repair_count) -> Dict[int, Dict[str, Any]]:
+    """Συνδυασμός των αθροισμάτων ανά μονάδα σε τελικά στατιστικά"""
+    result = {}
+    for k, unit_id in enumerate(unit_ids):
+        mtbf = float(gap_sum[k] / gap_count[k]) if gap_count[k] else None
+        mttr = float(repair_sum[k] / repair_count[k]) if repair_count[k] else None
+        availability = None
+        if mtbf is not None and mttr is not None and mtbf + mttr > 0:
+            availability = mtbf / (mtbf + mttr)
+        result[int(unit_id)] = {
+            'fault_count': int(fault_count[k]),
+            'mtbf_days': mtbf,
+            'repair_count': int(repair_count[k]),
+            'mttr_days': mttr,
+            'availability': availability,
+        }
+    return result
+
+
+def _compute_numpy(tasks, edges) -> Dict[int, Dict[str, Any]]:
+    ids = np.frombuffer(tasks['id'], dtype=np.int64)
+    unit = np.frombuffer(tasks['unit'], dtype=np.int64)
+    created = np.frombuffer(tasks['created'], dtype=np.float64)
+    done = np.frombuffer(tasks['done'], dtype=np.float64)
+    completed = np.frombuffer(tasks['completed'], dtype=np.int8).astype(bool)
+    kind = np.frombuffer(tasks['kind'], dtype=np.int8)
+
+    unit_ids, unit_idx = np.unique(unit, return_inverse=True)
+    n_units = len(unit_ids)
+
+    # MTBF: διαφορές διαδοχικών βλαβών της ίδιας μονάδας
+    is_fault = kind == KIND_FAULT
+    fault_unit = unit_idx[is_fault]
+    fault_created = created[is_fault]
+    same_unit = fault_unit[1:] == fault_unit[:-1]
+    gaps = np.diff(fault_created)[same_unit]
+    gap_unit = fault_unit[1:][same_unit]
+
+    fault_count = np.bincount(fault_unit, minlength=n_units)
+    gap_sum = np.bincount(gap_unit, weights=gaps, minlength=n_units)
+    gap_count = np.bincount(gap_unit, minlength=n_units)
+
+    # MTTR: ακμές Βλάβη → ολοκληρωμένη Επισκευή
+    order = np.argsort(ids, kind='stable')
+    sorted_ids = ids[order]
+    parent = np.frombuffer(edges['parent'], dtype=np.int64)
+    child = np.frombuffer(edges['child'], dtype=np.int64)
+
+    p_pos = np.clip(np.searchsorted(sorted_ids, parent), 0, max(len(ids) - 1, 0))
+    c_pos = np.clip(np.searchsorted(sorted_ids, child), 0, max(len(ids) - 1, 0))
+
+    repair_sum = np.zeros(n_units)
+    repair_count = np.zeros(n_units, dtype=np.int64)
+
+    if len(ids) and len(parent):
+        p = order[p_pos]
+        c = order[c_pos]
+        valid = ((sorted_ids[p_pos] == parent) & (sorted_ids[c_pos] == child)
+                 & (kind[p] == KIND_FAULT) & (kind[c] == KIND_REPAIR) & completed[c])
+        p, c = p[valid], c[valid]
+
+        # Χρόνος αποκατάστασης ανά βλάβη = η ΤΕΛΕΥΤΑΙΑ επισκευή της
+        time_to_repair = np.full(len(ids), -1.0)
+        np.maximum.at(time_to_repair, p, np.maximum(done[c] - created[p], 0.0))
+        repaired = time_to_repair >= 0
+
+        repair_sum = np.bincount(unit_idx[repaired], weights=time_to_repair[repaired], minlength=n_units)
+        repair_count = np.bincount(unit_idx[repaired], minlength=n_units)
+
+    return _finish(unit_ids.tolist(), fault_count, gap_sum, gap_count, repair_sum, repair_count)
+
+
+def _compute_arrays(tasks, edges) -> Dict[int, Dict[str, Any]]:
+    ids, unit, created = tasks['id'], tasks['unit'], tasks['created']
+    done, completed, kind = tasks['done'], tasks['completed'], tasks['kind']
+
+    unit_ids = []
+    unit_idx = array('q', bytes(8 * len(ids)))
+    fault_count, gap_sum, gap_count = array('q'), array('d'), array('q')
+
+    prev_unit = None
+    prev_fault = None
+    for i in range(len(ids)):
+        if unit[i] != prev_unit:
+            prev_unit = unit[i]
+            prev_fault = None
+            unit_ids.append(prev_unit)
+            fault_count.append(0)
+            gap_sum.append(0.0)
+            gap_count.append(0)
+        k = len(unit_ids) - 1
+        unit_idx[i] = k
+        if kind[i] == KIND_FAULT:
+            fault_count[k] += 1
+            if prev_fault is not None:
+                gap_sum[k] += created[i] - prev_fault
+                gap_count[k] += 1
+            prev_fault = created[i]
+
+    position = {task_id: i for i, task_id in enumerate(ids)}
+    time_to_repair: Dict[int, float] = {}
+    for parent, child in zip(edges['parent'], edges['child']):
+        p = position.get(parent)
+        c = position.get(child)
+        if p is None or c is None:
+            continue
+        if kind[p] != KIND_FAULT or kind[c] != KIND_REPAIR or not completed[c]:
+            continue
+        duration = max(done[c] - created[p], 0.0)
+        if duration > time_to_repair.get(p, -1.0):
+            time_to_repair[p] = duration
+
+    repair_sum = array('d', bytes(8 * len(unit_ids)))
+    repair_count = array('q', bytes(8 * len(unit_ids)))
+    for p, duration in time_to_repair.items():
+        k = unit_idx[p]
+        repair_sum[k] += duration
+        repair_count[k] += 1
+
+    return _finish(unit_ids, fault_count, gap_sum, gap_count, repair_sum, repair_count)
+
+
+def compute_reliability(conn, use_numpy: Optional[bool] = None) -> Dict[int, Dict[str, Any]]:
+    """
+    Υπολογισμός MTBF/MTTR για όλες τις μονάδες (χωρίς cache).
+
+    Args:
+        conn: Σύνδεση database
+        use_numpy: None = αυτόματα (NumPy αν είναι διαθέσιμο)
+    """
+    tasks, edges = _load_columns(conn)
+    if use_numpy is None:
+        use_numpy = np is not None
+    if use_numpy:
+        return _compute_numpy(tasks, edges)
+    return _compute_arrays(tasks, edges)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# PUBLIC API
+# ═══════════════════════════════════════════════════════════════════════════
+
+def get_unit_reliability(unit_ids: Optional[Iterable[int]] = None) -> Dict[int, Dict[str, Any]]:
+    """
+    MTBF/MTTR ανά μονάδα, από cache όσο δεν έχει αλλάξει το data version.
+
+    Args:
+        unit_ids: Προαιρετικό φίλτρο μονάδων
+
+    Returns:
+        Dict[unit_id, {'fault_count', 'mtbf_days', 'repair_count',
+                       'mttr_days', 'availability'}]
+        (μονάδες χωρίς εργασίες δεν εμφανίζονται)
+    """
+    conn = database.get_connection()
+    try:
+        init_data_version(conn)
+        version = get_data_version(conn)
+        if database.get_archive_state(conn):
+            database.attach_archive(conn)
+
+        stamp = (database.DB_NAME, version)
+        if _cache['version'] != stamp:
+            started = time.perf_counter()
+            _cache['units'] = compute_reliability(conn)
+            _cache['version'] = stamp
+            logger.info(f"Reliability analytics: {len(_cache['units'])} unit(s) in "
+                        f"{(time.perf_counter() - started) * 1000:.0f}ms "
+                        f"({'numpy' if np is not None else 'array'})")
+    finally:
+        conn.close()
+
+    units = _cache['units']
+    if unit_ids is None:
+        return dict(units)
+    return {unit_id: units[unit_id] for unit_id in unit_ids if unit_id in units}
+
+
+def invalidate_cache():
+    """Καθαρισμός cache (π.χ. μετά από restore backup)"""
+    _cache['version'] = None
+    _cache['units'] = None
+
+
+def format_days(value) -> str:
+    """Μορφοποίηση ημερών για εμφάνιση ('—' αν δεν υπάρχει τιμή)"""
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return "—"
+    return f"{value:.1f}"
@@ -0,0 +1,828 @@
+"""
+Offline Replica Synchronization
+===============================
+
+Συγχρονισμός laptop τεχνικών (χωρίς σύνδεση στο πεδίο) με τη βάση του
+γραφείου, ανταλλάσσοντας ΜΟΝΟ τις γραμμές που άλλαξαν.
+
+Features:
+---------
+- Κάθε database είναι replica με δικό της replica_id
+- Row-level change tracking με triggers: για κάθε γραμμή tasks /
+  task_relationships που άλλαξε κρατείται (seq, hlc, origin, deleted)
+    * seq: τοπικός αύξων αριθμός - "τι άλλαξε από το τελευταίο sync"
+    * hlc: hybrid logical clock (ms) - χρονική σειρά αλλαγών
+    * origin: replica που έκανε την αλλαγή
+- Καθολική ταυτότητα γραμμών: tasks.sync_uid (τα ids διαφέρουν ανά
+  replica), σχέσεις ως "parent_uid:child_uid", locations.sync_uid
+- Μετονομασία τοποθεσίας = ΜΙΑ αλλαγή τοποθεσίας (όχι αλλαγή κάθε
+  εργασίας της). Οι εργασίες ταξιδεύουν με το location_uid τους και
+  συνδέονται με την ίδια τοποθεσία στην άλλη replica, όποιο κι αν είναι
+  εκεί το όνομά της
+- Changeset = οι τρέχουσες τιμές των γραμμών με seq > σημείο sync του
+  peer, σε JSON συμπιεσμένο με zlib (αρχείο ή τοπικό socket)
+- Socket sync μόνο με γνωστές replicas (replica_peers - clone_replica ή
+  προηγούμενο sync) και, αν δοθεί κοινό secret, με αμοιβαίο HMAC
+  challenge-response πριν ανταλλαχθεί οποιοδήποτε changeset
+- Συγκρούσεις: last-writer-wins ανά γραμμή με κλειδί (hlc, origin) -
+  ίδιο αποτέλεσμα σε κάθε replica, ανεξάρτητα από τη σειρά των sync
+- Οι διαγραφές ταξιδεύουν ως tombstones με το δικό τους hlc
+
+Προϋποθέσεις:
+-------------
+- Τα δεδομένα αναφοράς (μονάδες, ομάδες, τύποι, είδη εργασιών) είναι
+  κοινά - δημιουργούνται στο γραφείο και οι εργασίες τα αναφέρουν με id
+- Νέα replica δημιουργείται με clone_replica() (ΟΧΙ με αντιγραφή του
+  αρχείου - θα είχε το ίδιο replica_id)
+
+Usage:
+------
+    import replica_sync
+
+    replica_sync.clone_replica("laptop_nikos.db")          # στο γραφείο
+
+    # Στο laptop, μετά τη βάρδια:
+    replica_sync.export_changeset(office_id, "nikos_2026-10-19.hvsync")
+    # Στο γραφείο:
+    replica_sync.import_changeset("nikos_2026-10-19.hvsync")
+
+    # Ή απευθείας μέσω socket (ίδιο secret και στις δύο πλευρές):
+    server = replica_sync.serve_sync("0.0.0.0", 8766, secret=key)   # γραφείο
+    replica_sync.sync_with("office-pc", 8766, secret=key)           # laptop
+"""
+
+import hashlib
+import hmac
+import json
+import os
+import socket
+import socketserver
+import sqlite3
+import struct
+import threading
+import time
+import uuid
+import zlib
+
+import database_refactored as database
+import logger_config
+
+logger = logger_config.get_logger(__name__)
+
+CHANGESET_FORMAT = "hvacr-changeset/1"
+DEFAULT_SYNC_HOST = "127.0.0.1"
+DEFAULT_SYNC_PORT = 8766
+
+# Όρια μεγέθους (ό,τι στέλνει ο peer πριν ελεγχθεί)
+MAX_HELLO_BYTES = 4096
+MAX_FRAME_BYTES = 64 * 1024 * 1024
+MAX_CHANGESET_BYTES = 512 * 1024 * 1024      # μετά την αποσυμπίεση
+
+# Στήλες που ΔΕΝ μεταφέρονται (τοπικές ανά replica) - το location_id
+# προκύπτει τοπικά από το location_uid (ή το κείμενο location, triggers
+# trg_location_*)
+_LOCAL_TASK_COLUMNS = {'id', 'sync_uid', 'row_version', 'location_id'}
+
+_WALL_MS = "CAST((julianday('now') - 2440587.5) * 86400000 AS INTEGER)"
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# SCHEMA & TRIGGERS
+# ═══════════════════════════════════════════════════════════════════════════
+
+def _log_change(table, uid_expr, deleted):
+    """SQL (μέσα σε trigger) που καταγράφει την αλλαγή και προχωρά seq/hlc"""
+    return f"""
+            UPDATE replica_meta SET value = value + 1 WHERE key = 'seq';
+            UPDATE replica_meta
+            SET value = MAX({_WALL_MS}, value + 1)
+            WHERE key = 'hlc';
+            INSERT INTO replica_changes (tbl, uid, seq, hlc, origin, deleted)
+            SELECT '{table}', {uid_expr},
+                   (SELECT value FROM replica_meta WHERE key = 'seq'),
+                   (SELECT value FROM replica_meta WHERE key = 'hlc'),
+                   (SELECT value FROM replica_meta WHERE key = 'replica_id'),
+                   {deleted}
+            WHERE {uid_expr} IS NOT NULL
+            ON CONFLICT (tbl, uid) DO UPDATE SET seq = excluded.seq, hlc = excluded.hlc,
+                                                 origin = excluded.origin, deleted = excluded.deleted;
+    """
+
+
+def _relationship_uid(row):
+    return (f"((SELECT sync_uid FROM tasks WHERE id = {row}.parent_task_id) || ':' || "
+            f"(SELECT sync_uid FROM tasks WHERE id = {row}.child_task_id))")
+
+
+def _moved_relationship_uid():
+    """uid του παλιού ζεύγους ΜΟΝΟ αν άλλαξαν τα άκρα της σχέσης"""
+    return (f"(CASE WHEN OLD.parent_task_id != NEW.parent_task_id OR OLD.child_task_id != NEW.child_task_id "
+            f"THEN {_relationship_uid('OLD')} END)")
+
+
+def _trigger_script():
+    tracking = "(SELECT value FROM replica_meta WHERE key = 'applying') = 0"
+    task_columns = ", ".join(database._VERSIONED_TABLES['tasks'])
+    return f"""
+        CREATE TRIGGER IF NOT EXISTS trg_replica_task_insert
+        AFTER INSERT ON tasks
+        WHEN {tracking}
+        BEGIN
+            UPDATE tasks SET sync_uid = lower(hex(randomblob(16)))
+            WHERE id = NEW.id AND sync_uid IS NULL;
+            {_log_change('tasks', '(SELECT sync_uid FROM tasks WHERE id = NEW.id)', 0)}
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_replica_task_update
+        AFTER UPDATE OF {task_columns} ON tasks
+        WHEN {tracking} AND NOT {database._location_text_sync('tasks')}
+        BEGIN
+            {_log_change('tasks', 'NEW.sync_uid', 0)}
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_replica_task_delete
+        AFTER DELETE ON tasks
+        WHEN {tracking}
+        BEGIN
+            {_log_change('tasks', 'OLD.sync_uid', 1)}
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_replica_rel_insert
+        AFTER INSERT ON task_relationships
+        WHEN {tracking}
+        BEGIN
+            {_log_change('task_relationships', _relationship_uid('NEW'), 0)}
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_replica_rel_update
+        AFTER UPDATE OF parent_task_id, child_task_id, relationship_type, is_deleted ON task_relationships
+        WHEN {tracking}
+        BEGIN
+            {_log_change('task_relationships', _moved_relationship_uid(), 1)}
+            {_log_change('task_relationships', _relationship_uid('NEW'), 0)}
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_replica_rel_delete
+        AFTER DELETE ON task_relationships
+        WHEN {tracking}
+        BEGIN
+            {_log_change('task_relationships', _relationship_uid('OLD'), 1)}
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_replica_location_insert
+        AFTER INSERT ON locations
+        BEGIN
+            UPDATE locations SET sync_uid = lower(hex(randomblob(16)))
+            WHERE id = NEW.id AND sync_uid IS NULL;
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_replica_location_rename
+        AFTER UPDATE OF name ON locations
+        WHEN {tracking} AND NEW.name IS NOT OLD.name
+        BEGIN
+            {_log_change('locations', 'NEW.sync_uid', 0)}
+        END;
+    """
+
+
+def init_replica(conn=None):
+    """
+    Δημιουργία πινάκων/triggers replica (μία φορά). Οι υπάρχουσες γραμμές
+    είναι η κοινή βάση - δεν καταγράφονται ως αλλαγές.
+    """
+    own_conn = conn is None
+    if own_conn:
+        conn = database.get_connection()
+
+    cursor = conn.cursor()
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'replica_changes'")
+    if cursor.fetchone() is None:
+        logger.info("Initializing replica change tracking...")
+        cursor.execute("PRAGMA table_info(tasks)")
+        if 'sync_uid' not in [column[1] for column in cursor.fetchall()]:
+            cursor.execute("ALTER TABLE tasks ADD COLUMN sync_uid TEXT")
+        cursor.execute("UPDATE tasks SET sync_uid = lower(hex(randomblob(16))) WHERE sync_uid IS NULL")
+        cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_tasks_sync_uid ON tasks(sync_uid)")
+
+        cursor.execute("""
+            CREATE TABLE replica_meta (
+                key TEXT PRIMARY KEY,
+                value
+            )
+        """)
+        cursor.executemany("INSERT INTO replica_meta (key, value) VALUES (?, ?)", [
+            ('replica_id', uuid.uuid4().hex), ('seq', 0), ('hlc', 0), ('applying', 0),
+        ])
+        cursor.execute("""
+            CREATE TABLE replica_changes (
+                tbl TEXT NOT NULL,
+                uid TEXT NOT NULL,
+                seq INTEGER NOT NULL,
+                hlc INTEGER NOT NULL,
+                origin TEXT NOT NULL,
+                deleted INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (tbl, uid)
+            ) WITHOUT ROWID
+        """)
+        cursor.execute("CREATE INDEX idx_replica_changes_seq ON replica_changes(seq)")
+        cursor.execute("""
+            CREATE TABLE replica_peers (
+                peer_id TEXT PRIMARY KEY,
+                received_seq INTEGER NOT NULL DEFAULT 0,
+                sent_seq INTEGER NOT NULL DEFAULT 0,
+                last_sync TIMESTAMP
+            )
+        """)
+        conn.commit()
+
+    # Triggers (νέα replica, ή παλαιότερης έκδοσης χωρίς τοποθεσίες)
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = 'trg_replica_location_rename'")
+    if cursor.fetchone() is None:
+        cursor.execute("PRAGMA table_info(locations)")
+        if 'sync_uid' not in [column[1] for column in cursor.fetchall()]:
+            cursor.execute("ALTER TABLE locations ADD COLUMN sync_uid TEXT")
+        # Υπάρχουσες τοποθεσίες: uid από το (μοναδικό) όνομα - ίδιο και σε
+        # replicas που κλωνοποιήθηκαν πριν από την αναβάθμιση
+        cursor.execute("UPDATE locations SET sync_uid = lower(hex(name)) WHERE sync_uid IS NULL")
+        cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_locations_sync_uid ON locations(sync_uid)")
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'trg_replica_%'")
+        for (name,) in cursor.fetchall():
+            cursor.execute(f"DROP TRIGGER {name}")
+        conn.commit()
+        cursor.executescript(_trigger_script())
+        conn.commit()
+
+    if own_conn:
+        conn.close()
+
+
+def _meta(cursor, key):
+    cursor.execute("SELECT value FROM replica_meta WHERE key = ?", (key,))
+    return cursor.fetchone()[0]
+
+
+def get_replica_id():
+    """Το replica_id αυτής της database"""
+    conn = database.get_connection()
+    try:
+        init_replica(conn)
+        return _meta(conn.cursor(), 'replica_id')
+    finally:
+        conn.close()
+
+
+def get_sync_status():
+    """
+    Returns:
+        dict: {'replica_id', 'seq', 'pending': {peer_id: αλλαγές προς αποστολή}}
+    """
+    conn = database.get_connection()
+    try:
+        init_replica(conn)
+        cursor = conn.cursor()
+        status = {'replica_id': _meta(cursor, 'replica_id'), 'seq': _meta(cursor, 'seq'), 'pending': {}}
+        cursor.execute("""
+            SELECT p.peer_id,
+                   (SELECT COUNT(*) FROM replica_changes c
+                    WHERE c.seq > p.sent_seq AND c.origin != p.peer_id) AS pending
+            FROM replica_peers p
+        """)
+        status['pending'] = {row['peer_id']: row['pending'] for row in cursor.fetchall()}
+        return status
+    finally:
+        conn.close()
+
+
+def record_bulk_location_inserts(cursor):
+    """
+    Set-based ισοδύναμο του trg_replica_location_insert (μαζική εισαγωγή με
+    ανενεργά triggers): sync_uid στις τοποθεσίες που δεν έχουν
+    """
+    cursor.execute("PRAGMA table_info(locations)")
+    if 'sync_uid' in [column[1] for column in cursor.fetchall()]:
+        cursor.execute("UPDATE locations SET sync_uid = lower(hex(randomblob(16))) WHERE sync_uid IS NULL")
+
+
+def record_bulk_task_inserts(cursor, after_id):
+    """
+    Set-based ισοδύναμο του trg_replica_task_insert για μαζικές εισαγωγές
+    που έγιναν με το trigger ανενεργό: sync_uid και καταγραφή αλλαγής για
+    όλες τις εργασίες με id > after_id. Τρέχει στο transaction του caller.
+
+    Returns:
+        int: Πλήθος εργασιών που καταγράφηκαν
+    """
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'replica_changes'")
+    if cursor.fetchone() is None:
+        return 0
+
+    cursor.execute("UPDATE tasks SET sync_uid = lower(hex(randomblob(16))) WHERE id > ? AND sync_uid IS NULL",
+                   (after_id,))
+    # Χωρίς peers κανείς δεν θα ζητήσει αυτές τις αλλαγές - μια νέα replica
+    # (clone_replica) παίρνει ολόκληρη τη database (π.χ. αρχικό onboarding)
+    cursor.execute("SELECT 1 FROM replica_peers LIMIT 1")
+    if cursor.fetchone() is None:
+        return 0
+
+    seq, hlc, replica_id = _meta(cursor, 'seq'), _meta(cursor, 'hlc'), _meta(cursor, 'replica_id')
+    first_hlc = max(int(time.time() * 1000), hlc + 1)
+    cursor.execute("""
+        INSERT INTO replica_changes (tbl, uid, seq, hlc, origin, deleted)
+        SELECT 'tasks', sync_uid, ? + n, ? + n - 1, ?, 0
+        FROM (SELECT sync_uid, ROW_NUMBER() OVER (ORDER BY id) AS n FROM tasks WHERE id > ?)
+        ORDER BY sync_uid   -- εισαγωγή με τη σειρά του primary key
+        ON CONFLICT (tbl, uid) DO UPDATE SET seq = excluded.seq, hlc = excluded.hlc,
+                                             origin = excluded.origin, deleted = 0
+    """, (seq, first_hlc, replica_id, after_id))
+    count = cursor.rowcount
+    if count > 0:
+        cursor.execute("UPDATE replica_meta SET value = ? WHERE key = 'seq'", (seq + count,))
+        cursor.execute("UPDATE replica_meta SET value = ? WHERE key = 'hlc'", (first_hlc + count - 1,))
+    return count
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# CLONE
+# ═══════════════════════════════════════════════════════════════════════════
+
+def clone_replica(target_path):
+    """
+    Νέα replica (π.χ. για laptop) ως αντίγραφο αυτής της database, με νέο
+    replica_id. Οι δύο replicas γνωρίζουν η μία την άλλη από το σημείο
+    του αντιγράφου - το πρώτο sync μεταφέρει μόνο τις νεότερες αλλαγές.
+
+    Returns:
+        str: Το replica_id της νέας replica
+    """
+    source = database.get_connection()
+    try:
+        init_replica(source)
+        target = sqlite3.connect(target_path)
+        try:
+            source.backup(target)
+            # Το seq του ΣΤΙΓΜΙΟΤΥΠΟΥ - ό,τι γράφτηκε μετά θα έρθει με το sync
+            source_id, source_seq = target.execute(
+                "SELECT (SELECT value FROM replica_meta WHERE key = 'replica_id'), "
+                "(SELECT value FROM replica_meta WHERE key = 'seq')").fetchone()
+            clone_id = uuid.uuid4().hex
+            target.execute("UPDATE replica_meta SET value = ? WHERE key = 'replica_id'", (clone_id,))
+            target.execute("UPDATE replica_meta SET value = 0 WHERE key = 'seq'")
+            target.execute("DELETE FROM replica_changes")
+            target.execute("DELETE FROM replica_peers")
+            target.execute("INSERT INTO replica_peers (peer_id, received_seq, sent_seq) VALUES (?, ?, 0)",
+                           (source_id, source_seq))
+            target.commit()
+        finally:
+            target.close()
+
+        source.execute("""
+            INSERT INTO replica_peers (peer_id, received_seq, sent_seq) VALUES (?, 0, ?)
+            ON CONFLICT (peer_id) DO UPDATE SET received_seq = 0, sent_seq = excluded.sent_seq
+        """, (clone_id, source_seq))
+        source.commit()
+    finally:
+        source.close()
+
+    logger.info(f"✅ Replica {clone_id} cloned to {target_path}")
+    return clone_id
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# EXPORT
+# ═══════════════════════════════════════════════════════════════════════════
+
+def _task_columns(cursor):
+    cursor.execute("PRAGMA table_info(tasks)")
+    return [column[1] for column in cursor.fetchall() if column[1] not in _LOCAL_TASK_COLUMNS]
+
+
+def build_changeset(peer_id):
+    """
+    Changeset (dict) με όλες τις αλλαγές που δεν έχει ακόμα ο peer.
+    Κάθε γραμμή εμφανίζεται μία φορά με την τρέχουσα τιμή της.
+    """
+    conn = database.get_connection()
+    try:
+        init_replica(conn)
+        cursor = conn.cursor()
+        cursor.execute("INSERT OR IGNORE INTO replica_peers (peer_id) VALUES (?)", (peer_id,))
+        conn.commit()
+
+        cursor.execute("SELECT received_seq, sent_seq FROM replica_peers WHERE peer_id = ?", (peer_id,))
+        peer = cursor.fetchone()
+        columns = _task_columns(cursor)
+
+        cursor.execute("""
+            SELECT c.uid, c.hlc, c.origin, l.name
+            FROM replica_changes c
+                     JOIN locations l ON l.sync_uid = c.uid
+            WHERE c.tbl = 'locations' AND c.seq > ? AND c.origin != ?
+            ORDER BY c.seq
+        """, (peer['sent_seq'], peer_id))
+        locations = [[row['uid'], row['hlc'], row['origin'], row['name']] for row in cursor.fetchall()]
+
+        cursor.execute(f"""
+            SELECT c.uid, c.seq, c.hlc, c.origin, c.deleted, {', '.join('t.' + c for c in columns)},
+                   l.sync_uid AS location_uid
+            FROM replica_changes c
+                     LEFT JOIN tasks t ON t.sync_uid = c.uid
+                     LEFT JOIN locations l ON l.id = t.location_id
+            WHERE c.tbl = 'tasks' AND c.seq > ? AND c.origin != ?
+            ORDER BY c.seq
+        """, (peer['sent_seq'], peer_id))
+        tasks = []
+        for row in cursor.fetchall():
+            deleted = row['deleted'] or row['unit_id'] is None
+            tasks.append([row['uid'], row['hlc'], row['origin'], 1 if deleted else 0,
+                          None if deleted else [row[c] for c in columns] + [row['location_uid']]])
+
+        cursor.execute("""
+            SELECT c.uid, c.hlc, c.origin, c.deleted, r.relationship_type, r.is_deleted
+            FROM replica_changes c
+                     LEFT JOIN tasks p ON p.sync_uid = substr(c.uid, 1, instr(c.uid, ':') - 1)
+                     LEFT JOIN tasks ch ON ch.sync_uid = substr(c.uid, instr(c.uid, ':') + 1)
+                     LEFT JOIN task_relationships r
+                               ON r.parent_task_id = p.id AND r.child_task_id = ch.id
+            WHERE c.tbl = 'task_relationships' AND c.seq > ? AND c.origin != ?
+            ORDER BY c.seq
+        """, (peer['sent_seq'], peer_id))
+        relationships = []
+        for row in cursor.fetchall():
+            deleted = row['deleted'] or row['relationship_type'] is None
+            relationships.append([row['uid'], row['hlc'], row['origin'], 1 if deleted else 0,
+                                  None if deleted else [row['relationship_type'], row['is_deleted']]])
+
+        return {
+            'format': CHANGESET_FORMAT,
+            'source': _meta(cursor, 'replica_id'),
+            'target': peer_id,
+            'source_seq': _meta(cursor, 'seq'),
+            'ack': peer['received_seq'],
+            # location_uid: όχι στήλη - παλαιότερες εκδόσεις το αγνοούν
+            'task_columns': columns + ['location_uid'],
+            'locations': locations,
+            'tasks': tasks,
+            'relationships': relationships,
+        }
+    finally:
+        conn.close()
+
+
+def encode_changeset(changeset):
+    """dict → συμπιεσμένα bytes"""
+    raw = json.dumps(changeset, ensure_ascii=False, separators=(',', ':'), default=str).encode("utf-8")
+    return zlib.compress(raw, 9)
+
+
+def decode_changeset(data):
+    decompressor = zlib.decompressobj()
+    raw = decompressor.decompress(data, MAX_CHANGESET_BYTES)
+    if decompressor.unconsumed_tail:
+        raise database.ValidationError("Το changeset υπερβαίνει το μέγιστο μέγεθος")
+    changeset = json.loads(raw.decode("utf-8"))
+    if changeset.get('format') != CHANGESET_FORMAT:
+        raise database.ValidationError("Μη υποστηριζόμενη μορφή changeset")
+    return changeset
+
+
+def export_changeset(peer_id, path):
+    """
+    Αποθήκευση των αλλαγών για τον peer σε αρχείο.
+
+    Returns:
+        dict: {'tasks', 'relationships', 'bytes'}
+    """
+    changeset = build_changeset(peer_id)
+    data = encode_changeset(changeset)
+    with open(path, "wb") as f:
+        f.write(data)
+    summary = {'locations': len(changeset['locations']), 'tasks': len(changeset['tasks']),
+               'relationships': len(changeset['relationships']), 'bytes': len(data)}
+    logger.info(f"Changeset for {peer_id} → {path}: {summary}")
+    return summary
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# IMPORT
+# ═══════════════════════════════════════════════════════════════════════════
+
+def _wins(incoming_hlc, incoming_origin, local):
+    """Last-writer-wins με ντετερμινιστικό tie-break στο origin"""
+    if local is None:
+        return True
+    return (incoming_hlc, incoming_origin) > (local['hlc'], local['origin'])
+
+
+def _record(cursor, table, uid, hlc, origin, deleted):
+    """Καταγραφή της εφαρμοσμένης αλλαγής με νέο ΤΟΠΙΚΟ seq (για μετάδοση σε τρίτους)"""
+    cursor.execute("UPDATE replica_meta SET value = value + 1 WHERE key = 'seq'")
+    cursor.execute("""
+        INSERT INTO replica_changes (tbl, uid, seq, hlc, origin, deleted)
+        VALUES (?, ?, (SELECT value FROM replica_meta WHERE key = 'seq'), ?, ?, ?)
+        ON CONFLICT (tbl, uid) DO UPDATE SET seq = excluded.seq, hlc = excluded.hlc,
+                                             origin = excluded.origin, deleted = excluded.deleted
+    """, (table, uid, hlc, origin, deleted))
+
+
+def apply_changeset(changeset):
+    """
+    Εφαρμογή changeset σε ΕΝΑ transaction.
+
+    Returns:
+        dict: {'applied', 'skipped'} - skipped = παλαιότερες από τις τοπικές,
+              ή μετονομασίες τοποθεσιών που δεν μπορούν να γίνουν εδώ
+    """
+    conn = database.get_connection()
+    applied = skipped = 0
+    try:
+        init_replica(conn)
+        cursor = conn.cursor()
+        cursor.execute("BEGIN IMMEDIATE")
+
+        local_id = _meta(cursor, 'replica_id')
+        if changeset['source'] == local_id:
+            raise database.ValidationError("Το changeset προέρχεται από αυτή τη replica")
+        if changeset.get('target') not in (None, local_id):
+            raise database.ValidationError("Το changeset προορίζεται για άλλη replica")
+
+        cursor.execute("UPDATE replica_meta SET value = 1 WHERE key = 'applying'")
+
+        local_columns = set(_task_columns(cursor))
+        remote_columns = changeset['task_columns']
+        usable = [i for i, c in enumerate(remote_columns) if c in local_columns]
+        names = [remote_columns[i] for i in usable]
+        location_uid_at = remote_columns.index('location_uid') if 'location_uid' in remote_columns else None
+        location_at = names.index('location') if 'location' in names else None
+        max_hlc = 0
+
+        # Μετονομασίες πρώτα: οι εργασίες που ακολουθούν βρίσκουν τα νέα ονόματα
+        for uid, hlc, origin, name in changeset.get('locations', []):
+            max_hlc = max(max_hlc, hlc)
+            cursor.execute("SELECT hlc, origin FROM replica_changes WHERE tbl = 'locations' AND uid = ?", (uid,))
+            if not _wins(hlc, origin, cursor.fetchone()):
+                skipped += 1
+                continue
+            cursor.execute("SELECT name FROM locations WHERE sync_uid = ?", (uid,))
+            local = cursor.fetchone()
+            if local is None:
+                # Η τοποθεσία δεν υπάρχει σε αυτή τη replica
+                skipped += 1
+                continue
+            if local['name'] != name:
+                try:
+                    # trg_location_rename: κείμενα εργασιών/μονάδων, χωρίς νέο row_version
+                    cursor.execute("UPDATE locations SET name = ? WHERE sync_uid = ?", (name, uid))
+                except sqlite3.IntegrityError:
+                    logger.warning(f"⚠️  Location rename '{local['name']}' → '{name}' skipped: "
+                                   f"another location already has that name")
+                    skipped += 1
+                    continue
+            _record(cursor, 'locations', uid, hlc, origin, 0)
+            applied += 1
+
+        for uid, hlc, origin, deleted, values in changeset['tasks']:
+            max_hlc = max(max_hlc, hlc)
+            cursor.execute("SELECT hlc, origin FROM replica_changes WHERE tbl = 'tasks' AND uid = ?", (uid,))
+            if not _wins(hlc, origin, cursor.fetchone()):
+                skipped += 1
+                continue
+
+            if deleted:
+                cursor.execute("DELETE FROM task_relationships WHERE parent_task_id IN "
+                               "(SELECT id FROM tasks WHERE sync_uid = ?) OR child_task_id IN "
+                               "(SELECT id FROM tasks WHERE sync_uid = ?)", (uid, uid))
+                cursor.execute("DELETE FROM tasks WHERE sync_uid = ?", (uid,))
+            else:
+                row = [values[i] for i in usable]
+                if location_uid_at is not None and location_at is not None and values[location_uid_at]:
+                    # Ίδια τοποθεσία με τον αποστολέα: το ΤΟΠΙΚΟ της όνομα (→ location_id)
+                    cursor.execute("SELECT name FROM locations WHERE sync_uid = ?", (values[location_uid_at],))
+                    local = cursor.fetchone()
+                    if local is not None:
+                        row[location_at] = local['name']
+                cursor.execute(f"UPDATE tasks SET {', '.join(n + ' = ?' for n in names)} WHERE sync_uid = ?",
+                               row + [uid])
+                if cursor.rowcount == 0:
+                    cursor.execute(f"""
+                        INSERT INTO tasks ({', '.join(names)}, sync_uid)
+                        VALUES ({', '.join('?' * len(names))}, ?)
+                    """, row + [uid])
+            _record(cursor, 'tasks', uid, hlc, origin, deleted)
+            applied += 1
+
+        for uid, hlc, origin, deleted, values in changeset['relationships']:
+            max_hlc = max(max_hlc, hlc)
+            cursor.execute("SELECT hlc, origin FROM replica_changes "
+                           "WHERE tbl = 'task_relationships' AND uid = ?", (uid,))
+            if not _wins(hlc, origin, cursor.fetchone()):
+                skipped += 1
+                continue
+
+            parent_uid, child_uid = uid.split(':', 1)
+            cursor.execute("SELECT (SELECT id FROM tasks WHERE sync_uid = ?), "
+                           "(SELECT id FROM tasks WHERE sync_uid = ?)", (parent_uid, child_uid))
+            parent_id, child_id = cursor.fetchone()
+
+            if deleted or parent_id is None or child_id is None:
+                cursor.execute("DELETE FROM task_relationships WHERE parent_task_id = ? AND child_task_id = ?",
+                               (parent_id, child_id))
+                deleted = 1
+            else:
+                cursor.execute("""
+                    INSERT INTO task_relationships (parent_task_id, child_task_id, relationship_type, is_deleted)
+                    VALUES (?, ?, ?, ?)
+                    ON CONFLICT (parent_task_id, child_task_id)
+                        DO UPDATE SET relationship_type = excluded.relationship_type,
+                                      is_deleted = excluded.is_deleted
+                """, (parent_id, child_id, values[0], values[1]))
+            _record(cursor, 'task_relationships', uid, hlc, origin, deleted)
+            applied += 1
+
+        # Το τοπικό ρολόι ποτέ πίσω από ό,τι έχουμε δει (αιτιότητα)
+        cursor.execute("UPDATE replica_meta SET value = MAX(value, ?) WHERE key = 'hlc'", (max_hlc,))
+        cursor.execute("UPDATE replica_meta SET value = 0 WHERE key = 'applying'")
+
+        cursor.execute("""
+            INSERT INTO replica_peers (peer_id, received_seq, sent_seq, last_sync)
+            VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT (peer_id) DO UPDATE SET received_seq = MAX(received_seq, excluded.received_seq),
+                                                sent_seq = MAX(sent_seq, excluded.sent_seq),
+                                                last_sync = CURRENT_TIMESTAMP
+        """, (changeset['source'], changeset['source_seq'], changeset['ack']))
+
+        conn.commit()
+    except sqlite3.Error as e:
+        conn.rollback()
+        logger.error(f"❌ Applying changeset failed: {e}", exc_info=True)
+        raise RuntimeError(f"Σφάλμα εφαρμογής αλλαγών: {str(e)}")
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+    logger.info(f"Changeset from {changeset['source']}: {applied} applied, {skipped} skipped")
+    return {'applied': applied, 'skipped': skipped}
+
+
+def import_changeset(path):
+    """Εφαρμογή changeset από αρχείο"""
+    with open(path, "rb") as f:
+        return apply_changeset(decode_changeset(f.read()))
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# SOCKET TRANSPORT
+# ═══════════════════════════════════════════════════════════════════════════
+
+def _send_frame(sock, data: bytes):
+    sock.sendall(struct.pack("!I", len(data)) + data)
+
+
+def _recv_exact(sock, size):
+    chunks = []
+    while size:
+        chunk = sock.recv(min(size, 65536))
+        if not chunk:
+            raise ConnectionError("Η σύνδεση sync έκλεισε πρόωρα")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+def _recv_frame(sock, limit=MAX_FRAME_BYTES) -> bytes:
+    (size,) = struct.unpack("!I", _recv_exact(sock, 4))
+    if size > limit:
+        raise ConnectionError(f"Frame sync {size} bytes - όριο {limit}")
+    return _recv_exact(sock, size)
+
+
+def _recv_json(sock) -> dict:
+    message = json.loads(_recv_frame(sock, MAX_HELLO_BYTES))
+    if not isinstance(message, dict):
+        raise ConnectionError("Μη έγκυρο μήνυμα sync")
+    return message
+
+
+def _proof(secret, role, *parts):
+    """HMAC-SHA256 του ρόλου και των nonces/ids με το κοινό secret"""
+    if secret is None:
+        return None
+    message = "|".join((role,) + parts).encode("utf-8")
+    return hmac.new(secret.encode("utf-8"), message, hashlib.sha256).hexdigest()
+
+
+def _check_proof(expected, received):
+    if expected is not None and not (isinstance(received, str)
+                                     and hmac.compare_digest(expected, received)):
+        raise PermissionError("Αποτυχία πιστοποίησης sync (λάθος secret)")
+
+
+def is_known_peer(peer_id):
+    """Η replica έχει εγγραφή στο replica_peers (clone_replica ή προηγούμενο sync)"""
+    conn = database.get_connection()
+    try:
+        init_replica(conn)
+        cursor = conn.cursor()
+        cursor.execute("SELECT 1 FROM replica_peers WHERE peer_id = ?", (peer_id,))
+        return cursor.fetchone() is not None
+    finally:
+        conn.close()
+
+
+class _SyncHandler(socketserver.BaseRequestHandler):
+    """
+    Server πλευρά: hello → πιστοποίηση → λήψη changeset client → αποστολή
+    δικού μας. Κανένα changeset δεν διαβάζεται πριν την πιστοποίηση.
+    """
+
+    def handle(self):
+        address = self.client_address[0]
+        secret = self.server.sync_secret
+        try:
+            hello = _recv_json(self.request)
+            peer_id, peer_nonce = hello.get('replica_id'), hello.get('nonce')
+            if not isinstance(peer_id, str) or not isinstance(peer_nonce, str):
+                raise ConnectionError("Μη έγκυρο hello")
+            if not is_known_peer(peer_id):
+                raise PermissionError(f"Άγνωστη replica {peer_id}")
+
+            local_id = get_replica_id()
+            nonce = os.urandom(16).hex()
+            _send_frame(self.request, json.dumps({
+                'replica_id': local_id, 'nonce': nonce,
+                'proof': _proof(secret, "server", peer_nonce, nonce, local_id),
+            }).encode())
+            _check_proof(_proof(secret, "client", nonce, peer_nonce, peer_id),
+                         _recv_json(self.request).get('proof'))
+
+            changeset = decode_changeset(_recv_frame(self.request))
+            if changeset.get('source') != peer_id:
+                raise PermissionError("Το changeset δεν προέρχεται από την πιστοποιημένη replica")
+            received = apply_changeset(changeset)
+            _send_frame(self.request, encode_changeset(build_changeset(peer_id)))
+            logger.info(f"Sync with {peer_id} ({address}): {received}")
+        except PermissionError as e:
+            logger.warning(f"⚠️ Sync session from {address} rejected: {e}")
+        except (ConnectionError, ValueError, database.ValidationError) as e:
+            # Πρωτόκολλο / δεδομένα του peer - χωρίς traceback
+            logger.warning(f"⚠️ Sync session from {address} aborted: {e}")
+        except Exception as e:
+            logger.error(f"❌ Sync session from {address} failed: {e}", exc_info=True)
+
+
+def serve_sync(host=DEFAULT_SYNC_HOST, port=DEFAULT_SYNC_PORT, secret=None):
+    """
+    Sync server σε background thread (sessions σειριακά - ένα transaction τη φορά).
+
+    Δέχεται μόνο γνωστές replicas. Για σύνδεση από το δίκτυο (host εκτός
+    loopback) δώστε και κοινό `secret` - το replica_id μόνο του ταξιδεύει
+    χωρίς κρυπτογράφηση.
+    """
+    server = socketserver.TCPServer((host, port), _SyncHandler)
+    server.sync_secret = secret
+    if secret is None and host not in ("127.0.0.1", "localhost", "::1"):
+        logger.warning(f"⚠️ Replica sync on {host} without secret - only the replica_id is checked")
+    threading.Thread(target=server.serve_forever, name="replica-sync", daemon=True).start()
+    logger.info(f"Replica sync listening on {host}:{server.server_address[1]}")
+    return server
+
+
+def sync_with(host, port=DEFAULT_SYNC_PORT, timeout=30.0, secret=None):
+    """
+    Αμφίδρομο sync με replica που τρέχει serve_sync (ίδιο `secret` με τον
+    server, αν έχει).
+
+    Returns:
+        dict: {'sent': {...}, 'received': {...}, 'bytes_sent', 'bytes_received'}
+    """
+    with socket.create_connection((host, port), timeout=timeout) as sock:
+        local_id = get_replica_id()
+        nonce = os.urandom(16).hex()
+        _send_frame(sock, json.dumps({'replica_id': local_id, 'nonce': nonce}).encode())
+        hello = _recv_json(sock)
+        peer_id, peer_nonce = hello.get('replica_id'), hello.get('nonce')
+        if not isinstance(peer_id, str) or not isinstance(peer_nonce, str):
+            raise ConnectionError("Μη έγκυρη απάντηση sync")
+        _check_proof(_proof(secret, "server", nonce, peer_nonce, peer_id), hello.get('proof'))
+        _send_frame(sock, json.dumps({'proof': _proof(secret, "client", peer_nonce, nonce, local_id)}).encode())
+
+        outgoing = build_changeset(peer_id)
+        data = encode_changeset(outgoing)
+        _send_frame(sock, data)
+
+        incoming = _recv_frame(sock)
+        changeset = decode_changeset(incoming)
+        if changeset.get('source') != peer_id:
+            raise PermissionError("Το changeset δεν προέρχεται από τον server του sync")
+        received = apply_changeset(changeset)
+
+    result = {
+        'sent': {'locations': len(outgoing['locations']), 'tasks': len(outgoing['tasks']),
+                 'relationships': len(outgoing['relationships'])},
+        'received': received,
+        'bytes_sent': len(data),
+        'bytes_received': len(incoming),
+    }
+    logger.info(f"Sync with {peer_id}: {result}")
+    return result
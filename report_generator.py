@@ -0,0 +1,795 @@
+"""
+Maintenance Report Generator
+============================
+
+PDF αναφορές συντήρησης ανά μονάδα και ανά ομάδα.
+
+Features:
+---------
+- Aggregates ανά μονάδα σε ΕΝΑ SQL pass (counts ανά τύπο, ανοιχτές βλάβες,
+  MTTR από αλυσίδες Βλάβη → Επισκευή, τελευταίο Service)
+- Persistent cache (πίνακας report_unit_cache) - triggers σημαδεύουν ως
+  "dirty" μόνο τις μονάδες που άλλαξαν, οπότε οι αμετάβλητες μονάδες
+  δεν ξαναϋπολογίζονται
+- Minimal PDF writer (μόνο stdlib) με σελιδοποίηση και ελληνικά
+  (ενσωμάτωση TrueType γραμματοσειράς όταν υπάρχει στο σύστημα)
+
+Usage:
+------
+    import report_generator
+
+    # Αναφορά ανά μονάδα
+    report_generator.generate_unit_report("units_report.pdf")
+
+    # Αναφορά ανά ομάδα
+    report_generator.generate_group_report("groups_report.pdf")
+"""
+
+import json
+import os
+import struct
+import zlib
+from datetime import datetime
+from typing import Optional, List, Dict, Any, Iterable
+
+import database_refactored as database
+import logger_config
+
+logger = logger_config.get_logger(__name__)
+
+# ═══════════════════════════════════════════════════════════════════════════
+# CONFIGURATION
+# ═══════════════════════════════════════════════════════════════════════════
+
+FAULT_TYPE_NAME = "Βλάβη"
+REPAIR_TYPE_NAME = "Επισκευή"
+SERVICE_TYPE_NAME = "Service"
+
+# A4 σε points
+PAGE_WIDTH = 595
+PAGE_HEIGHT = 842
+PAGE_MARGIN = 40
+
+# Γραμματοσειρές με ελληνικά (η πρώτη που υπάρχει χρησιμοποιείται)
+FONT_CANDIDATES = [
+    (r"C:\Windows\Fonts\segoeui.ttf", r"C:\Windows\Fonts\segoeuib.ttf"),
+    (r"C:\Windows\Fonts\arial.ttf", r"C:\Windows\Fonts\arialbd.ttf"),
+    ("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf"),
+    ("/Library/Fonts/Arial Unicode.ttf", None),
+    ("/System/Library/Fonts/Supplemental/Arial.ttf", "/System/Library/Fonts/Supplemental/Arial Bold.ttf"),
+]
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# AGGREGATE CACHE
+# ═══════════════════════════════════════════════════════════════════════════
+
+def init_report_cache(conn=None):
+    """
+    Δημιουργία του πίνακα cache και των triggers που τον κρατάνε ενημερωμένο.
+
+    Οι triggers ΔΕΝ ξαναϋπολογίζουν τίποτα - απλά σημαδεύουν τη μονάδα ως
+    dirty, ώστε η επόμενη αναφορά να ξαναϋπολογίσει μόνο αυτήν.
+    """
+    own_conn = conn is None
+    if own_conn:
+        conn = database.get_connection()
+
+    cursor = conn.cursor()
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS report_unit_cache (
+            unit_id INTEGER PRIMARY KEY,
+            aggregates TEXT,
+            is_dirty INTEGER NOT NULL DEFAULT 1,
+            computed_at TIMESTAMP
+        )
+    """)
+
+    cursor.executescript("""
+        CREATE TRIGGER IF NOT EXISTS trg_report_cache_task_insert
+        AFTER INSERT ON tasks
+        BEGIN
+            UPDATE report_unit_cache SET is_dirty = 1 WHERE unit_id = NEW.unit_id;
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_report_cache_task_update
+        AFTER UPDATE ON tasks
+        BEGIN
+            UPDATE report_unit_cache SET is_dirty = 1 WHERE unit_id IN (OLD.unit_id, NEW.unit_id);
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_report_cache_task_delete
+        AFTER DELETE ON tasks
+        BEGIN
+            UPDATE report_unit_cache SET is_dirty = 1 WHERE unit_id = OLD.unit_id;
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_report_cache_rel_insert
+        AFTER INSERT ON task_relationships
+        BEGIN
+            UPDATE report_unit_cache SET is_dirty = 1
+            WHERE unit_id IN (SELECT unit_id FROM tasks WHERE id IN (NEW.parent_task_id, NEW.child_task_id));
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_report_cache_rel_update
+        AFTER UPDATE ON task_relationships
+        BEGIN
+            UPDATE report_unit_cache SET is_dirty = 1
+            WHERE unit_id IN (SELECT unit_id FROM tasks
+                              WHERE id IN (OLD.parent_task_id, OLD.child_task_id,
+                                           NEW.parent_task_id, NEW.child_task_id));
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_report_cache_rel_delete
+        AFTER DELETE ON task_relationships
+        BEGIN
+            UPDATE report_unit_cache SET is_dirty = 1
+            WHERE unit_id IN (SELECT unit_id FROM tasks WHERE id IN (OLD.parent_task_id, OLD.child_task_id));
+        END;
+    """)
+
+    if own_conn:
+        conn.commit()
+        conn.close()
+
+
+def refresh_unit_aggregates(conn) -> int:
+    """
+    Ξαναϋπολογίζει τα aggregates ΜΟΝΟ για τις dirty/νέες μονάδες.
+
+    Όλες οι dirty μονάδες υπολογίζονται μαζί σε ένα SQL pass
+    (GROUP BY unit, task type) - ποτέ query ανά εργασία ή ανά μονάδα.
+
+    Returns:
+        int: Πλήθος μονάδων που ξαναϋπολογίστηκαν
+    """
+    cursor = conn.cursor()
+
+    # Νέες μονάδες μπαίνουν στο cache ως dirty
+    cursor.execute("""
+        INSERT OR IGNORE INTO report_unit_cache (unit_id, is_dirty)
+        SELECT id, 1 FROM units
+    """)
+
+    cursor.execute("SELECT unit_id FROM report_unit_cache WHERE is_dirty = 1")
+    stale_ids = [row['unit_id'] for row in cursor.fetchall()]
+    if not stale_ids:
+        return 0
+
+    # Με attached archive τα aggregates καλύπτουν και το αρχειοθετημένο ιστορικό
+    sources = database.task_sources(conn)
+    cursor.execute(f"""
+        WITH stale AS (
+            SELECT unit_id FROM report_unit_cache WHERE is_dirty = 1
+        ),
+        repairs AS (
+            SELECT f.unit_id,
+                   COUNT(*) AS repair_count,
+                   SUM(MAX(julianday(COALESCE(r.completed_date, r.created_date))
+                           - julianday(f.created_date), 0)) AS repair_days
+            FROM {sources['task_relationships']} tr
+                     JOIN {sources['tasks']} f ON f.id = tr.parent_task_id
+                     JOIN {sources['tasks']} r ON r.id = tr.child_task_id
+                     JOIN task_types ft ON ft.id = f.task_type_id
+                     JOIN task_types rt ON rt.id = r.task_type_id
+            WHERE tr.is_deleted = 0
+              AND f.is_deleted = 0
+              AND r.is_deleted = 0
+              AND r.status = 'completed'
+              AND ft.name = ?
+              AND rt.name = ?
+              AND f.unit_id IN (SELECT unit_id FROM stale)
+            GROUP BY f.unit_id
+        )
+        SELECT t.unit_id,
+               t.task_type_id,
+               tt.name                                  AS task_type_name,
+               COUNT(*)                                 AS task_count,
+               SUM(t.status = 'pending')                AS pending_count,
+               MAX(CASE WHEN t.status = 'completed'
+                        THEN COALESCE(t.completed_date, t.created_date) END) AS last_completed,
+               MAX(t.created_date)                      AS last_created,
+               rp.repair_count,
+               rp.repair_days
+        FROM {sources['tasks']} t
+                 JOIN task_types tt ON tt.id = t.task_type_id
+                 LEFT JOIN repairs rp ON rp.unit_id = t.unit_id
+        WHERE t.is_deleted = 0
+          AND t.unit_id IN (SELECT unit_id FROM stale)
+        GROUP BY t.unit_id, t.task_type_id
+    """, (FAULT_TYPE_NAME, REPAIR_TYPE_NAME))
+
+    aggregates = {unit_id: _empty_aggregate() for unit_id in stale_ids}
+
+    for row in cursor.fetchall():
+        agg = aggregates.setdefault(row['unit_id'], _empty_aggregate())
+        agg['by_type'][str(row['task_type_id'])] = row['task_count']
+        agg['total'] += row['task_count']
+        agg['pending'] += row['pending_count'] or 0
+        agg['repair_count'] = row['repair_count'] or 0
+        agg['repair_days'] = row['repair_days'] or 0.0
+
+        if row['last_created'] and (agg['last_activity'] is None or row['last_created'] > agg['last_activity']):
+            agg['last_activity'] = row['last_created']
+
+        if row['task_type_name'] == FAULT_TYPE_NAME:
+            agg['open_faults'] += row['pending_count'] or 0
+        elif row['task_type_name'] == SERVICE_TYPE_NAME:
+            agg['last_service'] = row['last_completed']
+
+    cursor.executemany("""
+        UPDATE report_unit_cache
+        SET aggregates = ?, is_dirty = 0, computed_at = CURRENT_TIMESTAMP
+        WHERE unit_id = ?
+    """, [(json.dumps(agg), unit_id) for unit_id, agg in aggregates.items()])
+
+    return len(stale_ids)
+
+
+def get_unit_aggregates(unit_ids: Optional[Iterable[int]] = None,
+                        group_ids: Optional[Iterable[int]] = None) -> List[Dict[str, Any]]:
+    """
+    Επιστρέφει τα (cached) aggregates ανά ενεργή μονάδα.
+
+    Args:
+        unit_ids: Προαιρετικό φίλτρο μονάδων
+        group_ids: Προαιρετικό φίλτρο ομάδων
+
+    Returns:
+        List[Dict]: Μία εγγραφή ανά μονάδα, ταξινομημένες ανά ομάδα/όνομα
+    """
+    conn = database.get_connection()
+    try:
+        init_report_cache(conn)
+        if database.get_archive_state(conn):
+            database.attach_archive(conn)
+
+        # BEGIN IMMEDIATE: καμία εγγραφή δεν μπαίνει ανάμεσα σε υπολογισμό και is_dirty = 0
+        conn.execute("BEGIN IMMEDIATE")
+        recomputed = refresh_unit_aggregates(conn)
+        conn.commit()
+
+        query = """
+            SELECT u.id, u.name, u.location, u.group_id, g.name AS group_name, c.aggregates
+            FROM units u
+                     JOIN groups g ON u.group_id = g.id
+                     JOIN report_unit_cache c ON c.unit_id = u.id
+            WHERE u.is_active = 1
+        """
+        params: List[Any] = []
+
+        if unit_ids:
+            unit_ids = list(unit_ids)
+            query += f" AND u.id IN ({','.join('?' * len(unit_ids))})"
+            params.extend(unit_ids)
+
+        if group_ids:
+            group_ids = list(group_ids)
+            query += f" AND u.group_id IN ({','.join('?' * len(group_ids))})"
+            params.extend(group_ids)
+
+        query += " ORDER BY g.name, u.name"
+
+        rows = conn.execute(query, params).fetchall()
+    finally:
+        conn.close()
+
+    logger.info(f"Report aggregates: {len(rows)} unit(s), {recomputed} recomputed")
+
+    units = []
+    for row in rows:
+        unit = dict(row)
+        unit.update(json.loads(unit.pop('aggregates')))
+        unit['mttr_days'] = _mttr(unit['repair_days'], unit['repair_count'])
+        units.append(unit)
+    return units
+
+
+def get_group_aggregates(group_ids: Optional[Iterable[int]] = None) -> List[Dict[str, Any]]:
+    """Aggregates ανά ομάδα - συνδυασμός των (cached) aggregates των μονάδων της"""
+    groups: Dict[int, Dict[str, Any]] = {}
+
+    for unit in get_unit_aggregates(group_ids=group_ids):
+        group = groups.get(unit['group_id'])
+        if group is None:
+            group = _empty_aggregate()
+            group.update({'id': unit['group_id'], 'name': unit['group_name'], 'unit_count': 0})
+            groups[unit['group_id']] = group
+
+        group['unit_count'] += 1
+        for key in ('total', 'pending', 'open_faults', 'repair_count', 'repair_days'):
+            group[key] += unit[key]
+        for type_id, count in unit['by_type'].items():
+            group['by_type'][type_id] = group['by_type'].get(type_id, 0) + count
+        for key in ('last_service', 'last_activity'):
+            if unit[key] and (group[key] is None or unit[key] > group[key]):
+                group[key] = unit[key]
+
+    result = sorted(groups.values(), key=lambda g: g['name'])
+    for group in result:
+        group['mttr_days'] = _mttr(group['repair_days'], group['repair_count'])
+    return result
+
+
+def _empty_aggregate() -> Dict[str, Any]:
+    return {
+        'by_type': {},
+        'total': 0,
+        'pending': 0,
+        'open_faults': 0,
+        'repair_count': 0,
+        'repair_days': 0.0,
+        'last_service': None,
+        'last_activity': None,
+    }
+
+
+def _mttr(repair_days, repair_count):
+    return repair_days / repair_count if repair_count else None
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# MINIMAL PDF WRITER
+# ═══════════════════════════════════════════════════════════════════════════
+
+class _TrueTypeFont:
+    """
+    Ελάχιστος TrueType parser - μόνο ό,τι χρειάζεται για ενσωμάτωση σε PDF
+    (cmap για unicode → glyph id, hmtx για πλάτη, head/hhea για metrics).
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self.data = f.read()
+
+        self.tables = {}
+        num_tables = struct.unpack('>H', self.data[4:6])[0]
+        for i in range(num_tables):
+            tag, _checksum, offset, length = struct.unpack('>4sIII', self.data[12 + 16 * i:28 + 16 * i])
+            self.tables[tag.decode('latin-1')] = (offset, length)
+
+        head = self.tables['head'][0]
+        self.units_per_em = struct.unpack('>H', self.data[head + 18:head + 20])[0]
+        self.bbox = [self._scale(v) for v in struct.unpack('>hhhh', self.data[head + 36:head + 44])]
+
+        hhea = self.tables['hhea'][0]
+        ascent, descent = struct.unpack('>hh', self.data[hhea + 4:hhea + 8])
+        self.ascent = self._scale(ascent)
+        self.descent = self._scale(descent)
+        num_hmetrics = struct.unpack('>H', self.data[hhea + 34:hhea + 36])[0]
+
+        hmtx = self.tables['hmtx'][0]
+        self.advances = [struct.unpack('>H', self.data[hmtx + 4 * i:hmtx + 4 * i + 2])[0]
+                         for i in range(num_hmetrics)]
+
+        self.cmap = self._parse_cmap()
+        self.used = {}  # glyph id -> unicode char
+        self.compressed = None
+
+    def _scale(self, value):
+        return int(round(value * 1000 / self.units_per_em))
+
+    def _parse_cmap(self):
+        base = self.tables['cmap'][0]
+        num = struct.unpack('>H', self.data[base + 2:base + 4])[0]
+        subtables = {}
+        for i in range(num):
+            platform, encoding, offset = struct.unpack('>HHI', self.data[base + 4 + 8 * i:base + 12 + 8 * i])
+            subtables[(platform, encoding)] = base + offset
+
+        for key in ((3, 10), (0, 4), (3, 1), (0, 3)):
+            if key not in subtables:
+                continue
+            offset = subtables[key]
+            fmt = struct.unpack('>H', self.data[offset:offset + 2])[0]
+            if fmt == 4:
+                return self._parse_cmap_format4(offset)
+            if fmt == 12:
+                return self._parse_cmap_format12(offset)
+        raise ValueError("Unsupported cmap")
+
+    def _parse_cmap_format4(self, offset):
+        data = self.data
+        seg_count = struct.unpack('>H', data[offset + 6:offset + 8])[0] // 2
+        ends_at = offset + 14
+        starts_at = ends_at + 2 * seg_count + 2
+        deltas_at = starts_at + 2 * seg_count
+        range_offsets_at = deltas_at + 2 * seg_count
+
+        mapping = {}
+        for i in range(seg_count):
+            end = struct.unpack('>H', data[ends_at + 2 * i:ends_at + 2 * i + 2])[0]
+            start = struct.unpack('>H', data[starts_at + 2 * i:starts_at + 2 * i + 2])[0]
+            delta = struct.unpack('>h', data[deltas_at + 2 * i:deltas_at + 2 * i + 2])[0]
+            range_pos = range_offsets_at + 2 * i
+            range_offset = struct.unpack('>H', data[range_pos:range_pos + 2])[0]
+
+            for code in range(start, min(end, 0xFFFE) + 1):
+                if range_offset == 0:
+                    glyph = (code + delta) & 0xFFFF
+                else:
+                    glyph_pos = range_pos + range_offset + 2 * (code - start)
+                    glyph = struct.unpack('>H', data[glyph_pos:glyph_pos + 2])[0]
+                    if glyph:
+                        glyph = (glyph + delta) & 0xFFFF
+                if glyph:
+                    mapping[code] = glyph
+        return mapping
+
+    def _parse_cmap_format12(self, offset):
+        n_groups = struct.unpack('>I', self.data[offset + 12:offset + 16])[0]
+        mapping = {}
+        for i in range(n_groups):
+            start, end, glyph = struct.unpack('>III', self.data[offset + 16 + 12 * i:offset + 28 + 12 * i])
+            for code in range(start, min(end, 0x2FFFF) + 1):
+                mapping[code] = glyph + code - start
+        return mapping
+
+    def glyph_width(self, glyph):
+        advance = self.advances[glyph] if glyph < len(self.advances) else self.advances[-1]
+        return self._scale(advance)
+
+    def encode(self, text):
+        glyphs = []
+        for char in text:
+            glyph = self.cmap.get(ord(char), 0)
+            self.used.setdefault(glyph, char)
+            glyphs.append(glyph)
+        return '<' + ''.join(f'{g:04X}' for g in glyphs) + '>'
+
+    def text_width(self, text, size):
+        return sum(self.glyph_width(self.cmap.get(ord(c), 0)) for c in text) * size / 1000
+
+
+class _StandardFont:
+    """Fallback: Helvetica (WinAnsi) με μεταγραφή ελληνικών σε λατινικά"""
+
+    GREEKLISH = str.maketrans({
+        'Α': 'A', 'Β': 'V', 'Γ': 'G', 'Δ': 'D', 'Ε': 'E', 'Ζ': 'Z', 'Η': 'I', 'Θ': 'Th', 'Ι': 'I',
+        'Κ': 'K', 'Λ': 'L', 'Μ': 'M', 'Ν': 'N', 'Ξ': 'X', 'Ο': 'O', 'Π': 'P', 'Ρ': 'R', 'Σ': 'S',
+        'Τ': 'T', 'Υ': 'Y', 'Φ': 'F', 'Χ': 'Ch', 'Ψ': 'Ps', 'Ω': 'O',
+        'α': 'a', 'β': 'v', 'γ': 'g', 'δ': 'd', 'ε': 'e', 'ζ': 'z', 'η': 'i', 'θ': 'th', 'ι': 'i',
+        'κ': 'k', 'λ': 'l', 'μ': 'm', 'ν': 'n', 'ξ': 'x', 'ο': 'o', 'π': 'p', 'ρ': 'r', 'σ': 's',
+        'ς': 's', 'τ': 't', 'υ': 'y', 'φ': 'f', 'χ': 'ch', 'ψ': 'ps', 'ω': 'o',
+        'ά': 'a', 'έ': 'e', 'ή': 'i', 'ί': 'i', 'ό': 'o', 'ύ': 'y', 'ώ': 'o', 'ϊ': 'i', 'ϋ': 'y',
+        'ΐ': 'i', 'ΰ': 'y', 'Ά': 'A', 'Έ': 'E', 'Ή': 'I', 'Ί': 'I', 'Ό': 'O', 'Ύ': 'Y', 'Ώ': 'O',
+        '→': '->', '•': '-', '—': '-',
+    })
+
+    def __init__(self, name):
+        self.name = name
+
+    def encode(self, text):
+        raw = text.translate(self.GREEKLISH).encode('cp1252', errors='replace').decode('cp1252')
+        return '(' + raw.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)') + ')'
+
+    def text_width(self, text, size):
+        return len(text.translate(self.GREEKLISH)) * size * 0.5
+
+
+class PDFWriter:
+    """
+    Minimal PDF writer (stdlib μόνο).
+
+    Υποστηρίζει σελίδες A4, κείμενο (regular/bold), γραμμές και
+    συμπιεσμένα (FlateDecode) content streams.
+    """
+
+    _font_cache: Dict[str, Any] = {}
+
+    def __init__(self):
+        self.pages: List[List[str]] = []
+        self.fonts = self._load_fonts()
+        for font in self.fonts.values():
+            if isinstance(font, _TrueTypeFont):
+                font.used = {}
+
+    @classmethod
+    def _load_fonts(cls):
+        # Το parsing της γραμματοσειράς γίνεται μία φορά ανά process
+        if cls._font_cache:
+            return dict(cls._font_cache)
+
+        for regular_path, bold_path in FONT_CANDIDATES:
+            if regular_path and os.path.exists(regular_path):
+                try:
+                    regular = _TrueTypeFont(regular_path)
+                    bold = _TrueTypeFont(bold_path) if bold_path and os.path.exists(bold_path) else regular
+                    cls._font_cache.update({'F1': regular, 'F2': bold})
+                    return dict(cls._font_cache)
+                except Exception as e:
+                    logger.warning(f"Could not load font {regular_path}: {e}")
+
+        logger.warning("No TrueType font found - PDF will use Helvetica with transliteration")
+        cls._font_cache.update({'F1': _StandardFont('Helvetica'), 'F2': _StandardFont('Helvetica-Bold')})
+        return dict(cls._font_cache)
+
+    def add_page(self):
+        self.pages.append([])
+
+    def text(self, x, y, text, size=10, bold=False, page=None):
+        key = 'F2' if bold else 'F1'
+        encoded = self.fonts[key].encode(text)
+        target = self.pages[-1] if page is None else self.pages[page]
+        target.append(f"BT /{key} {size} Tf {x:.2f} {y:.2f} Td {encoded} Tj ET")
+
+    def line(self, x1, y1, x2, y2, width=0.5):
+        self.pages[-1].append(f"{width} w {x1:.2f} {y1:.2f} m {x2:.2f} {y2:.2f} l S")
+
+    def text_width(self, text, size=10, bold=False):
+        return self.fonts['F2' if bold else 'F1'].text_width(text, size)
+
+    def fit_text(self, text, max_width, size=10, bold=False):
+        """Κόβει το κείμενο ώστε να χωράει σε max_width points"""
+        text = str(text)
+        if self.text_width(text, size, bold) <= max_width:
+            return text
+        while text and self.text_width(text + '…', size, bold) > max_width:
+            text = text[:-1]
+        return text + '…'
+
+    def save(self, path):
+        objects: List[bytes] = []
+
+        def add(obj: bytes) -> int:
+            objects.append(obj)
+            return len(objects)
+
+        def add_stream(data: bytes, extra: str = '', compressed: Optional[bytes] = None) -> int:
+            compressed = compressed if compressed is not None else zlib.compress(data)
+            return add(f"<< /Length {len(compressed)} /Filter /FlateDecode {extra}>>\nstream\n".encode()
+                       + compressed + b"\nendstream")
+
+        catalog_id = add(b'')  # placeholder
+        pages_id = add(b'')    # placeholder
+
+        # Content streams ΠΡΙΝ από τα fonts - γεμίζουν το 'used' των TrueType fonts.
+        # cp1252 = WinAnsiEncoding του fallback (…, €, “ ” δεν υπάρχουν στο latin-1)
+        content_ids = [add_stream('\n'.join(ops).encode('cp1252')) for ops in self.pages]
+
+        font_refs = []
+        written = {}
+        for key, font in self.fonts.items():
+            if id(font) not in written:
+                written[id(font)] = self._write_font(font, add, add_stream)
+            font_refs.append(f"/{key} {written[id(font)]} 0 R")
+
+        page_ids = []
+        for content_id in content_ids:
+            page_ids.append(add(
+                f"<< /Type /Page /Parent {pages_id} 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] "
+                f"/Resources << /Font << {' '.join(font_refs)} >> >> /Contents {content_id} 0 R >>".encode()
+            ))
+
+        objects[catalog_id - 1] = f"<< /Type /Catalog /Pages {pages_id} 0 R >>".encode()
+        objects[pages_id - 1] = (f"<< /Type /Pages /Kids [{' '.join(f'{p} 0 R' for p in page_ids)}] "
+                                 f"/Count {len(page_ids)} >>").encode()
+
+        out = bytearray(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        offsets = []
+        for number, obj in enumerate(objects, 1):
+            offsets.append(len(out))
+            out += f"{number} 0 obj\n".encode() + obj + b"\nendobj\n"
+
+        xref_at = len(out)
+        out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+        for offset in offsets:
+            out += f"{offset:010d} 00000 n \n".encode()
+        out += (f"trailer\n<< /Size {len(objects) + 1} /Root {catalog_id} 0 R >>\n"
+                f"startxref\n{xref_at}\n%%EOF\n").encode()
+
+        with open(path, 'wb') as f:
+            f.write(out)
+
+    @staticmethod
+    def _write_font(font, add, add_stream) -> int:
+        if isinstance(font, _StandardFont):
+            return add(f"<< /Type /Font /Subtype /Type1 /BaseFont /{font.name} "
+                       f"/Encoding /WinAnsiEncoding >>".encode())
+
+        if font.compressed is None:
+            font.compressed = zlib.compress(font.data)
+        file_id = add_stream(font.data, f"/Length1 {len(font.data)} ", compressed=font.compressed)
+        descriptor_id = add(
+            f"<< /Type /FontDescriptor /FontName /HVACRFont{id(font) % 10000} /Flags 32 "
+            f"/FontBBox [{' '.join(map(str, font.bbox))}] /ItalicAngle 0 /Ascent {font.ascent} "
+            f"/Descent {font.descent} /CapHeight {font.ascent} /StemV 80 /FontFile2 {file_id} 0 R >>".encode()
+        )
+
+        glyphs = sorted(font.used)
+        widths = ' '.join(f"{g} [{font.glyph_width(g)}]" for g in glyphs)
+        cid_id = add(
+            f"<< /Type /Font /Subtype /CIDFontType2 /BaseFont /HVACRFont{id(font) % 10000} "
+            f"/CIDSystemInfo << /Registry (Adobe) /Ordering (Identity) /Supplement 0 >> "
+            f"/FontDescriptor {descriptor_id} 0 R /CIDToGIDMap /Identity /W [{widths}] >>".encode()
+        )
+
+        # ToUnicode: επιτρέπει copy/paste & αναζήτηση κειμένου στο PDF
+        cmap_lines = ["/CIDInit /ProcSet findresource begin", "12 dict begin", "begincmap",
+                      "/CIDSystemInfo << /Registry (Adobe) /Ordering (UCS) /Supplement 0 >> def",
+                      "/CMapName /Adobe-Identity-UCS def", "/CMapType 2 def",
+                      "1 begincodespacerange", "<0000> <FFFF>", "endcodespacerange"]
+        for start in range(0, len(glyphs), 100):
+            chunk = glyphs[start:start + 100]
+            cmap_lines.append(f"{len(chunk)} beginbfchar")
+            for g in chunk:
+                utf16 = font.used[g].encode('utf-16-be').hex().upper()
+                cmap_lines.append(f"<{g:04X}> <{utf16}>")
+            cmap_lines.append("endbfchar")
+        cmap_lines += ["endcmap", "CMapName currentdict /CMap defineresource pop", "end", "end"]
+        to_unicode_id = add_stream('\n'.join(cmap_lines).encode('latin-1'))
+
+        return add(
+            f"<< /Type /Font /Subtype /Type0 /BaseFont /HVACRFont{id(font) % 10000} /Encoding /Identity-H "
+            f"/DescendantFonts [{cid_id} 0 R] /ToUnicode {to_unicode_id} 0 R >>".encode()
+        )
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# REPORT LAYOUT
+# ═══════════════════════════════════════════════════════════════════════════
+
+class _ReportLayout:
+    """Σελιδοποίηση: τίτλοι, πίνακες με επανάληψη header σε κάθε νέα σελίδα"""
+
+    LINE_HEIGHT = 14
+
+    def __init__(self, title):
+        self.pdf = PDFWriter()
+        self.title = title
+        self.columns = None
+        self.y = 0
+        self._new_page()
+
+    def _new_page(self):
+        self.pdf.add_page()
+        self.pdf.text(PAGE_MARGIN, PAGE_HEIGHT - PAGE_MARGIN, self.title, size=14, bold=True)
+        self.pdf.text(PAGE_MARGIN, PAGE_HEIGHT - PAGE_MARGIN - 16,
+                      f"Ημερομηνία: {datetime.now().strftime('%d/%m/%y %H:%M')}", size=8)
+        self.y = PAGE_HEIGHT - PAGE_MARGIN - 40
+        if self.columns:
+            self._draw_header()
+
+    def _ensure_space(self, lines=1):
+        if self.y - lines * self.LINE_HEIGHT < PAGE_MARGIN + 20:
+            self._new_page()
+
+    def heading(self, text):
+        self.columns = None
+        self._ensure_space(3)
+        self.y -= 6
+        self.pdf.text(PAGE_MARGIN, self.y, text, size=12, bold=True)
+        self.y -= self.LINE_HEIGHT + 2
+
+    def table(self, columns):
+        """columns: λίστα από (τίτλος, πλάτος σε points, 'l'/'r')"""
+        self.columns = columns
+        self._ensure_space(2)
+        self._draw_header()
+
+    def _draw_header(self):
+        self._cells([c[0] for c in self.columns], bold=True)
+        self.pdf.line(PAGE_MARGIN, self.y + 10, PAGE_WIDTH - PAGE_MARGIN, self.y + 10)
+
+    def row(self, values, note=None):
+        self._ensure_space(2 if note else 1)
+        self._cells(values)
+        if note:
+            self.pdf.text(PAGE_MARGIN + 12, self.y, self.pdf.fit_text(note, PAGE_WIDTH - 2 * PAGE_MARGIN - 12, 7),
+                          size=7)
+            self.y -= self.LINE_HEIGHT - 3
+
+    def _cells(self, values, bold=False):
+        x = PAGE_MARGIN
+        for (title, width, align), value in zip(self.columns, values):
+            text = self.pdf.fit_text('' if value is None else value, width - 4, 8, bold)
+            tx = x + width - 4 - self.pdf.text_width(text, 8, bold) if align == 'r' else x
+            self.pdf.text(tx, self.y, text, size=8, bold=bold)
+            x += width
+        self.y -= self.LINE_HEIGHT
+
+    def save(self, path):
+        total = len(self.pdf.pages)
+        for number in range(total):
+            self.pdf.text(PAGE_WIDTH - PAGE_MARGIN - 60, PAGE_MARGIN - 15,
+                          f"Σελίδα {number + 1}/{total}", size=8, page=number)
+        self.pdf.save(path)
+
+
+def _format_date(date_str):
+    if not date_str:
+        return "—"
+    try:
+        return datetime.strptime(date_str[:10], '%Y-%m-%d').strftime('%d/%m/%y')
+    except ValueError:
+        return date_str
+
+
+def _format_mttr(mttr_days):
+    return "—" if mttr_days is None else f"{mttr_days:.1f}"
+
+
+def _type_breakdown(by_type, type_names):
+    parts = [f"{type_names.get(int(type_id), '?')}: {count}"
+             for type_id, count in sorted(by_type.items(), key=lambda kv: type_names.get(int(kv[0]), ''))]
+    return "  •  ".join(parts)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# PUBLIC API
+# ═══════════════════════════════════════════════════════════════════════════
+
+def generate_unit_report(path: str, unit_ids: Optional[Iterable[int]] = None,
+                         group_ids: Optional[Iterable[int]] = None) -> str:
+    """
+    Δημιουργία PDF αναφοράς ανά μονάδα.
+
+    Args:
+        path: Αρχείο προορισμού (.pdf)
+        unit_ids: Προαιρετικό φίλτρο μονάδων
+        group_ids: Προαιρετικό φίλτρο ομάδων
+
+    Returns:
+        str: Το path του PDF
+    """
+    logger.info(f"Generating unit report: {path}")
+
+    units = get_unit_aggregates(unit_ids=unit_ids, group_ids=group_ids)
+    type_names = {t['id']: t['name'] for t in database.get_all_task_types()}
+
+    layout = _ReportLayout("Αναφορά Συντήρησης ανά Μονάδα")
+    columns = [("Μονάδα", 100, 'l'), ("Τοποθεσία", 105, 'l'), ("Σύνολο", 40, 'r'), ("Εκκρεμείς", 50, 'r'),
+               ("Ανοιχτές Βλάβες", 72, 'r'), ("MTTR (ημ.)", 58, 'r'), ("Τελ. Service", 90, 'r')]
+
+    current_group = None
+    for unit in units:
+        if unit['group_id'] != current_group:
+            current_group = unit['group_id']
+            layout.heading(f"Ομάδα: {unit['group_name']}")
+            layout.table(columns)
+
+        layout.row(
+            [unit['name'], unit.get('location') or "—", unit['total'], unit['pending'], unit['open_faults'],
+             _format_mttr(unit['mttr_days']), _format_date(unit['last_service'])],
+            note=_type_breakdown(unit['by_type'], type_names) or None
+        )
+
+    if not units:
+        layout.heading("Δεν βρέθηκαν μονάδες")
+
+    layout.save(path)
+    logger.info(f"✅ Unit report saved: {path} ({len(layout.pdf.pages)} page(s))")
+    return path
+
+
+def generate_group_report(path: str, group_ids: Optional[Iterable[int]] = None) -> str:
+    """
+    Δημιουργία PDF αναφοράς ανά ομάδα μονάδων.
+
+    Args:
+        path: Αρχείο προορισμού (.pdf)
+        group_ids: Προαιρετικό φίλτρο ομάδων
+
+    Returns:
+        str: Το path του PDF
+    """
+    logger.info(f"Generating group report: {path}")
+
+    groups = get_group_aggregates(group_ids=group_ids)
+    type_names = {t['id']: t['name'] for t in database.get_all_task_types()}
+
+    layout = _ReportLayout("Αναφορά Συντήρησης ανά Ομάδα")
+    layout.heading("Σύνοψη Ομάδων")
+    layout.table([("Ομάδα", 140, 'l'), ("Μονάδες", 50, 'r'), ("Σύνολο", 50, 'r'), ("Εκκρεμείς", 55, 'r'),
+                  ("Ανοιχτές Βλάβες", 80, 'r'), ("MTTR (ημ.)", 55, 'r'), ("Τελ. Service", 85, 'r')])
+
+    for group in groups:
+        layout.row(
+            [group['name'], group['unit_count'], group['total'], group['pending'], group['open_faults'],
+             _format_mttr(group['mttr_days']), _format_date(group['last_service'])],
+            note=_type_breakdown(group['by_type'], type_names) or None
+        )
+
+    layout.save(path)
+    logger.info(f"✅ Group report saved: {path} ({len(layout.pdf.pages)} page(s))")
+    return path
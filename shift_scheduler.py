@@ -0,0 +1,559 @@
+"""
+Shift Roster Engine
+===================
+
+Μηνιαίο πρόγραμμα βαρδιών τεχνικών.
+
+Features:
+---------
+- Μητρώο τεχνικών (αρχικοποίηση από τα tasks.technician_name)
+- Solver: greedy ανάθεση ανά ημέρα + local search για ισοκατανομή
+- Περιορισμοί: μέγιστες βάρδιες/εβδομάδα, μέγιστες συνεχόμενες ημέρες
+  (υποχρεωτικό ρεπό), άδειες ανά τεχνικό, κάλυψη ανά ομάδα
+- Αποθήκευση σε shift_rosters / shift_assignments
+- Ένα query για όλο τον μήνα (για το calendar grid)
+
+Usage:
+------
+    import shift_scheduler
+
+    shift_scheduler.sync_technicians()
+    result = shift_scheduler.generate_roster(2025, 3)
+    roster = shift_scheduler.get_roster_month(2025, 3)
+"""
+
+import calendar
+import random
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, date, timedelta
+from typing import Optional, List, Dict, Any, Set
+
+import database_refactored as database
+import logger_config
+
+logger = logger_config.get_logger(__name__)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# CONFIGURATION
+# ═══════════════════════════════════════════════════════════════════════════
+
+@dataclass
+class ShiftConstraints:
+    """Περιορισμοί προγράμματος βαρδιών"""
+    max_shifts_per_week: int = 5
+    max_consecutive_days: int = 5
+    default_coverage: int = 1                                   # Τεχνικοί/ημέρα ανά ομάδα
+    coverage: Dict[int, int] = field(default_factory=dict)      # group_id -> τεχνικοί/ημέρα
+    days_off: Dict[int, Set[date]] = field(default_factory=dict)  # technician_id -> άδειες
+    local_search_iterations: int = 2000
+
+
+# Ποινή ανά ακάλυπτη θέση (πάντα χειρότερη από οποιαδήποτε ανισοκατανομή)
+UNCOVERED_PENALTY = 10_000
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# SCHEMA
+# ═══════════════════════════════════════════════════════════════════════════
+
+def init_shift_tables(conn=None):
+    """Δημιουργία πινάκων technicians, shift_rosters, shift_assignments"""
+    own_conn = conn is None
+    if own_conn:
+        conn = database.get_connection()
+
+    cursor = conn.cursor()
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS technicians (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL UNIQUE,
+            group_id INTEGER,
+            is_active INTEGER NOT NULL DEFAULT 1,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (group_id) REFERENCES groups (id)
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS shift_rosters (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            year INTEGER NOT NULL,
+            month INTEGER NOT NULL,
+            uncovered INTEGER NOT NULL DEFAULT 0,
+            generated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE (year, month)
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS shift_assignments (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            roster_id INTEGER NOT NULL,
+            shift_date DATE NOT NULL,
+            technician_id INTEGER NOT NULL,
+            group_id INTEGER NOT NULL,
+            FOREIGN KEY (roster_id) REFERENCES shift_rosters (id),
+            FOREIGN KEY (technician_id) REFERENCES technicians (id),
+            FOREIGN KEY (group_id) REFERENCES groups (id),
+            UNIQUE (roster_id, shift_date, technician_id)
+        )
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_shift_assignments_date
+            ON shift_assignments(shift_date, technician_id)
+    """)
+
+    if own_conn:
+        conn.commit()
+        conn.close()
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# TECHNICIANS
+# ═══════════════════════════════════════════════════════════════════════════
+
+def sync_technicians() -> int:
+    """
+    Προσθήκη στο μητρώο όσων ονομάτων τεχνικών υπάρχουν στις εργασίες.
+
+    Returns:
+        int: Πλήθος νέων τεχνικών
+    """
+    conn = database.get_connection()
+    try:
+        init_shift_tables(conn)
+        cursor = conn.cursor()
+        cursor.execute("""
+            INSERT OR IGNORE INTO technicians (name)
+            SELECT DISTINCT TRIM(technician_name)
+            FROM tasks
+            WHERE technician_name IS NOT NULL
+              AND TRIM(technician_name) != ''
+              AND is_deleted = 0
+        """)
+        added = cursor.rowcount
+        conn.commit()
+    finally:
+        conn.close()
+
+    if added:
+        logger.info(f"Technicians synced: {added} new")
+    return added
+
+
+def add_technician(name: str, group_id: Optional[int] = None) -> int:
+    """Προσθήκη τεχνικού (group_id=None: καλύπτει όλες τις ομάδες)"""
+    name = (name or "").strip()
+    if not name:
+        raise database.ValidationError("Το όνομα τεχνικού είναι υποχρεωτικό")
+
+    conn = database.get_connection()
+    try:
+        init_shift_tables(conn)
+        cursor = conn.cursor()
+        cursor.execute("INSERT INTO technicians (name, group_id) VALUES (?, ?)", (name, group_id))
+        technician_id = cursor.lastrowid
+        conn.commit()
+    except database.sqlite3.IntegrityError:
+        raise database.ValidationError(f"Ο τεχνικός '{name}' υπάρχει ήδη")
+    finally:
+        conn.close()
+    return technician_id
+
+
+def set_technician_group(technician_id: int, group_id: Optional[int]) -> bool:
+    """Ορισμός ομάδας ευθύνης τεχνικού"""
+    conn = database.get_connection()
+    try:
+        init_shift_tables(conn)
+        conn.execute("UPDATE technicians SET group_id = ? WHERE id = ?", (group_id, technician_id))
+        conn.commit()
+    finally:
+        conn.close()
+    return True
+
+
+def get_technicians(active_only: bool = True) -> List[Dict[str, Any]]:
+    """Λίστα τεχνικών"""
+    conn = database.get_connection()
+    try:
+        init_shift_tables(conn)
+        cursor = conn.cursor()
+        query = """
+            SELECT t.*, g.name AS group_name
+            FROM technicians t
+                     LEFT JOIN groups g ON t.group_id = g.id
+        """
+        if active_only:
+            query += " WHERE t.is_active = 1"
+        query += " ORDER BY t.name"
+        cursor.execute(query)
+        return [dict(row) for row in cursor.fetchall()]
+    finally:
+        conn.close()
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# SOLVER
+# ═══════════════════════════════════════════════════════════════════════════
+
+class _RosterState:
+    """
+    Εσωτερική κατάσταση του solver.
+
+    Όλα τα δεδομένα είναι σε λίστες με index (τεχνικός, ημέρα), ώστε ο
+    έλεγχος εφικτότητας μιας κίνησης να είναι O(max_consecutive_days).
+    """
+
+    def __init__(self, days, technicians, groups, constraints, history):
+        self.days = days
+        self.n_days = len(days)
+        self.constraints = constraints
+        self.tech_ids = [t['id'] for t in technicians]
+        self.n_techs = len(technicians)
+        self.groups = groups
+
+        # Εβδομάδα (ISO) κάθε ημέρας → index
+        week_keys = []
+        self.week_of = []
+        for d in days:
+            key = d.isocalendar()[:2]
+            if not week_keys or week_keys[-1] != key:
+                week_keys.append(key)
+            self.week_of.append(len(week_keys) - 1)
+        n_weeks = len(week_keys)
+
+        # Ποιος τεχνικός καλύπτει ποια ομάδα
+        self.eligible = {
+            g: [i for i, t in enumerate(technicians) if t['group_id'] is None or t['group_id'] == g]
+            for g in groups
+        }
+
+        self.generalist = [t['group_id'] is None for t in technicians]
+
+        # Άδειες
+        self.off = [[False] * self.n_days for _ in range(self.n_techs)]
+        day_index = {d: k for k, d in enumerate(days)}
+        for i, tech_id in enumerate(self.tech_ids):
+            for d in constraints.days_off.get(tech_id, ()):
+                if d in day_index:
+                    self.off[i][day_index[d]] = True
+
+        # Ιστορικό προηγούμενου μήνα: συνεχόμενες ημέρες & βάρδιες 1ης εβδομάδας
+        self.prev_streak = [history.get('streak', {}).get(t, 0) for t in self.tech_ids]
+        self.week_count = [[0] * n_weeks for _ in range(self.n_techs)]
+        for i, t in enumerate(self.tech_ids):
+            self.week_count[i][0] = history.get('first_week', {}).get(t, 0)
+
+        # assigned[i][k] = group_id ή None
+        self.assigned = [[None] * self.n_days for _ in range(self.n_techs)]
+        self.load = [0] * self.n_techs
+        # slots[k][g] = λίστα τεχνικών (index)
+        self.slots = [{g: [] for g in groups} for _ in range(self.n_days)]
+
+    # ----- Βοηθητικά -----
+
+    def _run_length(self, i, k):
+        """Μήκος συνεχόμενων βαρδιών αν ο τεχνικός i δουλέψει την ημέρα k"""
+        limit = self.constraints.max_consecutive_days
+        left = 0
+        j = k - 1
+        while j >= 0 and self.assigned[i][j] is not None and left <= limit:
+            left += 1
+            j -= 1
+        if j < 0:
+            left += self.prev_streak[i]
+        right = 0
+        j = k + 1
+        while j < self.n_days and self.assigned[i][j] is not None and right <= limit:
+            right += 1
+            j += 1
+        return left + right + 1
+
+    def can_work(self, i, k):
+        if self.assigned[i][k] is not None or self.off[i][k]:
+            return False
+        if self.week_count[i][self.week_of[k]] >= self.constraints.max_shifts_per_week:
+            return False
+        return self._run_length(i, k) <= self.constraints.max_consecutive_days
+
+    def assign(self, i, k, g):
+        self.assigned[i][k] = g
+        self.load[i] += 1
+        self.week_count[i][self.week_of[k]] += 1
+        self.slots[k][g].append(i)
+
+    def unassign(self, i, k):
+        g = self.assigned[i][k]
+        self.assigned[i][k] = None
+        self.load[i] -= 1
+        self.week_count[i][self.week_of[k]] -= 1
+        self.slots[k][g].remove(i)
+
+    def uncovered(self):
+        return sum(
+            max(0, self.groups[g] - len(self.slots[k][g]))
+            for k in range(self.n_days) for g in self.groups
+        )
+
+    def cost(self):
+        return self.uncovered() * UNCOVERED_PENALTY + sum(x * x for x in self.load)
+
+    # ----- Φάσεις -----
+
+    def greedy(self, rng):
+        """Ημέρα-ημέρα: πρώτα οι ομάδες με τους λιγότερους διαθέσιμους"""
+        tiebreak = [rng.random() for _ in range(self.n_techs)]
+        group_order = sorted(self.groups, key=lambda g: len(self.eligible[g]))
+
+        for k in range(self.n_days):
+            for g in group_order:
+                need = self.groups[g] - len(self.slots[k][g])
+                if need <= 0:
+                    continue
+                candidates = [i for i in self.eligible[g] if self.can_work(i, k)]
+                # Λιγότερο φορτωμένοι πρώτα, ειδικευμένοι πριν τους "γενικούς"
+                candidates.sort(key=lambda i: (self.load[i], self.generalist[i], tiebreak[i]))
+                for i in candidates[:need]:
+                    self.assign(i, k, g)
+
+    def fill_gaps(self):
+        """Κάλυψη κενών θέσεων (μετά από αλλαγές του local search)"""
+        filled = 0
+        for k in range(self.n_days):
+            for g in self.groups:
+                while len(self.slots[k][g]) < self.groups[g]:
+                    candidates = [i for i in self.eligible[g] if self.can_work(i, k)]
+                    if not candidates:
+                        break
+                    self.assign(min(candidates, key=lambda i: self.load[i]), k, g)
+                    filled += 1
+        return filled
+
+    def local_search(self, rng):
+        """
+        Μεταφορά βαρδιών από τον πιο φορτωμένο σε λιγότερο φορτωμένο
+        τεχνικό, όσο μειώνεται το άθροισμα τετραγώνων του φόρτου.
+        """
+        iterations = self.constraints.local_search_iterations
+        for _ in range(iterations):
+            if self.n_techs < 2:
+                break
+            order = sorted(range(self.n_techs), key=lambda i: self.load[i])
+            lo_candidates = order[:max(1, self.n_techs // 4)]
+            hi = order[-1]
+            if self.load[hi] - self.load[order[0]] <= 1:
+                break
+
+            moved = False
+            shifts = [k for k in range(self.n_days) if self.assigned[hi][k] is not None]
+            rng.shuffle(shifts)
+            for k in shifts:
+                g = self.assigned[hi][k]
+                for lo in lo_candidates:
+                    if self.load[hi] - self.load[lo] <= 1 or lo not in self.eligible[g]:
+                        continue
+                    if self.can_work(lo, k):
+                        self.unassign(hi, k)
+                        self.assign(lo, k, g)
+                        moved = True
+                        break
+                if moved:
+                    break
+
+            if not moved:
+                # Ο πιο φορτωμένος δεν μπορεί να δώσει βάρδια - δοκιμάζουμε
+                # να κλείσουμε κενά με τη νέα κατανομή και σταματάμε
+                break
+
+        self.fill_gaps()
+
+
+def solve_roster(year: int, month: int, technicians: List[Dict[str, Any]], group_ids: List[int],
+                 constraints: Optional[ShiftConstraints] = None,
+                 history: Optional[Dict[str, Dict[int, int]]] = None,
+                 seed: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Επίλυση προγράμματος μήνα (χωρίς πρόσβαση σε database).
+
+    Args:
+        year, month: Μήνας προγράμματος
+        technicians: [{'id', 'group_id'}, ...] (group_id=None: όλες οι ομάδες)
+        group_ids: Ομάδες που χρειάζονται κάλυψη
+        constraints: ShiftConstraints
+        history: {'streak': {tech_id: συνεχόμενες ημέρες στο τέλος του
+                  προηγούμενου μήνα}, 'first_week': {tech_id: βάρδιες της
+                  ίδιας εβδομάδας στον προηγούμενο μήνα}}
+        seed: Για αναπαραγώγιμα αποτελέσματα
+
+    Returns:
+        dict: {'assignments': [(date_str, tech_id, group_id)], 'uncovered',
+               'loads': {tech_id: βάρδιες}, 'elapsed'}
+    """
+    constraints = constraints or ShiftConstraints()
+    rng = random.Random(seed if seed is not None else year * 100 + month)
+    started = time.perf_counter()
+
+    n_days = calendar.monthrange(year, month)[1]
+    days = [date(year, month, 1) + timedelta(days=k) for k in range(n_days)]
+    groups = {g: constraints.coverage.get(g, constraints.default_coverage) for g in group_ids}
+
+    state = _RosterState(days, technicians, groups, constraints, history or {})
+    state.greedy(rng)
+    greedy_cost = state.cost()
+    state.local_search(rng)
+
+    assignments = [
+        (days[k].strftime('%Y-%m-%d'), state.tech_ids[i], state.assigned[i][k])
+        for k in range(n_days)
+        for i in range(state.n_techs)
+        if state.assigned[i][k] is not None
+    ]
+    elapsed = time.perf_counter() - started
+
+    logger.debug(f"Roster {year}-{month:02d}: cost {greedy_cost} → {state.cost()} in {elapsed * 1000:.1f}ms")
+    return {
+        'assignments': assignments,
+        'uncovered': state.uncovered(),
+        'loads': dict(zip(state.tech_ids, state.load)),
+        'elapsed': elapsed,
+    }
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# PERSISTENCE
+# ═══════════════════════════════════════════════════════════════════════════
+
+def _load_history(cursor, year: int, month: int) -> Dict[str, Dict[int, int]]:
+    """Βάρδιες της τελευταίας εβδομάδας πριν τον μήνα (για streak & εβδομαδιαίο όριο)"""
+    first_day = date(year, month, 1)
+    since = first_day - timedelta(days=7)
+    cursor.execute("""
+        SELECT technician_id, shift_date
+        FROM shift_assignments
+        WHERE shift_date >= ? AND shift_date < ?
+    """, (since.strftime('%Y-%m-%d'), first_day.strftime('%Y-%m-%d')))
+
+    worked: Dict[int, Set[date]] = {}
+    for row in cursor.fetchall():
+        worked.setdefault(row['technician_id'], set()).add(
+            datetime.strptime(row['shift_date'], '%Y-%m-%d').date()
+        )
+
+    week_start = first_day - timedelta(days=first_day.weekday())
+    streak, first_week = {}, {}
+    for tech_id, dates in worked.items():
+        d, n = first_day - timedelta(days=1), 0
+        while d in dates:
+            n += 1
+            d -= timedelta(days=1)
+        streak[tech_id] = n
+        first_week[tech_id] = sum(1 for d in dates if d >= week_start)
+    return {'streak': streak, 'first_week': first_week}
+
+
+def generate_roster(year: int, month: int, constraints: Optional[ShiftConstraints] = None,
+                    seed: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Δημιουργία & αποθήκευση προγράμματος μήνα (αντικαθιστά το υπάρχον).
+
+    Returns:
+        dict: Αποτέλεσμα του solve_roster + 'roster_id'
+    """
+    conn = database.get_connection()
+    try:
+        init_shift_tables(conn)
+        cursor = conn.cursor()
+
+        cursor.execute("SELECT id, group_id FROM technicians WHERE is_active = 1 ORDER BY id")
+        technicians = [dict(row) for row in cursor.fetchall()]
+        if not technicians:
+            raise database.ValidationError("Δεν υπάρχουν ενεργοί τεχνικοί")
+
+        cursor.execute("SELECT id FROM groups ORDER BY id")
+        group_ids = [row['id'] for row in cursor.fetchall()]
+
+        history = _load_history(cursor, year, month)
+        result = solve_roster(year, month, technicians, group_ids, constraints, history, seed)
+
+        cursor.execute("BEGIN IMMEDIATE")
+        cursor.execute("SELECT id FROM shift_rosters WHERE year = ? AND month = ?", (year, month))
+        existing = cursor.fetchone()
+        if existing:
+            roster_id = existing['id']
+            cursor.execute("DELETE FROM shift_assignments WHERE roster_id = ?", (roster_id,))
+            cursor.execute("""
+                UPDATE shift_rosters SET uncovered = ?, generated_at = CURRENT_TIMESTAMP WHERE id = ?
+            """, (result['uncovered'], roster_id))
+        else:
+            cursor.execute("INSERT INTO shift_rosters (year, month, uncovered) VALUES (?, ?, ?)",
+                           (year, month, result['uncovered']))
+            roster_id = cursor.lastrowid
+
+        cursor.executemany("""
+            INSERT INTO shift_assignments (roster_id, shift_date, technician_id, group_id)
+            VALUES (?, ?, ?, ?)
+        """, [(roster_id,) + a for a in result['assignments']])
+
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+    result['roster_id'] = roster_id
+    logger.info(f"✅ Roster {year}-{month:02d}: {len(result['assignments'])} shifts, "
+                f"{result['uncovered']} uncovered, solved in {result['elapsed'] * 1000:.0f}ms")
+    return result
+
+
+def get_roster_month(year: int, month: int) -> Dict[str, Any]:
+    """
+    Ολόκληρο το πρόγραμμα ενός μήνα με ΕΝΑ query.
+
+    Returns:
+        dict: {'year', 'month', 'exists', 'uncovered',
+               'days': {'YYYY-MM-DD': [{'technician_id', 'technician_name',
+                                        'group_id', 'group_name'}, ...]}}
+    """
+    conn = database.get_connection()
+    try:
+        init_shift_tables(conn)
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT r.uncovered,
+                   a.shift_date,
+                   a.technician_id,
+                   t.name AS technician_name,
+                   a.group_id,
+                   g.name AS group_name
+            FROM shift_rosters r
+                     LEFT JOIN shift_assignments a ON a.roster_id = r.id
+                     LEFT JOIN technicians t ON a.technician_id = t.id
+                     LEFT JOIN groups g ON a.group_id = g.id
+            WHERE r.year = ? AND r.month = ?
+            ORDER BY a.shift_date, g.name, t.name
+        """, (year, month))
+        rows = cursor.fetchall()
+    finally:
+        conn.close()
+
+    days: Dict[str, List[Dict[str, Any]]] = {}
+    for row in rows:
+        if row['shift_date'] is None:
+            continue
+        days.setdefault(row['shift_date'], []).append({
+            'technician_id': row['technician_id'],
+            'technician_name': row['technician_name'],
+            'group_id': row['group_id'],
+            'group_name': row['group_name'],
+        })
+
+    return {
+        'year': year,
+        'month': month,
+        'exists': bool(rows),
+        'uncovered': rows[0]['uncovered'] if rows else 0,
+        'days': days,
+    }
@@ -55,11 +55,13 @@ from components.task_card import TaskCard
 from components.date_picker import DatePickerDialog
 from components.task_form import TaskForm
 from components.locations_mgmt import LocationsManagement
+from components.location_tree import LocationTreeSelector
 from components.units_mgmt import UnitsManagement
 from components.tasks_mgmt import TaskManagement
 from components.history_view import TaskHistoryView
 from components.recycle_bin import RecycleBinView
 from components.relationships import TaskRelationshipsView
+from components.shift_calendar import ShiftCalendarGrid, ShiftRosterView
 
 # ═══════════════════════════════════════════════════════════════════════════
 # PUBLIC API
@@ -70,11 +72,14 @@ __all__ = [
     'DatePickerDialog',
     'TaskForm',
     'LocationsManagement',
+    'LocationTreeSelector',
     'UnitsManagement',
     'TaskManagement',
     'TaskHistoryView',
     'RecycleBinView',
     'TaskRelationshipsView',
+    'ShiftCalendarGrid',
+    'ShiftRosterView',
 ]
 
 # ═══════════════════════════════════════════════════════════════════════════
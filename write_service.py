@@ -0,0 +1,370 @@
+"""
+Write Service - Single Writer with Group Commit
+===============================================
+
+Ένας writer thread για όλες τις εγγραφές: τα αιτήματα μπαίνουν σε ουρά
+και όσα φτάνουν μέσα σε ένα μικρό παράθυρο χρόνου γίνονται commit ΜΑΖΙ
+(ένα fsync για όλο το batch αντί για ένα ανά γραμμή).
+
+Features:
+---------
+- submit(fn, ...) / execute(sql, params) → concurrent.futures.Future
+- Κάθε αίτημα τρέχει σε δικό του SAVEPOINT: ένα αποτυχημένο αίτημα
+  ακυρώνεται μόνο του, τα υπόλοιπα του batch γίνονται κανονικά commit
+- Τα futures ολοκληρώνονται ΜΟΝΟ μετά το επιτυχές COMMIT (durability)
+- busy_timeout στη σύνδεση + retry με exponential backoff για
+  "database is locked" (πολλά instances σε κοινόχρηστο δίσκο)
+- Στατιστικά: αιτήματα, commits, μέσο μέγεθος batch, retries
+- benchmark_throughput(): commit ανά γραμμή vs group commit
+
+Περιορισμοί των callables:
+--------------------------
+- Δέχονται τη σύνδεση του writer ως πρώτο όρισμα, ΔΕΝ κάνουν commit/rollback
+- Μπορεί να εκτελεστούν ξανά αν το batch ξαναδοκιμαστεί μετά από lock -
+  πρέπει να αλλάζουν μόνο τη database
+
+Χρήση στην εφαρμογή:
+--------------------
+- api_server: όλα τα handlers εγγραφής (POST/PUT/DELETE εργασιών, restore,
+  PUT μονάδων) μέσω των add_task / update_task / delete_task /
+  restore_task / update_unit με conn= (στο transaction του writer)
+- Οι μαζικές ενέργειες του UI (restore_tasks, permanent_delete_tasks,
+  empty_recycle_bin, bulk_importer) είναι ήδη ΕΝΑ transaction και δεν
+  κερδίζουν από group commit
+- Για τη database της εφαρμογής (DB_NAME) η σύνδεση του writer έρχεται από
+  το get_connection - με ενεργό memory_replica οι εγγραφές αντιγράφονται
+  και στη μνήμη
+
+Usage:
+------
+    import write_service
+
+    service = write_service.get_write_service()
+    future = service.execute("UPDATE tasks SET status = ? WHERE id = ?", ("completed", 12))
+    future.result()
+
+    futures = [service.submit(lambda conn, i=i: conn.execute(...)) for i in ids]
+"""
+
+import atexit
+import os
+import queue
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+import database_refactored as database
+import logger_config
+
+logger = logger_config.get_logger(__name__)
+
+DEFAULT_WINDOW = 0.005         # δευτερόλεπτα συλλογής αιτημάτων ανά batch
+DEFAULT_MAX_BATCH = 500
+DEFAULT_RETRIES = 5
+DEFAULT_RETRY_DELAY = 0.05     # αρχική αναμονή, διπλασιάζεται σε κάθε retry
+
+_STOP = object()
+
+
+def is_busy_error(error: Exception) -> bool:
+    """SQLITE_BUSY / SQLITE_LOCKED από άλλη σύνδεση ή διεργασία"""
+    message = str(error).lower()
+    return isinstance(error, sqlite3.OperationalError) and ("locked" in message or "busy" in message)
+
+
+@dataclass
+class WriteStats:
+    """Μετρητές του writer thread"""
+    requests: int = 0
+    failed: int = 0
+    commits: int = 0
+    retries: int = 0
+
+    @property
+    def avg_batch(self) -> float:
+        return self.requests / self.commits if self.commits else 0.0
+
+
+class _Request:
+    __slots__ = ("fn", "args", "kwargs", "future")
+
+    def __init__(self, fn, args, kwargs):
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.future = Future()
+
+
+class WriteService:
+    """Ουρά εγγραφών με έναν writer thread και group commit"""
+
+    def __init__(self, db_path: Optional[str] = None, window: float = DEFAULT_WINDOW,
+                 max_batch: int = DEFAULT_MAX_BATCH, retries: int = DEFAULT_RETRIES,
+                 retry_delay: float = DEFAULT_RETRY_DELAY):
+        self.db_path = db_path or database.DB_NAME
+        self.window = window
+        self.max_batch = max_batch
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.stats = WriteStats()
+
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    # ─────────────────────────────────────────────────────────────────────
+    # Public API
+    # ─────────────────────────────────────────────────────────────────────
+
+    def start(self) -> "WriteService":
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+                self._thread.start()
+        return self
+
+    def stop(self, timeout: Optional[float] = 10.0) -> None:
+        """Ολοκλήρωση των αιτημάτων που είναι ήδη στην ουρά και τερματισμός"""
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+        if thread is not None and thread.is_alive():
+            self._queue.put(_STOP)
+            thread.join(timeout)
+
+    def submit(self, fn: Callable[..., Any], *args, **kwargs) -> Future:
+        """
+        Εκτέλεση fn(conn, *args, **kwargs) στον writer thread.
+        Το Future παίρνει την τιμή επιστροφής της fn μετά το COMMIT.
+        """
+        request = _Request(fn, args, kwargs)
+        self.start()
+        self._queue.put(request)
+        return request.future
+
+    def execute(self, sql: str, params=()) -> Future:
+        """Ένα statement - το Future επιστρέφει (rowcount, lastrowid)"""
+        return self.submit(_execute, sql, params)
+
+    def executemany(self, sql: str, seq_of_params) -> Future:
+        """executemany σε ένα αίτημα - το Future επιστρέφει το rowcount"""
+        return self.submit(_executemany, sql, list(seq_of_params))
+
+    # ─────────────────────────────────────────────────────────────────────
+    # Writer thread
+    # ─────────────────────────────────────────────────────────────────────
+
+    def _connect(self):
+        # isolation_level=None: BEGIN/COMMIT/SAVEPOINT τα ελέγχει ο writer
+        if self.db_path == database.DB_NAME:
+            conn = database.get_connection()
+            conn.isolation_level = None
+            return conn
+        conn = sqlite3.connect(self.db_path, timeout=database.BUSY_TIMEOUT_MS / 1000,
+                               isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute(f"PRAGMA busy_timeout = {database.BUSY_TIMEOUT_MS}")
+        return conn
+
+    def _run(self):
+        conn = self._connect()
+        try:
+            stopping = False
+            while not stopping:
+                first = self._queue.get()
+                if first is _STOP:
+                    break
+
+                batch = [first]
+                deadline = time.monotonic() + self.window
+                while len(batch) < self.max_batch:
+                    remaining = deadline - time.monotonic()
+                    try:
+                        item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is _STOP:
+                        stopping = True
+                        break
+                    batch.append(item)
+
+                batch = [r for r in batch if r.future.set_running_or_notify_cancel()]
+                if batch:
+                    self._commit_batch(conn, batch)
+        finally:
+            conn.close()
+
+    def _commit_batch(self, conn, batch):
+        """Ένα transaction για όλο το batch, με retry σε lock"""
+        delay = self.retry_delay
+        for attempt in range(self.retries + 1):
+            try:
+                outcomes = self._apply(conn, batch)
+                conn.execute("COMMIT")
+                break
+            except Exception as e:
+                # Οτιδήποτε εκτός από lock αποτυγχάνει το batch - ο writer συνεχίζει
+                try:
+                    if conn.in_transaction:
+                        conn.execute("ROLLBACK")
+                except sqlite3.Error as rollback_error:
+                    logger.error(f"❌ Rollback of failed batch failed: {rollback_error}")
+                if not is_busy_error(e) or attempt == self.retries:
+                    logger.error(f"❌ Group commit of {len(batch)} request(s) failed: {e}",
+                                 exc_info=not isinstance(e, sqlite3.Error))
+                    for request in batch:
+                        request.future.set_exception(e)
+                    self.stats.failed += len(batch)
+                    return
+                self.stats.retries += 1
+                logger.debug(f"Database busy, retry {attempt + 1}/{self.retries} in {delay:.2f}s")
+                time.sleep(delay)
+                delay *= 2
+
+        self.stats.commits += 1
+        self.stats.requests += len(batch)
+        for request, (ok, value) in zip(batch, outcomes):
+            if ok:
+                request.future.set_result(value)
+            else:
+                self.stats.failed += 1
+                request.future.set_exception(value)
+
+    @staticmethod
+    def _apply(conn, batch):
+        """Εκτέλεση των αιτημάτων, το καθένα σε δικό του SAVEPOINT"""
+        conn.execute("BEGIN IMMEDIATE")
+        outcomes = []
+        for request in batch:
+            conn.execute("SAVEPOINT request")
+            try:
+                value = request.fn(conn, *request.args, **request.kwargs)
+            except Exception as e:
+                conn.execute("ROLLBACK TO request")
+                conn.execute("RELEASE request")
+                # Lock κατά τη διάρκεια του αιτήματος → retry όλου του batch
+                if is_busy_error(e):
+                    raise
+                outcomes.append((False, e))
+            else:
+                conn.execute("RELEASE request")
+                outcomes.append((True, value))
+        return outcomes
+
+
+def _execute(conn, sql, params):
+    cursor = conn.execute(sql, params)
+    return cursor.rowcount, cursor.lastrowid
+
+
+def _executemany(conn, sql, seq_of_params):
+    return conn.executemany(sql, seq_of_params).rowcount
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# DEFAULT SERVICE
+# ═══════════════════════════════════════════════════════════════════════════
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_write_service() -> WriteService:
+    """Ο κοινός writer της εφαρμογής (ξεκινά με την πρώτη χρήση)"""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = WriteService().start()
+            atexit.register(_service.stop)
+        return _service
+
+
+def submit_write(fn: Callable[..., Any], *args, **kwargs) -> Future:
+    """Συντόμευση: get_write_service().submit(...)"""
+    return get_write_service().submit(fn, *args, **kwargs)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# BENCHMARK
+# ═══════════════════════════════════════════════════════════════════════════
+
+_BENCH_INSERT = """
+    INSERT INTO tasks (unit_id, task_type_id, description, status, priority, created_date)
+    VALUES (?, ?, ?, 'pending', 'medium', DATE('now'))
+"""
+
+
+def benchmark_throughput(n_writes: int = 2000, n_threads: int = 8) -> dict:
+    """
+    Εγγραφές/δευτερόλεπτο σε ΑΝΤΙΓΡΑΦΟ της database (με όλα τα triggers):
+    - per_row: σύνδεση + INSERT + commit ανά εγγραφή (όπως οι συναρτήσεις
+      του database_refactored)
+    - group_commit: n_threads producers που γράφουν μέσω του WriteService
+
+    Returns:
+        dict: {'per_row': rows/s, 'group_commit': rows/s, 'avg_batch', 'commits'}
+    """
+    workdir = tempfile.mkdtemp(prefix="hvacr_bench_")
+    path = os.path.join(workdir, "bench.db")
+    try:
+        source = database.get_connection()
+        target = sqlite3.connect(path)
+        source.backup(target)
+        source.close()
+
+        row = target.execute("""
+            SELECT (SELECT id FROM units ORDER BY id LIMIT 1),
+                   (SELECT id FROM task_types ORDER BY id LIMIT 1)
+        """).fetchone()
+        target.close()
+        if row[0] is None or row[1] is None:
+            raise database.ValidationError("Χρειάζεται τουλάχιστον μία μονάδα και ένας τύπος εργασίας")
+        params = (row[0], row[1], "benchmark")
+
+        # Commit ανά εγγραφή
+        started = time.perf_counter()
+        for _ in range(n_writes):
+            conn = sqlite3.connect(path, timeout=database.BUSY_TIMEOUT_MS / 1000)
+            conn.execute(_BENCH_INSERT, params)
+            conn.commit()
+            conn.close()
+        per_row = n_writes / (time.perf_counter() - started)
+
+        # Group commit από πολλούς producers
+        service = WriteService(db_path=path).start()
+        per_thread = n_writes // n_threads
+
+        def produce(out):
+            out.extend(service.execute(_BENCH_INSERT, params) for _ in range(per_thread))
+
+        futures = []
+        started = time.perf_counter()
+        threads = [threading.Thread(target=produce, args=(futures,)) for _ in range(n_threads)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        for future in futures:
+            future.result()
+        group = len(futures) / (time.perf_counter() - started)
+        service.stop()
+
+        result = {
+            'per_row': round(per_row),
+            'group_commit': round(group),
+            'avg_batch': round(service.stats.avg_batch, 1),
+            'commits': service.stats.commits,
+        }
+        logger.info(f"Write throughput: {result}")
+        return result
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    print(benchmark_throughput())